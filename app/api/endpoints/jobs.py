@@ -0,0 +1,101 @@
+from fastapi import APIRouter, HTTPException, Depends, Path, Query, Request
+import logging
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.core.jobs import FAILED, Job, JobQueue
+from app.schemas.job import JobListResponse, JobResponse
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# Dependency to get the background job queue created at application startup
+def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.jobs
+
+
+def timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+def job_response(job: Job) -> JobResponse:
+    """Build the API representation of a job"""
+    return JobResponse(
+        id=job.id,
+        kind=job.kind,
+        video_id=job.video_id,
+        status=job.status,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        result=job.result,
+        error=job.error,
+        created_at=timestamp(job.created_at),
+        run_at=timestamp(job.run_at),
+        started_at=timestamp(job.started_at),
+        finished_at=timestamp(job.finished_at)
+    )
+
+
+@router.get("", response_model=JobListResponse)
+async def list_jobs(
+    status: Optional[str] = Query(None, pattern="^(queued|running|succeeded|failed)$", description="Only jobs in this state"),
+    kind: Optional[str] = Query(None, description="Only jobs of this kind, e.g. transcode"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of jobs to return"),
+    jobs: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    List the most recent background jobs, e.g. ?status=failed to find jobs
+    that ran out of retries
+    
+    Args:
+        status: Job state filter
+        kind: Job kind filter
+        limit: Maximum number of jobs
+        
+    Returns:
+        Jobs, newest first
+    """
+    return JobListResponse(items=[job_response(job) for job in jobs.list(status=status, kind=kind, limit=limit)])
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str = Path(..., description="The ID of the job"),
+    jobs: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    Get the status of a background job, such as transcoding
+    
+    Args:
+        job_id: The ID of the job
+        
+    Returns:
+        Job status, and its result or error once finished
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job_response(job)
+
+
+@router.post("/{job_id}/retry", response_model=JobResponse)
+async def retry_job(
+    job_id: str = Path(..., description="The ID of the job"),
+    jobs: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    Queue a failed job again, with a fresh set of attempts
+    
+    Args:
+        job_id: The ID of the job
+        
+    Returns:
+        The queued job
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job.status != FAILED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    return job_response(jobs.retry(job_id))
@@ -0,0 +1,442 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Path, Query, Request, Response
+from starlette.requests import ClientDisconnect
+import math
+import re
+import uuid
+import logging
+from typing import Any, Optional
+
+from app.api.endpoints.jobs import get_job_queue
+from app.api.endpoints.videos import (
+    build_video_key, get_s3_client, get_video_repository, index_video, schedule_processing
+)
+from app.core.aws import AsyncS3Client
+from app.core.config import settings
+from app.core.hashing import ChecksumMismatch
+from app.core.jobs import JobQueue
+from app.core.metadata import VideoRepository
+from app.core.streaming import StreamingMultipartUpload
+from app.core.thumbnails import THUMBNAIL_JOB
+from app.core.transcoding import TRANSCODE_JOB
+from app.core.transfer import select_part_size
+from app.core.uploads import UploadSession, UploadSessionStore
+from app.schemas.upload import (
+    UploadCreate, UploadCreated, PartUrlsRequest, PartUrlsResponse, PartUrl, UploadComplete, UploadStatus
+)
+from app.schemas.video import VideoResponse
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Only keys produced by build_video_key may be signed or completed
+VIDEO_KEY_PATTERN = re.compile(r"^videos/[0-9a-f-]{36}\.[A-Za-z0-9]{1,10}$")
+
+
+# Dependency to get the resumable upload checkpoint store
+def get_upload_store(request: Request) -> UploadSessionStore:
+    return request.app.state.upload_sessions
+
+
+def validate_video_key(key: str) -> str:
+    if not VIDEO_KEY_PATTERN.match(key):
+        raise HTTPException(status_code=400, detail=f"Invalid video key {key}")
+    return key
+
+
+async def load_session(
+    upload_id: str,
+    store: UploadSessionStore,
+    s3_client: Optional[AsyncS3Client] = None
+) -> UploadSession:
+    """
+    Load an upload session, optionally reconciling its parts with S3
+    
+    Args:
+        upload_id: The S3 upload ID
+        store: Checkpoint store
+        s3_client: When given, S3's list of stored parts replaces the local one
+        
+    Returns:
+        The upload session
+    """
+    session = store.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+    if s3_client is not None and session.status == "in_progress":
+        parts = await s3_client.list_parts(session.key, upload_id)
+        if parts != session.parts:
+            store.replace_parts(upload_id, parts)
+            session.parts = parts
+    return session
+
+
+async def index_upload(
+    session: UploadSession,
+    s3_client: AsyncS3Client,
+    repository: VideoRepository,
+    jobs: JobQueue
+) -> None:
+    """
+    Index the video of a completed resumable upload and queue its processing
+    
+    Indexing replaces any earlier record, so it is safe to repeat. A failure
+    to queue processing is only logged: the video is stored and indexed.
+    
+    Args:
+        session: The completed upload
+        s3_client: S3 client
+        repository: Video metadata store
+        jobs: Background job queue
+    """
+    record = await index_video(
+        repository, s3_client, session.video_id, session.key, session.metadata,
+        content_type=session.content_type, size=session.total_size
+    )
+    try:
+        schedule_processing(jobs, record)
+    except Exception as e:
+        logger.error(f"Error scheduling processing of video {session.video_id}: {str(e)}")
+
+
+def session_status(session: UploadSession) -> UploadStatus:
+    offset = session.total_size if session.status == "completed" else session.offset
+    return UploadStatus(
+        upload_id=session.upload_id,
+        video_id=session.video_id,
+        key=session.key,
+        status=session.status,
+        offset=offset or 0,
+        size=session.total_size,
+        part_size=session.part_size,
+        parts_completed=len(session.parts)
+    )
+
+
+@router.post("", response_model=UploadCreated, status_code=201)
+async def create_upload(
+    upload: UploadCreate,
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    store: UploadSessionStore = Depends(get_upload_store)
+) -> Any:
+    """
+    Start a multipart upload that the client sends directly to S3 or
+    resumably through the API.
+    
+    Direct: the client requests presigned part URLs from /{upload_id}/parts,
+    PUTs each part to S3, then calls /{upload_id}/complete with the returned
+    ETags, so video bytes never pass through the API.
+    
+    Resumable: the client PATCHes the file to /{upload_id} from the offset
+    reported by HEAD /{upload_id}; parts already stored are never re-sent.
+    
+    Args:
+        upload: File name, content type, optional size and metadata
+        
+    Returns:
+        Upload ID, video ID, S3 key and the part size to use
+    """
+    if not upload.content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    
+    try:
+        video_id = str(uuid.uuid4())
+        s3_key = build_video_key(video_id, upload.filename)
+        metadata = {
+            "title": upload.title or upload.filename,
+            "description": upload.description or "",
+            "original_filename": upload.filename
+        }
+        
+        upload_id = await s3_client.create_multipart_upload(
+            s3_key, {k: v for k, v in metadata.items() if v}, content_type=upload.content_type
+        )
+        
+        part_size = select_part_size(upload.size)
+        store.create(UploadSession(
+            upload_id=upload_id,
+            video_id=video_id,
+            key=s3_key,
+            part_size=part_size,
+            total_size=upload.size,
+            metadata=metadata,
+            content_type=upload.content_type
+        ))
+        return UploadCreated(
+            upload_id=upload_id,
+            video_id=video_id,
+            key=s3_key,
+            part_size=part_size,
+            part_count=max(1, math.ceil(upload.size / part_size)) if upload.size is not None else None
+        )
+        
+    except Exception as e:
+        logger.error(f"Error starting upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error starting upload: {str(e)}")
+
+
+@router.post("/{upload_id}/parts", response_model=PartUrlsResponse)
+async def get_part_urls(
+    request: PartUrlsRequest,
+    upload_id: str = Path(..., description="The S3 upload ID"),
+    s3_client: AsyncS3Client = Depends(get_s3_client)
+) -> Any:
+    """
+    Presign UploadPart URLs for a batch of parts
+    
+    Args:
+        upload_id: The S3 upload ID
+        request: S3 key and up to 1000 part numbers
+        
+    Returns:
+        Presigned PUT URL for each requested part
+    """
+    s3_key = validate_video_key(request.key)
+    try:
+        urls = await s3_client.generate_presigned_part_urls(s3_key, upload_id, request.part_numbers)
+        return PartUrlsResponse(
+            upload_id=upload_id,
+            expires_in=settings.PRESIGNED_URL_EXPIRY_SECONDS,
+            parts=[PartUrl(part_number=number, url=url) for number, url in urls.items()]
+        )
+        
+    except Exception as e:
+        logger.error(f"Error signing upload parts: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error signing upload parts: {str(e)}")
+
+
+@router.post("/{upload_id}/complete", response_model=VideoResponse)
+async def complete_upload(
+    request: UploadComplete,
+    upload_id: str = Path(..., description="The S3 upload ID"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    store: UploadSessionStore = Depends(get_upload_store),
+    repository: VideoRepository = Depends(get_video_repository),
+    jobs: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    Complete a direct-to-S3 multipart upload
+    
+    Args:
+        upload_id: The S3 upload ID
+        request: S3 key and the part numbers/ETags returned by S3
+        
+    Returns:
+        JSON with video ID and URL
+    """
+    s3_key = validate_video_key(request.key)
+    try:
+        parts = [
+            {"PartNumber": part.part_number, "ETag": part.etag}
+            for part in sorted(request.parts, key=lambda part: part.part_number)
+        ]
+        url = await s3_client.complete_multipart_upload(s3_key, upload_id, parts)
+        session = store.get(upload_id)
+        if session is not None:
+            store.set_status(upload_id, "completed")
+        
+        # Title and description were stored as object metadata when the upload started
+        metadata = (await s3_client.head_video(s3_key)).metadata
+        video_id = s3_key.split("/", 1)[1].rsplit(".", 1)[0]
+        record = await index_video(
+            repository, s3_client, video_id, s3_key,
+            {
+                "title": metadata.get("title", video_id),
+                "description": metadata.get("description", ""),
+                "original_filename": metadata.get("original_filename")
+            },
+            content_type=session.content_type if session is not None else None
+        )
+        job_ids = schedule_processing(jobs, record)
+        return VideoResponse(
+            id=video_id,
+            filename=s3_key,
+            url=url,
+            title=record.title,
+            description=record.description,
+            transcode_job_id=job_ids.get(TRANSCODE_JOB),
+            thumbnail_job_id=job_ids.get(THUMBNAIL_JOB)
+        )
+        
+    except ChecksumMismatch as e:
+        logger.error(f"Upload {upload_id} failed verification: {str(e)}")
+        if store.get(upload_id) is not None:
+            store.set_status(upload_id, "failed")
+        raise HTTPException(status_code=502, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error completing upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error completing upload: {str(e)}")
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def abort_upload(
+    upload_id: str = Path(..., description="The S3 upload ID"),
+    key: str = Query(..., description="The S3 key returned when the upload was created"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    store: UploadSessionStore = Depends(get_upload_store)
+) -> Response:
+    """
+    Abort a direct-to-S3 multipart upload and discard uploaded parts
+    
+    Args:
+        upload_id: The S3 upload ID
+        key: The S3 key of the upload
+    """
+    s3_key = validate_video_key(key)
+    try:
+        await s3_client.abort_multipart_upload(s3_key, upload_id)
+        if store.get(upload_id) is not None:
+            store.set_status(upload_id, "aborted")
+        return Response(status_code=204)
+        
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error aborting upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error aborting upload: {str(e)}")
+
+
+@router.get("/{upload_id}", response_model=UploadStatus)
+async def get_upload_status(
+    upload_id: str = Path(..., description="The S3 upload ID"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    store: UploadSessionStore = Depends(get_upload_store)
+) -> Any:
+    """
+    Get the state of a resumable upload, including the offset to resume from
+    
+    Args:
+        upload_id: The S3 upload ID
+        
+    Returns:
+        Upload status and offset
+    """
+    try:
+        return session_status(await load_session(upload_id, store, s3_client))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.head("/{upload_id}")
+async def get_upload_offset(
+    upload_id: str = Path(..., description="The S3 upload ID"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    store: UploadSessionStore = Depends(get_upload_store)
+) -> Response:
+    """
+    Report the offset to resume a resumable upload from (tus-style)
+    
+    Args:
+        upload_id: The S3 upload ID
+        
+    Returns:
+        Empty response with Upload-Offset and Upload-Length headers
+    """
+    try:
+        status = session_status(await load_session(upload_id, store, s3_client))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    headers = {"Upload-Offset": str(status.offset), "Cache-Control": "no-store"}
+    if status.size is not None:
+        headers["Upload-Length"] = str(status.size)
+    return Response(status_code=200, headers=headers)
+
+
+@router.patch("/{upload_id}", status_code=204)
+async def upload_chunk(
+    request: Request,
+    upload_id: str = Path(..., description="The S3 upload ID"),
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    store: UploadSessionStore = Depends(get_upload_store),
+    repository: VideoRepository = Depends(get_video_repository),
+    jobs: JobQueue = Depends(get_job_queue)
+) -> Response:
+    """
+    Append bytes to a resumable upload, starting at Upload-Offset (tus-style).
+    
+    The body is streamed into S3 part by part and each part is checkpointed
+    as it lands. If the connection drops, the parts already stored are kept
+    and a trailing partial part is discarded; HEAD reports where to resume.
+    The upload is completed automatically once the declared size is reached;
+    if indexing the video then fails, repeating the request retries it.
+    
+    Args:
+        upload_id: The S3 upload ID
+        upload_offset: Byte offset of the first byte in the body
+        
+    Returns:
+        Empty response with the new Upload-Offset header
+    """
+    session = await load_session(upload_id, store)
+    if session.status == "completed" and repository.get(session.video_id) is None:
+        # An earlier request stored the video but failed to index it: a retry finishes the job
+        try:
+            await index_upload(session, s3_client, repository, jobs)
+        except Exception as e:
+            logger.error(f"Error indexing upload {upload_id}: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
+        return Response(status_code=204, headers={"Upload-Offset": str(session.total_size)})
+    if session.status != "in_progress":
+        raise HTTPException(status_code=409, detail=f"Upload {upload_id} is {session.status}")
+    if session.total_size is None:
+        raise HTTPException(status_code=400, detail="Resumable uploads must declare their size when created")
+    if upload_offset != session.offset:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload-Offset {upload_offset} does not match stored offset {session.offset}",
+            headers={"Upload-Offset": str(session.offset)}
+        )
+    
+    remaining = session.total_size - session.offset
+    upload = StreamingMultipartUpload(
+        s3_client,
+        session.key,
+        part_size=session.part_size,
+        upload_id=upload_id,
+        first_part_number=session.next_part_number,
+        on_part=lambda part_number, etag, size: store.record_part(upload_id, part_number, etag, size)
+    )
+    
+    received = 0
+    disconnected = False
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > remaining:
+                raise HTTPException(status_code=400, detail="Body exceeds the declared upload size")
+            await upload.write(chunk)
+    except ClientDisconnect:
+        # Keep whatever parts already landed so the client can resume
+        disconnected = True
+    except Exception:
+        try:
+            await upload.flush(final=False)
+        except Exception as e:
+            logger.error(f"Error checkpointing upload {upload_id}: {str(e)}")
+        raise
+    
+    try:
+        finished = not disconnected and received == remaining
+        await upload.flush(final=finished)
+        session = await load_session(upload_id, store)
+        if finished:
+            await s3_client.complete_multipart_upload(session.key, upload_id, session.completed_parts())
+            # The multipart upload is gone from here on; if indexing fails, a retry redoes it
+            store.set_status(upload_id, "completed")
+            await index_upload(session, s3_client, repository, jobs)
+            offset = session.total_size
+        else:
+            offset = session.offset
+        return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+        
+    except ChecksumMismatch as e:
+        # The assembled object was deleted, so the upload cannot be resumed
+        logger.error(f"Upload {upload_id} failed verification: {str(e)}")
+        store.set_status(upload_id, "failed")
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error uploading to {upload_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
@@ -1,39 +1,272 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Path, Query, BackgroundTasks
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Path, Query, Request
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import base64
+import binascii
+import json
 import uuid
 import logging
-from typing import Any
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.core.aws import S3Client
-from app.schemas.video import VideoResponse, VideoMetadata
+from app.api.endpoints.jobs import get_job_queue, job_response
+from app.core.aws import AsyncS3Client
+from app.core.config import settings
+from app.core.faststart import faststart
+from app.core.hashing import ChecksumMismatch, file_sha256
+from app.core.jobs import JobQueue
+from app.core.metadata import SORT_EXPRESSIONS, VideoRecord, VideoRepository, sort_key
+from app.core.probe import MediaInfo, probe_file
+from app.core.ranges import MultipartByteranges, RangeNotSatisfiable, if_range_matches, parse_range_header
+from app.core.streaming import FIELD, FILE_DATA, FILE_START, MultipartFormStream, StreamingMultipartUpload
+from app.core.thumbnails import THUMBNAIL_JOB, sprite_key, thumbnail_prefix
+from app.core.transcoding import TRANSCODE_JOB, renditions_prefix
+from app.core.transfer import ProgressTracker, select_part_size
+from app.schemas.job import JobListResponse
+from app.schemas.video import (
+    VideoResponse, VideoMetadata, VideoListResponse, UploadProgressResponse,
+    SignUrlsRequest, SignedUrl, SignedUrlsResponse, SignedCookiesResponse,
+    BatchRequest, BatchInfoItem, BatchInfoResponse, BatchDeleteItem, BatchDeleteResponse
+)
+from app.core.cache import ObjectInfo
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Dependency to get S3 client
-def get_s3_client() -> S3Client:
-    return S3Client()
+# Dependency to get the shared, non-blocking S3 client created at application startup
+def get_s3_client(request: Request) -> AsyncS3Client:
+    return request.app.state.clients.async_s3_client
+
+
+# Dependency to get the per-worker upload progress registry
+def get_progress_tracker(request: Request) -> ProgressTracker:
+    return request.app.state.upload_progress
+
+
+# Dependency to get the video metadata store
+def get_video_repository(request: Request) -> VideoRepository:
+    return request.app.state.video_repository
+
+
+def build_video_key(video_id: str, original_filename: str, default_extension: str = "mp4") -> str:
+    """
+    Build the S3 key for a video, keeping the extension of the uploaded file
+    
+    Args:
+        video_id: The ID of the video
+        original_filename: Name of the file as uploaded
+        default_extension: Extension for file names without one
+        
+    Returns:
+        S3 key of the form videos/{video_id}.{ext}
+    """
+    file_extension = original_filename.split(".")[-1] if "." in original_filename else default_extension
+    return f"videos/{video_id}.{file_extension}"
+
+
+def video_metadata(record: VideoRecord, s3_client: AsyncS3Client) -> VideoMetadata:
+    """Build the API representation of an indexed video"""
+    return VideoMetadata(
+        id=record.id,
+        url=s3_client.get_object_url(record.key),
+        title=record.title,
+        description=record.description,
+        filename=record.key,
+        original_filename=record.original_filename,
+        size=record.size,
+        content_type=record.content_type,
+        extension=record.extension,
+        etag=record.etag,
+        created_at=datetime.fromtimestamp(record.created_at, tz=timezone.utc),
+        container=record.container,
+        duration=record.duration,
+        width=record.width,
+        height=record.height,
+        video_codec=record.video_codec,
+        audio_codec=record.audio_codec,
+        bitrate=record.bitrate,
+        playlist_url=s3_client.get_object_url(record.playlist_key) if record.playlist_key else None,
+        poster_url=s3_client.get_object_url(record.poster_key) if record.poster_key else None,
+        thumbnail_track_url=(
+            s3_client.get_object_url(record.thumbnail_track_key) if record.thumbnail_track_key else None
+        )
+    )
+
+
+def object_metadata(video_id: str, s3_key: str, info: ObjectInfo, s3_client: AsyncS3Client) -> VideoMetadata:
+    """Build the API representation of an unindexed video from its S3 object"""
+    return VideoMetadata(
+        id=video_id,
+        url=s3_client.get_object_url(s3_key),
+        title=info.metadata.get("title", video_id),
+        description=info.metadata.get("description", ""),
+        filename=s3_key,
+        original_filename=info.metadata.get("original_filename"),
+        size=info.content_length,
+        content_type=info.content_type,
+        extension=s3_key.rsplit(".", 1)[-1],
+        etag=info.etag
+    )
+
+
+def encode_cursor(sort: str, order: str, position: Tuple[Any, str]) -> str:
+    """Opaque cursor pointing just after `position` in a listing"""
+    raw = json.dumps([sort, order, position[0], position[1]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, str]:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed or belongs to a different sort
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, cursor_order, value, video_id = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError("Cursor does not match the requested sort order")
+    return value, video_id
+
+
+async def index_video(
+    repository: VideoRepository,
+    s3_client: AsyncS3Client,
+    video_id: str,
+    s3_key: str,
+    metadata: Dict[str, str],
+    content_type: Optional[str] = None,
+    size: Optional[int] = None,
+    sha256: Optional[str] = None,
+    duplicate_of: Optional[VideoRecord] = None,
+    media: Optional[MediaInfo] = None
+) -> VideoRecord:
+    """
+    Record an uploaded video in the metadata store
+    
+    The new object is checked once to capture its ETag and stored size, which
+    also primes the lookup cache for the first GET.
+    
+    Args:
+        repository: Video metadata store
+        s3_client: S3 client
+        video_id: The ID of the video
+        s3_key: S3 key the video was stored under
+        metadata: Title, description and original filename
+        content_type: Content type declared by the client
+        size: Size declared by the client
+        sha256: Content hash, when computed for deduplication
+        duplicate_of: Video with identical content, whose renditions and
+            thumbnails are shared
+        media: Container and stream properties probed from the upload; its
+            MIME type takes precedence over the declared content type
+        
+    Returns:
+        The stored record
+    """
+    info = await s3_client.head_video(s3_key)
+    record = VideoRecord(
+        id=video_id,
+        key=s3_key,
+        title=metadata.get("title") or metadata.get("original_filename") or video_id,
+        description=metadata.get("description") or "",
+        original_filename=metadata.get("original_filename"),
+        size=info.content_length if info.content_length is not None else size,
+        content_type=(media.mime_type if media is not None else None) or content_type or info.content_type,
+        extension=s3_key.rsplit(".", 1)[-1],
+        etag=info.etag,
+        sha256=sha256,
+        playlist_key=duplicate_of.playlist_key if duplicate_of is not None else None,
+        poster_key=duplicate_of.poster_key if duplicate_of is not None else None,
+        thumbnail_track_key=duplicate_of.thumbnail_track_key if duplicate_of is not None else None
+    )
+    if media is not None:
+        record.container = media.container
+        record.duration = media.duration
+        record.width = media.width
+        record.height = media.height
+        record.video_codec = media.video_codec
+        record.audio_codec = media.audio_codec
+        record.bitrate = media.bitrate
+    repository.add(record)
+    return record
+
+
+def schedule_processing(jobs: JobQueue, record: VideoRecord) -> Dict[str, str]:
+    """
+    Queue the enabled post-upload jobs (transcoding, thumbnails) for a newly
+    stored video
+    
+    Args:
+        jobs: Background job queue
+        record: The indexed video
+        
+    Returns:
+        ID of each queued job, by job kind
+    """
+    enabled = {TRANSCODE_JOB: settings.TRANSCODE_ENABLED, THUMBNAIL_JOB: settings.THUMBNAILS_ENABLED}
+    return {
+        kind: jobs.enqueue(kind, record.id, {"key": record.key}).id
+        for kind, on in enabled.items() if on
+    }
+
+
+def schedule_processing_logged(jobs: JobQueue, record: VideoRecord) -> Dict[str, str]:
+    """
+    schedule_processing for an upload that has already succeeded: the video
+    is stored and indexed, so a job queue error is logged rather than raised
+    """
+    try:
+        return schedule_processing(jobs, record)
+    except Exception as e:
+        logger.error(f"Error scheduling processing of video {record.id}: {str(e)}")
+        return {}
+
+
+async def remove_unindexed_object(s3_client: AsyncS3Client, s3_key: str) -> None:
+    """Delete a newly stored object that could not be indexed, so it is not orphaned"""
+    try:
+        await s3_client.delete_video(s3_key)
+    except Exception as e:
+        logger.error(f"Error removing unindexed video {s3_key}: {str(e)}")
 
 
 @router.post("/upload", response_model=VideoResponse, status_code=201)
 async def upload_video(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    title: str = Query(None, description="Optional title for the video"),
-    description: str = Query(None, description="Optional description for the video"),
-    s3_client: S3Client = Depends(get_s3_client)
+    title: Optional[str] = Form(None, description="Optional title for the video"),
+    description: Optional[str] = Form(None, description="Optional description for the video"),
+    title_query: Optional[str] = Query(None, alias="title", description="Optional title for the video"),
+    description_query: Optional[str] = Query(None, alias="description", description="Optional description for the video"),
+    upload_id: Optional[str] = Query(None, description="Optional client-chosen ID for polling upload progress"),
+    faststart_layout: Optional[bool] = Query(
+        None, alias="faststart", description="Move the MP4 index in front of the media data; defaults to on"
+    ),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    progress_tracker: ProgressTracker = Depends(get_progress_tracker),
+    repository: VideoRepository = Depends(get_video_repository),
+    jobs: JobQueue = Depends(get_job_queue)
 ) -> Any:
     """
     Upload a video file to S3 and optionally serve via CloudFront CDN.
     
     Args:
         file: The video file to upload
-        title: Optional title for the video
-        description: Optional description for the video
+        title: Optional title for the video, as a form field or query parameter
+        description: Optional description for the video, as a form field or query parameter
+        upload_id: Optional ID to poll at /upload/{upload_id}/progress
+        faststart_layout: Rewrite MP4s with a trailing moov box for instant
+            playback, overriding MEDIA_FASTSTART_ENABLED
         
     Returns:
         JSON with video ID and URL
     """
+    title = title or title_query
+    description = description or description_query
     if not file.content_type or not file.content_type.startswith("video/"):
         raise HTTPException(status_code=400, detail="File must be a video")
         
@@ -41,12 +274,13 @@ async def upload_video(
         # Generate a unique ID for the video
         video_id = str(uuid.uuid4())
         
-        # Extract file extension
-        original_filename = file.filename or "video.mp4"
-        file_extension = original_filename.split(".")[-1] if "." in original_filename else "mp4"
+        # The file is spooled locally, so its headers can be read (skipping
+        # the media data) before anything is sent to S3
+        media = await run_in_threadpool(probe_file, file.file) if settings.MEDIA_PROBE_ENABLED else None
         
-        # Create the S3 key (filename)
-        s3_key = f"videos/{video_id}.{file_extension}"
+        # Create the S3 key (filename) from the ID and file extension
+        original_filename = file.filename or "video.mp4"
+        s3_key = build_video_key(video_id, original_filename, media.extension if media is not None else "mp4")
         
         # Prepare metadata
         metadata = {
@@ -55,69 +289,709 @@ async def upload_video(
             "original_filename": original_filename
         }
         
-        # Upload the file to S3
-        url = s3_client.upload_video(
-            file_obj=file.file, 
-            file_name=s3_key,
-            metadata={k: v for k, v in metadata.items() if v}
-        )
+        # Track progress under the client's ID, or the video ID if none was given
+        upload_id = upload_id or video_id
+        progress_callback = progress_tracker.start(upload_id, total_bytes=file.size)
+        succeeded = False
+        try:
+            # The file is already spooled locally, so hashing it first lets a
+            # duplicate skip the transfer entirely
+            sha256 = None
+            duplicate = None
+            if settings.UPLOAD_DEDUP_ENABLED:
+                sha256 = await run_in_threadpool(file_sha256, file.file)
+                duplicate = repository.find_by_hash(sha256)
+            
+            if duplicate is not None:
+                s3_key = duplicate.key
+                url = s3_client.get_object_url(s3_key)
+            else:
+                body, body_size = file.file, file.size
+                if faststart_layout is None:
+                    faststart_layout = settings.MEDIA_FASTSTART_ENABLED
+                if faststart_layout and media is not None and media.faststart is False:
+                    relocated = await run_in_threadpool(faststart, file.file)
+                    if relocated is not None:
+                        body, body_size = relocated, relocated.size
+                        media.faststart = True
+                
+                # Upload the file to S3
+                url = await s3_client.upload_video(
+                    file_obj=body, 
+                    file_name=s3_key,
+                    metadata={k: v for k, v in metadata.items() if v},
+                    file_size=body_size,
+                    progress_callback=progress_callback,
+                    content_type=media.mime_type if media is not None else file.content_type
+                )
+            succeeded = True
+        finally:
+            # Whatever fails after start(), the upload must not stay in flight
+            progress_tracker.finish(upload_id, succeeded=succeeded, callback=progress_callback)
+        
+        try:
+            record = await index_video(
+                repository, s3_client, video_id, s3_key, metadata,
+                content_type=file.content_type, size=file.size, sha256=sha256,
+                duplicate_of=duplicate, media=media
+            )
+        except Exception:
+            if duplicate is None:
+                await remove_unindexed_object(s3_client, s3_key)
+            raise
+        # Duplicates share the original's renditions, or pick them up when its jobs finish
+        job_ids = schedule_processing_logged(jobs, record) if duplicate is None else {}
         
         return VideoResponse(
             id=video_id,
             filename=s3_key,
             url=url,
             title=metadata["title"],
-            description=metadata["description"]
+            description=metadata["description"],
+            deduplicated=duplicate is not None,
+            transcode_job_id=job_ids.get(TRANSCODE_JOB),
+            thumbnail_job_id=job_ids.get(THUMBNAIL_JOB)
         )
             
+    except ChecksumMismatch as e:
+        # The bytes were corrupted between the API and S3, not by the client
+        logger.error(f"Upload failed verification: {str(e)}")
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         logger.error(f"Error uploading video: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
 
 
-@router.get("/{video_id}", response_class=RedirectResponse, status_code=307)
+@router.post("/upload/stream", response_model=VideoResponse, status_code=201)
+async def upload_video_stream(
+    request: Request,
+    title: str = Query(None, description="Optional title for the video"),
+    description: str = Query(None, description="Optional description for the video"),
+    filename: Optional[str] = Query(None, description="File name for raw (non-multipart) uploads"),
+    upload_id: Optional[str] = Query(None, description="Optional client-chosen ID for polling upload progress"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    progress_tracker: ProgressTracker = Depends(get_progress_tracker),
+    repository: VideoRepository = Depends(get_video_repository),
+    jobs: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    Upload a video, streaming the request body straight into S3.
+    
+    Unlike /upload, the body is never spooled to a temporary file: it is parsed
+    incrementally and forwarded to S3 part by part as it arrives, with bounded
+    memory per upload. Accepts either multipart/form-data with a single file
+    part (form fields must come before it) or a raw body with a video/*
+    Content-Type.
+    
+    Args:
+        title: Optional title for the video
+        description: Optional description for the video
+        filename: File name for raw uploads, used for the extension
+        upload_id: Optional ID to poll at /upload/{upload_id}/progress
+        
+    Returns:
+        JSON with video ID and URL
+    """
+    content_type = request.headers.get("content-type", "")
+    content_length = request.headers.get("content-length")
+    declared_size = int(content_length) if content_length and content_length.isdigit() else None
+    is_form = content_type.startswith("multipart/form-data")
+    if not is_form and not content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    
+    video_id = str(uuid.uuid4())
+    upload_id = upload_id or video_id
+    fields = {"title": title, "description": description}
+    result = {}
+    
+    def start_upload(original_filename: str, file_content_type: str) -> StreamingMultipartUpload:
+        result["s3_key"] = build_video_key(video_id, original_filename)
+        result["content_type"] = file_content_type
+        result["metadata"] = metadata = {
+            "title": fields.get("title") or original_filename,
+            "description": fields.get("description") or "",
+            "original_filename": original_filename
+        }
+        return StreamingMultipartUpload(
+            s3_client,
+            result["s3_key"],
+            part_size=select_part_size(declared_size),
+            metadata={k: v for k, v in metadata.items() if v},
+            progress_callback=progress_tracker.start(upload_id, total_bytes=declared_size),
+            content_hash=settings.UPLOAD_DEDUP_ENABLED,
+            content_type=file_content_type,
+            probe=settings.MEDIA_PROBE_ENABLED,
+            checksum_algorithm=settings.UPLOAD_CHECKSUM_ALGORITHM
+        )
+    
+    upload: Optional[StreamingMultipartUpload] = None
+    try:
+        if is_form:
+            form = MultipartFormStream(content_type)
+            async for chunk in request.stream():
+                for event in form.feed(chunk):
+                    if event[0] == FIELD:
+                        fields[event[1]] = fields.get(event[1]) or event[2]
+                    elif event[0] == FILE_START:
+                        if upload is not None:
+                            raise HTTPException(status_code=400, detail="Only one file may be uploaded")
+                        if not event[3].startswith("video/"):
+                            raise HTTPException(status_code=400, detail="File must be a video")
+                        upload = start_upload(event[2] or "video.mp4", event[3])
+                    elif event[0] == FILE_DATA:
+                        await upload.write(event[1])
+            if upload is None:
+                raise HTTPException(status_code=400, detail="No file in request")
+        else:
+            upload = start_upload(filename or "video.mp4", content_type)
+            async for chunk in request.stream():
+                await upload.write(chunk)
+        
+        sha256 = upload.sha256.hexdigest() if upload.sha256 is not None else None
+        duplicate = repository.find_by_hash(sha256) if sha256 else None
+        if duplicate is None:
+            url = await upload.complete()
+    
+    except Exception as e:
+        if upload is not None:
+            await upload.abort()
+            progress_tracker.finish(upload_id, succeeded=False, callback=upload.progress_callback)
+        if isinstance(e, HTTPException):
+            raise
+        if isinstance(e, ChecksumMismatch):
+            # The bytes were corrupted between the API and S3, not by the client
+            logger.error(f"Streamed upload failed verification: {str(e)}")
+            raise HTTPException(status_code=502, detail=str(e))
+        if isinstance(e, ValueError):
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.error(f"Error streaming video upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
+    
+    # The transfer is settled from here on: the upload is never aborted again
+    if duplicate is not None:
+        # Identical content is already stored: drop the parts sent so far
+        await upload.abort()
+        s3_key = duplicate.key
+        url = s3_client.get_object_url(s3_key)
+    else:
+        s3_key = result["s3_key"]
+    progress_tracker.finish(upload_id, callback=upload.progress_callback)
+    
+    metadata = result["metadata"]
+    try:
+        record = await index_video(
+            repository, s3_client, video_id, s3_key, metadata,
+            content_type=result["content_type"], size=upload.bytes_received, sha256=sha256,
+            duplicate_of=duplicate, media=upload.media
+        )
+    except Exception as e:
+        logger.error(f"Error indexing streamed video {video_id}: {str(e)}")
+        if duplicate is None:
+            await remove_unindexed_object(s3_client, s3_key)
+        raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
+    
+    job_ids = schedule_processing_logged(jobs, record) if duplicate is None else {}
+    
+    return VideoResponse(
+        id=video_id,
+        filename=s3_key,
+        url=url,
+        title=metadata["title"],
+        description=metadata["description"],
+        deduplicated=duplicate is not None,
+        transcode_job_id=job_ids.get(TRANSCODE_JOB),
+        thumbnail_job_id=job_ids.get(THUMBNAIL_JOB)
+    )
+
+
+@router.get("/upload/{upload_id}/progress", response_model=UploadProgressResponse)
+async def get_upload_progress(
+    upload_id: str = Path(..., description="The upload ID passed to /upload, or the returned video ID"),
+    progress_tracker: ProgressTracker = Depends(get_progress_tracker)
+) -> Any:
+    """
+    Get the progress of an upload to S3
+    
+    Args:
+        upload_id: The upload ID
+        
+    Returns:
+        Bytes transferred so far and upload status
+    """
+    progress = progress_tracker.get(upload_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail=f"Upload {upload_id} not found")
+    
+    return UploadProgressResponse(
+        upload_id=progress.upload_id,
+        status=progress.status,
+        bytes_transferred=progress.bytes_transferred,
+        total_bytes=progress.total_bytes,
+        percent=progress.percent,
+        bytes_per_second=progress.bytes_per_second
+    )
+
+
+@router.get("", response_model=VideoListResponse)
+async def list_videos(
+    sort: str = Query("created_at", description=f"Field to sort by: {', '.join(SORT_EXPRESSIONS)}"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort direction"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of videos to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    title: Optional[str] = Query(None, description="Only list videos whose title starts with this"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
+) -> Any:
+    """
+    List videos from the metadata store, one page at a time
+    
+    Pages are fetched by cursor (keyset pagination) rather than offset, so
+    every page costs the same however large the catalog is.
+    
+    Args:
+        sort: Field to sort by
+        order: asc or desc
+        limit: Page size
+        cursor: Where the previous page ended
+        title: Title prefix filter
+        
+    Returns:
+        The page of videos and the cursor for the next one, if any
+    """
+    if sort not in SORT_EXPRESSIONS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort videos by {sort}")
+    try:
+        after = decode_cursor(cursor, sort, order) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # Fetch one extra record to know whether another page exists
+        records = repository.list(
+            sort=sort,
+            descending=order == "desc",
+            limit=limit + 1,
+            after=after,
+            title_prefix=title
+        )
+    except Exception as e:
+        logger.error(f"Error listing videos: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error listing videos: {str(e)}")
+    
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(sort, order, sort_key(records[-1], sort))
+    
+    return VideoListResponse(
+        items=[video_metadata(record, s3_client) for record in records],
+        next_cursor=next_cursor
+    )
+
+
+@router.post("/sign", response_model=SignedUrlsResponse)
+async def sign_video_urls(
+    request: SignUrlsRequest,
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
+) -> Any:
+    """
+    Sign CloudFront URLs for a batch of videos (a playlist or a page of
+    results) in one call
+    
+    Args:
+        request: Video IDs and an optional lifetime in seconds
+        
+    Returns:
+        Signed URLs sharing one expiry, and the IDs that were not found
+    """
+    if s3_client.sync_client.signer is None:
+        raise HTTPException(status_code=501, detail="CloudFront signing is not configured")
+    
+    try:
+        records = repository.get_many(request.video_ids)
+        found = [video_id for video_id in dict.fromkeys(request.video_ids) if video_id in records]
+        # Uncached RSA signatures are CPU-bound; keep them off the event loop
+        urls, expires = await run_in_threadpool(
+            s3_client.sync_client.sign_object_urls,
+            [records[video_id].key for video_id in found],
+            request.expires_in
+        )
+    except Exception as e:
+        logger.error(f"Error signing video URLs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error signing video URLs: {str(e)}")
+    
+    return SignedUrlsResponse(
+        expires_at=expires,
+        urls=[SignedUrl(id=video_id, url=url) for video_id, url in zip(found, urls)],
+        missing=[video_id for video_id in request.video_ids if video_id not in records]
+    )
+
+
+def cookie_path_pattern(s3_key: str) -> str:
+    """Key pattern matching both videos/{stem}.{ext} and renditions/{stem}/..."""
+    stem = s3_key.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return f"*/{stem}*"
+
+
+@router.post("/{video_id}/cookies", response_model=SignedCookiesResponse)
+async def issue_signed_cookies(
+    response: Response,
+    video_id: str = Path(..., description="The ID of the video to grant access to"),
+    expires_in: Optional[int] = Query(None, ge=60, le=7 * 24 * 3600, description="Lifetime in seconds"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
+) -> Any:
+    """
+    Set CloudFront signed cookies granting access to a video and its HLS
+    renditions, so players can fetch segments without signing each URL
+    
+    Args:
+        video_id: The ID of the video
+        expires_in: Lifetime in seconds
+        
+    Returns:
+        The resource the cookies cover and their expiry
+    """
+    if s3_client.sync_client.signer is None:
+        raise HTTPException(status_code=501, detail="CloudFront signing is not configured")
+    
+    record = repository.get(video_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Video {video_id} not found")
+    
+    try:
+        cookies, resource, expires = await run_in_threadpool(
+            s3_client.sync_client.signed_cookies, cookie_path_pattern(record.key), expires_in
+        )
+    except Exception as e:
+        logger.error(f"Error signing cookies: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error signing cookies: {str(e)}")
+    
+    for name, value in cookies.items():
+        response.set_cookie(
+            name,
+            value,
+            expires=datetime.fromtimestamp(expires, tz=timezone.utc),
+            domain=settings.SIGNED_COOKIE_DOMAIN,
+            secure=True,
+            httponly=True,
+            samesite="none"
+        )
+    return SignedCookiesResponse(resource=resource, expires_at=expires)
+
+
+@router.post("/batch/info", response_model=BatchInfoResponse)
+async def batch_video_info(
+    request: BatchRequest,
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
+) -> Any:
+    """
+    Get metadata for many videos in one call
+    
+    Indexed videos are read from the metadata store in a single query. Videos
+    uploaded before the index existed are looked up in S3 concurrently, with
+    at most BATCH_MAX_CONCURRENCY lookups in flight.
+    
+    Args:
+        request: Video IDs
+        
+    Returns:
+        One result per requested ID, in order
+    """
+    try:
+        records = repository.get_many(request.video_ids)
+    except Exception as e:
+        logger.error(f"Error retrieving video info: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving video info: {str(e)}")
+    
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+    
+    async def lookup(video_id: str) -> BatchInfoItem:
+        record = records.get(video_id)
+        if record is not None:
+            return BatchInfoItem(id=video_id, status="ok", video=video_metadata(record, s3_client))
+        
+        s3_key = legacy_video_key(video_id)
+        try:
+            async with semaphore:
+                info = await s3_client.head_video(s3_key)
+        except Exception as e:
+            logger.error(f"Error retrieving video info for {video_id}: {str(e)}")
+            return BatchInfoItem(id=video_id, status="error", error=str(e))
+        if not info.exists:
+            return BatchInfoItem(id=video_id, status="not_found")
+        return BatchInfoItem(id=video_id, status="ok", video=object_metadata(video_id, s3_key, info, s3_client))
+    
+    results = await asyncio.gather(*(lookup(video_id) for video_id in request.video_ids))
+    return BatchInfoResponse(results=list(results))
+
+
+async def delete_videos(
+    video_ids: List[str],
+    s3_client: AsyncS3Client,
+    repository: VideoRepository
+) -> Dict[str, Optional[str]]:
+    """
+    Delete videos from S3 and the metadata store
+    
+    Args:
+        video_ids: IDs of the videos to delete
+        s3_client: S3 client
+        repository: Video metadata store
+        
+    Returns:
+        Error message per video ID, or None where the delete succeeded
+    """
+    records = repository.get_many(video_ids)
+    keys = {
+        video_id: records[video_id].key if video_id in records else legacy_video_key(video_id)
+        for video_id in video_ids
+    }
+    
+    # Deduplicated videos share an object; only delete it along with its last reference
+    references = repository.reference_counts(list(keys.values()))
+    for video_id in records:
+        references[keys[video_id]] -= 1
+    orphaned = [key for key in dict.fromkeys(keys.values()) if references[key] <= 0]
+    
+    errors = await s3_client.delete_videos(orphaned) if orphaned else {}
+    # Renditions and thumbnails go with the source; a failure here only leaves
+    # unreachable files
+    derived = {}
+    for record in records.values():
+        if record.playlist_key:
+            derived.setdefault(record.key, set()).add(renditions_prefix(record.key))
+        if record.poster_key:
+            derived.setdefault(record.key, set()).add(thumbnail_prefix(record.key))
+    for key in orphaned:
+        if key in errors:
+            continue
+        for prefix in sorted(derived.get(key, ())):
+            failed = await s3_client.delete_prefix(prefix)
+            if failed:
+                logger.warning(f"Could not delete {len(failed)} files under {prefix}")
+    repository.delete_many([video_id for video_id, key in keys.items() if key not in errors])
+    return {video_id: errors.get(key) for video_id, key in keys.items()}
+
+
+@router.post("/batch/delete", response_model=BatchDeleteResponse)
+async def batch_delete_videos(
+    request: BatchRequest,
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
+) -> Any:
+    """
+    Delete many videos in one call, using S3 DeleteObjects (1000 keys per request)
+    
+    DeleteObjects succeeds for keys that don't exist, so videos missing from
+    the index are first looked up in S3, as in batch/info, and reported as
+    not_found when there is nothing to delete.
+    
+    Args:
+        request: Video IDs
+        
+    Returns:
+        One result per requested ID, in order, plus totals
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+    missing = set()
+    errors: Dict[str, Optional[str]] = {}
+    
+    async def lookup(video_id: str) -> None:
+        try:
+            async with semaphore:
+                info = await s3_client.head_video(legacy_video_key(video_id))
+        except Exception as e:
+            logger.error(f"Error retrieving video info for {video_id}: {str(e)}")
+            errors[video_id] = str(e)
+            return
+        if not info.exists:
+            missing.add(video_id)
+    
+    try:
+        records = repository.get_many(request.video_ids)
+        await asyncio.gather(*(
+            lookup(video_id) for video_id in dict.fromkeys(request.video_ids) if video_id not in records
+        ))
+        found = [video_id for video_id in request.video_ids if video_id not in missing and video_id not in errors]
+        if found:
+            errors.update(await delete_videos(found, s3_client, repository))
+    except Exception as e:
+        logger.error(f"Error deleting videos: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error deleting videos: {str(e)}")
+    
+    results = [
+        BatchDeleteItem(id=video_id, status="not_found") if video_id in missing else
+        BatchDeleteItem(id=video_id, status="error" if errors[video_id] else "deleted", error=errors[video_id])
+        for video_id in request.video_ids
+    ]
+    failed = sum(1 for result in results if result.error)
+    deleted = sum(1 for result in results if result.status == "deleted")
+    return BatchDeleteResponse(results=results, deleted=deleted, failed=failed)
+
+
+def legacy_video_key(video_id: str) -> str:
+    """S3 key of a video uploaded before the metadata index existed"""
+    # First, check if the video ID already contains the extension
+    if not video_id.endswith(".mp4"):
+        # Construct the S3 key assuming MP4 format
+        return f"videos/{video_id}.mp4"
+    # Use the video_id as is if it already has an extension
+    return f"videos/{video_id}"
+
+
+async def proxy_video(request: Request, s3_client: AsyncS3Client, s3_key: str) -> Response:
+    """
+    Serve a video through the API, honouring Range and If-Range
+    
+    Bodies are streamed from S3 chunk by chunk and never held in memory whole.
+    Single ranges get a 206 with Content-Range; several ranges get a
+    multipart/byteranges body.
+    
+    Args:
+        request: The incoming request
+        s3_client: S3 client
+        s3_key: S3 key of the video
+        
+    Returns:
+        200, 206 or 416 response
+    """
+    info = await s3_client.head_video(s3_key)
+    if not info.exists:
+        raise ValueError(f"Video file {s3_key} does not exist in bucket")
+    
+    size = info.content_length or 0
+    content_type = info.content_type or "application/octet-stream"
+    headers = {"Accept-Ranges": "bytes"}
+    if info.etag:
+        headers["ETag"] = info.etag
+    if info.last_modified:
+        headers["Last-Modified"] = info.last_modified
+    
+    ranges = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range_matches(if_range, info.etag, info.last_modified)):
+        try:
+            ranges = parse_range_header(range_header, size, settings.PROXY_MAX_RANGES)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    # Pin every read to the ETag advertised above, so a replaced object can't
+    # be spliced into a response
+    def read_range(start: int, end: int):
+        return s3_client.iter_object(s3_key, (start, end), if_match=info.etag)
+    
+    if not ranges:
+        status_code = 200
+        headers["Content-Length"] = str(size)
+        body = s3_client.iter_object(s3_key, if_match=info.etag) if size else None
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        body = read_range(start, end)
+    else:
+        layout = MultipartByteranges(ranges, size, content_type)
+        status_code = 206
+        content_type = layout.media_type
+        headers["Content-Length"] = str(layout.content_length)
+        body = layout.stream(read_range)
+    
+    if request.method == "HEAD" or body is None:
+        return Response(status_code=status_code, headers=headers, media_type=content_type)
+    return StreamingResponse(body, status_code=status_code, headers=headers, media_type=content_type)
+
+
+@router.api_route("/{video_id}", methods=["GET", "HEAD"], response_class=RedirectResponse, status_code=307)
 async def get_video(
+    request: Request,
     video_id: str = Path(..., description="The ID of the video to retrieve"),
-    s3_client: S3Client = Depends(get_s3_client)
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
 ) -> Any:
     """
-    Get a video by ID and redirect to its URL
+    Get a video by ID, either redirecting to its URL or, in proxy mode,
+    streaming it with support for Range requests
     
     Args:
         video_id: The ID of the video
         
     Returns:
-        Redirect to the video URL (S3 or CloudFront)
+        Redirect to the HLS master playlist or video URL (S3 or CloudFront),
+        or the video itself
     """
     try:
-        # First, check if the video ID already contains the extension
-        if not video_id.endswith(".mp4"):
-            # Construct the S3 key assuming MP4 format
-            s3_key = f"videos/{video_id}.mp4"
-        else:
-            # Use the video_id as is if it already has an extension
-            s3_key = f"videos/{video_id}"
+        record = repository.get(video_id)
         
-        # Get the video URL
-        url = s3_client.get_video_url(s3_key)
+        if settings.VIDEO_DELIVERY_MODE == "proxy":
+            s3_key = record.key if record is not None else legacy_video_key(video_id)
+            return await proxy_video(request, s3_client, s3_key)
+        
+        # Indexed videos have a known key and exist, so no S3 check is needed.
+        # Transcoded ones go to the adaptive stream instead of the original
+        if record is not None:
+            return s3_client.get_object_url(record.playlist_key or record.key)
+        
+        # Fall back to guessing the key for videos uploaded before the index existed
+        url = await s3_client.get_video_url(legacy_video_key(video_id))
         
         # Redirect to the URL
         return url
         
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning(f"Timed out looking up video {video_id}")
+        raise HTTPException(status_code=504, detail="Timed out looking up video")
     except Exception as e:
         logger.error(f"Error retrieving video: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving video: {str(e)}")
 
 
+@router.delete("/{video_id}", status_code=204)
+async def delete_video(
+    video_id: str = Path(..., description="The ID of the video to delete"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
+) -> Response:
+    """
+    Delete a video
+    
+    Args:
+        video_id: The ID of the video
+        
+    Returns:
+        Empty response
+    """
+    try:
+        if repository.get(video_id) is None and not (await s3_client.head_video(legacy_video_key(video_id))).exists:
+            raise HTTPException(status_code=404, detail=f"Video {video_id} not found")
+        error = (await delete_videos([video_id], s3_client, repository))[video_id]
+        if error:
+            raise RuntimeError(error)
+        return Response(status_code=204)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting video: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error deleting video: {str(e)}")
+
+
 @router.get("/{video_id}/info", response_model=VideoMetadata)
 async def get_video_info(
     video_id: str = Path(..., description="The ID of the video to get info for"),
-    s3_client: S3Client = Depends(get_s3_client)
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
 ) -> Any:
     """
-    Get video metadata by ID
+    Get video metadata by ID from the metadata store, without calling S3
+    
+    Videos uploaded before the index existed are looked up in S3 instead.
     
     Args:
         video_id: The ID of the video
@@ -126,23 +1000,90 @@ async def get_video_info(
         Video metadata
     """
     try:
-        # Construct the S3 key assuming MP4 format
-        s3_key = f"videos/{video_id}.mp4"
+        record = repository.get(video_id)
+        if record is not None:
+            return video_metadata(record, s3_client)
         
-        # Get the video URL
-        url = s3_client.get_video_url(s3_key)
+        s3_key = legacy_video_key(video_id)
+        info = await s3_client.head_video(s3_key)
+    except Exception as e:
+        logger.error(f"Error retrieving video info: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving video info: {str(e)}")
+    
+    if not info.exists:
+        raise HTTPException(status_code=404, detail=f"Video {video_id} not found")
+    
+    return object_metadata(video_id, s3_key, info, s3_client)
+
+
+@router.get("/{video_id}/jobs", response_model=JobListResponse)
+async def list_video_jobs(
+    video_id: str = Path(..., description="The ID of the video"),
+    jobs: JobQueue = Depends(get_job_queue)
+) -> Any:
+    """
+    List the background jobs (e.g. transcoding) run for a video
+    
+    Args:
+        video_id: The ID of the video
         
-        # In a real app, you'd fetch metadata from a database
-        # For this example, we'll just return basic info
-        return VideoMetadata(
-            id=video_id,
-            url=url,
-            title=f"Video {video_id}",
-            description="Video description would be fetched from database"
-        )
+    Returns:
+        Jobs, oldest first
+    """
+    return JobListResponse(items=[job_response(job) for job in jobs.list_for_video(video_id)])
+
+
+@router.api_route("/{video_id}/thumbnail", methods=["GET", "HEAD"], response_class=RedirectResponse, status_code=307)
+async def get_thumbnail(
+    request: Request,
+    video_id: str = Path(..., description="The ID of the video"),
+    variant: str = Query("poster", pattern="^(poster|track|sprite)$",
+                         description="poster image, WebVTT seek-preview track, or a sprite sheet"),
+    sheet: int = Query(0, ge=0, description="Sprite sheet number, for variant=sprite"),
+    s3_client: AsyncS3Client = Depends(get_s3_client),
+    repository: VideoRepository = Depends(get_video_repository)
+) -> Any:
+    """
+    Get the poster, thumbnail track or a sprite sheet of a video, with long
+    cache headers so listing pages and players fetch each image once
+    
+    Args:
+        video_id: The ID of the video
+        variant: Which thumbnail file to return
+        sheet: Sprite sheet number
+        
+    Returns:
+        Redirect to the file, or the file itself in proxy mode
+    """
+    record = repository.get(video_id)
+    if record is None or not record.poster_key:
+        raise HTTPException(status_code=404, detail=f"Thumbnails for video {video_id} are not available")
+    
+    if variant == "poster":
+        s3_key = record.poster_key
+    elif variant == "track":
+        s3_key = record.thumbnail_track_key
+    else:
+        s3_key = sprite_key(record.key, sheet)
+    max_age = settings.THUMBNAIL_CACHE_MAX_AGE_SECONDS
+    
+    try:
+        if settings.VIDEO_DELIVERY_MODE == "proxy":
+            response = await proxy_video(request, s3_client, s3_key)
+            response.headers["Cache-Control"] = f"public, max-age={max_age}"
+            return response
         
+        # A cached redirect must not outlive the signature in its URL
+        if s3_client.sync_client.signer is not None:
+            max_age = min(max_age, settings.SIGNED_URL_EXPIRY_SECONDS)
+        return RedirectResponse(
+            s3_client.get_object_url(s3_key),
+            status_code=307,
+            headers={"Cache-Control": f"public, max-age={max_age}"}
+        )
+    
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        logger.error(f"Error retrieving video info: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error retrieving video info: {str(e)}")
+        logger.error(f"Error retrieving thumbnail: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving thumbnail: {str(e)}")
@@ -1,7 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import videos
+from app.api.endpoints import jobs, uploads, videos
 
 # Combine all API routers
 router = APIRouter()
+# Registered first so /videos/uploads/... is never captured by /videos/{video_id} routes
+router.include_router(uploads.router, prefix="/videos/uploads", tags=["uploads"])
 router.include_router(videos.router, prefix="/videos", tags=["videos"])
+router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
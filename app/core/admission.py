@@ -0,0 +1,340 @@
+import asyncio
+import ipaddress
+import logging
+import math
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.metrics import REGISTRY, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+UPLOAD_ADMISSIONS = REGISTRY.register(Counter(
+    "upload_admissions_total", "Upload requests by admission outcome",
+    ("result",),
+))
+ADMITTED = UPLOAD_ADMISSIONS.labels("admitted")
+QUEUED = UPLOAD_ADMISSIONS.labels("queued")
+REJECTED_CLIENT = UPLOAD_ADMISSIONS.labels("rejected_client_limit")
+REJECTED_QUEUE_FULL = UPLOAD_ADMISSIONS.labels("rejected_queue_full")
+REJECTED_TIMEOUT = UPLOAD_ADMISSIONS.labels("rejected_timeout")
+UPLOAD_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "upload_queue_depth", "Upload requests waiting for an upload slot",
+))
+
+# Bounds of the Retry-After suggested to rejected clients
+MIN_RETRY_AFTER_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 60
+
+# Key for requests whose peer address is not known
+UNKNOWN_CLIENT = "unknown"
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+# Requests that stream video bytes through the API, relative to API_V1_STR
+UPLOAD_ROUTES = (
+    ("POST", re.compile(r"^/videos/upload(/stream)?/?$")),
+    ("PATCH", re.compile(r"^/videos/uploads/[^/]+/?$")),
+)
+
+
+def is_upload_request(method: str, path: str, prefix: str = settings.API_V1_STR) -> bool:
+    if not path.startswith(prefix):
+        return False
+    path = path[len(prefix):]
+    return any(method == route_method and pattern.match(path) for route_method, pattern in UPLOAD_ROUTES)
+
+
+def parse_trusted_proxies(value: str) -> List[Network]:
+    """
+    Parse a comma-separated list of proxy addresses and CIDR ranges
+
+    Args:
+        value: For example "10.0.0.0/8, 192.168.1.1"
+
+    Returns:
+        Networks whose requests may name the client in X-Forwarded-For
+    """
+    return [ipaddress.ip_network(entry.strip(), strict=False) for entry in value.split(",") if entry.strip()]
+
+
+def is_trusted(address: str, trusted_proxies: List[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_address(scope: Dict[str, Any], trusted_proxies: List[Network]) -> str:
+    """
+    Address of the client that sent a request
+
+    Behind a load balancer or CloudFront every connection comes from a proxy.
+    While the address so far is a trusted proxy, the next address to the left
+    in X-Forwarded-For (the one that proxy saw) is taken instead, so entries a
+    client forged at the start of the header are never reached.
+
+    Args:
+        scope: ASGI connection scope
+        trusted_proxies: Networks whose X-Forwarded-For entries are believed
+
+    Returns:
+        The client's address, or UNKNOWN_CLIENT when there is no peer address
+    """
+    if not scope.get("client"):
+        return UNKNOWN_CLIENT
+    address = scope["client"][0]
+    if not trusted_proxies:
+        return address
+    forwarded = [
+        entry.strip()
+        for name, value in scope.get("headers", [])
+        if name == b"x-forwarded-for"
+        for entry in value.decode("latin-1").split(",")
+        if entry.strip()
+    ]
+    while forwarded and is_trusted(address, trusted_proxies):
+        address = forwarded.pop()
+    return address
+
+
+class AdmissionRejected(Exception):
+    """An upload turned away before its body is read"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Byte-rate limiter shared by every upload in a worker.
+
+    Callers take what they need straight away and, when that leaves the
+    bucket in debt, sleep until the refill covers it. Later callers see the
+    debt too, so together they never exceed the rate by more than one
+    bucket's worth.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: int) -> float:
+        """
+        Take amount tokens
+
+        Returns:
+            Seconds to wait before using them
+        """
+        self._refill()
+        self._tokens -= amount
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    async def consume(self, amount: int) -> None:
+        """Wait until amount bytes may pass"""
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AdmissionController:
+    """
+    Concurrency limits for uploads, per client and for the whole worker.
+
+    A client over its own limit is rejected at once (429). Otherwise an
+    upload takes a free slot or waits for one in FIFO order; when the queue
+    is full, or the wait exceeds queue_timeout, it is rejected (503). Both
+    suggest a Retry-After derived from how long recent uploads took and how
+    many are waiting, so clients back off more as the backlog grows.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = settings.UPLOAD_MAX_CONCURRENT,
+        max_per_client: int = settings.UPLOAD_MAX_CONCURRENT_PER_CLIENT,
+        max_queued: int = settings.UPLOAD_MAX_QUEUED,
+        queue_timeout: float = settings.UPLOAD_QUEUE_TIMEOUT_SECONDS
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_client = max_per_client
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        # Uploads per client, queued ones included
+        self._clients: Dict[str, int] = {}
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of upload durations, for Retry-After
+        self._average_duration = 1.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to be free for a new upload"""
+        slots = self.max_concurrent or 1
+        estimate = math.ceil(self._average_duration * (self.queued + 1) / slots)
+        return max(MIN_RETRY_AFTER_SECONDS, min(MAX_RETRY_AFTER_SECONDS, estimate))
+
+    async def acquire(self, client: str) -> None:
+        """
+        Take an upload slot for client, waiting in the queue if needed
+
+        Raises:
+            AdmissionRejected: If the upload is turned away
+        """
+        if self.max_per_client and self._clients.get(client, 0) >= self.max_per_client:
+            REJECTED_CLIENT.inc()
+            raise AdmissionRejected(429, "Too many concurrent uploads from this client", self.retry_after())
+        self._clients[client] = self._clients.get(client, 0) + 1
+        try:
+            if not self.max_concurrent or (self.active < self.max_concurrent and not self._waiters):
+                self.active += 1
+            else:
+                await self._wait_for_slot()
+        except BaseException:
+            self._forget(client)
+            raise
+        ADMITTED.inc()
+
+    async def _wait_for_slot(self) -> None:
+        if self.max_queued and len(self._waiters) >= self.max_queued:
+            REJECTED_QUEUE_FULL.inc()
+            raise AdmissionRejected(503, "Too many uploads in progress", self.retry_after())
+        QUEUED.inc()
+        # Released slots are handed to the first waiter (see release)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        UPLOAD_QUEUE_DEPTH.set(len(self._waiters))
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout or None)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            REJECTED_TIMEOUT.inc()
+            raise AdmissionRejected(503, "Timed out waiting for an upload slot", self.retry_after())
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # The slot arrived as the wait ended: pass it on
+            self._release_slot()
+        else:
+            waiter.cancel()
+            self._waiters.remove(waiter)
+        UPLOAD_QUEUE_DEPTH.set(len(self._waiters))
+
+    def release(self, client: str, duration: float) -> None:
+        """
+        Give back the slot of a finished upload
+
+        Args:
+            client: Client the slot was acquired for
+            duration: How long the upload held the slot, in seconds
+        """
+        self._average_duration += 0.2 * (duration - self._average_duration)
+        self._forget(client)
+        self._release_slot()
+
+    def _forget(self, client: str) -> None:
+        remaining = self._clients.get(client, 0) - 1
+        if remaining > 0:
+            self._clients[client] = remaining
+        else:
+            self._clients.pop(client, None)
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                UPLOAD_QUEUE_DEPTH.set(len(self._waiters))
+                return
+        UPLOAD_QUEUE_DEPTH.set(0)
+        self.active -= 1
+
+
+def build_bandwidth_limiter() -> Optional[TokenBucket]:
+    """
+    Create the upload bandwidth limiter configured in settings
+
+    Returns:
+        TokenBucket, or None when bandwidth is unlimited
+    """
+    if settings.UPLOAD_BANDWIDTH_MB_PER_SEC <= 0:
+        return None
+    return TokenBucket(settings.UPLOAD_BANDWIDTH_MB_PER_SEC * MB)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying admission control and the bandwidth limit to
+    requests that upload video bytes. It runs before the body is read, so a
+    rejected upload costs no memory or temporary disk. All other requests
+    pass straight through and never wait behind uploads.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        controller: Optional[AdmissionController] = None,
+        bandwidth: Optional[TokenBucket] = None,
+        trusted_proxies: Optional[List[Network]] = None
+    ):
+        self.app = app
+        self.controller = controller if controller is not None else AdmissionController()
+        self.bandwidth = bandwidth if bandwidth is not None else build_bandwidth_limiter()
+        self.trusted_proxies = (
+            trusted_proxies if trusted_proxies is not None else parse_trusted_proxies(settings.UPLOAD_TRUSTED_PROXIES)
+        )
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not is_upload_request(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        client = client_address(scope, self.trusted_proxies)
+        try:
+            await self.controller.acquire(client)
+        except AdmissionRejected as e:
+            logger.warning(f"Rejected upload from {client}: {e.detail}")
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code, headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, self._throttle(receive) if self.bandwidth is not None else receive, send)
+        finally:
+            self.controller.release(client, time.monotonic() - start)
+
+    def _throttle(self, receive: Callable) -> Callable:
+        async def throttled_receive() -> Dict[str, Any]:
+            message = await receive()
+            if message["type"] == "http.request":
+                # Not reading on makes the client's TCP window fill up, slowing it down
+                await self.bandwidth.consume(len(message.get("body", b"")))
+            return message
+
+        return throttled_receive
@@ -1,22 +1,98 @@
+import asyncio
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import format_datetime
+import functools
 import logging
-from typing import Optional, BinaryIO, Dict, Any
+import os
+import threading
+from typing import Optional, AsyncIterator, BinaryIO, Dict, Any, Callable, List, Tuple, TypeVar
 
+from app.core.cache import ObjectInfo, ObjectInfoCache, build_object_cache
 from app.core.config import settings
+from app.core.hashing import CHECKSUM_ALGORITHMS, Checksum, ChecksumMismatch, composite_checksum
+from app.core.metrics import UPLOAD_BYTES, UPLOAD_CHECKSUM_MISMATCHES, instrument_boto_client, track_transfer
+from app.core.segment_cache import SegmentCache, build_segment_cache
+from app.core.signing import CloudFrontSigner, build_cloudfront_signer
+from app.core.singleflight import SingleFlight
+from app.core.storage import DEFAULT_CONTENT_TYPE, InMemoryStorage, LocalStorage, StorageBackend
+from app.core.transfer import build_transfer_config
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-class S3Client:
+# Most keys S3 accepts in a single DeleteObjects request
+MAX_DELETE_KEYS = 1000
+
+# Error codes S3 rejects a request with when the body fails its checksum
+CHECKSUM_ERROR_CODES = ('BadDigest', 'XAmzContentChecksumMismatch')
+
+
+def build_boto_config() -> Config:
+    """
+    Build the botocore configuration shared by all S3 clients
+    
+    Returns:
+        botocore Config with connection pool, keep-alive, timeout and retry settings
+    """
+    return Config(
+        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=settings.S3_TCP_KEEPALIVE,
+        connect_timeout=settings.S3_CONNECT_TIMEOUT,
+        read_timeout=settings.S3_READ_TIMEOUT,
+        retries={
+            'mode': settings.S3_RETRY_MODE,
+            'max_attempts': settings.S3_MAX_ATTEMPTS,
+        },
+    )
+
+
+def http_date(value: Any) -> Optional[str]:
+    """Format a timestamp returned by boto3 as an HTTP date"""
+    if not isinstance(value, datetime):
+        return None
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+class S3Client(StorageBackend):
     """Client for interacting with AWS S3"""
     
-    def __init__(self, region_name: str = settings.AWS_REGION):
-        self.s3_client = boto3.client('s3', region_name=region_name)
+    def __init__(
+        self,
+        region_name: str = settings.AWS_REGION,
+        endpoint_url: Optional[str] = settings.S3_ENDPOINT_URL,
+        cache: Optional[ObjectInfoCache] = None,
+        signer: Optional[CloudFrontSigner] = None
+    ):
+        self.s3_client = boto3.client(
+            's3',
+            region_name=region_name,
+            endpoint_url=endpoint_url,
+            config=build_boto_config()
+        )
+        instrument_boto_client(self.s3_client)
         self.bucket_name = settings.S3_BUCKET_NAME
         self.cloudfront_domain = settings.CLOUDFRONT_DOMAIN
+        self.cache = cache if cache is not None else build_object_cache()
+        self.signer = signer if signer is not None else build_cloudfront_signer()
+    
+    def close(self) -> None:
+        """Release the underlying HTTP connection pool"""
+        self.s3_client.close()
     
-    def upload_video(self, file_obj: BinaryIO, file_name: str, metadata: Optional[Dict[str, str]] = None) -> str:
+    def upload_video(
+        self,
+        file_obj: BinaryIO,
+        file_name: str,
+        metadata: Optional[Dict[str, str]] = None,
+        file_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        content_type: Optional[str] = None
+    ) -> str:
         """
         Upload a video file to S3 bucket
         
@@ -24,64 +100,412 @@ class S3Client:
             file_obj: File-like object to upload
             file_name: Name of the file in S3
             metadata: Optional metadata for the S3 object
+            file_size: Declared size in bytes, used to pick the multipart part size
+            progress_callback: Called with the number of bytes sent as parts complete
+            content_type: Content-Type to store, defaults to video/mp4
             
         Returns:
             S3 object URL or CloudFront URL if configured
+            
+        Raises:
+            ChecksumMismatch: If S3 rejects the data as not matching its checksum
         """
+        def callback(bytes_amount: int) -> None:
+            UPLOAD_BYTES.inc(bytes_amount)
+            if progress_callback is not None:
+                progress_callback(bytes_amount)
+        
         try:
-            extra_args = {
-                'ContentType': 'video/mp4',  # Assuming MP4 format, adjust as needed
-                'ACL': 'public-read',  # Make objects publicly readable so CloudFront can access them
-            }
-            
-            if metadata:
-                extra_args['Metadata'] = metadata
+            extra_args = self._object_args(metadata, content_type)
+            if settings.UPLOAD_CHECKSUM_ALGORITHM:
+                # botocore checksums each part as it is sent and s3transfer
+                # lists the part checksums on completion, so S3 verifies both
+                extra_args['ChecksumAlgorithm'] = settings.UPLOAD_CHECKSUM_ALGORITHM
                 
-            self.s3_client.upload_fileobj(
-                file_obj,
-                self.bucket_name,
-                file_name,
-                ExtraArgs=extra_args
-            )
+            with track_transfer('upload_fileobj'):
+                self.s3_client.upload_fileobj(
+                    file_obj,
+                    self.bucket_name,
+                    file_name,
+                    ExtraArgs=extra_args,
+                    Config=build_transfer_config(file_size),
+                    Callback=callback
+                )
             
             logger.info(f"Successfully uploaded video {file_name} to S3 bucket {self.bucket_name}")
+            self._invalidate(file_name)
             
-            # Return CloudFront URL if configured, otherwise return S3 URL
-            if self.cloudfront_domain:
-                return f"https://{self.cloudfront_domain}/{file_name}"
-            else:
-                return f"https://{self.bucket_name}.s3.amazonaws.com/{file_name}"
+            return self.get_object_url(file_name)
                 
         except ClientError as e:
             logger.error(f"Error uploading video to S3: {str(e)}")
+            if e.response['Error']['Code'] in CHECKSUM_ERROR_CODES:
+                UPLOAD_CHECKSUM_MISMATCHES.inc()
+                raise ChecksumMismatch(f"S3 rejected {file_name}: {str(e)}") from e
+            raise
+    
+    def upload_file(
+        self,
+        path: str,
+        file_name: str,
+        content_type: str,
+        cache_control: Optional[str] = None
+    ) -> None:
+        """
+        Upload a local file, such as a generated rendition or thumbnail
+        
+        Args:
+            path: Local file to upload
+            file_name: Name of the file in S3
+            content_type: Content-Type to store with the object
+            cache_control: Optional Cache-Control to store with the object
+        """
+        extra_args = self._object_args(content_type=content_type)
+        if cache_control:
+            extra_args['CacheControl'] = cache_control
+        try:
+            with track_transfer('upload_file'):
+                self.s3_client.upload_file(
+                    path,
+                    self.bucket_name,
+                    file_name,
+                    ExtraArgs=extra_args,
+                    Config=build_transfer_config(os.path.getsize(path))
+                )
+            self._invalidate(file_name)
+        except ClientError as e:
+            logger.error(f"Error uploading {file_name} to S3: {str(e)}")
+            raise
+    
+    def download_file(self, file_name: str, path: str) -> None:
+        """
+        Download an object to a local file
+        
+        Args:
+            file_name: Name of the file in S3
+            path: Local destination
+        """
+        try:
+            with track_transfer('download_file'):
+                self.s3_client.download_file(self.bucket_name, file_name, path, Config=build_transfer_config())
+        except ClientError as e:
+            logger.error(f"Error downloading {file_name} from S3: {str(e)}")
             raise
     
-    def get_video_url(self, file_name: str) -> str:
+    def create_multipart_upload(
+        self,
+        file_name: str,
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        checksum_algorithm: Optional[str] = None
+    ) -> str:
         """
-        Get the URL for a video file
+        Start a multipart upload
         
         Args:
             file_name: Name of the file in S3
+            metadata: Optional metadata for the S3 object
+            content_type: Content-Type to store, defaults to video/mp4
+            checksum_algorithm: Checksum every part must then carry (see upload_part)
             
         Returns:
-            CloudFront URL if configured, otherwise S3 URL
+            S3 upload ID
         """
-        # Check if file exists
+        extra_args = self._object_args(metadata, content_type)
+        if checksum_algorithm:
+            extra_args['ChecksumAlgorithm'] = checksum_algorithm
         try:
-            self.s3_client.head_object(Bucket=self.bucket_name, Key=file_name)
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=file_name,
+                **extra_args
+            )
+            return response['UploadId']
         except ClientError as e:
-            if e.response['Error']['Code'] == '404':
-                raise ValueError(f"Video file {file_name} does not exist in bucket")
-            else:
+            logger.error(f"Error starting multipart upload: {str(e)}")
+            raise
+    
+    def upload_part(
+        self,
+        file_name: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+        checksum: Optional[Checksum] = None
+    ) -> str:
+        """
+        Upload one part of a multipart upload
+        
+        Args:
+            file_name: Name of the file in S3
+            upload_id: S3 upload ID
+            part_number: 1-based part number
+            body: Part contents
+            checksum: Checksum of body, which S3 verifies before storing the part
+            
+        Returns:
+            ETag of the stored part
+            
+        Raises:
+            ChecksumMismatch: If S3 rejects the part as not matching checksum
+        """
+        extra_args = {checksum.member: checksum.b64digest()} if checksum is not None else {}
+        try:
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket_name,
+                Key=file_name,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body,
+                **extra_args
+            )
+            UPLOAD_BYTES.inc(len(body))
+            return response['ETag']
+        except ClientError as e:
+            logger.error(f"Error uploading part {part_number} of {file_name}: {str(e)}")
+            if e.response['Error']['Code'] in CHECKSUM_ERROR_CODES:
+                UPLOAD_CHECKSUM_MISMATCHES.inc()
+                raise ChecksumMismatch(f"S3 rejected part {part_number} of {file_name}: {str(e)}") from e
+            raise
+    
+    def complete_multipart_upload(self, file_name: str, upload_id: str, parts: List[Dict[str, Any]]) -> str:
+        """
+        Assemble uploaded parts into the final object
+        
+        When the parts carry checksums, the checksum S3 reports for the
+        assembled object is checked against them; an object that doesn't
+        match is deleted.
+        
+        Args:
+            file_name: Name of the file in S3
+            upload_id: S3 upload ID
+            parts: List of {'PartNumber': int, 'ETag': str} in part order, with
+                the part's checksum (e.g. 'ChecksumCRC32') if it was sent with one
+            
+        Returns:
+            S3 object URL or CloudFront URL if configured
+            
+        Raises:
+            ValueError: If the upload doesn't exist
+            ChecksumMismatch: If the assembled object fails verification; it is deleted
+        """
+        try:
+            response = self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=file_name,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            self._verify_checksum(file_name, parts, response)
+            logger.info(f"Successfully uploaded video {file_name} to S3 bucket {self.bucket_name}")
+            self._invalidate(file_name)
+            return self.get_object_url(file_name)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchUpload':
+                raise ValueError(f"Upload {upload_id} does not exist")
+            logger.error(f"Error completing multipart upload: {str(e)}")
+            raise
+    
+    def _verify_checksum(self, file_name: str, parts: List[Dict[str, Any]], response: Dict[str, Any]) -> None:
+        """Check the object assembled from parts against the checksums they were sent with"""
+        if not parts:
+            return
+        algorithm = next((name for name in CHECKSUM_ALGORITHMS if f'Checksum{name}' in parts[0]), None)
+        if algorithm is None:
+            return
+        member = f'Checksum{algorithm}'
+        expected = composite_checksum(algorithm, [part[member] for part in parts])
+        stored = response.get(member)
+        if stored is None:
+            # Not every S3-compatible store returns it on completion
+            stored = self.s3_client.head_object(
+                Bucket=self.bucket_name, Key=file_name, ChecksumMode='ENABLED'
+            ).get(member)
+        if stored is None:
+            logger.warning(f"No {algorithm} checksum stored for {file_name}; skipping verification")
+            return
+        # Some stores leave off the -<part count> suffix
+        if stored.split('-')[0] != expected.split('-')[0]:
+            UPLOAD_CHECKSUM_MISMATCHES.inc()
+            self.s3_client.delete_object(Bucket=self.bucket_name, Key=file_name)
+            raise ChecksumMismatch(f"Checksum mismatch for {file_name}: sent {expected}, stored {stored}")
+    
+    def abort_multipart_upload(self, file_name: str, upload_id: str) -> None:
+        """
+        Abort a multipart upload and discard its parts
+        
+        Args:
+            file_name: Name of the file in S3
+            upload_id: S3 upload ID
+        """
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=file_name,
+                UploadId=upload_id
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchUpload':
+                raise ValueError(f"Upload {upload_id} does not exist")
+            logger.error(f"Error aborting multipart upload: {str(e)}")
+            raise
+    
+    def list_parts(self, file_name: str, upload_id: str) -> Dict[int, Tuple[str, int]]:
+        """
+        List the parts S3 has stored for a multipart upload
+        
+        Args:
+            file_name: Name of the file in S3
+            upload_id: S3 upload ID
+            
+        Returns:
+            Mapping of part number to (ETag, size)
+        """
+        parts: Dict[int, Tuple[str, int]] = {}
+        try:
+            paginator = self.s3_client.get_paginator('list_parts')
+            for page in paginator.paginate(Bucket=self.bucket_name, Key=file_name, UploadId=upload_id):
+                for part in page.get('Parts', []):
+                    parts[part['PartNumber']] = (part['ETag'], part['Size'])
+            return parts
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchUpload':
+                raise ValueError(f"Upload {upload_id} does not exist")
+            logger.error(f"Error listing upload parts: {str(e)}")
+            raise
+    
+    def generate_presigned_part_urls(
+        self,
+        file_name: str,
+        upload_id: str,
+        part_numbers: List[int],
+        expires_in: int = settings.PRESIGNED_URL_EXPIRY_SECONDS
+    ) -> Dict[int, str]:
+        """
+        Presign UploadPart requests so clients can send parts directly to S3
+        
+        Signing is local (no S3 round trip), so large batches are cheap.
+        
+        Args:
+            file_name: Name of the file in S3
+            upload_id: S3 upload ID
+            part_numbers: 1-based part numbers to sign
+            expires_in: URL lifetime in seconds
+            
+        Returns:
+            Mapping of part number to presigned PUT URL
+        """
+        return {
+            part_number: self.s3_client.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': self.bucket_name,
+                    'Key': file_name,
+                    'UploadId': upload_id,
+                    'PartNumber': part_number,
+                },
+                ExpiresIn=expires_in
+            )
+            for part_number in part_numbers
+        }
+    
+    def origin_url(self, file_name: str) -> str:
+        """S3 URL of an object"""
+        return f"https://{self.bucket_name}.s3.amazonaws.com/{file_name}"
+    
+    def _object_args(
+        self,
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        args: Dict[str, Any] = {
+            'ContentType': content_type or DEFAULT_CONTENT_TYPE,
+        }
+        if settings.S3_OBJECT_ACL and self.signer is None:
+            # public-read lets CloudFront and players fetch objects directly;
+            # leave unset for private buckets served in proxy mode. Buckets
+            # behind signed CloudFront URLs block public ACLs outright.
+            args['ACL'] = settings.S3_OBJECT_ACL
+        if metadata:
+            args['Metadata'] = metadata
+        return args
+    
+    def check_bucket(self) -> None:
+        """
+        Check that the bucket is reachable with the configured credentials
+        
+        Raises:
+            ClientError: If the bucket is missing or access is denied
+            BotoCoreError: If S3 cannot be reached
+        """
+        self.s3_client.head_bucket(Bucket=self.bucket_name)
+    
+    def head_video(self, file_name: str) -> ObjectInfo:
+        """
+        Check whether a video exists, consulting the object cache first
+        
+        Args:
+            file_name: Name of the file in S3
+            
+        Returns:
+            ObjectInfo describing the object (exists=False if it is missing)
+        """
+        if self.cache is not None:
+            cached = self.cache.get(file_name)
+            if cached is not None:
+                return cached
+        
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=file_name)
+            info = ObjectInfo(
+                exists=True,
+                metadata=response.get('Metadata', {}),
+                etag=response.get('ETag'),
+                content_length=response.get('ContentLength'),
+                content_type=response.get('ContentType'),
+                last_modified=http_date(response.get('LastModified')),
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != '404':
                 logger.error(f"Error checking video existence: {str(e)}")
                 raise
-                
-        # Return CloudFront URL if configured, otherwise return S3 URL
-        if self.cloudfront_domain:
-            return f"https://{self.cloudfront_domain}/{file_name}"
-        else:
-            return f"https://{self.bucket_name}.s3.amazonaws.com/{file_name}"
+            info = ObjectInfo(exists=False)
+        
+        if self.cache is not None:
+            self.cache.set(file_name, info)
+        return info
+    
+    def get_object(
+        self,
+        file_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        if_match: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Open an object for reading. The body is not read here; callers
+        stream it from response['Body']
+        
+        Args:
+            file_name: Name of the file in S3
+            byte_range: Inclusive first and last byte to fetch
+            if_match: Only succeed if the object still has this ETag
             
+        Returns:
+            The get_object response
+        """
+        args: Dict[str, Any] = {'Bucket': self.bucket_name, 'Key': file_name}
+        if byte_range is not None:
+            args['Range'] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        if if_match:
+            args['IfMatch'] = if_match
+        try:
+            return self.s3_client.get_object(**args)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                raise ValueError(f"Video file {file_name} does not exist in bucket")
+            logger.error(f"Error reading video from S3: {str(e)}")
+            raise
+    
     def delete_video(self, file_name: str) -> None:
         """
         Delete a video file from S3
@@ -98,3 +522,411 @@ class S3Client:
         except ClientError as e:
             logger.error(f"Error deleting video from S3: {str(e)}")
             raise
+        finally:
+            self._invalidate(file_name)
+    
+    def delete_videos(self, file_names: List[str]) -> Dict[str, str]:
+        """
+        Delete many video files, up to 1000 per S3 request
+        
+        Args:
+            file_names: Names of the files to delete
+            
+        Returns:
+            Error message for each key that could not be deleted; keys that
+            are absent were deleted (deletes of missing keys succeed in S3)
+        """
+        errors: Dict[str, str] = {}
+        for offset in range(0, len(file_names), MAX_DELETE_KEYS):
+            batch = file_names[offset:offset + MAX_DELETE_KEYS]
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': file_name} for file_name in batch], 'Quiet': True}
+                )
+                for error in response.get('Errors', []):
+                    errors[error['Key']] = f"{error.get('Code')}: {error.get('Message')}"
+            except ClientError as e:
+                logger.error(f"Error deleting videos from S3: {str(e)}")
+                for file_name in batch:
+                    errors[file_name] = str(e)
+            finally:
+                for file_name in batch:
+                    self._invalidate(file_name)
+        logger.info(f"Deleted {len(file_names) - len(errors)} videos from S3 bucket {self.bucket_name}")
+        return errors
+    
+    def delete_prefix(self, prefix: str) -> Dict[str, str]:
+        """
+        Delete every object under a prefix, e.g. the renditions of a video
+        
+        Args:
+            prefix: Key prefix, ending in "/"
+            
+        Returns:
+            Error message for each key that could not be deleted
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        keys = [
+            item['Key']
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix)
+            for item in page.get('Contents', [])
+        ]
+        return self.delete_videos(keys) if keys else {}
+    
+    def _invalidate(self, file_name: str) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(file_name)
+
+
+class AsyncS3Client:
+    """
+    Non-blocking facade over a storage backend (S3Client unless configured
+    otherwise) for use from async endpoints.
+    
+    boto3 is synchronous, so every call runs on a dedicated, bounded thread pool.
+    A semaphore caps the calls in flight; callers beyond the limit wait on the
+    event loop (backpressure) instead of queueing without bound in the executor.
+    Upload calls (see run_write) may only take part of the pool, so lookups for
+    reads always find a free slot under ingest load.
+    """
+    
+    def __init__(
+        self,
+        s3_client: StorageBackend,
+        max_concurrency: int = settings.S3_MAX_CONCURRENT_CALLS,
+        segment_cache: Optional[SegmentCache] = None,
+        read_reserved: int = settings.S3_READ_RESERVED_CALLS
+    ):
+        self.sync_client = s3_client
+        self.max_concurrency = max_concurrency
+        self.write_concurrency = max(1, max_concurrency - read_reserved)
+        self.segment_cache = segment_cache
+        # Concurrent lookups of the same key (e.g. a viral video) share one call
+        self._lookups = SingleFlight("s3_lookup")
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="s3-io")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._write_semaphore: Optional[asyncio.Semaphore] = None
+    
+    def _get_semaphore(self, write: bool = False) -> asyncio.Semaphore:
+        # asyncio primitives are bound to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._write_semaphore = asyncio.Semaphore(self.write_concurrency)
+        return self._write_semaphore if write else self._semaphore
+    
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking callable on the S3 executor
+        
+        Args:
+            func: Blocking callable, usually an S3Client method
+            
+        Returns:
+            Result of the callable
+        """
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def run_write(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """run() for calls that send video data, which share a smaller limit"""
+        async with self._get_semaphore(write=True):
+            return await self.run(func, *args, **kwargs)
+    
+    async def upload_video(
+        self,
+        file_obj: BinaryIO,
+        file_name: str,
+        metadata: Optional[Dict[str, str]] = None,
+        file_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        content_type: Optional[str] = None
+    ) -> str:
+        """Non-blocking S3Client.upload_video"""
+        return await self.run_write(
+            self.sync_client.upload_video,
+            file_obj=file_obj,
+            file_name=file_name,
+            metadata=metadata,
+            file_size=file_size,
+            progress_callback=progress_callback,
+            content_type=content_type
+        )
+    
+    async def check_bucket(self) -> None:
+        """Non-blocking S3Client.check_bucket"""
+        return await self.run(self.sync_client.check_bucket)
+    
+    async def head_video(self, file_name: str) -> ObjectInfo:
+        """
+        Non-blocking S3Client.head_video. Concurrent lookups of a key share
+        one S3 call and its result or error.
+        
+        Raises:
+            asyncio.TimeoutError: If the lookup takes longer than S3_LOOKUP_TIMEOUT_SECONDS
+        """
+        return await self._lookups.do(
+            ("head_video", file_name),
+            lambda: self.run(self.sync_client.head_video, file_name),
+            settings.S3_LOOKUP_TIMEOUT_SECONDS
+        )
+    
+    async def get_video_url(self, file_name: str) -> str:
+        """Non-blocking S3Client.get_video_url, coalesced like head_video"""
+        return await self._lookups.do(
+            ("get_video_url", file_name),
+            lambda: self.run(self.sync_client.get_video_url, file_name),
+            settings.S3_LOOKUP_TIMEOUT_SECONDS
+        )
+    
+    async def delete_video(self, file_name: str) -> None:
+        """Non-blocking S3Client.delete_video"""
+        return await self.run(self.sync_client.delete_video, file_name)
+    
+    async def delete_prefix(self, prefix: str) -> Dict[str, str]:
+        """Non-blocking S3Client.delete_prefix"""
+        return await self.run(self.sync_client.delete_prefix, prefix)
+    
+    async def delete_videos(self, file_names: List[str]) -> Dict[str, str]:
+        """Non-blocking S3Client.delete_videos, sending each 1000-key batch concurrently"""
+        batches = [
+            file_names[offset:offset + MAX_DELETE_KEYS]
+            for offset in range(0, len(file_names), MAX_DELETE_KEYS)
+        ]
+        errors: Dict[str, str] = {}
+        for batch_errors in await asyncio.gather(*(
+            self.run(self.sync_client.delete_videos, batch) for batch in batches
+        )):
+            errors.update(batch_errors)
+        return errors
+    
+    async def get_object(
+        self,
+        file_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        if_match: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Non-blocking S3Client.get_object"""
+        return await self.run(self.sync_client.get_object, file_name, byte_range, if_match)
+    
+    async def iter_object(
+        self,
+        file_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        chunk_size: int = settings.PROXY_CHUNK_SIZE_KB * 1024,
+        if_match: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream an object, or part of one, in chunks of at most chunk_size bytes
+        
+        Only one chunk is held in memory at a time, and each read runs on the
+        executor, so slow clients apply backpressure all the way to S3.
+        
+        Args:
+            file_name: Name of the file in S3
+            byte_range: Inclusive first and last byte to fetch
+            chunk_size: Bytes to read per chunk
+            if_match: Only succeed if the object still has this ETag
+        """
+        if self.segment_cache is not None and if_match:
+            async for chunk in self._iter_segments(file_name, byte_range, chunk_size, if_match):
+                yield chunk
+            return
+        response = await self.get_object(file_name, byte_range, if_match)
+        body = response['Body']
+        try:
+            while True:
+                chunk = await self.run(body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+    
+    async def _iter_segments(
+        self,
+        file_name: str,
+        byte_range: Optional[Tuple[int, int]],
+        chunk_size: int,
+        etag: str
+    ) -> AsyncIterator[bytes]:
+        """iter_object through the segment cache: whole segments are fetched on a miss"""
+        cache = self.segment_cache
+        if byte_range is None:
+            size = (await self.head_video(file_name)).content_length or 0
+            byte_range = (0, size - 1)
+        start, end = byte_range
+        
+        def read_segment(index: int) -> bytes:
+            segment_start = index * cache.segment_size
+            response = self.sync_client.get_object(
+                file_name, (segment_start, segment_start + cache.segment_size - 1), etag
+            )
+            try:
+                return response['Body'].read()
+            finally:
+                response['Body'].close()
+        
+        def fetch(index: int) -> asyncio.Future:
+            future = asyncio.ensure_future(
+                cache.fetch(file_name, etag, index, functools.partial(self.run, read_segment, index))
+            )
+            # A read-ahead may fail after its reader has gone; don't log that as unhandled
+            future.add_done_callback(lambda done: done.cancelled() or done.exception())
+            return future
+        
+        last_index = end // cache.segment_size
+        # Read-ahead: the next missing segments are fetched while this one is sent
+        ahead: Dict[int, asyncio.Future] = {}
+        try:
+            for index in range(start // cache.segment_size, last_index + 1):
+                segment_start = index * cache.segment_size
+                first = max(start, segment_start) - segment_start
+                last = min(end, segment_start + cache.segment_size - 1) - segment_start + 1
+                mapped = cache.open(file_name, etag, index)
+                current = ahead.pop(index, None)
+                if mapped is not None and current is not None:
+                    current.cancel()
+                elif mapped is None and current is None:
+                    current = fetch(index)
+                for next_index in range(index + 1, min(last_index, index + cache.read_ahead) + 1):
+                    if next_index not in ahead and not cache.contains(file_name, etag, next_index):
+                        ahead[next_index] = fetch(next_index)
+                if mapped is not None:
+                    cache.record_hit(min(last, len(mapped)) - first)
+                    data = mapped
+                else:
+                    data = await current
+                try:
+                    for offset in range(first, min(last, len(data)), chunk_size):
+                        yield data[offset:min(last, offset + chunk_size)]
+                finally:
+                    if mapped is not None:
+                        mapped.close()
+        finally:
+            # The fetches themselves carry on and are cached for the next reader
+            for future in ahead.values():
+                future.cancel()
+    
+    async def create_multipart_upload(
+        self,
+        file_name: str,
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        checksum_algorithm: Optional[str] = None
+    ) -> str:
+        """Non-blocking S3Client.create_multipart_upload"""
+        return await self.run(
+            self.sync_client.create_multipart_upload, file_name, metadata, content_type, checksum_algorithm
+        )
+    
+    async def upload_part(
+        self,
+        file_name: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+        checksum: Optional[Checksum] = None
+    ) -> str:
+        """Non-blocking S3Client.upload_part"""
+        return await self.run_write(self.sync_client.upload_part, file_name, upload_id, part_number, body, checksum)
+    
+    async def complete_multipart_upload(self, file_name: str, upload_id: str, parts: List[Dict[str, Any]]) -> str:
+        """Non-blocking S3Client.complete_multipart_upload"""
+        return await self.run_write(self.sync_client.complete_multipart_upload, file_name, upload_id, parts)
+    
+    async def abort_multipart_upload(self, file_name: str, upload_id: str) -> None:
+        """Non-blocking S3Client.abort_multipart_upload"""
+        return await self.run(self.sync_client.abort_multipart_upload, file_name, upload_id)
+    
+    async def list_parts(self, file_name: str, upload_id: str) -> Dict[int, Tuple[str, int]]:
+        """Non-blocking S3Client.list_parts"""
+        return await self.run(self.sync_client.list_parts, file_name, upload_id)
+    
+    async def generate_presigned_part_urls(self, file_name: str, upload_id: str, part_numbers: List[int]) -> Dict[int, str]:
+        """Non-blocking S3Client.generate_presigned_part_urls"""
+        return await self.run(self.sync_client.generate_presigned_part_urls, file_name, upload_id, part_numbers)
+    
+    def get_object_url(self, file_name: str) -> str:
+        """S3Client.get_object_url; builds a string, so it doesn't need the executor"""
+        return self.sync_client.get_object_url(file_name)
+    
+    def close(self) -> None:
+        """Stop the executor, waiting for in-flight calls to finish"""
+        self._executor.shutdown(wait=True)
+
+
+def build_storage_backend(
+    region_name: str = settings.AWS_REGION,
+    endpoint_url: Optional[str] = settings.S3_ENDPOINT_URL
+) -> StorageBackend:
+    """
+    Create the storage backend configured in settings
+    
+    Args:
+        region_name: AWS region, for the S3 backend
+        endpoint_url: S3 endpoint override, for the S3 backend
+        
+    Returns:
+        S3Client, LocalStorage or InMemoryStorage
+    """
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STORAGE_LOCAL_PATH)
+    if settings.STORAGE_BACKEND == "memory":
+        return InMemoryStorage()
+    if settings.STORAGE_BACKEND != "s3":
+        raise ValueError(f"Unknown storage backend {settings.STORAGE_BACKEND}")
+    return S3Client(region_name=region_name, endpoint_url=endpoint_url)
+
+
+class ClientRegistry:
+    """
+    Application-lifetime registry of AWS clients.
+    
+    boto3 clients are thread-safe and expensive to build (credential resolution,
+    endpoint loading, a fresh urllib3 pool), so one instance is created per
+    worker process and shared by every request.
+    """
+    
+    def __init__(self, region_name: str = settings.AWS_REGION, endpoint_url: Optional[str] = settings.S3_ENDPOINT_URL):
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self._s3_client: Optional[StorageBackend] = None
+        self._async_s3_client: Optional[AsyncS3Client] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def s3_client(self) -> StorageBackend:
+        """Shared storage backend (an S3Client by default), created on first access"""
+        if self._s3_client is None:
+            with self._lock:
+                if self._s3_client is None:
+                    self._s3_client = build_storage_backend(
+                        region_name=self.region_name,
+                        endpoint_url=self.endpoint_url
+                    )
+        return self._s3_client
+    
+    @property
+    def async_s3_client(self) -> AsyncS3Client:
+        """Shared AsyncS3Client wrapping the pooled S3Client"""
+        if self._async_s3_client is None:
+            s3_client = self.s3_client
+            with self._lock:
+                if self._async_s3_client is None:
+                    self._async_s3_client = AsyncS3Client(s3_client, segment_cache=build_segment_cache())
+        return self._async_s3_client
+    
+    def close(self) -> None:
+        """Close all clients held by the registry"""
+        with self._lock:
+            if self._async_s3_client is not None:
+                self._async_s3_client.close()
+                self._async_s3_client = None
+            if self._s3_client is not None:
+                self._s3_client.close()
+                self._s3_client = None
@@ -0,0 +1,201 @@
+import copy
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = CACHE_REQUESTS.labels("video_info", "hit")
+CACHE_MISSES = CACHE_REQUESTS.labels("video_info", "miss")
+
+
+@dataclass
+class ObjectInfo:
+    """Result of an S3 existence check for a single key"""
+    exists: bool
+    metadata: Dict[str, str] = field(default_factory=dict)
+    etag: Optional[str] = None
+    content_length: Optional[int] = None
+    content_type: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class CacheBackend(ABC):
+    """Interface for the key/value stores backing ObjectInfoCache"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Bounded, per-process LRU cache with per-entry expiry
+    """
+
+    def __init__(self, max_entries: int = settings.VIDEO_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Callers get their own copy, as they would from a serializing backend
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache shared by all workers, stored in Redis (or anything speaking its
+    get/set/delete interface). Eviction is left to the Redis server.
+    """
+
+    def __init__(self, client: Any, prefix: str = "video-cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("VIDEO_CACHE_REDIS_URL is set but the 'redis' package is not installed") from e
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+
+class ObjectInfoCache:
+    """
+    Cache of S3 key -> ObjectInfo used to skip head_object round trips.
+
+    Missing keys are cached too (negative caching) with a shorter TTL, so
+    repeated lookups of bad IDs don't reach S3 either.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float = settings.VIDEO_CACHE_TTL_SECONDS,
+        negative_ttl: float = settings.VIDEO_CACHE_NEGATIVE_TTL_SECONDS,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[ObjectInfo]:
+        """
+        Look up a key
+
+        Args:
+            key: S3 object key
+
+        Returns:
+            Cached ObjectInfo, or None on a miss
+        """
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            # A broken shared cache must not take lookups down with it
+            logger.warning(f"Error reading video cache: {str(e)}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        (CACHE_MISSES if value is None else CACHE_HITS).inc()
+        return ObjectInfo(**value) if value is not None else None
+
+    def set(self, key: str, info: ObjectInfo) -> None:
+        """Store the result of a lookup"""
+        ttl = self.ttl if info.exists else self.negative_ttl
+        try:
+            self.backend.set(key, asdict(info), ttl)
+        except Exception as e:
+            logger.warning(f"Error writing video cache: {str(e)}")
+
+    def invalidate(self, key: str) -> None:
+        """Drop a key after the underlying object changed"""
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            logger.warning(f"Error invalidating video cache: {str(e)}")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+
+def build_object_cache() -> Optional[ObjectInfoCache]:
+    """
+    Create the object cache configured in settings
+
+    Returns:
+        ObjectInfoCache, or None when caching is disabled
+    """
+    if not settings.VIDEO_CACHE_ENABLED:
+        return None
+    if settings.VIDEO_CACHE_REDIS_URL:
+        backend: CacheBackend = RedisCacheBackend.from_url(settings.VIDEO_CACHE_REDIS_URL)
+    else:
+        backend = InMemoryCacheBackend()
+    return ObjectInfoCache(backend)
@@ -1,8 +1,11 @@
+import ipaddress
 from typing import Any, Dict, List, Optional, Union
 
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings
 
+from app.core.hashing import CHECKSUM_ALGORITHMS
+
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -27,6 +30,183 @@ class Settings(BaseSettings):
     AWS_REGION: str = "eu-west-1"
     S3_BUCKET_NAME: str = "video-storage-bucket"
     CLOUDFRONT_DOMAIN: Optional[str] = None
+    # CloudFront trusted key pair for signed URLs/cookies (private distributions).
+    # The private key is given inline (PEM) or as a file path.
+    CLOUDFRONT_KEY_PAIR_ID: Optional[str] = None
+    CLOUDFRONT_PRIVATE_KEY: Optional[str] = None
+    CLOUDFRONT_PRIVATE_KEY_PATH: Optional[str] = None
+    SIGNED_URL_EXPIRY_SECONDS: int = 3600
+    # Expiry times are rounded up to this, so URLs signed in the same window
+    # share a policy and a cached signature
+    SIGNED_URL_EXPIRY_GRANULARITY_SECONDS: int = 300
+    SIGNED_URL_CACHE_SIZE: int = 100000
+    # Domain attribute for signed cookies, e.g. ".example.com" when the API and
+    # the CloudFront alias share a parent domain
+    SIGNED_COOKIE_DOMAIN: Optional[str] = None
+    # Override the S3 endpoint, e.g. to point at a local S3-compatible server
+    S3_ENDPOINT_URL: Optional[str] = None
+
+    # Where objects are stored: "s3", "local" (files under STORAGE_LOCAL_PATH,
+    # e.g. local NVMe on an edge box) or "memory" (per process, for development
+    # and benchmarks). Without CloudFront, local objects get URLs under
+    # STORAGE_PUBLIC_BASE_URL; with VIDEO_DELIVERY_MODE=proxy the API serves them.
+    STORAGE_BACKEND: str = "s3"
+    STORAGE_LOCAL_PATH: str = "media"
+    STORAGE_PUBLIC_BASE_URL: Optional[str] = None
+
+    # S3 connection pool settings (shared by every request in a worker)
+    S3_MAX_POOL_CONNECTIONS: int = 50
+    S3_TCP_KEEPALIVE: bool = True
+    S3_CONNECT_TIMEOUT: int = 5
+    S3_READ_TIMEOUT: int = 60
+    S3_RETRY_MODE: str = "standard"
+    S3_MAX_ATTEMPTS: int = 3
+    # Maximum concurrent blocking S3 calls per worker; further calls wait on the event loop
+    S3_MAX_CONCURRENT_CALLS: int = 32
+    # Of those, slots upload calls can never take, so reads stay fast under ingest load
+    S3_READ_RESERVED_CALLS: int = 8
+    # How long a request waits for an existence/metadata lookup, which it may
+    # share with concurrent requests for the same key
+    S3_LOOKUP_TIMEOUT_SECONDS: Optional[float] = 10
+
+    # Multipart upload tuning. Each upload opens up to S3_UPLOAD_MAX_CONCURRENCY
+    # connections, so keep S3_MAX_POOL_CONNECTIONS above that.
+    S3_MULTIPART_THRESHOLD_MB: int = 16
+    S3_MULTIPART_CHUNKSIZE_MB: int = 16
+    S3_UPLOAD_MAX_CONCURRENCY: int = 10
+    S3_UPLOAD_USE_THREADS: bool = True
+    # Parts sent concurrently per streaming upload; memory per upload is about
+    # part size * (parts in flight + 1)
+    STREAMING_UPLOAD_PARTS_IN_FLIGHT: int = 2
+    # Lifetime of presigned URLs handed to clients for direct-to-S3 uploads
+    PRESIGNED_URL_EXPIRY_SECONDS: int = 3600
+    # SQLite file recording which parts of resumable uploads have landed
+    UPLOAD_STATE_DB_PATH: str = "uploads.db"
+    # SQLite file holding video metadata (title, size, key, ...)
+    METADATA_DB_PATH: str = "videos.db"
+    # Hash uploads and point identical videos at the already-stored object
+    UPLOAD_DEDUP_ENABLED: bool = False
+    # Checksum sent with uploaded bytes so S3 rejects parts corrupted in transit
+    # and stores it with the object: "CRC32" or "SHA256", empty to disable
+    UPLOAD_CHECKSUM_ALGORITHM: Optional[str] = "CRC32"
+
+    @field_validator("UPLOAD_CHECKSUM_ALGORITHM", mode="before")
+    def check_checksum_algorithm(cls, v: Optional[str]) -> Optional[str]:
+        if not v:
+            return None
+        if v.upper() not in CHECKSUM_ALGORITHMS:
+            raise ValueError(f"must be one of {', '.join(CHECKSUM_ALGORITHMS)} or empty, got {v!r}")
+        return v.upper()
+    
+    # Read container, duration, resolution and codecs from the headers of
+    # uploads as they stream in; also sets the stored object's Content-Type
+    MEDIA_PROBE_ENABLED: bool = True
+    # Largest header (MP4 moov, WebM Info/Tracks) kept in memory while probing
+    MEDIA_PROBE_MAX_HEADER_MB: int = 32
+    # Move the moov box of MP4s uploaded through /upload in front of the media
+    # data, so players can start without fetching the end of the file first
+    MEDIA_FASTSTART_ENABLED: bool = True
+
+    # Video delivery: "redirect" sends clients to the CloudFront/S3 URL, "proxy"
+    # streams objects through the API (with Range support) for private buckets
+    VIDEO_DELIVERY_MODE: str = "redirect"
+    # Canned ACL applied to uploaded objects; set to an empty value for private buckets.
+    # Never sent while CloudFront signing is configured
+    S3_OBJECT_ACL: Optional[str] = "public-read"
+    PROXY_CHUNK_SIZE_KB: int = 256
+    PROXY_MAX_RANGES: int = 16
+
+    # Disk cache of object segments in front of proxy-mode reads, so hot videos
+    # are served from local disk instead of S3. Segments are fetched whole on a
+    # miss; SEGMENT_CACHE_MAX_MB bounds the cache of each worker process.
+    SEGMENT_CACHE_ENABLED: bool = False
+    SEGMENT_CACHE_DIR: Optional[str] = None
+    SEGMENT_CACHE_MAX_MB: int = 10240
+    SEGMENT_CACHE_SEGMENT_MB: int = 2
+    # Missing segments fetched ahead of a sequential reader (0 disables read-ahead)
+    SEGMENT_CACHE_READ_AHEAD: int = 4
+
+    # Batch endpoints: items per request, and S3 calls in flight per request
+    BATCH_MAX_ITEMS: int = 1000
+    BATCH_MAX_CONCURRENCY: int = 16
+
+    # Background transcoding into an HLS bitrate ladder ("height:video kbps" pairs).
+    # Renditions taller than the source are skipped.
+    TRANSCODE_ENABLED: bool = False
+    TRANSCODE_LADDER: str = "1080:5000,720:2800,480:1400,360:800,240:400"
+    TRANSCODE_AUDIO_BITRATE_KBPS: int = 128
+    TRANSCODE_SEGMENT_SECONDS: int = 6
+    TRANSCODE_PRESET: str = "veryfast"
+    TRANSCODE_FFMPEG_PATH: str = "ffmpeg"
+    TRANSCODE_FFPROBE_PATH: str = "ffprobe"
+    TRANSCODE_TIMEOUT_SECONDS: int = 3600
+    # Scratch space for sources and segments; defaults to the system temp dir
+    TRANSCODE_WORK_DIR: Optional[str] = None
+    # Renditions uploaded concurrently per job
+    TRANSCODE_UPLOAD_CONCURRENCY: int = 8
+    # Poster frame and seek-preview sprite sheets with a WebVTT thumbnail track,
+    # stored next to the video
+    THUMBNAILS_ENABLED: bool = False
+    THUMBNAIL_POSTER_WIDTH: int = 640
+    THUMBNAIL_SPRITE_INTERVAL_SECONDS: int = 10
+    THUMBNAIL_SPRITE_TILE_WIDTH: int = 160
+    THUMBNAIL_SPRITE_COLUMNS: int = 10
+    THUMBNAIL_SPRITE_ROWS: int = 10
+    # Cache lifetime of thumbnails served by the API and stored in S3
+    THUMBNAIL_CACHE_MAX_AGE_SECONDS: int = 31536000
+    # Durable queue for post-upload jobs, consumed by worker.py. Each worker
+    # process runs JOB_WORKER_THREADS jobs at once (each one a multi-threaded ffmpeg).
+    JOB_DB_PATH: str = "jobs.db"
+    JOB_WORKER_PROCESSES: int = 2
+    JOB_WORKER_THREADS: int = 1
+    # Threads running jobs inside the API process itself, for development
+    # without a separate worker; keep at 0 in production
+    JOB_API_WORKER_THREADS: int = 0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    # Failed attempts are retried with exponential backoff and jitter
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 10
+    JOB_RETRY_MAX_SECONDS: float = 900
+    # A running job is assumed lost (worker crashed) and claimed again after this;
+    # keep it above the longest job (TRANSCODE_TIMEOUT_SECONDS)
+    JOB_LEASE_SECONDS: int = 7200
+
+    # Cache of video existence checks (saves a head_object per lookup)
+    VIDEO_CACHE_ENABLED: bool = True
+    VIDEO_CACHE_MAX_ENTRIES: int = 10000
+    VIDEO_CACHE_TTL_SECONDS: float = 300
+    VIDEO_CACHE_NEGATIVE_TTL_SECONDS: float = 30
+    # Share the cache between workers through Redis instead of per-process memory
+    VIDEO_CACHE_REDIS_URL: Optional[str] = None
+    
+    # Prometheus metrics at /metrics (per worker process), and how long /ready
+    # waits for S3 before reporting the instance as not ready
+    METRICS_ENABLED: bool = True
+    READINESS_TIMEOUT_SECONDS: float = 2.0
+    
+    # Admission control for uploads that carry video bytes through the API
+    # (/upload, /upload/stream, resumable PATCH), per worker process. Uploads
+    # beyond UPLOAD_MAX_CONCURRENT queue for a slot; when UPLOAD_MAX_QUEUED are
+    # already waiting, or one waits longer than the timeout, the request gets
+    # 503 with Retry-After. A client over its own limit gets 429. 0 disables a limit.
+    UPLOAD_MAX_CONCURRENT: int = 16
+    UPLOAD_MAX_CONCURRENT_PER_CLIENT: int = 4
+    UPLOAD_MAX_QUEUED: int = 32
+    UPLOAD_QUEUE_TIMEOUT_SECONDS: float = 10
+    # Upload body bytes read per second, shared by all uploads in a worker
+    # (token bucket holding one second's worth), 0 for unlimited
+    UPLOAD_BANDWIDTH_MB_PER_SEC: float = 0
+    # Load balancers or CDN edges (comma-separated addresses or CIDR ranges,
+    # e.g. "10.0.0.0/8") whose X-Forwarded-For is believed when telling
+    # clients apart for UPLOAD_MAX_CONCURRENT_PER_CLIENT; empty trusts none
+    UPLOAD_TRUSTED_PROXIES: str = ""
+
+    @field_validator("UPLOAD_TRUSTED_PROXIES")
+    def check_trusted_proxies(cls, v: str) -> str:
+        for entry in v.split(","):
+            if entry.strip():
+                ipaddress.ip_network(entry.strip(), strict=False)
+        return v
     
     # Additional environment variables
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -0,0 +1,242 @@
+import logging
+import struct
+from typing import BinaryIO, Callable, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.core.probe import MB, read_box_header
+
+logger = logging.getLogger(__name__)
+
+# Boxes on the path from moov down to the chunk offset tables
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+MAX_32BIT = 0xFFFFFFFF
+
+# A piece of the rewritten file: literal bytes, or a (start, end) range of the source
+Segment = Union[bytes, Tuple[int, int]]
+
+
+class SplicedFile:
+    """
+    Read-only, seekable file assembled from in-memory bytes and ranges of
+    another seekable file.
+
+    Used to present a faststart layout of an upload without writing a second
+    copy: only the relocated moov is held in memory, and media data is read
+    from the original file as the consumer (e.g. boto3) asks for it.
+    """
+
+    def __init__(self, source: BinaryIO, segments: List[Segment]):
+        self.source = source
+        self._segments: List[Tuple[int, Segment]] = []
+        position = 0
+        for segment in segments:
+            length = len(segment) if isinstance(segment, bytes) else segment[1] - segment[0]
+            if length > 0:
+                self._segments.append((position, segment))
+                position += length
+        self.size = position
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        self._position = offset
+        return offset
+
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if size is None or size < 0 else min(self.size, self._position + size)
+        chunks = []
+        for start, segment in self._segments:
+            length = len(segment) if isinstance(segment, bytes) else segment[1] - segment[0]
+            if start + length <= self._position:
+                continue
+            if start >= end:
+                break
+            first = max(self._position, start) - start
+            last = min(end, start + length) - start
+            if isinstance(segment, bytes):
+                chunks.append(segment[first:last])
+            else:
+                self.source.seek(segment[0] + first)
+                chunks.append(self.source.read(last - first))
+        data = b"".join(chunks)
+        self._position += len(data)
+        return data
+
+    def close(self) -> None:
+        pass
+
+
+def top_level_boxes(file_obj: BinaryIO, size: int) -> List[Tuple[bytes, int, int]]:
+    """
+    Top-level boxes of an MP4, read by seeking from header to header
+
+    Returns:
+        (type, offset, total size) of each box
+    """
+    boxes = []
+    offset = 0
+    while offset + 8 <= size:
+        file_obj.seek(offset)
+        header = file_obj.read(16)
+        parsed = read_box_header(header, 0, len(header))
+        if parsed is None:
+            break
+        box_type, header_size, payload_size = parsed
+        total = size - offset if payload_size is None else header_size + payload_size
+        boxes.append((box_type, offset, total))
+        offset += total
+    return boxes
+
+
+def build_box(box_type: bytes, payload: bytes) -> bytes:
+    if len(payload) + 8 > MAX_32BIT:
+        return struct.pack(">I4sQ", 1, box_type, len(payload) + 16) + payload
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+def patch_chunk_offsets(
+    data: bytes,
+    shift: Callable[[int], int],
+    upgrade: bool,
+    start: int = 0,
+    end: Optional[int] = None
+) -> bytes:
+    """
+    Copy of an MP4 box tree with every stco/co64 chunk offset passed through `shift`
+
+    Args:
+        data: Boxes to rewrite, e.g. a complete moov box
+        shift: Maps an old file offset to its new one
+        upgrade: Rewrite stco tables as co64, for offsets past 4 GiB
+        start: Start of the boxes within data
+        end: End of the boxes within data
+
+    Returns:
+        The rewritten boxes
+
+    Raises:
+        OverflowError: If an offset no longer fits in an stco table and
+            upgrade is False
+    """
+    end = len(data) if end is None else end
+    out = bytearray()
+    pos = start
+    while pos + 8 <= end:
+        box_type, header_size, payload_size = read_box_header(data, pos, end)
+        payload_end = end if payload_size is None else pos + header_size + payload_size
+        payload_start = pos + header_size
+        if box_type in CONTAINER_BOXES:
+            out += build_box(box_type, patch_chunk_offsets(data, shift, upgrade, payload_start, payload_end))
+        elif box_type in (b"stco", b"co64"):
+            wide = box_type == b"co64"
+            count = struct.unpack(">I", data[payload_start + 4:payload_start + 8])[0]
+            offsets = struct.unpack(
+                f">{count}{'Q' if wide else 'I'}", data[payload_start + 8:payload_start + 8 + count * (8 if wide else 4)]
+            )
+            offsets = [shift(offset) for offset in offsets]
+            if not wide and not upgrade and offsets and max(offsets) > MAX_32BIT:
+                raise OverflowError("Chunk offset does not fit in stco")
+            wide = wide or upgrade
+            out += build_box(
+                b"co64" if wide else b"stco",
+                data[payload_start:payload_start + 8] + struct.pack(f">{count}{'Q' if wide else 'I'}", *offsets)
+            )
+        else:
+            out += data[pos:payload_end]
+        pos = payload_end
+    return bytes(out)
+
+
+def faststart(
+    file_obj: BinaryIO,
+    max_moov_bytes: int = settings.MEDIA_PROBE_MAX_HEADER_MB * MB
+) -> Optional[SplicedFile]:
+    """
+    Faststart layout of an MP4 whose moov box comes after the media data
+
+    Players need moov before they can decode anything; at the end of the file
+    it costs an extra round trip through the CDN (or, for naive clients, the
+    whole download) before playback can start. The returned file has moov
+    moved in front of the first mdat, with every chunk offset adjusted. Memory
+    use is bounded by the size of moov.
+
+    Args:
+        file_obj: Seekable MP4 file, which must stay open while the result is read
+        max_moov_bytes: Largest moov box to relocate
+
+    Returns:
+        SplicedFile with the new layout, or None if the file is already
+        faststart, fragmented, not a plain MP4, or its chunk offsets cannot
+        be rewritten
+    """
+    size = file_obj.seek(0, 2)
+    try:
+        boxes = top_level_boxes(file_obj, size)
+    except (ValueError, struct.error):
+        return None
+    finally:
+        file_obj.seek(0)
+    types = [box[0] for box in boxes]
+    if b"moov" not in types or b"mdat" not in types or b"moof" in types:
+        return None
+    _, moov_offset, moov_size = boxes[types.index(b"moov")]
+    _, mdat_offset, _ = boxes[types.index(b"mdat")]
+    if moov_offset < mdat_offset:
+        return None
+    if moov_size > max_moov_bytes:
+        logger.warning(f"Not relocating a {moov_size} byte moov box, over the {max_moov_bytes} byte limit")
+        return None
+    file_obj.seek(moov_offset)
+    moov = file_obj.read(moov_size)
+    file_obj.seek(0)
+    moov_end = moov_offset + moov_size
+
+    def shifter(new_size: int) -> Callable[[int], int]:
+        def shift(offset: int) -> int:
+            # Data between the first mdat and the old moov moves down by the
+            # size of the new moov; data after the old moov by the size change
+            if mdat_offset <= offset < moov_offset:
+                return offset + new_size
+            if offset >= moov_end:
+                return offset + new_size - moov_size
+            return offset
+        return shift
+
+    # The new moov's size never depends on the offsets in it, only on whether
+    # stco tables are widened to co64, so a sizing pass fixes the shift
+    try:
+        upgrade = False
+        try:
+            new_size = len(patch_chunk_offsets(moov, shifter(moov_size), upgrade))
+        except OverflowError:
+            upgrade = True
+            new_size = len(patch_chunk_offsets(moov, shifter(0), upgrade))
+        relocated = patch_chunk_offsets(moov, shifter(new_size), upgrade)
+    except OverflowError as e:
+        logger.warning(f"Not relocating a moov box whose offsets would not fit: {str(e)}")
+        return None
+    except (ValueError, struct.error) as e:
+        logger.warning(f"Not relocating an unreadable moov box: {str(e)}")
+        return None
+
+    return SplicedFile(file_obj, [
+        (0, mdat_offset),
+        relocated,
+        (mdat_offset, moov_offset),
+        (moov_end, size),
+    ])
@@ -0,0 +1,85 @@
+import base64
+import hashlib
+import zlib
+from typing import BinaryIO, List
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_obj: BinaryIO, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    SHA-256 of a seekable file, read in chunks and rewound afterwards
+
+    Args:
+        file_obj: File to hash
+        chunk_size: Bytes to read at a time
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+# S3 additional checksums that can be computed without the AWS CRT extension
+CHECKSUM_ALGORITHMS = ("CRC32", "SHA256")
+
+
+class ChecksumMismatch(Exception):
+    """A stored object does not match the checksums its data was sent with"""
+
+
+class Checksum:
+    """
+    Incremental S3 additional checksum (CRC32 or SHA-256) of a byte stream.
+
+    Fed chunk by chunk as data arrives, so the bytes are never read twice.
+    """
+
+    def __init__(self, algorithm: str):
+        if algorithm not in CHECKSUM_ALGORITHMS:
+            raise ValueError(f"Unsupported checksum algorithm {algorithm}")
+        self.algorithm = algorithm
+        self._sha256 = hashlib.sha256() if algorithm == "SHA256" else None
+        self._crc = 0
+
+    @property
+    def member(self) -> str:
+        """Name of the S3 request/response field carrying the checksum, e.g. ChecksumCRC32"""
+        return f"Checksum{self.algorithm}"
+
+    def update(self, data: bytes) -> None:
+        if self._sha256 is not None:
+            self._sha256.update(data)
+        else:
+            self._crc = zlib.crc32(data, self._crc)
+
+    def digest(self) -> bytes:
+        if self._sha256 is not None:
+            return self._sha256.digest()
+        return self._crc.to_bytes(4, "big")
+
+    def b64digest(self) -> str:
+        """The checksum as S3 expects and returns it"""
+        return base64.b64encode(self.digest()).decode()
+
+
+def composite_checksum(algorithm: str, part_checksums: List[str]) -> str:
+    """
+    S3's checksum of a multipart object: the checksum of its parts' checksums
+
+    Args:
+        algorithm: Checksum algorithm of the upload
+        part_checksums: Base64 checksum of each part, in part order
+
+    Returns:
+        Base64 checksum followed by -<part count>, as S3 reports it
+    """
+    checksum = Checksum(algorithm)
+    for part_checksum in part_checksums:
+        checksum.update(base64.b64decode(part_checksum))
+    return f"{checksum.b64digest()}-{len(part_checksums)}"
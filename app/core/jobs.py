@@ -0,0 +1,324 @@
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    payload TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    run_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_expires_at REAL,
+    worker TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, run_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_video ON jobs (video_id, created_at);
+"""
+
+COLUMNS = (
+    "id", "kind", "video_id", "payload", "status", "attempts", "max_attempts", "result", "error",
+    "created_at", "run_at", "started_at", "finished_at",
+)
+
+
+@dataclass
+class Job:
+    """A unit of background work, such as transcoding one video"""
+    id: str
+    kind: str
+    video_id: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    status: str = QUEUED
+    attempts: int = 0
+    max_attempts: int = settings.JOB_MAX_ATTEMPTS
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    # Earliest time the job may (re)start; pushed back after each failure
+    run_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+# Handlers receive the job and return a short result (e.g. an S3 key) or None
+JobHandler = Callable[[Job], Optional[str]]
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Exponential backoff with full jitter before retrying a job
+
+    Args:
+        attempts: Attempts made so far
+
+    Returns:
+        Seconds to wait
+    """
+    ceiling = min(settings.JOB_RETRY_MAX_SECONDS, settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class JobQueue:
+    """
+    Durable job queue backed by SQLite.
+
+    The API enqueues and reads status; worker processes (see worker.py) claim
+    jobs with a lease. A job whose worker dies is claimed again once its lease
+    expires, and failed attempts are retried with backoff up to max_attempts.
+    Several processes can share one database file.
+    """
+
+    def __init__(self, path: str = settings.JOB_DB_PATH):
+        # Workers in other processes write to the same file; wait for their
+        # transactions instead of failing with "database is locked"
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def enqueue(
+        self,
+        kind: str,
+        video_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        max_attempts: int = settings.JOB_MAX_ATTEMPTS
+    ) -> Job:
+        """
+        Queue a job
+
+        Args:
+            kind: Job kind, matching a handler registered with the workers
+            video_id: Video the job works on
+            payload: JSON-serializable arguments for the handler
+            max_attempts: Attempts before the job is marked failed
+
+        Returns:
+            The queued job
+        """
+        job = Job(id=str(uuid.uuid4()), kind=kind, video_id=video_id, payload=payload or {}, max_attempts=max_attempts)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})",
+                self._row(job),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def list_for_video(self, video_id: str) -> List[Job]:
+        """Jobs for a video, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE video_id = ? ORDER BY created_at, id", (video_id,)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def list(self, status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Most recent jobs, optionally filtered by status and kind"""
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs {where}ORDER BY created_at DESC, id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def claim(self, kinds: List[str], worker: str, lease_seconds: float = settings.JOB_LEASE_SECONDS) -> Optional[Job]:
+        """
+        Atomically take the next ready job, or one whose lease has expired
+
+        Args:
+            kinds: Job kinds this worker can run
+            worker: Identifier of the claiming worker, for diagnostics
+            lease_seconds: How long the job is reserved for this worker
+
+        Returns:
+            The claimed job, now running, or None if nothing is ready
+        """
+        if not kinds:
+            return None
+        now = time.time()
+        placeholders = ", ".join("?" for _ in kinds)
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, finished_at = NULL, "
+                f"lease_expires_at = ?, worker = ? "
+                f"WHERE id = (SELECT id FROM jobs WHERE kind IN ({placeholders}) AND ("
+                f"(status = ? AND run_at <= ?) OR (status = ? AND lease_expires_at < ?)"
+                f") ORDER BY run_at LIMIT 1) "
+                f"RETURNING {', '.join(COLUMNS)}",
+                (RUNNING, now, now + lease_seconds, worker, *kinds, QUEUED, now, RUNNING, now),
+            ).fetchall()
+        return self._job(rows[0]) if rows else None
+
+    def complete(self, job_id: str, result: Optional[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, finished_at = ?, lease_expires_at = NULL "
+                "WHERE id = ?",
+                (SUCCEEDED, result, time.time(), job_id),
+            )
+
+    def fail(self, job: Job, error: str) -> Job:
+        """
+        Record a failed attempt, scheduling a retry if attempts remain
+
+        Returns:
+            The job as updated
+        """
+        now = time.time()
+        if job.attempts < job.max_attempts:
+            status, run_at = QUEUED, now + retry_delay(job.attempts)
+        else:
+            status, run_at = FAILED, job.run_at
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, run_at = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE id = ?",
+                (status, error, run_at, now, job.id),
+            )
+        return self.get(job.id)
+
+    def retry(self, job_id: str) -> Optional[Job]:
+        """Queue a failed job again with a fresh set of attempts"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, run_at = ?, error = NULL WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, FAILED),
+            )
+        return self.get(job_id)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row(job: Job) -> tuple:
+        return tuple(
+            json.dumps(job.payload) if column == "payload" else getattr(job, column) for column in COLUMNS
+        )
+
+    @staticmethod
+    def _job(row: tuple) -> Job:
+        values = dict(zip(COLUMNS, row))
+        values["payload"] = json.loads(values["payload"])
+        return Job(**values)
+
+
+class JobWorker:
+    """
+    Threads that claim jobs from a JobQueue and run the registered handlers.
+
+    Heavy work happens in ffmpeg subprocesses, so a few threads per process
+    keep the CPU busy; run several processes (worker.py) to scale further.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        threads: int = settings.JOB_WORKER_THREADS,
+        poll_interval: float = settings.JOB_POLL_INTERVAL_SECONDS
+    ):
+        self.queue = queue
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._threads: List[threading.Thread] = []
+        self._stopping = threading.Event()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Run `handler` for jobs of type `kind`"""
+        self._handlers[kind] = handler
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        self._stopping.clear()
+        for index in range(self.threads - len(self._threads)):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the threads once they finish their current job"""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_once(self) -> Optional[Job]:
+        """
+        Claim and run a single job, if one is ready
+
+        Returns:
+            The job as finished, or None if there was nothing to do
+        """
+        job = self.queue.claim(list(self._handlers), f"{self.name}:{threading.current_thread().name}")
+        if job is None:
+            return None
+        if job.attempts > job.max_attempts:
+            # Claimed again after its lease expired more often than it may run:
+            # it keeps killing or hanging its worker
+            return self.queue.fail(job, job.error or "Job lease expired too many times")
+        try:
+            result = self._handlers[job.kind](job)
+        except Exception as e:
+            job = self.queue.fail(job, str(e))
+            if job.status == FAILED:
+                logger.error(f"{job.kind} job {job.id} for video {job.video_id} failed for good: {str(e)}")
+            else:
+                logger.warning(
+                    f"{job.kind} job {job.id} for video {job.video_id} failed (attempt {job.attempts} "
+                    f"of {job.max_attempts}), retrying in {job.run_at - time.time():.0f}s: {str(e)}"
+                )
+            return job
+        self.queue.complete(job.id, result)
+        logger.info(f"{job.kind} job {job.id} for video {job.video_id} succeeded")
+        return self.queue.get(job.id)
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                ran = self.run_once() is not None
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+                ran = False
+            if not ran:
+                self._stopping.wait(self.poll_interval)
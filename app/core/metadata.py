@@ -0,0 +1,321 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    original_filename TEXT,
+    size INTEGER,
+    content_type TEXT,
+    extension TEXT NOT NULL,
+    etag TEXT,
+    created_at REAL NOT NULL,
+    sha256 TEXT,
+    playlist_key TEXT,
+    poster_key TEXT,
+    thumbnail_track_key TEXT,
+    container TEXT,
+    duration REAL,
+    width INTEGER,
+    height INTEGER,
+    video_codec TEXT,
+    audio_codec TEXT,
+    bitrate INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_videos_created_at ON videos (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_videos_size ON videos (IFNULL(size, -1), id);
+CREATE INDEX IF NOT EXISTS idx_videos_title ON videos (title);
+"""
+
+# Indexes on columns that older databases gain through MIGRATIONS
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_videos_key ON videos (key);
+CREATE INDEX IF NOT EXISTS idx_videos_sha256 ON videos (sha256);
+"""
+
+# Columns added since the table was first created
+MIGRATIONS = {
+    "sha256": "ALTER TABLE videos ADD COLUMN sha256 TEXT",
+    "playlist_key": "ALTER TABLE videos ADD COLUMN playlist_key TEXT",
+    "poster_key": "ALTER TABLE videos ADD COLUMN poster_key TEXT",
+    "thumbnail_track_key": "ALTER TABLE videos ADD COLUMN thumbnail_track_key TEXT",
+    "container": "ALTER TABLE videos ADD COLUMN container TEXT",
+    "duration": "ALTER TABLE videos ADD COLUMN duration REAL",
+    "width": "ALTER TABLE videos ADD COLUMN width INTEGER",
+    "height": "ALTER TABLE videos ADD COLUMN height INTEGER",
+    "video_codec": "ALTER TABLE videos ADD COLUMN video_codec TEXT",
+    "audio_codec": "ALTER TABLE videos ADD COLUMN audio_codec TEXT",
+    "bitrate": "ALTER TABLE videos ADD COLUMN bitrate INTEGER",
+}
+
+COLUMNS = (
+    "id", "key", "title", "description", "original_filename", "size",
+    "content_type", "extension", "etag", "created_at", "sha256",
+    "playlist_key", "poster_key", "thumbnail_track_key",
+    "container", "duration", "width", "height", "video_codec", "audio_codec", "bitrate",
+)
+
+# Sortable fields and the indexed expression each one orders by
+SORT_EXPRESSIONS = {
+    "created_at": "created_at",
+    "size": "IFNULL(size, -1)",
+}
+
+
+@dataclass
+class VideoRecord:
+    """Metadata stored for an uploaded video"""
+    id: str
+    key: str
+    title: str
+    description: str = ""
+    original_filename: Optional[str] = None
+    size: Optional[int] = None
+    content_type: Optional[str] = None
+    extension: str = "mp4"
+    etag: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    # SHA-256 of the content, recorded when uploads are deduplicated
+    sha256: Optional[str] = None
+    # HLS master playlist, once the video has been transcoded
+    playlist_key: Optional[str] = None
+    # Poster frame and WebVTT seek-preview track, once extracted
+    poster_key: Optional[str] = None
+    thumbnail_track_key: Optional[str] = None
+    # Read from the container headers at upload time (see app/core/probe.py)
+    container: Optional[str] = None
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    bitrate: Optional[int] = None
+
+
+def sort_key(record: VideoRecord, sort: str) -> Tuple[Any, str]:
+    """Position of a record in a listing sorted by `sort`, for use as `after`"""
+    if sort == "size":
+        return (record.size if record.size is not None else -1, record.id)
+    return (record.created_at, record.id)
+
+
+class VideoRepository(ABC):
+    """Interface for video metadata storage"""
+
+    @abstractmethod
+    def add(self, record: VideoRecord) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, video_id: str) -> Optional[VideoRecord]:
+        ...
+
+    @abstractmethod
+    def get_many(self, video_ids: List[str]) -> Dict[str, VideoRecord]:
+        ...
+
+    @abstractmethod
+    def list(
+        self,
+        sort: str = "created_at",
+        descending: bool = True,
+        limit: int = 20,
+        after: Optional[Tuple[Any, str]] = None,
+        title_prefix: Optional[str] = None,
+    ) -> List[VideoRecord]:
+        ...
+
+    @abstractmethod
+    def find_by_hash(self, sha256: str) -> Optional[VideoRecord]:
+        ...
+
+    @abstractmethod
+    def reference_counts(self, keys: List[str]) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    def set_playlist(self, key: str, playlist_key: str) -> None:
+        ...
+
+    @abstractmethod
+    def set_thumbnails(self, key: str, poster_key: str, thumbnail_track_key: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, video_id: str) -> None:
+        ...
+
+    def delete_many(self, video_ids: List[str]) -> None:
+        for video_id in video_ids:
+            self.delete(video_id)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteVideoRepository(VideoRepository):
+    """
+    Video metadata stored in SQLite, keyed by video ID.
+
+    Lookups are a primary-key read on a local file, cheap enough to run
+    directly from request handlers without a round trip to S3.
+    """
+
+    def __init__(self, path: str = settings.METADATA_DB_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(videos)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in existing:
+                self._conn.execute(statement)
+        self._conn.executescript(INDEXES)
+        self._lock = threading.Lock()
+
+    def add(self, record: VideoRecord) -> None:
+        self.add_many([record])
+
+    def add_many(self, records: Iterable[VideoRecord]) -> None:
+        """Insert or replace records in a single transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO videos ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                (tuple(getattr(record, column) for column in COLUMNS) for record in records),
+            )
+
+    def get(self, video_id: str) -> Optional[VideoRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM videos WHERE id = ?", (video_id,)
+            ).fetchone()
+        return VideoRecord(*row) if row is not None else None
+
+    def get_many(self, video_ids: List[str]) -> Dict[str, VideoRecord]:
+        """Look up several videos at once; missing IDs are left out"""
+        records: Dict[str, VideoRecord] = {}
+        ids = list(dict.fromkeys(video_ids))
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters per statement
+            for offset in range(0, len(ids), 500):
+                batch = ids[offset:offset + 500]
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM videos "
+                    f"WHERE id IN ({', '.join('?' for _ in batch)})",
+                    batch,
+                ).fetchall()
+                for row in rows:
+                    record = VideoRecord(*row)
+                    records[record.id] = record
+        return records
+
+    def list(
+        self,
+        sort: str = "created_at",
+        descending: bool = True,
+        limit: int = 20,
+        after: Optional[Tuple[Any, str]] = None,
+        title_prefix: Optional[str] = None,
+    ) -> List[VideoRecord]:
+        """
+        One page of videos, using keyset pagination.
+
+        Pages continue from the (sort value, id) of the last record seen
+        instead of an OFFSET, so each page is an index range scan and costs
+        the same however deep into the catalog it is.
+
+        Args:
+            sort: Field to order by, one of SORT_EXPRESSIONS
+            descending: Order from largest to smallest
+            limit: Maximum number of records to return
+            after: sort_key() of the last record on the previous page
+            title_prefix: Only return videos whose title starts with this
+
+        Returns:
+            Records in page order
+        """
+        if sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"Cannot sort videos by {sort}")
+        expression = SORT_EXPRESSIONS[sort]
+        direction = "DESC" if descending else "ASC"
+
+        clauses = []
+        params: List[Any] = []
+        if title_prefix:
+            # Range form of a prefix match, which can use idx_videos_title
+            clauses.append("title >= ? AND title < ?")
+            params += [title_prefix, title_prefix + "\U0010ffff"]
+        if after is not None:
+            # Spelled out rather than as a row value so that SQLite can also
+            # range-scan the expression index used for size
+            op = "<" if descending else ">"
+            clauses.append(f"{expression} {op}= ? AND ({expression} {op} ? OR id {op} ?)")
+            params += [after[0], after[0], after[1]]
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM videos {where}"
+                f"ORDER BY {expression} {direction}, id {direction} LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [VideoRecord(*row) for row in rows]
+
+    def find_by_hash(self, sha256: str) -> Optional[VideoRecord]:
+        """A video whose content has this SHA-256, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM videos WHERE sha256 = ? LIMIT 1", (sha256,)
+            ).fetchone()
+        return VideoRecord(*row) if row is not None else None
+
+    def reference_counts(self, keys: List[str]) -> Dict[str, int]:
+        """
+        Number of videos pointing at each S3 key. Deduplicated uploads share
+        a key, so an object may only be deleted once its count drops to zero
+        """
+        counts = {key: 0 for key in keys}
+        unique = list(counts)
+        with self._lock:
+            for offset in range(0, len(unique), 500):
+                batch = unique[offset:offset + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, COUNT(*) FROM videos WHERE key IN ({', '.join('?' for _ in batch)}) GROUP BY key",
+                    batch,
+                ).fetchall()
+                counts.update(rows)
+        return counts
+
+    def set_playlist(self, key: str, playlist_key: str) -> None:
+        """Record the master playlist of every video stored under `key`"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE videos SET playlist_key = ? WHERE key = ?", (playlist_key, key))
+
+    def set_thumbnails(self, key: str, poster_key: str, thumbnail_track_key: str) -> None:
+        """Record the poster and thumbnail track of every video stored under `key`"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE videos SET poster_key = ?, thumbnail_track_key = ? WHERE key = ?",
+                (poster_key, thumbnail_track_key, key)
+            )
+
+    def delete(self, video_id: str) -> None:
+        self.delete_many([video_id])
+
+    def delete_many(self, video_ids: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM videos WHERE id = ?", ((video_id,) for video_id in video_ids))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
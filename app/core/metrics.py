@@ -0,0 +1,317 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Latency buckets in seconds, from a cached lookup to a large upload
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class CounterValue:
+    """A single counter series"""
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class GaugeValue(CounterValue):
+    """A single gauge series"""
+    __slots__ = ()
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class HistogramValue:
+    """A single histogram series: a count per bucket plus the sum of observations"""
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket, plus +Inf; cumulated only when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric(ABC):
+    """
+    A metric family: one series per combination of label values.
+
+    Series are created on first use and reused afterwards, so hot paths that
+    hold on to the result of labels() only take a lock and add a number.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str) -> Any:
+        """The series for these label values, in labelnames order"""
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                series = self._series.setdefault(values, self._new_series())
+        return series
+
+    @abstractmethod
+    def _new_series(self) -> Any:
+        ...
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        ...
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return sorted(self._series.items())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_series(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{format_labels(self.labelnames, values)} {format_value(series.value)}"
+            for values, series in self._items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_series(self) -> GaugeValue:
+        return GaugeValue()
+
+    def dec(self, amount: float = 1) -> None:
+        self._default.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_series(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for values, series in self._items():
+            with series._lock:
+                counts, total = list(series.counts), series.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = format_labels(self.labelnames + ("le",), values + (format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics exposed together at /metrics"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request, by route template",
+    ("method", "route", "status"),
+))
+S3_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "s3_request_duration_seconds", "Latency of S3 API calls, including retries",
+    ("operation",),
+))
+S3_ERRORS = REGISTRY.register(Counter(
+    "s3_errors_total", "S3 API calls that failed, by error code",
+    ("operation", "code"),
+))
+S3_TRANSFER_DURATION = REGISTRY.register(Histogram(
+    "s3_transfer_duration_seconds", "Duration of managed transfers (upload_fileobj, upload_file, download_file)",
+    ("operation",),
+))
+UPLOAD_BYTES = REGISTRY.register(Counter(
+    "video_upload_bytes_total", "Bytes of video sent to S3; rate() gives upload bytes/sec",
+))
+UPLOADS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "video_uploads_in_flight", "Uploads currently being received or sent to S3",
+))
+UPLOADS = REGISTRY.register(Counter(
+    "video_uploads_total", "Finished uploads, by outcome",
+    ("status",),
+))
+UPLOAD_CHECKSUM_MISMATCHES = REGISTRY.register(Counter(
+    "video_upload_checksum_mismatches_total",
+    "Multipart uploads whose assembled object did not match the checksums of the parts sent",
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    "cache_requests_total", "Cache lookups by cache and result; hit rate is hit / (hit + miss)",
+    ("cache", "result"),
+))
+
+
+def s3_operation_name(operation: str) -> str:
+    """boto's snake_case name of an API operation, e.g. HeadObject -> head_object"""
+    return "".join(f"_{char.lower()}" if char.isupper() else char for char in operation).lstrip("_")
+
+
+def instrument_boto_client(boto_client: Any) -> None:
+    """
+    Record the latency and errors of every call made by a boto3 client,
+    including the ones s3transfer makes for multipart uploads
+    """
+    durations: Dict[str, HistogramValue] = {}
+
+    def series(model: Any) -> HistogramValue:
+        histogram = durations.get(model.name)
+        if histogram is None:
+            histogram = durations.setdefault(model.name, S3_REQUEST_DURATION.labels(s3_operation_name(model.name)))
+        return histogram
+
+    def before_call(context: Dict[str, Any], **kwargs) -> None:
+        context["metrics_start"] = time.perf_counter()
+
+    def after_call(http_response: Any, parsed: Dict[str, Any], model: Any, context: Dict[str, Any], **kwargs) -> None:
+        start = context.get("metrics_start")
+        if start is not None:
+            series(model).observe(time.perf_counter() - start)
+        if http_response.status_code >= 300:
+            code = parsed.get("Error", {}).get("Code") or str(http_response.status_code)
+            S3_ERRORS.labels(s3_operation_name(model.name), code).inc()
+
+    def after_call_error(exception: Exception, context: Dict[str, Any], **kwargs) -> None:
+        operation = kwargs.get("event_name", "").rsplit(".", 1)[-1]
+        S3_ERRORS.labels(s3_operation_name(operation), type(exception).__name__).inc()
+
+    events = boto_client.meta.events
+    # Emitted for every call, even ones answered by an earlier before-call
+    # handler (e.g. a Stubber), which would skip a before-call hook of ours
+    events.register("before-parameter-build.s3.*", before_call)
+    events.register("after-call.s3.*", after_call)
+    events.register("after-call-error.s3.*", after_call_error)
+
+
+@contextmanager
+def track_transfer(operation: str) -> Iterator[None]:
+    """Time a managed transfer and count it as an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        code = getattr(e, "response", {}).get("Error", {}).get("Code") or type(e).__name__
+        S3_ERRORS.labels(operation, code).inc()
+        raise
+    finally:
+        S3_TRANSFER_DURATION.labels(operation).observe(time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request by method, route template and
+    status. Using the template (/videos/{video_id}) rather than the path keeps
+    the number of series bounded.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status[0])
+            ).observe(time.perf_counter() - start)
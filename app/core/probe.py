@@ -0,0 +1,470 @@
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+MB = 1024 * 1024
+
+# Bytes read at a time when probing a seekable file
+PROBE_READ_SIZE = 64 * 1024
+
+# Top-level MP4/QuickTime boxes that may start a file
+MP4_TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"styp", b"uuid"}
+MP4_CAPTURE = {b"ftyp", b"moov"}
+
+# Matroska/WebM element IDs (with their length marker bits, as written)
+EBML_HEADER = 0x1A45DFA3
+EBML_DOCTYPE = 0x4282
+SEGMENT = 0x18538067
+CLUSTER = 0x1F43B675
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_TYPE = 0x83
+CODEC_ID = 0x86
+VIDEO = 0xE0
+PIXEL_WIDTH = 0xB0
+PIXEL_HEIGHT = 0xBA
+EBML_CAPTURE = {EBML_HEADER, INFO, TRACKS}
+
+MP4_CODECS = {
+    "avc1": "h264", "avc3": "h264", "hvc1": "hevc", "hev1": "hevc", "av01": "av1", "vp09": "vp9",
+    "mp4v": "mpeg4", "mp4a": "aac", "Opus": "opus", "ac-3": "ac3", "ec-3": "eac3", ".mp3": "mp3",
+    "fLaC": "flac",
+}
+MATROSKA_CODECS = {
+    "V_MPEG4/ISO/AVC": "h264", "V_MPEGH/ISO/HEVC": "hevc", "V_AV1": "av1", "V_VP8": "vp8", "V_VP9": "vp9",
+    "A_OPUS": "opus", "A_VORBIS": "vorbis", "A_AAC": "aac", "A_MPEG/L3": "mp3", "A_FLAC": "flac",
+}
+
+
+@dataclass
+class MediaInfo:
+    """Container and stream properties read from a video's headers"""
+    container: str
+    mime_type: str
+    extension: str
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    bitrate: Optional[int] = None
+    # MP4 only: whether the moov box precedes the media data, so playback
+    # can start before the whole file has arrived
+    faststart: Optional[bool] = None
+
+
+class MediaProbe:
+    """
+    Incremental container sniffer for MP4/QuickTime and Matroska/WebM.
+
+    Bytes are fed in as they stream past, and only the headers that matter
+    are kept: the ftyp and moov boxes of an MP4 (wherever moov sits), or the
+    EBML header, Info and Tracks of a WebM. Media data is counted and
+    discarded, so memory is bounded by the header size whatever the file
+    size. On a seekable file, probe_file() skips media data without reading it.
+    """
+
+    def __init__(self, max_header_bytes: int = settings.MEDIA_PROBE_MAX_HEADER_MB * MB):
+        self.max_header_bytes = max_header_bytes
+        self.format: Optional[str] = None
+        self.done = False
+        self.failed = False
+        self.total_bytes = 0
+        self.elements: Dict[object, bytes] = {}
+        self.positions: Dict[object, int] = {}
+        self._position = 0
+        self._buffer = b""
+        self._skip = 0
+        self._capture_id: object = None
+        self._capture_left = 0
+        self._capture = bytearray()
+
+    @property
+    def finished(self) -> bool:
+        return self.done or self.failed
+
+    @property
+    def pending_skip(self) -> int:
+        """Bytes the probe will discard next, which a seekable reader can jump over"""
+        return self._skip if not self.finished else 0
+
+    def skip(self, count: int) -> None:
+        """Account for `count` bytes of pending_skip that were skipped without being fed"""
+        count = min(count, self._skip)
+        self._skip -= count
+        self._position += count
+        self.total_bytes += count
+
+    def feed(self, data: bytes) -> None:
+        """
+        Process the next chunk of the stream
+
+        Args:
+            data: Bytes following those already fed
+        """
+        self.total_bytes += len(data)
+        if self.finished:
+            return
+        if self._buffer:
+            data = self._buffer + data
+            self._buffer = b""
+        view = memoryview(data)
+        base = self._position
+        pos = 0
+        end = len(view)
+        while pos < end and not self.finished:
+            if self._skip:
+                count = min(self._skip, end - pos)
+                self._skip -= count
+                pos += count
+            elif self._capture_left:
+                count = min(self._capture_left, end - pos)
+                self._capture += view[pos:pos + count]
+                self._capture_left -= count
+                pos += count
+                if not self._capture_left:
+                    self._captured()
+            else:
+                try:
+                    header = self._read_header(view, pos, end)
+                except ValueError:
+                    self.failed = True
+                    break
+                if header is None:
+                    # Keep the partial header for the next chunk; at most a few bytes
+                    self._buffer = bytes(view[pos:end])
+                    pos = end
+                    break
+                element, header_size, size = header
+                self._element(element, base + pos, size)
+                pos += header_size
+        self._position = base + pos - len(self._buffer)
+
+    def result(self, size: Optional[int] = None) -> Optional["MediaInfo"]:
+        """
+        Interpret the headers seen so far
+
+        Args:
+            size: Total size of the file, defaults to the bytes fed
+
+        Returns:
+            MediaInfo, or None if the stream is not a recognised container
+        """
+        size = size if size is not None else self.total_bytes
+        try:
+            if self.format == "mp4" and (b"ftyp" in self.elements or b"moov" in self.elements):
+                return parse_mp4(self.elements, self.positions, size)
+            if self.format == "ebml" and EBML_HEADER in self.elements:
+                return parse_matroska(self.elements, size)
+        except (IndexError, KeyError, ValueError, struct.error):
+            pass
+        return None
+
+    def _read_header(self, view: memoryview, pos: int, end: int) -> Optional[Tuple[object, int, Optional[int]]]:
+        if self.format is None:
+            if end - pos < 8:
+                return None
+            if bytes(view[pos:pos + 4]) == EBML_HEADER.to_bytes(4, "big"):
+                self.format = "ebml"
+            elif bytes(view[pos + 4:pos + 8]) in MP4_TOP_LEVEL:
+                self.format = "mp4"
+            else:
+                raise ValueError("Unrecognised container")
+        if self.format == "mp4":
+            return read_box_header(view, pos, end)
+        return read_element_header(view, pos, end)
+
+    def _element(self, element: object, offset: int, size: Optional[int]) -> None:
+        """Decide what to do with an element whose header ends at the current position"""
+        self.positions.setdefault(element, offset)
+        if self.format == "ebml":
+            if element == SEGMENT:
+                # Descend: Info and Tracks are children of the segment
+                return
+            if element == CLUSTER:
+                # Media data starts; every header we need comes before it
+                self.done = True
+                return
+        capture = MP4_CAPTURE if self.format == "mp4" else EBML_CAPTURE
+        if size is None:
+            # Runs to the end of the file: nothing after it to look for
+            if element in capture:
+                self._start_capture(element, self.max_header_bytes)
+            else:
+                self.done = True
+            return
+        if element in capture and element not in self.elements:
+            if size > self.max_header_bytes:
+                self.failed = True
+                return
+            self._start_capture(element, size)
+        else:
+            self._skip = size
+
+    def _start_capture(self, element: object, size: int) -> None:
+        self._capture_id = element
+        self._capture_left = size
+        self._capture = bytearray()
+        if not size:
+            self._captured()
+
+    def _captured(self) -> None:
+        self.elements[self._capture_id] = bytes(self._capture)
+        self._capture = bytearray()
+        if self.format == "mp4" and b"moov" in self.elements:
+            self.done = True
+        elif self.format == "ebml" and INFO in self.elements and TRACKS in self.elements:
+            self.done = True
+
+
+def read_box_header(view, pos: int, end: int) -> Optional[Tuple[bytes, int, Optional[int]]]:
+    """
+    Parse an MP4 box header
+
+    Returns:
+        Box type, header length and payload size (None when the box runs to
+        the end of the file), or None if more bytes are needed
+    """
+    if end - pos < 8:
+        return None
+    size, box_type = struct.unpack(">I4s", view[pos:pos + 8])
+    if size == 1:
+        if end - pos < 16:
+            return None
+        size = struct.unpack(">Q", view[pos + 8:pos + 16])[0]
+        header_size = 16
+    elif size == 0:
+        return box_type, 8, None
+    else:
+        header_size = 8
+    if size < header_size:
+        raise ValueError(f"Invalid size for box {box_type!r}")
+    return box_type, header_size, size - header_size
+
+
+def read_vint(view, pos: int, end: int, keep_marker: bool) -> Optional[Tuple[int, int]]:
+    """Read an EBML variable-length integer, returning (value, length)"""
+    if pos >= end:
+        return None
+    first = view[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer")
+    if end - pos < length:
+        return None
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in view[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    return value, length
+
+
+def read_element_header(view, pos: int, end: int) -> Optional[Tuple[int, int, Optional[int]]]:
+    """
+    Parse an EBML element header
+
+    Returns:
+        Element ID, header length and data size (None for unknown-size
+        elements), or None if more bytes are needed
+    """
+    element = read_vint(view, pos, end, keep_marker=True)
+    if element is None:
+        return None
+    size = read_vint(view, pos + element[1], end, keep_marker=False)
+    if size is None:
+        return None
+    unknown = size[0] == (1 << (7 * size[1])) - 1
+    return element[0], element[1] + size[1], None if unknown else size[0]
+
+
+def iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int]]:
+    """Child boxes of an MP4 payload, as (type, payload start, payload end)"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        header = read_box_header(data, pos, end)
+        if header is None:
+            return
+        box_type, header_size, size = header
+        payload_end = end if size is None else min(end, pos + header_size + size)
+        yield box_type, pos + header_size, payload_end
+        pos = payload_end
+
+
+def find_box(data: bytes, path: Tuple[bytes, ...], start: int = 0, end: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """Payload bounds of the first box at `path` below data[start:end]"""
+    for box_type, payload_start, payload_end in iter_boxes(data, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return payload_start, payload_end
+            found = find_box(data, path[1:], payload_start, payload_end)
+            if found is not None:
+                return found
+    return None
+
+
+def mp4_brand(ftyp: Optional[bytes]) -> Tuple[str, str, str]:
+    """Container name, MIME type and extension for an MP4 major brand"""
+    brand = ftyp[:4] if ftyp else b"qt  "
+    if brand == b"qt  ":
+        return "mov", "video/quicktime", "mov"
+    if brand.startswith(b"M4V"):
+        return "m4v", "video/x-m4v", "m4v"
+    if brand.startswith(b"3g2"):
+        return "3g2", "video/3gpp2", "3g2"
+    if brand.startswith(b"3gp"):
+        return "3gp", "video/3gpp", "3gp"
+    return "mp4", "video/mp4", "mp4"
+
+
+def full_box_times(data: bytes, start: int) -> Tuple[int, int]:
+    """Timescale and duration from an mvhd/mdhd payload"""
+    if data[start] == 1:
+        return struct.unpack(">IQ", data[start + 20:start + 32])
+    return struct.unpack(">II", data[start + 12:start + 20])
+
+
+def parse_mp4(elements: Dict[object, bytes], positions: Dict[object, int], size: int) -> MediaInfo:
+    container, mime_type, extension = mp4_brand(elements.get(b"ftyp"))
+    info = MediaInfo(container=container, mime_type=mime_type, extension=extension)
+    if b"moov" in positions:
+        # The probe stops at moov, so an unseen mdat comes after it
+        info.faststart = b"mdat" not in positions or positions[b"moov"] < positions[b"mdat"]
+
+    moov = elements.get(b"moov")
+    if moov is None:
+        return info
+    mvhd = find_box(moov, (b"mvhd",))
+    if mvhd is not None:
+        timescale, duration = full_box_times(moov, mvhd[0])
+        if timescale:
+            info.duration = duration / timescale
+
+    for box_type, trak_start, trak_end in iter_boxes(moov):
+        if box_type != b"trak":
+            continue
+        hdlr = find_box(moov, (b"mdia", b"hdlr"), trak_start, trak_end)
+        stsd = find_box(moov, (b"mdia", b"minf", b"stbl", b"stsd"), trak_start, trak_end)
+        if hdlr is None or stsd is None:
+            continue
+        handler = moov[hdlr[0] + 8:hdlr[0] + 12]
+        # stsd: version/flags and entry count, then the first sample entry box
+        entry = moov[stsd[0] + 12:stsd[0] + 16].decode("latin-1")
+        codec = MP4_CODECS.get(entry, entry.strip())
+        if handler == b"vide" and info.video_codec is None:
+            info.video_codec = codec
+            tkhd = find_box(moov, (b"tkhd",), trak_start, trak_end)
+            if tkhd is not None:
+                width, height = struct.unpack(">II", moov[tkhd[1] - 8:tkhd[1]])
+                info.width, info.height = width >> 16, height >> 16
+            if not info.width:
+                # Fall back to the visual sample entry's own dimensions
+                info.width, info.height = struct.unpack(">HH", moov[stsd[0] + 40:stsd[0] + 44])
+        elif handler == b"soun" and info.audio_codec is None:
+            info.audio_codec = codec
+
+    if info.duration:
+        info.bitrate = int(size * 8 / info.duration)
+    return info
+
+
+def iter_elements(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, int, int]]:
+    """Child elements of an EBML payload, as (ID, data start, data end)"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos < end:
+        header = read_element_header(data, pos, end)
+        if header is None:
+            return
+        element, header_size, size = header
+        data_end = end if size is None else min(end, pos + header_size + size)
+        yield element, pos + header_size, data_end
+        pos = data_end
+
+
+def ebml_uint(data: bytes, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], "big")
+
+
+def parse_matroska(elements: Dict[object, bytes], size: int) -> MediaInfo:
+    header = elements[EBML_HEADER]
+    doc_type = "matroska"
+    for element, start, end in iter_elements(header):
+        if element == EBML_DOCTYPE:
+            doc_type = header[start:end].rstrip(b"\x00").decode("ascii", "replace")
+    if doc_type == "webm":
+        info = MediaInfo(container="webm", mime_type="video/webm", extension="webm")
+    else:
+        info = MediaInfo(container="matroska", mime_type="video/x-matroska", extension="mkv")
+
+    segment_info = elements.get(INFO, b"")
+    scale, duration = 1000000, None
+    for element, start, end in iter_elements(segment_info):
+        if element == TIMECODE_SCALE:
+            scale = ebml_uint(segment_info, start, end)
+        elif element == DURATION:
+            duration = struct.unpack(">f" if end - start == 4 else ">d", segment_info[start:end])[0]
+    if duration:
+        info.duration = duration * scale / 1e9
+        info.bitrate = int(size * 8 / info.duration)
+
+    tracks = elements.get(TRACKS, b"")
+    for element, start, end in iter_elements(tracks):
+        if element != TRACK_ENTRY:
+            continue
+        track_type, codec, width, height = None, None, None, None
+        for child, child_start, child_end in iter_elements(tracks, start, end):
+            if child == TRACK_TYPE:
+                track_type = ebml_uint(tracks, child_start, child_end)
+            elif child == CODEC_ID:
+                codec_id = tracks[child_start:child_end].rstrip(b"\x00").decode("ascii", "replace")
+                codec = MATROSKA_CODECS.get(codec_id, codec_id)
+            elif child == VIDEO:
+                for video, video_start, video_end in iter_elements(tracks, child_start, child_end):
+                    if video == PIXEL_WIDTH:
+                        width = ebml_uint(tracks, video_start, video_end)
+                    elif video == PIXEL_HEIGHT:
+                        height = ebml_uint(tracks, video_start, video_end)
+        if track_type == 1 and info.video_codec is None:
+            info.video_codec, info.width, info.height = codec, width, height
+        elif track_type == 2 and info.audio_codec is None:
+            info.audio_codec = codec
+    return info
+
+
+def probe_file(file_obj: BinaryIO) -> Optional[MediaInfo]:
+    """
+    Probe a seekable file, reading only its headers: media data is skipped
+    with seek() instead of being read. The file is rewound afterwards
+
+    Args:
+        file_obj: Seekable binary file
+
+    Returns:
+        MediaInfo, or None if the file is not a recognised container
+    """
+    size = file_obj.seek(0, 2)
+    file_obj.seek(0)
+    probe = MediaProbe()
+    try:
+        while not probe.finished:
+            if probe.pending_skip:
+                count = min(probe.pending_skip, size - file_obj.tell())
+                if count <= 0:
+                    break
+                file_obj.seek(count, 1)
+                probe.skip(count)
+                continue
+            chunk = file_obj.read(PROBE_READ_SIZE)
+            if not chunk:
+                break
+            probe.feed(chunk)
+    finally:
+        file_obj.seek(0)
+    return probe.result(size)
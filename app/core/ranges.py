@@ -0,0 +1,152 @@
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+# An inclusive (first byte, last byte) pair, as in Content-Range
+ByteRange = Tuple[int, int]
+
+
+class RangeNotSatisfiable(ValueError):
+    """None of the requested ranges overlap the object"""
+
+
+def parse_range_header(header: str, size: int, max_ranges: int) -> Optional[List[ByteRange]]:
+    """
+    Parse a Range request header (RFC 9110 section 14.2)
+
+    Overlapping and adjacent ranges are merged, so the result is sorted and
+    never asks for the same byte twice.
+
+    Args:
+        header: Value of the Range header
+        size: Size of the object in bytes
+        max_ranges: Largest number of ranges accepted in one request
+
+    Returns:
+        Satisfiable ranges, or None if the header is malformed or asks for
+        too many ranges, in which case it should be ignored
+
+    Raises:
+        RangeNotSatisfiable: If the header is valid but no range overlaps the object
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+
+    specs = spec.split(",")
+    if len(specs) > max_ranges:
+        return None
+
+    ranges: List[ByteRange] = []
+    for item in specs:
+        first, dash, last = item.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if not first:
+                # Suffix range: the last N bytes
+                length = int(last)
+                if length < 0:
+                    return None
+                if length == 0 or size == 0:
+                    continue
+                ranges.append((max(0, size - length), size - 1))
+                continue
+            start = int(first)
+            end = int(last) if last else size - 1
+        except ValueError:
+            return None
+        if start < 0 or (last and end < start):
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+
+    if not ranges:
+        raise RangeNotSatisfiable(f"bytes */{size}")
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_matches(if_range: str, etag: Optional[str], last_modified: Optional[str]) -> bool:
+    """
+    Evaluate an If-Range precondition
+
+    Args:
+        if_range: Value of the If-Range header: an entity tag or an HTTP date
+        etag: Current ETag of the object
+        last_modified: Current Last-Modified of the object, as an HTTP date
+
+    Returns:
+        True if the Range header should be honoured, False if the full object
+        should be sent instead
+    """
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        # Strong comparison: the ETag must match exactly
+        return etag is not None and not etag.startswith("W/") and if_range == etag
+    if if_range.startswith("W/"):
+        return False
+    return last_modified is not None and if_range == last_modified
+
+
+@dataclass
+class MultipartByteranges:
+    """
+    Body layout of a multipart/byteranges response, used to compute its
+    Content-Length up front and stream it without buffering
+    """
+    ranges: List[ByteRange]
+    size: int
+    content_type: str
+    boundary: str = ""
+
+    def __post_init__(self) -> None:
+        if not self.boundary:
+            self.boundary = uuid.uuid4().hex
+
+    @property
+    def media_type(self) -> str:
+        return f"multipart/byteranges; boundary={self.boundary}"
+
+    def part_header(self, byte_range: ByteRange) -> bytes:
+        start, end = byte_range
+        return (
+            f"--{self.boundary}\r\n"
+            f"Content-Type: {self.content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{self.size}\r\n\r\n"
+        ).encode("latin-1")
+
+    @property
+    def trailer(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode("latin-1")
+
+    @property
+    def content_length(self) -> int:
+        length = len(self.trailer)
+        for byte_range in self.ranges:
+            # Header, the bytes themselves, then the CRLF that ends the part
+            length += len(self.part_header(byte_range)) + byte_range[1] - byte_range[0] + 1 + 2
+        return length
+
+    async def stream(self, read_range: Callable[[int, int], AsyncIterator[bytes]]) -> AsyncIterator[bytes]:
+        """
+        Yield the body
+
+        Args:
+            read_range: Returns an iterator over the bytes of an inclusive range
+        """
+        for byte_range in self.ranges:
+            yield self.part_header(byte_range)
+            async for chunk in read_range(*byte_range):
+                yield chunk
+            yield b"\r\n"
+        yield self.trailer
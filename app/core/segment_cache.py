@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, REGISTRY, Counter, Gauge
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+SEGMENT_HITS = CACHE_REQUESTS.labels("segment", "hit")
+SEGMENT_MISSES = CACHE_REQUESTS.labels("segment", "miss")
+# Misses that waited for another request's fetch of the same segment
+SEGMENT_COALESCED = CACHE_REQUESTS.labels("segment", "coalesced")
+SEGMENT_BYTES_SAVED = REGISTRY.register(Counter(
+    "segment_cache_bytes_saved_total", "Bytes served from the disk segment cache instead of the origin",
+))
+SEGMENT_CACHE_BYTES = REGISTRY.register(Gauge(
+    "segment_cache_bytes", "Bytes held by the disk segment cache",
+))
+
+# (digest of key and ETag, segment index)
+SegmentId = Tuple[str, int]
+
+
+class SegmentCache:
+    """
+    Size-bounded, disk-backed cache of fixed-size object segments.
+
+    Segments are keyed by (key, ETag, index), so a replaced object can never
+    be served from stale segments; old ones simply age out. Eviction is least
+    recently used. Concurrent misses on the same segment share one fetch from
+    the origin. Cached segments are read through memory maps.
+
+    The size bound is per process: workers sharing a directory each track the
+    segments they have seen, and a segment another worker evicted is a miss.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = settings.SEGMENT_CACHE_MAX_MB * MB,
+        segment_size: int = settings.SEGMENT_CACHE_SEGMENT_MB * MB,
+        read_ahead: int = settings.SEGMENT_CACHE_READ_AHEAD
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_size = segment_size
+        # Segments fetched ahead of a sequential reader
+        self.read_ahead = read_ahead
+        self._segments: "OrderedDict[SegmentId, int]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._fetches = SingleFlight("segment_cache")
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def segment_id(self, key: str, etag: str, index: int) -> SegmentId:
+        return hashlib.sha256(f"{etag}\0{key}".encode()).hexdigest(), index
+
+    def _path(self, segment: SegmentId) -> str:
+        digest, index = segment
+        return os.path.join(self.directory, digest[:2], digest, str(index))
+
+    def _load_index(self) -> None:
+        """Pick up segments left by a previous run, oldest first"""
+        found = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not filename.isdigit():
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, (os.path.basename(dirpath), int(filename)), stat.st_size))
+        for _, segment, size in sorted(found):
+            self._segments[segment] = size
+            self._size += size
+        SEGMENT_CACHE_BYTES.set(self._size)
+        self._evict()
+
+    def contains(self, key: str, etag: str, index: int) -> bool:
+        with self._lock:
+            return self.segment_id(key, etag, index) in self._segments
+
+    def open(self, key: str, etag: str, index: int) -> Optional[mmap.mmap]:
+        """
+        Map a cached segment
+
+        Returns:
+            Read-only memory map of the segment (the caller closes it), or None on a miss
+        """
+        segment = self.segment_id(key, etag, index)
+        with self._lock:
+            if segment not in self._segments:
+                return None
+            self._segments.move_to_end(segment)
+        try:
+            with open(self._path(segment), "rb") as f:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Removed by another worker, or empty
+            self._forget(segment)
+            return None
+
+    def store(self, key: str, etag: str, index: int, data: bytes) -> None:
+        """Write a segment, evicting least recently used ones to stay within max_bytes"""
+        if not data or len(data) > self.max_bytes:
+            return
+        segment = self.segment_id(key, etag, index)
+        path = self._path(segment)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # Renamed into place, so concurrent readers see whole segments only
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Error writing segment cache: {str(e)}")
+            return
+        with self._lock:
+            self._size += len(data) - self._segments.pop(segment, 0)
+            self._segments[segment] = len(data)
+        self._evict()
+
+    def _forget(self, segment: SegmentId) -> None:
+        with self._lock:
+            self._size -= self._segments.pop(segment, 0)
+        SEGMENT_CACHE_BYTES.set(self._size)
+
+    def _evict(self) -> None:
+        while True:
+            with self._lock:
+                if self._size <= self.max_bytes or not self._segments:
+                    break
+                segment, size = self._segments.popitem(last=False)
+                self._size -= size
+            try:
+                os.unlink(self._path(segment))
+            except OSError:
+                pass
+        SEGMENT_CACHE_BYTES.set(self._size)
+
+    async def fetch(self, key: str, etag: str, index: int, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Fetch a missing segment from the origin and cache it. Concurrent calls
+        for the same segment wait for the first one's fetch instead of
+        issuing their own, and all see its result or error.
+
+        The fetch runs as its own task, so a viewer disconnecting doesn't
+        cancel it for the others.
+
+        Args:
+            key: Object key
+            etag: ETag of the object version to read
+            index: Segment index
+            load: Reads the segment from the origin
+
+        Returns:
+            The segment's bytes
+        """
+        segment = self.segment_id(key, etag, index)
+        (SEGMENT_COALESCED if segment in self._fetches else SEGMENT_MISSES).inc()
+        return await self._fetches.do(segment, lambda: self._fill(key, etag, index, load))
+
+    async def _fill(self, key: str, etag: str, index: int, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        data = await load()
+        await asyncio.get_running_loop().run_in_executor(None, self.store, key, etag, index, data)
+        return data
+
+    def record_hit(self, served_bytes: int) -> None:
+        """Count a segment read from disk, and the origin bytes it saved"""
+        SEGMENT_HITS.inc()
+        SEGMENT_BYTES_SAVED.inc(served_bytes)
+
+
+def build_segment_cache() -> Optional[SegmentCache]:
+    """
+    Create the segment cache configured in settings
+
+    Returns:
+        SegmentCache, or None when it is disabled
+    """
+    if not settings.SEGMENT_CACHE_ENABLED:
+        return None
+    directory = settings.SEGMENT_CACHE_DIR or os.path.join(tempfile.gettempdir(), "video-segment-cache")
+    return SegmentCache(directory)
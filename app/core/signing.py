@@ -0,0 +1,208 @@
+import base64
+import functools
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+SIGNATURE_HITS = CACHE_REQUESTS.labels("signature", "hit")
+SIGNATURE_MISSES = CACHE_REQUESTS.labels("signature", "miss")
+
+
+def cloudfront_b64(data: bytes) -> str:
+    """Base64 with the substitutions CloudFront expects in URLs and cookies"""
+    return base64.b64encode(data).decode().translate(str.maketrans("+=/", "-_~"))
+
+
+@functools.lru_cache(maxsize=4)
+def load_private_key(pem: bytes) -> Any:
+    """
+    Parse an RSA private key. Cached, since parsing costs far more than signing
+
+    Args:
+        pem: PEM-encoded key
+
+    Returns:
+        cryptography RSAPrivateKey
+    """
+    try:
+        from cryptography.hazmat.primitives import serialization
+    except ImportError as e:
+        raise RuntimeError("CloudFront signing is configured but the 'cryptography' package is not installed") from e
+    return serialization.load_pem_private_key(pem, password=None)
+
+
+class CloudFrontSigner:
+    """
+    Signs CloudFront URLs and cookies with a trusted key pair.
+
+    RSA signing dominates the cost, so signatures are cached by policy. Expiry
+    times are rounded up to `expiry_granularity` seconds, which makes every URL
+    signed within the same window share one policy document and hit the cache.
+    """
+
+    def __init__(
+        self,
+        key_pair_id: str,
+        private_key: Any,
+        expiry_seconds: int = settings.SIGNED_URL_EXPIRY_SECONDS,
+        expiry_granularity: int = settings.SIGNED_URL_EXPIRY_GRANULARITY_SECONDS,
+        cache_size: int = settings.SIGNED_URL_CACHE_SIZE,
+    ):
+        self.key_pair_id = key_pair_id
+        self.private_key = private_key
+        self.expiry_seconds = expiry_seconds
+        self.expiry_granularity = max(1, expiry_granularity)
+        self.cache_size = cache_size
+        self._signatures: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def expires_at(self, expires_in: Optional[int] = None, now: Optional[float] = None) -> int:
+        """
+        Expiry time for a signature requested now
+
+        Args:
+            expires_in: Minimum lifetime in seconds, defaults to the configured one
+            now: Current time, for tests
+
+        Returns:
+            Epoch seconds, rounded up to the expiry granularity
+        """
+        now = time.time() if now is None else now
+        expires = now + (self.expiry_seconds if expires_in is None else expires_in)
+        return int(math.ceil(expires / self.expiry_granularity) * self.expiry_granularity)
+
+    @staticmethod
+    def canned_policy(url: str, expires: int) -> bytes:
+        # Must be byte-for-byte what CloudFront rebuilds from the URL: no whitespace
+        return (
+            '{"Statement":[{"Resource":"%s","Condition":{"DateLessThan":{"AWS:EpochTime":%d}}}]}'
+            % (url, expires)
+        ).encode()
+
+    @staticmethod
+    def custom_policy(resource: str, expires: int) -> bytes:
+        return json.dumps(
+            {"Statement": [{"Resource": resource, "Condition": {"DateLessThan": {"AWS:EpochTime": expires}}}]},
+            separators=(",", ":"),
+        ).encode()
+
+    def sign_policy(self, policy: bytes) -> str:
+        """
+        RSA-SHA1 signature of a policy, in CloudFront's base64 alphabet
+
+        Args:
+            policy: Policy document
+
+        Returns:
+            Encoded signature
+        """
+        with self._lock:
+            signature = self._signatures.get(policy)
+            if signature is not None:
+                self._signatures.move_to_end(policy)
+                SIGNATURE_HITS.inc()
+                return signature
+        SIGNATURE_MISSES.inc()
+
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        signature = cloudfront_b64(self.private_key.sign(policy, padding.PKCS1v15(), hashes.SHA1()))
+        with self._lock:
+            self._signatures[policy] = signature
+            while len(self._signatures) > self.cache_size:
+                self._signatures.popitem(last=False)
+        return signature
+
+    def sign_url(self, url: str, expires: Optional[int] = None) -> str:
+        """
+        Sign a single URL with a canned policy
+
+        Args:
+            url: CloudFront URL without a query string
+            expires: Epoch expiry, defaults to expires_at()
+
+        Returns:
+            Signed URL
+        """
+        expires = self.expires_at() if expires is None else expires
+        signature = self.sign_policy(self.canned_policy(url, expires))
+        return f"{url}?Expires={expires}&Signature={signature}&Key-Pair-Id={self.key_pair_id}"
+
+    def sign_urls(self, urls: List[str], expires: Optional[int] = None) -> List[str]:
+        """Sign a batch of URLs with a shared expiry"""
+        expires = self.expires_at() if expires is None else expires
+        return [self.sign_url(url, expires) for url in urls]
+
+    def sign_url_with_policy(self, url: str, resource: str, expires: Optional[int] = None) -> str:
+        """
+        Sign a URL with a custom policy covering `resource`, which may contain
+        wildcards. Every URL under the same resource reuses one signature
+
+        Args:
+            url: CloudFront URL without a query string
+            resource: URL pattern the policy grants, e.g. https://cdn/renditions/id/*
+            expires: Epoch expiry, defaults to expires_at()
+
+        Returns:
+            Signed URL
+        """
+        query = self.policy_params(resource, expires)
+        return (
+            f"{url}?Policy={query['Policy']}&Signature={query['Signature']}"
+            f"&Key-Pair-Id={query['Key-Pair-Id']}"
+        )
+
+    def policy_params(self, resource: str, expires: Optional[int] = None) -> Dict[str, str]:
+        """Policy, Signature and Key-Pair-Id for a custom policy over `resource`"""
+        expires = self.expires_at() if expires is None else expires
+        policy = self.custom_policy(resource, expires)
+        return {
+            "Policy": cloudfront_b64(policy),
+            "Signature": self.sign_policy(policy),
+            "Key-Pair-Id": self.key_pair_id,
+        }
+
+    def signed_cookies(self, resource: str, expires: Optional[int] = None) -> Tuple[Dict[str, str], int]:
+        """
+        CloudFront signed cookies granting access to `resource`
+
+        Args:
+            resource: URL pattern the cookies grant, may contain wildcards
+            expires: Epoch expiry, defaults to expires_at()
+
+        Returns:
+            Cookie names and values, and the expiry used
+        """
+        expires = self.expires_at() if expires is None else expires
+        params = self.policy_params(resource, expires)
+        return {
+            "CloudFront-Policy": params["Policy"],
+            "CloudFront-Signature": params["Signature"],
+            "CloudFront-Key-Pair-Id": params["Key-Pair-Id"],
+        }, expires
+
+
+def build_cloudfront_signer() -> Optional[CloudFrontSigner]:
+    """
+    Create the signer configured in settings
+
+    Returns:
+        CloudFrontSigner, or None when no key pair is configured
+    """
+    if not settings.CLOUDFRONT_KEY_PAIR_ID:
+        return None
+    if settings.CLOUDFRONT_PRIVATE_KEY:
+        pem = settings.CLOUDFRONT_PRIVATE_KEY.encode()
+    elif settings.CLOUDFRONT_PRIVATE_KEY_PATH:
+        with open(settings.CLOUDFRONT_PRIVATE_KEY_PATH, "rb") as key_file:
+            pem = key_file.read()
+    else:
+        raise RuntimeError("CLOUDFRONT_KEY_PAIR_ID is set but no private key is configured")
+    return CloudFrontSigner(settings.CLOUDFRONT_KEY_PAIR_ID, load_private_key(pem))
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from app.core.metrics import REGISTRY, Counter
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = REGISTRY.register(Counter(
+    "singleflight_calls_total", "Coalesced lookups: 'leader' calls reach the backend, 'shared' ones wait for a leader",
+    ("name", "role"),
+))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one.
+
+    The first caller for a key starts the call; callers that arrive while it
+    is in flight wait for it and get the same result or exception. Nothing is
+    remembered once it finishes, so this adds no staleness of its own. The
+    call runs as a separate task: a waiter that is cancelled or times out
+    leaves it running for the others.
+    """
+
+    def __init__(self, name: str):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._leaders = SINGLEFLIGHT_CALLS.labels(name, "leader")
+        self._shared = SINGLEFLIGHT_CALLS.labels(name, "shared")
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """
+        Run call(), or wait for the in-flight call with the same key
+
+        Args:
+            key: Identifies calls that can share a result
+            call: Starts the call when none is in flight
+            timeout: Seconds this caller waits, or None to wait for the result
+
+        Returns:
+            The call's result
+
+        Raises:
+            asyncio.TimeoutError: If the result takes longer than timeout
+        """
+        task = self._calls.get(key)
+        if task is not None and task.get_loop() is not asyncio.get_running_loop():
+            # Left over from another event loop (e.g. a finished TestClient)
+            task = None
+        if task is None:
+            self._leaders.inc()
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self._shared.inc()
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the error, so one every waiter abandoned isn't logged as unhandled
+        if not task.cancelled():
+            task.exception()
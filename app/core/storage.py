@@ -0,0 +1,732 @@
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from email.utils import formatdate
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.cache import ObjectInfo, ObjectInfoCache
+from app.core.config import settings
+from app.core.hashing import Checksum
+from app.core.metrics import UPLOAD_BYTES
+from app.core.signing import CloudFrontSigner, build_cloudfront_signer
+
+logger = logging.getLogger(__name__)
+
+# Content-Type of uploads whose container could not be identified
+DEFAULT_CONTENT_TYPE = 'video/mp4'
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Keys under which ObjectStore keeps multipart upload state
+UPLOADS_PREFIX = ".uploads/"
+
+
+class StorageBackend(ABC):
+    """
+    Interface for the object stores videos are kept in.
+
+    S3Client is the production implementation; LocalStorage and
+    InMemoryStorage run the whole service on one machine. URL building and
+    CloudFront signing are shared: every backend can sit behind CloudFront.
+    """
+    cloudfront_domain: Optional[str] = None
+    signer: Optional[CloudFrontSigner] = None
+    cache: Optional[ObjectInfoCache] = None
+
+    @abstractmethod
+    def origin_url(self, file_name: str) -> str:
+        """URL of an object at the origin, bypassing CloudFront"""
+
+    def get_object_url(self, file_name: str) -> str:
+        """
+        Build the public URL of an object without checking that it exists
+
+        Args:
+            file_name: Key of the object
+
+        Returns:
+            CloudFront URL if configured (signed when a key pair is set), otherwise the origin URL
+        """
+        if self.cloudfront_domain:
+            url = f"https://{self.cloudfront_domain}/{file_name}"
+            return self.signer.sign_url(url) if self.signer else url
+        return self.origin_url(file_name)
+
+    def sign_object_urls(self, file_names: List[str], expires_in: Optional[int] = None) -> Tuple[List[str], int]:
+        """
+        Sign CloudFront URLs for a batch of objects with a shared expiry
+
+        Args:
+            file_names: Keys of the objects
+            expires_in: Minimum lifetime in seconds, defaults to the configured one
+
+        Returns:
+            Signed URLs in the same order, and their expiry (epoch seconds)
+        """
+        if self.signer is None or not self.cloudfront_domain:
+            raise RuntimeError("CloudFront signing is not configured")
+        expires = self.signer.expires_at(expires_in)
+        urls = [f"https://{self.cloudfront_domain}/{file_name}" for file_name in file_names]
+        return self.signer.sign_urls(urls, expires), expires
+
+    def signed_cookies(self, path_pattern: str, expires_in: Optional[int] = None) -> Tuple[Dict[str, str], str, int]:
+        """
+        CloudFront signed cookies granting access to every object matching a path
+
+        Args:
+            path_pattern: Key pattern, may contain wildcards (e.g. renditions/id/*)
+            expires_in: Minimum lifetime in seconds, defaults to the configured one
+
+        Returns:
+            Cookie names and values, the resource URL they cover, and their expiry
+        """
+        if self.signer is None or not self.cloudfront_domain:
+            raise RuntimeError("CloudFront signing is not configured")
+        resource = f"https://{self.cloudfront_domain}/{path_pattern}"
+        cookies, expires = self.signer.signed_cookies(resource, self.signer.expires_at(expires_in))
+        return cookies, resource, expires
+
+    def get_video_url(self, file_name: str) -> str:
+        """
+        Get the URL for a video file
+
+        Args:
+            file_name: Key of the object
+
+        Returns:
+            CloudFront URL if configured, otherwise the origin URL
+        """
+        if not self.head_video(file_name).exists:
+            raise ValueError(f"Video file {file_name} does not exist in bucket")
+        return self.get_object_url(file_name)
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    @abstractmethod
+    def check_bucket(self) -> None:
+        ...
+
+    @abstractmethod
+    def upload_video(
+        self,
+        file_obj: BinaryIO,
+        file_name: str,
+        metadata: Optional[Dict[str, str]] = None,
+        file_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        content_type: Optional[str] = None
+    ) -> str:
+        ...
+
+    @abstractmethod
+    def upload_file(self, path: str, file_name: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        ...
+
+    @abstractmethod
+    def download_file(self, file_name: str, path: str) -> None:
+        ...
+
+    @abstractmethod
+    def create_multipart_upload(
+        self,
+        file_name: str,
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        checksum_algorithm: Optional[str] = None
+    ) -> str:
+        ...
+
+    @abstractmethod
+    def upload_part(
+        self,
+        file_name: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+        checksum: Optional[Checksum] = None
+    ) -> str:
+        ...
+
+    @abstractmethod
+    def complete_multipart_upload(self, file_name: str, upload_id: str, parts: List[Dict[str, Any]]) -> str:
+        ...
+
+    @abstractmethod
+    def abort_multipart_upload(self, file_name: str, upload_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def list_parts(self, file_name: str, upload_id: str) -> Dict[int, Tuple[str, int]]:
+        ...
+
+    @abstractmethod
+    def generate_presigned_part_urls(self, file_name: str, upload_id: str, part_numbers: List[int]) -> Dict[int, str]:
+        ...
+
+    @abstractmethod
+    def head_video(self, file_name: str) -> ObjectInfo:
+        ...
+
+    @abstractmethod
+    def get_object(
+        self,
+        file_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        if_match: Optional[str] = None
+    ) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def delete_video(self, file_name: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete_videos(self, file_names: List[str]) -> Dict[str, str]:
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> Dict[str, str]:
+        ...
+
+
+def read_chunks(file_obj: BinaryIO, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+    return iter(lambda: file_obj.read(chunk_size), b"")
+
+
+class ObjectStore(StorageBackend):
+    """
+    Storage backend for objects kept on this machine.
+
+    Implements the S3-shaped API (multipart uploads included) on top of a few
+    primitives, so subclasses only decide where bytes and object info live.
+    Multipart parts are stored as objects under UPLOADS_PREFIX.
+    """
+
+    def __init__(self, public_base_url: Optional[str] = None, signer: Optional[CloudFrontSigner] = None):
+        base_url = settings.STORAGE_PUBLIC_BASE_URL if public_base_url is None else public_base_url
+        self.public_base_url = (base_url or "").rstrip("/")
+        self.cloudfront_domain = settings.CLOUDFRONT_DOMAIN
+        self.signer = signer if signer is not None else build_cloudfront_signer()
+        # Lookups are local, so there is nothing for an object cache to save
+        self.cache = None
+
+    @abstractmethod
+    def _write(self, file_name: str, chunks: Iterable[bytes]) -> Tuple[int, str]:
+        """Store an object's data, replacing any previous version; returns (size, ETag)"""
+
+    @abstractmethod
+    def _open(self, file_name: str, start: int, end: int) -> BinaryIO:
+        """Reader over bytes start..end (inclusive) of an object"""
+
+    @abstractmethod
+    def _load_info(self, file_name: str) -> Optional[ObjectInfo]:
+        ...
+
+    @abstractmethod
+    def _save_info(self, file_name: str, info: ObjectInfo) -> None:
+        ...
+
+    @abstractmethod
+    def _remove(self, file_name: str) -> None:
+        """Delete an object and its info; missing objects are ignored"""
+
+    @abstractmethod
+    def _list(self, prefix: str) -> List[str]:
+        ...
+
+    def _put(
+        self,
+        file_name: str,
+        chunks: Iterable[bytes],
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        cache_control: Optional[str] = None
+    ) -> ObjectInfo:
+        size, etag = self._write(file_name, chunks)
+        info = ObjectInfo(
+            exists=True,
+            metadata=dict(metadata or {}),
+            etag=etag,
+            content_length=size,
+            content_type=content_type or DEFAULT_CONTENT_TYPE,
+            last_modified=formatdate(time.time(), usegmt=True),
+        )
+        if cache_control:
+            info.metadata["cache-control"] = cache_control
+        self._save_info(file_name, info)
+        return info
+
+    def origin_url(self, file_name: str) -> str:
+        # Without a public base URL the path is relative to wherever the
+        # storage directory is served from; proxy delivery mode needs no URL
+        return f"{self.public_base_url}/{file_name}"
+
+    def close(self) -> None:
+        pass
+
+    def check_bucket(self) -> None:
+        pass
+
+    def upload_video(
+        self,
+        file_obj: BinaryIO,
+        file_name: str,
+        metadata: Optional[Dict[str, str]] = None,
+        file_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Store a video file
+
+        Args:
+            file_obj: File-like object to store
+            file_name: Key of the object
+            metadata: Optional metadata for the object
+            file_size: Declared size in bytes (unused; kept for S3Client compatibility)
+            progress_callback: Called with the number of bytes written as chunks land
+            content_type: Content-Type to store, defaults to video/mp4
+
+        Returns:
+            URL of the object
+        """
+        def counted() -> Iterator[bytes]:
+            for chunk in read_chunks(file_obj):
+                yield chunk
+                UPLOAD_BYTES.inc(len(chunk))
+                if progress_callback is not None:
+                    progress_callback(len(chunk))
+
+        self._put(file_name, counted(), metadata, content_type)
+        logger.info(f"Successfully stored video {file_name}")
+        return self.get_object_url(file_name)
+
+    def upload_file(self, path: str, file_name: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        """
+        Store a local file, such as a generated rendition or thumbnail
+
+        Args:
+            path: Local file to store
+            file_name: Key of the object
+            content_type: Content-Type to store with the object
+            cache_control: Optional Cache-Control to store with the object
+        """
+        with open(path, "rb") as f:
+            self._put(file_name, read_chunks(f), content_type=content_type, cache_control=cache_control)
+
+    def download_file(self, file_name: str, path: str) -> None:
+        """
+        Copy an object to a local file
+
+        Args:
+            file_name: Key of the object
+            path: Local destination
+        """
+        response = self.get_object(file_name)
+        body = response['Body']
+        try:
+            with open(path, "wb") as f:
+                for chunk in read_chunks(body):
+                    f.write(chunk)
+        finally:
+            body.close()
+
+    def _upload_record(self, upload_id: str) -> str:
+        return f"{UPLOADS_PREFIX}{upload_id}/upload"
+
+    def _part_key(self, upload_id: str, part_number: int) -> str:
+        return f"{UPLOADS_PREFIX}{upload_id}/part-{part_number:05d}"
+
+    def _load_upload(self, file_name: str, upload_id: str) -> ObjectInfo:
+        record = self._load_info(self._upload_record(upload_id)) if upload_id.isalnum() else None
+        if record is None or record.metadata.get("key") != file_name:
+            raise ValueError(f"Upload {upload_id} does not exist")
+        return record
+
+    def create_multipart_upload(
+        self,
+        file_name: str,
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        checksum_algorithm: Optional[str] = None
+    ) -> str:
+        """
+        Start a multipart upload
+
+        Args:
+            file_name: Key of the object
+            metadata: Optional metadata for the object
+            content_type: Content-Type to store, defaults to video/mp4
+            checksum_algorithm: Unused; parts never leave this machine, so they aren't checksummed
+
+        Returns:
+            Upload ID
+        """
+        upload_id = uuid.uuid4().hex
+        record = {"key": file_name, "metadata": json.dumps(metadata or {})}
+        self._put(self._upload_record(upload_id), [], record, content_type)
+        return upload_id
+
+    def upload_part(
+        self,
+        file_name: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+        checksum: Optional[Checksum] = None
+    ) -> str:
+        """
+        Store one part of a multipart upload (checksum is unused, as above)
+
+        Returns:
+            ETag of the stored part
+        """
+        self._load_upload(file_name, upload_id)
+        info = self._put(self._part_key(upload_id, part_number), [body])
+        UPLOAD_BYTES.inc(len(body))
+        return info.etag
+
+    def list_parts(self, file_name: str, upload_id: str) -> Dict[int, Tuple[str, int]]:
+        """
+        List the parts stored for a multipart upload
+
+        Returns:
+            Mapping of part number to (ETag, size)
+        """
+        self._load_upload(file_name, upload_id)
+        parts: Dict[int, Tuple[str, int]] = {}
+        for key in self._list(f"{UPLOADS_PREFIX}{upload_id}/part-"):
+            info = self._load_info(key)
+            if info is not None:
+                parts[int(key.rsplit("-", 1)[1])] = (info.etag, info.content_length)
+        return parts
+
+    def complete_multipart_upload(self, file_name: str, upload_id: str, parts: List[Dict[str, Any]]) -> str:
+        """
+        Assemble uploaded parts into the final object
+
+        Args:
+            file_name: Key of the object
+            upload_id: Upload ID
+            parts: List of {'PartNumber': int, 'ETag': str} in part order
+
+        Returns:
+            URL of the object
+        """
+        record = self._load_upload(file_name, upload_id)
+        stored = self.list_parts(file_name, upload_id)
+        for part in parts:
+            if stored.get(part['PartNumber'], (None,))[0] != part['ETag']:
+                raise ValueError(f"Part {part['PartNumber']} of upload {upload_id} does not exist")
+
+        def chunks() -> Iterator[bytes]:
+            for part in parts:
+                size = stored[part['PartNumber']][1]
+                body = self._open(self._part_key(upload_id, part['PartNumber']), 0, size - 1)
+                try:
+                    yield from read_chunks(body)
+                finally:
+                    body.close()
+
+        metadata = json.loads(record.metadata.get("metadata", "{}"))
+        self._put(file_name, chunks(), metadata, record.content_type)
+        self._remove_upload(upload_id)
+        logger.info(f"Successfully stored video {file_name}")
+        return self.get_object_url(file_name)
+
+    def abort_multipart_upload(self, file_name: str, upload_id: str) -> None:
+        """Abort a multipart upload and discard its parts"""
+        self._load_upload(file_name, upload_id)
+        self._remove_upload(upload_id)
+
+    def _remove_upload(self, upload_id: str) -> None:
+        for key in self._list(f"{UPLOADS_PREFIX}{upload_id}/"):
+            self._remove(key)
+
+    def generate_presigned_part_urls(self, file_name: str, upload_id: str, part_numbers: List[int]) -> Dict[int, str]:
+        raise RuntimeError("Direct uploads need the S3 storage backend; send parts through the API instead")
+
+    def head_video(self, file_name: str) -> ObjectInfo:
+        """
+        Check whether a video exists
+
+        Returns:
+            ObjectInfo describing the object (exists=False if it is missing)
+        """
+        return self._load_info(file_name) or ObjectInfo(exists=False)
+
+    def get_object(
+        self,
+        file_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        if_match: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Open an object for reading; callers stream it from response['Body']
+
+        Args:
+            file_name: Key of the object
+            byte_range: Inclusive first and last byte to read
+            if_match: Only succeed if the object still has this ETag
+
+        Returns:
+            Dict with Body, ContentLength, ContentType and ETag, like S3's get_object
+        """
+        info = self._load_info(file_name)
+        if info is None:
+            raise ValueError(f"Video file {file_name} does not exist in bucket")
+        if if_match and info.etag != if_match:
+            raise ValueError(f"Video file {file_name} has changed")
+        start, end = byte_range if byte_range is not None else (0, (info.content_length or 0) - 1)
+        end = min(end, (info.content_length or 0) - 1)
+        return {
+            'Body': self._open(file_name, start, end),
+            'ContentLength': max(0, end - start + 1),
+            'ContentType': info.content_type,
+            'ETag': info.etag,
+        }
+
+    def delete_video(self, file_name: str) -> None:
+        """Delete an object; deleting a missing object succeeds, as in S3"""
+        self._remove(file_name)
+        logger.info(f"Successfully deleted video {file_name}")
+
+    def delete_videos(self, file_names: List[str]) -> Dict[str, str]:
+        """
+        Delete many objects
+
+        Returns:
+            Error message for each key that could not be deleted
+        """
+        errors: Dict[str, str] = {}
+        for file_name in file_names:
+            try:
+                self._remove(file_name)
+            except (OSError, ValueError) as e:
+                errors[file_name] = str(e)
+        logger.info(f"Deleted {len(file_names) - len(errors)} videos")
+        return errors
+
+    def delete_prefix(self, prefix: str) -> Dict[str, str]:
+        """Delete every object under a prefix, e.g. the renditions of a video"""
+        keys = self._list(prefix)
+        return self.delete_videos(keys) if keys else {}
+
+
+class MappedBody(io.RawIOBase):
+    """
+    Reader over a byte range of a file through a read-only memory map.
+
+    Reads are slices of the page cache: no read() syscall per chunk and no
+    intermediate buffer. Objects are replaced by renaming a new file into
+    place, so a mapped old version stays valid until the reader is closed.
+    """
+
+    def __init__(self, path: str, start: int, end: int):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._position = start
+        self._end = min(end + 1, size)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if self._map is None or self._position >= self._end:
+            return b""
+        end = self._end if size is None or size < 0 else min(self._end, self._position + size)
+        data = self._map[self._position:end]
+        self._position = end
+        return data
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+        super().close()
+
+
+class LocalStorage(ObjectStore):
+    """
+    Objects stored as files under a directory, e.g. on local NVMe.
+
+    Data is written to a temporary file and renamed into place, so readers
+    never see a partial object. Object info (Content-Type, metadata, ETag)
+    lives in JSON files under .meta/. Objects are served from memory maps,
+    and whole-file copies (renditions, thumbnails, job downloads) go through
+    shutil.copyfile, which uses sendfile on Linux.
+    """
+
+    META_DIR = ".meta"
+
+    def __init__(self, root: str = settings.STORAGE_LOCAL_PATH, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def check_bucket(self) -> None:
+        """Check that the storage directory is writable"""
+        if not os.access(self.root, os.W_OK):
+            raise OSError(f"Storage directory {self.root} is not writable")
+
+    def _path(self, file_name: str, base: Optional[str] = None) -> str:
+        relative = os.path.normpath(file_name)
+        top = relative.split(os.sep)[0]
+        if os.path.isabs(relative) or top == os.pardir or top == self.META_DIR:
+            raise ValueError(f"Invalid object key {file_name}")
+        return os.path.join(base or self.root, relative)
+
+    def _meta_path(self, file_name: str) -> str:
+        return self._path(file_name, os.path.join(self.root, self.META_DIR)) + ".json"
+
+    def _replace(self, path: str, write: Callable[[str], None]) -> None:
+        """Write a file through `write` (given a temporary path) and rename it into place"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        os.close(fd)
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def _etag(self, path: str) -> Tuple[int, str]:
+        # Size and modification time, like nginx; hashing every object on
+        # write would cost a full pass over large videos
+        stat = os.stat(path)
+        return stat.st_size, f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def _write(self, file_name: str, chunks: Iterable[bytes]) -> Tuple[int, str]:
+        path = self._path(file_name)
+
+        def write(temp_path: str) -> None:
+            with open(temp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+
+        self._replace(path, write)
+        return self._etag(path)
+
+    def _open(self, file_name: str, start: int, end: int) -> BinaryIO:
+        return MappedBody(self._path(file_name), start, end)
+
+    def _load_info(self, file_name: str) -> Optional[ObjectInfo]:
+        path = self._path(file_name)
+        try:
+            with open(self._meta_path(file_name)) as f:
+                info = ObjectInfo(**json.load(f))
+        except FileNotFoundError:
+            # Files copied into the directory by hand are still served
+            if not os.path.isfile(path):
+                return None
+            size, etag = self._etag(path)
+            return ObjectInfo(
+                exists=True, etag=etag, content_length=size, content_type=DEFAULT_CONTENT_TYPE,
+                last_modified=formatdate(os.path.getmtime(path), usegmt=True),
+            )
+        return info if os.path.isfile(path) else None
+
+    def _save_info(self, file_name: str, info: ObjectInfo) -> None:
+        def write(temp_path: str) -> None:
+            with open(temp_path, "w") as f:
+                json.dump(asdict(info), f)
+
+        self._replace(self._meta_path(file_name), write)
+
+    def _remove(self, file_name: str) -> None:
+        for path in (self._path(file_name), self._meta_path(file_name)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _list(self, prefix: str) -> List[str]:
+        directory, _, name_prefix = prefix.rpartition("/")
+        top = self._path(directory) if directory else self.root
+        keys = []
+        for dirpath, dirnames, filenames in os.walk(top):
+            if dirpath == self.root:
+                dirnames[:] = [name for name in dirnames if name != self.META_DIR]
+            for filename in filenames:
+                key = os.path.relpath(os.path.join(dirpath, filename), self.root).replace(os.sep, "/")
+                if key.startswith(prefix) and not filename.startswith(".tmp-"):
+                    keys.append(key)
+        return sorted(keys)
+
+    def upload_file(self, path: str, file_name: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        """Store a local file, copied with sendfile where the OS supports it"""
+        target = self._path(file_name)
+        self._replace(target, lambda temp_path: shutil.copyfile(path, temp_path))
+        size, etag = self._etag(target)
+        info = ObjectInfo(
+            exists=True, etag=etag, content_length=size, content_type=content_type,
+            last_modified=formatdate(time.time(), usegmt=True),
+            metadata={"cache-control": cache_control} if cache_control else {},
+        )
+        self._save_info(file_name, info)
+
+    def download_file(self, file_name: str, path: str) -> None:
+        """Copy an object to a local file with sendfile where the OS supports it"""
+        if self._load_info(file_name) is None:
+            raise ValueError(f"Video file {file_name} does not exist in bucket")
+        shutil.copyfile(self._path(file_name), path)
+
+
+class InMemoryStorage(ObjectStore):
+    """
+    Objects held in this process's memory, for tests, benchmarks and
+    single-process development. Nothing is shared between workers or
+    survives a restart.
+    """
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._data: Dict[str, bytes] = {}
+        self._info: Dict[str, ObjectInfo] = {}
+        self._lock = threading.Lock()
+
+    def _write(self, file_name: str, chunks: Iterable[bytes]) -> Tuple[int, str]:
+        data = b"".join(chunks)
+        with self._lock:
+            self._data[file_name] = data
+        return len(data), f'"{hashlib.md5(data).hexdigest()}"'
+
+    def _open(self, file_name: str, start: int, end: int) -> BinaryIO:
+        with self._lock:
+            data = self._data.get(file_name)
+        if data is None:
+            raise ValueError(f"Video file {file_name} does not exist in bucket")
+        return io.BytesIO(memoryview(data)[start:end + 1])
+
+    def _load_info(self, file_name: str) -> Optional[ObjectInfo]:
+        with self._lock:
+            info = self._info.get(file_name)
+        return ObjectInfo(**asdict(info)) if info is not None else None
+
+    def _save_info(self, file_name: str, info: ObjectInfo) -> None:
+        with self._lock:
+            self._info[file_name] = info
+
+    def _remove(self, file_name: str) -> None:
+        with self._lock:
+            self._data.pop(file_name, None)
+            self._info.pop(file_name, None)
+
+    def _list(self, prefix: str) -> List[str]:
+        with self._lock:
+            return sorted(key for key in self._data if key.startswith(prefix))
@@ -0,0 +1,323 @@
+import asyncio
+import hashlib
+import io
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.aws import AsyncS3Client
+from app.core.config import settings
+from app.core.hashing import Checksum
+from app.core.probe import MediaInfo, MediaProbe
+
+logger = logging.getLogger(__name__)
+
+# Events produced by MultipartFormStream.feed
+FIELD = "field"
+FILE_START = "file_start"
+FILE_DATA = "file_data"
+FILE_END = "file_end"
+
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class StreamingMultipartUpload:
+    """
+    Pipes an incoming byte stream straight into an S3 multipart upload.
+
+    Bytes are buffered only until a full part is available, and at most
+    `max_parts_in_flight` parts are being sent at once, so memory per upload is
+    bounded by roughly part_size * (max_parts_in_flight + 1) whatever the file
+    size, and nothing is written to local disk. Streams shorter than one part
+    are sent with a single PUT instead.
+
+    Passing an existing `upload_id` and `first_part_number` continues an
+    earlier upload; `on_part` is called as each part lands so callers can
+    checkpoint progress. With `content_hash`, a SHA-256 of the whole stream is
+    computed as it passes through. With `probe`, the container headers are
+    parsed as they pass (see MediaProbe) and the sniffed MIME type replaces
+    `content_type` on the stored object. With `checksum_algorithm`, each part
+    is checksummed as its bytes arrive and sent with its checksum for S3 to
+    verify; the assembled object is checked against them on completion.
+    The algorithm must match the one the upload was created with.
+    """
+
+    def __init__(
+        self,
+        s3_client: AsyncS3Client,
+        file_name: str,
+        part_size: int,
+        metadata: Optional[Dict[str, str]] = None,
+        max_parts_in_flight: int = settings.STREAMING_UPLOAD_PARTS_IN_FLIGHT,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        upload_id: Optional[str] = None,
+        first_part_number: int = 1,
+        on_part: Optional[Callable[[int, str, int], None]] = None,
+        content_hash: bool = False,
+        content_type: Optional[str] = None,
+        probe: bool = False,
+        checksum_algorithm: Optional[str] = None,
+    ):
+        self.s3_client = s3_client
+        self.file_name = file_name
+        self.part_size = part_size
+        self.metadata = metadata
+        self.max_parts_in_flight = max(1, max_parts_in_flight)
+        self.progress_callback = progress_callback
+        self.on_part = on_part
+        self.upload_id = upload_id
+        self.bytes_received = 0
+        self.peak_buffered_bytes = 0
+        self.sha256 = hashlib.sha256() if content_hash else None
+        self.content_type = content_type
+        self.probe = MediaProbe() if probe else None
+        self.checksum_algorithm = checksum_algorithm
+        self._buffer = bytearray()
+        # Checksum of the bytes in _buffer, i.e. of the part being filled
+        self._checksum = self._new_checksum()
+        self._parts: Dict[int, Tuple[str, Optional[Checksum]]] = {}
+        self._next_part_number = first_part_number
+        self._in_flight: Set["asyncio.Task[None]"] = set()
+        self._in_flight_bytes = 0
+        # Set once completion is requested from S3; the upload can no longer be aborted
+        self._completing = False
+
+    async def write(self, data: bytes) -> None:
+        """
+        Add bytes to the upload, sending parts as they fill up
+
+        Args:
+            data: Next chunk of the stream
+        """
+        self.bytes_received += len(data)
+        if self.sha256 is not None:
+            self.sha256.update(data)
+        if self.probe is not None:
+            self.probe.feed(data)
+        view = memoryview(data)
+        while view:
+            # Fill the current part, so its checksum covers exactly its bytes
+            piece = view[:self.part_size - len(self._buffer)]
+            view = view[len(piece):]
+            self._buffer += piece
+            if self._checksum is not None:
+                self._checksum.update(piece)
+            self._track_peak()
+            if len(self._buffer) == self.part_size:
+                await self._submit_buffer()
+
+    async def complete(self) -> str:
+        """
+        Flush remaining bytes and finish the upload
+
+        Returns:
+            S3 object URL or CloudFront URL if configured
+        """
+        if self.upload_id is None:
+            # The whole stream fit in one part: a single PUT is cheaper than multipart
+            body = bytes(self._buffer)
+            self._buffer.clear()
+            return await self.s3_client.upload_video(
+                file_obj=io.BytesIO(body),
+                file_name=self.file_name,
+                metadata=self.metadata,
+                file_size=len(body),
+                progress_callback=self.progress_callback,
+                content_type=self._object_content_type(),
+            )
+
+        await self.flush(final=True)
+        self._completing = True
+        parts = []
+        for number, (etag, checksum) in sorted(self._parts.items()):
+            part = {"PartNumber": number, "ETag": etag}
+            if checksum is not None:
+                part[checksum.member] = checksum.b64digest()
+            parts.append(part)
+        return await self.s3_client.complete_multipart_upload(self.file_name, self.upload_id, parts)
+
+    @property
+    def media(self) -> Optional[MediaInfo]:
+        """What the probe made of the bytes received so far, if probing"""
+        return self.probe.result(self.bytes_received) if self.probe is not None else None
+
+    async def flush(self, final: bool) -> None:
+        """
+        Wait for every part in flight to land
+
+        Args:
+            final: Send buffered bytes as the last part; otherwise they are
+                dropped, since only the last part of an upload may be short
+        """
+        if final and self._buffer:
+            await self._submit_buffer()
+        self._buffer.clear()
+        self._checksum = self._new_checksum()
+        if self._in_flight:
+            results = await asyncio.gather(*self._in_flight, return_exceptions=True)
+            self._in_flight.clear()
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+
+    async def abort(self) -> None:
+        """
+        Discard the upload and any parts already stored
+
+        Does nothing to S3 once complete() has asked for the upload to be
+        assembled, whether or not that succeeded: a completed upload is gone,
+        and one that failed verification has already been deleted.
+        """
+        self._buffer.clear()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+            self._in_flight.clear()
+        if self.upload_id is not None and not self._completing:
+            try:
+                await self.s3_client.abort_multipart_upload(self.file_name, self.upload_id)
+            except Exception as e:
+                logger.error(f"Error aborting streaming upload of {self.file_name}: {str(e)}")
+
+    def _new_checksum(self) -> Optional[Checksum]:
+        return Checksum(self.checksum_algorithm) if self.checksum_algorithm else None
+
+    async def _submit_buffer(self) -> None:
+        part, checksum = bytes(self._buffer), self._checksum
+        self._buffer.clear()
+        self._checksum = self._new_checksum()
+        await self._submit(part, checksum)
+
+    async def _submit(self, part: bytes, checksum: Optional[Checksum]) -> None:
+        if self.upload_id is None:
+            self.upload_id = await self.s3_client.create_multipart_upload(
+                self.file_name, self.metadata, self._object_content_type(), self.checksum_algorithm
+            )
+        # Backpressure: stop reading the request until a part slot frees up
+        while len(self._in_flight) >= self.max_parts_in_flight:
+            await self._wait_for_part()
+
+        part_number = self._next_part_number
+        self._next_part_number += 1
+        self._in_flight_bytes += len(part)
+        self._track_peak()
+        task = asyncio.ensure_future(self._upload_part(part_number, part, checksum))
+        self._in_flight.add(task)
+
+    async def _upload_part(self, part_number: int, part: bytes, checksum: Optional[Checksum]) -> None:
+        try:
+            etag = await self.s3_client.upload_part(self.file_name, self.upload_id, part_number, part, checksum)
+            self._parts[part_number] = (etag, checksum)
+            if self.on_part:
+                self.on_part(part_number, etag, len(part))
+            if self.progress_callback:
+                self.progress_callback(len(part))
+        finally:
+            self._in_flight_bytes -= len(part)
+
+    async def _wait_for_part(self) -> None:
+        done, _ = await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+        self._in_flight -= done
+        for task in done:
+            # Re-raise the first failed part
+            task.result()
+
+    def _object_content_type(self) -> Optional[str]:
+        # By the first part the probe has seen the ftyp box or EBML header,
+        # which is all it needs for the MIME type
+        media = self.media
+        return media.mime_type if media is not None else self.content_type
+
+    def _track_peak(self) -> None:
+        buffered = len(self._buffer) + self._in_flight_bytes
+        if buffered > self.peak_buffered_bytes:
+            self.peak_buffered_bytes = buffered
+
+
+class MultipartFormStream:
+    """
+    Incremental multipart/form-data parser.
+
+    Raw body chunks go in through feed(); out come events describing form fields
+    and file parts. File contents are passed through as they arrive and never
+    accumulated, unlike Starlette's form parser which spools them to a
+    temporary file.
+    """
+
+    def __init__(self, content_type: str):
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Missing multipart boundary")
+
+        self._events: List[Tuple[Any, ...]] = []
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._headers: Dict[bytes, bytes] = {}
+        self._field_name: Optional[str] = None
+        self._field_value = bytearray()
+        self._is_file = False
+
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def feed(self, chunk: bytes) -> List[Tuple[Any, ...]]:
+        """
+        Parse the next chunk of the request body
+
+        Args:
+            chunk: Raw body bytes
+
+        Returns:
+            Events completed by this chunk, in order:
+            (FIELD, name, value), (FILE_START, name, filename, content_type),
+            (FILE_DATA, bytes) and (FILE_END,)
+        """
+        self._parser.write(chunk)
+        events, self._events = self._events, []
+        return events
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._field_value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._field_name = options.get(b"name", b"").decode("latin-1")
+        filename = options.get(b"filename")
+        self._is_file = filename is not None
+        if self._is_file:
+            content_type = self._headers.get(b"content-type", b"").decode("latin-1")
+            self._events.append((FILE_START, self._field_name, filename.decode("utf-8"), content_type))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._is_file:
+            self._events.append((FILE_DATA, data[start:end]))
+        else:
+            self._field_value += data[start:end]
+            if len(self._field_value) > MAX_FIELD_SIZE:
+                raise ValueError(f"Form field {self._field_name} is too large")
+
+    def _on_part_end(self) -> None:
+        if self._is_file:
+            self._events.append((FILE_END,))
+        else:
+            self._events.append((FIELD, self._field_name, self._field_value.decode("utf-8")))
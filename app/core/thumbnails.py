@@ -0,0 +1,241 @@
+import logging
+import math
+import os
+import subprocess
+import tempfile
+from concurrent.futures import Executor
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.jobs import Job, JobHandler
+from app.core.metadata import VideoRepository
+from app.core.storage import StorageBackend
+from app.core.transcoding import probe_source
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_JOB = "thumbnails"
+
+CONTENT_TYPES = {
+    ".jpg": "image/jpeg",
+    ".vtt": "text/vtt",
+}
+
+
+@dataclass
+class SpriteLayout:
+    """Where each seek-preview thumbnail sits in the sprite sheets"""
+    interval: int
+    tile_width: int
+    tile_height: int
+    columns: int
+    rows: int
+    count: int
+
+    @property
+    def sheets(self) -> int:
+        return math.ceil(self.count / (self.columns * self.rows))
+
+    def position(self, index: int) -> Tuple[int, int, int]:
+        """Sheet number and x, y offset of thumbnail `index`"""
+        sheet, cell = divmod(index, self.columns * self.rows)
+        row, column = divmod(cell, self.columns)
+        return sheet, column * self.tile_width, row * self.tile_height
+
+
+def thumbnail_prefix(source_key: str) -> str:
+    """Key prefix shared by the thumbnails of a source, e.g. videos/abc.mp4 -> videos/abc."""
+    return f"{source_key.rsplit('.', 1)[0]}."
+
+
+def poster_key(source_key: str) -> str:
+    return f"{thumbnail_prefix(source_key)}poster.jpg"
+
+
+def track_key(source_key: str) -> str:
+    return f"{thumbnail_prefix(source_key)}thumbnails.vtt"
+
+
+def sprite_key(source_key: str, sheet: int) -> str:
+    return f"{thumbnail_prefix(source_key)}sprite_{sheet:03d}.jpg"
+
+
+def sprite_name(stem: str, sheet: int) -> str:
+    return f"{stem}.sprite_{sheet:03d}.jpg"
+
+
+def sprite_layout(width: int, height: int, duration: float) -> SpriteLayout:
+    """
+    Layout of the sprite sheets for a source
+
+    Args:
+        width: Source width in pixels
+        height: Source height in pixels
+        duration: Source duration in seconds
+
+    Returns:
+        SpriteLayout with one thumbnail per THUMBNAIL_SPRITE_INTERVAL_SECONDS
+    """
+    tile_width = settings.THUMBNAIL_SPRITE_TILE_WIDTH
+    # Even height, as the JPEG encoder's 4:2:0 subsampling needs
+    tile_height = max(2, int(round(tile_width * height / width / 2)) * 2) if width else tile_width * 9 // 16
+    interval = max(1, settings.THUMBNAIL_SPRITE_INTERVAL_SECONDS)
+    return SpriteLayout(
+        interval=interval,
+        tile_width=tile_width,
+        tile_height=tile_height,
+        columns=settings.THUMBNAIL_SPRITE_COLUMNS,
+        rows=settings.THUMBNAIL_SPRITE_ROWS,
+        count=max(1, math.ceil(duration / interval))
+    )
+
+
+def vtt_timestamp(seconds: float) -> str:
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    return f"{hours:02d}:{minutes:02d}:{milliseconds // 1000:02d}.{milliseconds % 1000:03d}"
+
+
+def build_thumbnail_track(stem: str, layout: SpriteLayout, duration: float) -> str:
+    """
+    WebVTT track mapping each time range to its tile in a sprite sheet
+
+    Sprite URLs are relative, so the track works wherever it is served from
+    alongside the sheets (S3 or CloudFront)
+    """
+    cues = ["WEBVTT", ""]
+    for index in range(layout.count):
+        start = index * layout.interval
+        end = min(duration, start + layout.interval) if duration > start else start + layout.interval
+        sheet, x, y = layout.position(index)
+        cues += [
+            f"{vtt_timestamp(start)} --> {vtt_timestamp(end)}",
+            f"{sprite_name(stem, sheet)}#xywh={x},{y},{layout.tile_width},{layout.tile_height}",
+            "",
+        ]
+    return "\n".join(cues)
+
+
+def build_poster_command(source: str, output: str, offset: float, width: int) -> List[str]:
+    # Seeking before -i jumps to the nearest keyframe instead of decoding up to it
+    return [
+        settings.TRANSCODE_FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", f"{offset:.3f}", "-i", source,
+        "-frames:v", "1", "-vf", f"scale={width}:-2", "-q:v", "3",
+        output,
+    ]
+
+
+def build_sprite_command(source: str, output_pattern: str, layout: SpriteLayout) -> List[str]:
+    return [
+        settings.TRANSCODE_FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-y",
+        "-i", source, "-an",
+        "-vf", (
+            f"fps=1/{layout.interval},scale={layout.tile_width}:{layout.tile_height},"
+            f"tile={layout.columns}x{layout.rows}"
+        ),
+        "-q:v", "4", "-start_number", "0",
+        output_pattern,
+    ]
+
+
+def run_ffmpeg(command: List[str]) -> None:
+    process = subprocess.run(command, capture_output=True, timeout=settings.TRANSCODE_TIMEOUT_SECONDS)
+    if process.returncode != 0:
+        stderr = process.stderr.decode(errors="replace").strip()
+        raise RuntimeError(f"ffmpeg exited with {process.returncode}: {stderr[-500:]}")
+
+
+def extract_thumbnails(source: str, output_dir: str, stem: str) -> List[str]:
+    """
+    Write the poster, sprite sheets and WebVTT track for a local video.
+    Runs in a worker process
+
+    Args:
+        source: Local video file
+        output_dir: Directory for the generated files
+        stem: File name prefix, matching the video's S3 key
+
+    Returns:
+        Names of the generated files
+    """
+    info = probe_source(source)
+    duration = info.duration or 0.0
+    layout = sprite_layout(info.width, info.height, duration)
+
+    # A frame a little way in is more representative than the first, which is
+    # often black; short clips use their midpoint
+    poster = f"{stem}.poster.jpg"
+    run_ffmpeg(build_poster_command(
+        source, os.path.join(output_dir, poster), min(duration / 2, max(1.0, duration * 0.1)),
+        settings.THUMBNAIL_POSTER_WIDTH
+    ))
+    run_ffmpeg(build_sprite_command(source, os.path.join(output_dir, f"{stem}.sprite_%03d.jpg"), layout))
+
+    # A short or truncated stream yields fewer tiles than its probed duration
+    # suggests; cues only cover the sheets ffmpeg actually wrote (it pads the
+    # last one, so its tiles exist even when some are blank)
+    sprites = []
+    while len(sprites) < layout.sheets and os.path.exists(os.path.join(output_dir, sprite_name(stem, len(sprites)))):
+        sprites.append(sprite_name(stem, len(sprites)))
+    layout = replace(layout, count=min(layout.count, len(sprites) * layout.columns * layout.rows))
+
+    track = f"{stem}.thumbnails.vtt"
+    with open(os.path.join(output_dir, track), "w") as track_file:
+        track_file.write(build_thumbnail_track(stem, layout, duration))
+
+    return [poster, track] + sprites
+
+
+def generate_thumbnails(
+    s3_client: StorageBackend,
+    source_key: str,
+    executor: Optional[Executor] = None,
+    work_dir: Optional[str] = settings.TRANSCODE_WORK_DIR
+) -> str:
+    """
+    Generate the thumbnails of an uploaded video and store them next to it
+
+    Args:
+        s3_client: Synchronous storage backend
+        source_key: S3 key of the uploaded video
+        executor: Pool to run the extraction in; inline when None
+        work_dir: Parent directory for scratch files
+
+    Returns:
+        S3 key of the poster
+    """
+    directory = source_key.rsplit("/", 1)[0] + "/" if "/" in source_key else ""
+    stem = source_key.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    cache_control = f"public, max-age={settings.THUMBNAIL_CACHE_MAX_AGE_SECONDS}"
+    with tempfile.TemporaryDirectory(prefix="thumbnails-", dir=work_dir) as scratch:
+        source = os.path.join(scratch, "source")
+        s3_client.download_file(source_key, source)
+        if executor is None:
+            names = extract_thumbnails(source, scratch, stem)
+        else:
+            names = executor.submit(extract_thumbnails, source, scratch, stem).result()
+        for name in names:
+            s3_client.upload_file(
+                os.path.join(scratch, name),
+                f"{directory}{name}",
+                CONTENT_TYPES[os.path.splitext(name)[1]],
+                cache_control=cache_control
+            )
+    logger.info(f"Generated {len(names)} thumbnail files for {source_key}")
+    return poster_key(source_key)
+
+
+def thumbnail_handler(s3_client: StorageBackend, repository: VideoRepository, executor: Optional[Executor] = None) -> JobHandler:
+    """
+    Job handler that generates thumbnails for job.payload["key"] and records
+    them on every video stored under that key
+    """
+    def handle(job: Job) -> str:
+        source_key = job.payload["key"]
+        poster = generate_thumbnails(s3_client, source_key, executor)
+        repository.set_thumbnails(source_key, poster, track_key(source_key))
+        return poster
+    return handle
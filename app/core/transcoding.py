@@ -0,0 +1,260 @@
+import json
+import logging
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.jobs import Job, JobHandler
+from app.core.metadata import VideoRepository
+from app.core.storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+TRANSCODE_JOB = "transcode"
+MASTER_PLAYLIST = "master.m3u8"
+
+# Segment names are unique per rendition and never rewritten, so the CDN can
+# keep them forever; playlists get a short TTL in case a video is re-transcoded
+SEGMENT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+PLAYLIST_CACHE_CONTROL = "public, max-age=300"
+
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+
+@dataclass(frozen=True)
+class Rendition:
+    """One rung of the bitrate ladder"""
+    height: int
+    video_kbps: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.height}p"
+
+
+@dataclass
+class SourceInfo:
+    """What the transcoder needs to know about an uploaded file"""
+    height: int
+    has_audio: bool
+    width: int = 0
+    duration: Optional[float] = None
+
+
+def parse_ladder(ladder: str) -> List[Rendition]:
+    """
+    Parse a ladder such as "1080:5000,720:2800"
+
+    Args:
+        ladder: Comma-separated height:video kbps pairs
+
+    Returns:
+        Renditions, tallest first
+    """
+    renditions = []
+    for item in ladder.split(","):
+        if not item.strip():
+            continue
+        height, _, kbps = item.strip().partition(":")
+        try:
+            renditions.append(Rendition(int(height), int(kbps)))
+        except ValueError:
+            raise ValueError(f"Invalid ladder entry {item!r}, expected height:kbps")
+    if not renditions:
+        raise ValueError("The transcoding ladder is empty")
+    return sorted(renditions, key=lambda rendition: rendition.height, reverse=True)
+
+
+def select_renditions(ladder: List[Rendition], source_height: int) -> List[Rendition]:
+    """
+    Renditions worth producing for a source: upscaling only wastes bytes, so
+    rungs taller than the source are dropped. A source shorter than every
+    rung still gets one rendition, at its own height and the lowest bitrate
+    """
+    selected = [rendition for rendition in ladder if rendition.height <= source_height]
+    if not selected:
+        # Keep the height even, as libx264 requires for 4:2:0
+        selected = [Rendition(source_height - source_height % 2, ladder[-1].video_kbps)]
+    return selected
+
+
+def renditions_prefix(source_key: str) -> str:
+    """S3 prefix for the renditions of a source, e.g. videos/abc.mp4 -> renditions/abc/"""
+    stem = source_key.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    return f"renditions/{stem}/"
+
+
+def probe_source(path: str) -> SourceInfo:
+    """
+    Read the video dimensions, duration and whether there is an audio
+    track, using ffprobe
+
+    Args:
+        path: Local file
+
+    Returns:
+        SourceInfo
+    """
+    output = subprocess.run(
+        [settings.TRANSCODE_FFPROBE_PATH, "-v", "error", "-print_format", "json",
+         "-show_streams", "-show_format", path],
+        capture_output=True, check=True, timeout=60
+    ).stdout
+    probe = json.loads(output)
+    streams = probe.get("streams", [])
+    video = next((stream for stream in streams if stream.get("codec_type") == "video"), None)
+    if video is None or not video.get("height"):
+        raise ValueError("Source has no video stream")
+    duration = video.get("duration") or probe.get("format", {}).get("duration")
+    return SourceInfo(
+        height=int(video["height"]),
+        has_audio=any(stream.get("codec_type") == "audio" for stream in streams),
+        width=int(video.get("width") or 0),
+        duration=float(duration) if duration else None
+    )
+
+
+def build_ffmpeg_command(
+    source: str,
+    output_dir: str,
+    renditions: List[Rendition],
+    has_audio: bool,
+    segment_seconds: int = settings.TRANSCODE_SEGMENT_SECONDS
+) -> List[str]:
+    """
+    A single ffmpeg run that decodes the source once and encodes every
+    rendition from it, writing HLS playlists and segments
+
+    Args:
+        source: Local source file
+        output_dir: Directory for master.m3u8 and one subdirectory per rendition
+        renditions: Renditions to produce
+        has_audio: Whether to include the first audio track in every rendition
+        segment_seconds: Target segment duration
+
+    Returns:
+        ffmpeg arguments
+    """
+    count = len(renditions)
+    splits = "".join(f"[v{index}]" for index in range(count))
+    scales = ";".join(
+        f"[v{index}]scale=-2:{rendition.height}[v{index}out]" for index, rendition in enumerate(renditions)
+    )
+    command = [
+        settings.TRANSCODE_FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-y",
+        "-i", source,
+        "-filter_complex", f"[0:v]split={count}{splits};{scales}",
+    ]
+    stream_map = []
+    for index, rendition in enumerate(renditions):
+        command += [
+            "-map", f"[v{index}out]",
+            f"-c:v:{index}", "libx264",
+            f"-b:v:{index}", f"{rendition.video_kbps}k",
+            # Capped VBR keeps every segment within the bandwidth the playlist advertises
+            f"-maxrate:v:{index}", f"{rendition.video_kbps * 107 // 100}k",
+            f"-bufsize:v:{index}", f"{rendition.video_kbps * 3 // 2}k",
+        ]
+        entry = f"v:{index}"
+        if has_audio:
+            command += ["-map", "0:a:0"]
+            entry += f",a:{index}"
+        stream_map.append(f"{entry},name:{rendition.name}")
+    if has_audio:
+        command += ["-c:a", "aac", "-b:a", f"{settings.TRANSCODE_AUDIO_BITRATE_KBPS}k", "-ac", "2"]
+    command += [
+        "-preset", settings.TRANSCODE_PRESET,
+        # Keyframes on segment boundaries in every rendition, so players can
+        # switch bitrate at any segment
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment_seconds})",
+        "-sc_threshold", "0",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_flags", "independent_segments",
+        "-hls_segment_filename", os.path.join(output_dir, "%v", "seg_%05d.ts"),
+        "-master_pl_name", MASTER_PLAYLIST,
+        "-var_stream_map", " ".join(stream_map),
+        os.path.join(output_dir, "%v", "index.m3u8"),
+    ]
+    return command
+
+
+def collect_outputs(output_dir: str) -> Tuple[List[str], List[str]]:
+    """Segments and playlists under output_dir, as paths relative to it"""
+    segments, playlists = [], []
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            relative = os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, "/")
+            (playlists if name.endswith(".m3u8") else segments).append(relative)
+    return sorted(segments), sorted(playlists)
+
+
+def transcode_video(s3_client: StorageBackend, source_key: str, work_dir: Optional[str] = settings.TRANSCODE_WORK_DIR) -> str:
+    """
+    Transcode an uploaded video into an HLS ladder and upload it next to the source
+
+    Args:
+        s3_client: Synchronous storage backend
+        source_key: S3 key of the uploaded video
+        work_dir: Parent directory for scratch files
+
+    Returns:
+        S3 key of the master playlist
+    """
+    prefix = renditions_prefix(source_key)
+    with tempfile.TemporaryDirectory(prefix="transcode-", dir=work_dir) as scratch:
+        source = os.path.join(scratch, "source")
+        output_dir = os.path.join(scratch, "hls")
+        s3_client.download_file(source_key, source)
+
+        info = probe_source(source)
+        renditions = select_renditions(parse_ladder(settings.TRANSCODE_LADDER), info.height)
+        for rendition in renditions:
+            os.makedirs(os.path.join(output_dir, rendition.name))
+        command = build_ffmpeg_command(source, output_dir, renditions, info.has_audio)
+        process = subprocess.run(command, capture_output=True, timeout=settings.TRANSCODE_TIMEOUT_SECONDS)
+        if process.returncode != 0:
+            stderr = process.stderr.decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg exited with {process.returncode}: {stderr[-500:]}")
+
+        segments, playlists = collect_outputs(output_dir)
+
+        def upload(relative: str, cache_control: str) -> None:
+            s3_client.upload_file(
+                os.path.join(output_dir, relative),
+                f"{prefix}{relative}",
+                CONTENT_TYPES.get(os.path.splitext(relative)[1], "application/octet-stream"),
+                cache_control=cache_control
+            )
+
+        # Segments go up in parallel, then the playlists: a player that finds
+        # the master playlist can rely on everything it references existing
+        with ThreadPoolExecutor(max_workers=settings.TRANSCODE_UPLOAD_CONCURRENCY) as pool:
+            list(pool.map(lambda relative: upload(relative, SEGMENT_CACHE_CONTROL), segments))
+            list(pool.map(lambda relative: upload(relative, PLAYLIST_CACHE_CONTROL),
+                          [name for name in playlists if name != MASTER_PLAYLIST]))
+        upload(MASTER_PLAYLIST, PLAYLIST_CACHE_CONTROL)
+
+    logger.info(f"Transcoded {source_key} into {len(renditions)} renditions, {len(segments)} segments")
+    return f"{prefix}{MASTER_PLAYLIST}"
+
+
+def transcode_handler(s3_client: StorageBackend, repository: VideoRepository) -> JobHandler:
+    """
+    Job handler that transcodes job.payload["key"] and points every video
+    stored under that key at the new master playlist
+    """
+    def handle(job: Job) -> str:
+        source_key = job.payload["key"]
+        playlist_key = transcode_video(s3_client, source_key)
+        repository.set_playlist(source_key, playlist_key)
+        return playlist_key
+    return handle
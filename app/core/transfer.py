@@ -0,0 +1,171 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from boto3.s3.transfer import TransferConfig
+
+from app.core.config import settings
+from app.core.metrics import UPLOADS, UPLOADS_IN_FLIGHT
+
+UPLOADS_SUCCEEDED = UPLOADS.labels("completed")
+UPLOADS_FAILED = UPLOADS.labels("failed")
+
+MB = 1024 * 1024
+
+# S3 multipart limits
+MIN_PART_SIZE = 5 * MB
+MAX_PART_SIZE = 5 * 1024 * MB
+MAX_PARTS = 10000
+
+
+def select_part_size(file_size: Optional[int], part_size: Optional[int] = None) -> int:
+    """
+    Pick a multipart part size for an upload of the given size.
+
+    The configured size is used unless the file would need more than the
+    10,000 parts S3 allows, in which case parts grow (rounded up to whole MB).
+
+    Args:
+        file_size: Declared size of the upload in bytes, if known
+        part_size: Preferred part size in bytes, defaults to the configured one
+
+    Returns:
+        Part size in bytes
+    """
+    if part_size is None:
+        part_size = settings.S3_MULTIPART_CHUNKSIZE_MB * MB
+    part_size = max(part_size, MIN_PART_SIZE)
+    if file_size:
+        required = math.ceil(file_size / MAX_PARTS)
+        if required > part_size:
+            part_size = math.ceil(required / MB) * MB
+    return min(part_size, MAX_PART_SIZE)
+
+
+def build_transfer_config(file_size: Optional[int] = None) -> TransferConfig:
+    """
+    Build the s3transfer configuration for an upload
+
+    Args:
+        file_size: Declared size of the upload in bytes, if known
+
+    Returns:
+        TransferConfig driven by settings, with a part size suited to file_size
+    """
+    return TransferConfig(
+        multipart_threshold=settings.S3_MULTIPART_THRESHOLD_MB * MB,
+        multipart_chunksize=select_part_size(file_size),
+        max_concurrency=settings.S3_UPLOAD_MAX_CONCURRENCY,
+        use_threads=settings.S3_UPLOAD_USE_THREADS,
+    )
+
+
+@dataclass
+class UploadProgress:
+    """Progress of a single upload to S3"""
+    upload_id: str
+    total_bytes: Optional[int] = None
+    bytes_transferred: int = 0
+    status: str = "uploading"
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.total_bytes:
+            return None
+        return min(100.0, 100.0 * self.bytes_transferred / self.total_bytes)
+
+    @property
+    def bytes_per_second(self) -> float:
+        elapsed = self.updated_at - self.started_at
+        return self.bytes_transferred / elapsed if elapsed > 0 else 0.0
+
+
+class ProgressCallback:
+    """Records transferred bytes for one upload; returned by ProgressTracker.start"""
+
+    def __init__(self, progress: UploadProgress, lock: threading.Lock):
+        self.progress = progress
+        self._lock = lock
+
+    def __call__(self, bytes_amount: int) -> None:
+        with self._lock:
+            self.progress.bytes_transferred += bytes_amount
+            self.progress.updated_at = time.time()
+
+
+class ProgressTracker:
+    """
+    Thread-safe registry of in-flight and recently finished uploads.
+
+    s3transfer invokes progress callbacks from its worker threads, so updates
+    are guarded by a lock. Only the most recent `max_entries` uploads are kept;
+    finished uploads are dropped before in-flight ones.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._uploads: "OrderedDict[str, UploadProgress]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, upload_id: str, total_bytes: Optional[int] = None) -> ProgressCallback:
+        """
+        Register an upload
+
+        Args:
+            upload_id: Identifier clients use to poll progress
+            total_bytes: Expected size of the upload, if known
+
+        Returns:
+            Callback to pass to S3 that records transferred bytes, and to
+            pass back to finish
+        """
+        progress = UploadProgress(upload_id=upload_id, total_bytes=total_bytes)
+        with self._lock:
+            # A client reusing the ID of an unfinished upload replaces it
+            dropped = [self._uploads.pop(upload_id)] if upload_id in self._uploads else []
+            self._uploads[upload_id] = progress
+            while len(self._uploads) > self.max_entries:
+                dropped.append(self._uploads.pop(self._oldest_evictable()))
+            # Dropped uploads are no longer tracked, so finish will not count them
+            in_flight = sum(1 for upload in dropped if upload.status == "uploading")
+        UPLOADS_IN_FLIGHT.inc()
+        if in_flight:
+            UPLOADS_IN_FLIGHT.dec(in_flight)
+        return ProgressCallback(progress, self._lock)
+
+    def _oldest_evictable(self) -> str:
+        for upload_id, progress in self._uploads.items():
+            if progress.status != "uploading":
+                return upload_id
+        return next(iter(self._uploads))
+
+    def finish(self, upload_id: str, succeeded: bool = True, callback: Optional[ProgressCallback] = None) -> None:
+        """
+        Mark an upload as completed or failed
+
+        Args:
+            upload_id: Identifier the upload was started with
+            succeeded: Whether the upload completed
+            callback: Callback start returned; when given, nothing happens if
+                the ID has since been reused by another upload
+        """
+        with self._lock:
+            progress = self._uploads.get(upload_id)
+            if progress is None or progress.status != "uploading":
+                return
+            if callback is not None and callback.progress is not progress:
+                return
+            progress.status = "completed" if succeeded else "failed"
+            progress.updated_at = time.time()
+        UPLOADS_IN_FLIGHT.dec()
+        (UPLOADS_SUCCEEDED if succeeded else UPLOADS_FAILED).inc()
+
+    def get(self, upload_id: str) -> Optional[UploadProgress]:
+        """Current progress of an upload, or None if unknown"""
+        with self._lock:
+            return self._uploads.get(upload_id)
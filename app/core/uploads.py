@@ -0,0 +1,176 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    upload_id TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    part_size INTEGER NOT NULL,
+    total_size INTEGER,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    content_type TEXT,
+    status TEXT NOT NULL DEFAULT 'in_progress',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS upload_parts (
+    upload_id TEXT NOT NULL,
+    part_number INTEGER NOT NULL,
+    etag TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (upload_id, part_number)
+);
+"""
+
+# Columns added after the first release, applied to older databases on startup
+MIGRATIONS = {
+    "content_type": "ALTER TABLE upload_sessions ADD COLUMN content_type TEXT",
+}
+
+
+@dataclass
+class UploadSession:
+    """A multipart upload and the parts known to have reached S3"""
+    upload_id: str
+    video_id: str
+    key: str
+    part_size: int
+    total_size: Optional[int] = None
+    metadata: Dict[str, str] = field(default_factory=dict)
+    content_type: Optional[str] = None
+    status: str = "in_progress"
+    parts: Dict[int, Tuple[str, int]] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def offset(self) -> int:
+        """Bytes stored contiguously from the start of the file"""
+        offset = 0
+        part_number = 1
+        while part_number in self.parts:
+            offset += self.parts[part_number][1]
+            part_number += 1
+        return offset
+
+    @property
+    def next_part_number(self) -> int:
+        """Part that holds the byte at `offset`"""
+        part_number = 1
+        while part_number in self.parts:
+            part_number += 1
+        return part_number
+
+    def completed_parts(self) -> List[Dict[str, object]]:
+        """Parts in the format expected by complete_multipart_upload"""
+        return [
+            {"PartNumber": number, "ETag": etag}
+            for number, (etag, _) in sorted(self.parts.items())
+        ]
+
+
+class UploadSessionStore:
+    """
+    Local checkpoint store for resumable uploads, backed by SQLite.
+
+    Each part is recorded once S3 has acknowledged it, so an interrupted
+    upload can resume from the last stored part instead of starting over.
+    """
+
+    def __init__(self, path: str = settings.UPLOAD_STATE_DB_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(upload_sessions)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in existing:
+                self._conn.execute(statement)
+        self._lock = threading.Lock()
+
+    def create(self, session: UploadSession) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO upload_sessions "
+                "(upload_id, video_id, key, part_size, total_size, metadata, content_type, status, "
+                "created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session.upload_id, session.video_id, session.key, session.part_size,
+                    session.total_size, json.dumps(session.metadata), session.content_type,
+                    session.status, session.created_at, session.updated_at,
+                ),
+            )
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT upload_id, video_id, key, part_size, total_size, metadata, content_type, status, "
+                "created_at, updated_at "
+                "FROM upload_sessions WHERE upload_id = ?",
+                (upload_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            parts = self._conn.execute(
+                "SELECT part_number, etag, size FROM upload_parts WHERE upload_id = ?",
+                (upload_id,),
+            ).fetchall()
+        return UploadSession(
+            upload_id=row[0],
+            video_id=row[1],
+            key=row[2],
+            part_size=row[3],
+            total_size=row[4],
+            metadata=json.loads(row[5]),
+            content_type=row[6],
+            status=row[7],
+            created_at=row[8],
+            updated_at=row[9],
+            parts={number: (etag, size) for number, etag, size in parts},
+        )
+
+    def record_part(self, upload_id: str, part_number: int, etag: str, size: int) -> None:
+        """Checkpoint a part that S3 has stored"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO upload_parts (upload_id, part_number, etag, size) VALUES (?, ?, ?, ?)",
+                (upload_id, part_number, etag, size),
+            )
+            self._touch(upload_id)
+
+    def replace_parts(self, upload_id: str, parts: Dict[int, Tuple[str, int]]) -> None:
+        """Overwrite the recorded parts with the authoritative list from S3"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM upload_parts WHERE upload_id = ?", (upload_id,))
+            self._conn.executemany(
+                "INSERT INTO upload_parts (upload_id, part_number, etag, size) VALUES (?, ?, ?, ?)",
+                [(upload_id, number, etag, size) for number, (etag, size) in parts.items()],
+            )
+            self._touch(upload_id)
+
+    def set_status(self, upload_id: str, status: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE upload_sessions SET status = ? WHERE upload_id = ?", (status, upload_id)
+            )
+            self._touch(upload_id)
+            if status != "in_progress":
+                # Part checkpoints are only needed while the upload can resume
+                self._conn.execute("DELETE FROM upload_parts WHERE upload_id = ?", (upload_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _touch(self, upload_id: str) -> None:
+        self._conn.execute(
+            "UPDATE upload_sessions SET updated_at = ? WHERE upload_id = ?", (time.time(), upload_id)
+        )
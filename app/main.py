@@ -1,8 +1,53 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router as api_router
+from app.core.admission import AdmissionMiddleware
+from app.core.aws import ClientRegistry
 from app.core.config import settings
+from app.core.jobs import JobQueue, JobWorker
+from app.core.metadata import SQLiteVideoRepository
+from app.core.metrics import CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from app.core.transfer import ProgressTracker
+from app.core.uploads import UploadSessionStore
+from app.worker import register_handlers
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """
+    Create application-lifetime resources on startup and release them on shutdown
+    """
+    clients = ClientRegistry()
+    # Build the S3 clients eagerly so the first request doesn't pay for them
+    clients.async_s3_client
+    application.state.clients = clients
+    application.state.upload_progress = ProgressTracker()
+    application.state.upload_sessions = UploadSessionStore(settings.UPLOAD_STATE_DB_PATH)
+    application.state.video_repository = SQLiteVideoRepository(settings.METADATA_DB_PATH)
+    application.state.jobs = JobQueue(settings.JOB_DB_PATH)
+    # Jobs normally run in worker.py; running some here is a development convenience
+    job_worker = None
+    if settings.JOB_API_WORKER_THREADS > 0:
+        job_worker = JobWorker(application.state.jobs, threads=settings.JOB_API_WORKER_THREADS)
+        register_handlers(job_worker, clients.s3_client, application.state.video_repository)
+        job_worker.start()
+    try:
+        yield
+    finally:
+        # Let running jobs finish before the stores they write to are closed
+        if job_worker is not None:
+            job_worker.stop()
+        application.state.jobs.close()
+        application.state.video_repository.close()
+        application.state.upload_sessions.close()
+        clients.close()
 
 
 def create_application() -> FastAPI:
@@ -10,6 +55,7 @@ def create_application() -> FastAPI:
     Create and configure the FastAPI application
     """
     application = FastAPI(
+        lifespan=lifespan,
         title=settings.PROJECT_NAME,
         description=settings.PROJECT_DESCRIPTION,
         version=settings.PROJECT_VERSION,
@@ -18,6 +64,9 @@ def create_application() -> FastAPI:
         redoc_url=f"{settings.API_V1_STR}/redoc",
     )
 
+    # Admission control for uploads, inside CORS so rejections carry CORS headers
+    application.add_middleware(AdmissionMiddleware)
+
     # Set up CORS middleware
     application.add_middleware(
         CORSMiddleware,
@@ -26,6 +75,8 @@ def create_application() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if settings.METRICS_ENABLED:
+        application.add_middleware(MetricsMiddleware)
 
     # Include API routes
     application.include_router(api_router, prefix=settings.API_V1_STR)
@@ -38,6 +89,27 @@ def create_application() -> FastAPI:
     async def health():
         return {"status": "healthy"}
 
+    @application.get("/ready")
+    async def ready(request: Request):
+        """Readiness probe: the instance can serve traffic only if S3 is reachable"""
+        try:
+            await asyncio.wait_for(
+                request.app.state.clients.async_s3_client.check_bucket(),
+                timeout=settings.READINESS_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Readiness check timed out waiting for S3")
+            raise HTTPException(status_code=503, detail="S3 did not respond in time")
+        except Exception as e:
+            logger.warning(f"Readiness check failed: {str(e)}")
+            raise HTTPException(status_code=503, detail="S3 is unreachable")
+        return {"status": "ready"}
+
+    if settings.METRICS_ENABLED:
+        @application.get("/metrics", include_in_schema=False)
+        async def metrics():
+            return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
     return application
 
 
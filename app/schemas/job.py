@@ -0,0 +1,25 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class JobResponse(BaseModel):
+    """Schema for a background job"""
+    id: str
+    kind: str
+    video_id: str
+    status: str
+    attempts: int = 0
+    max_attempts: int
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    # When a queued job becomes eligible to run (later than created_at after a failed attempt)
+    run_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobListResponse(BaseModel):
+    """Schema for a list of jobs"""
+    items: List[JobResponse]
@@ -0,0 +1,65 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional
+
+PartNumber = Annotated[int, Field(ge=1, le=10000)]
+
+
+class UploadCreate(BaseModel):
+    """Schema for starting a direct-to-S3 multipart upload"""
+    filename: str
+    content_type: str
+    size: Optional[int] = Field(None, gt=0, description="Total size in bytes, used to pick the part size")
+    title: Optional[str] = None
+    description: Optional[str] = None
+
+
+class UploadCreated(BaseModel):
+    """Schema for a started multipart upload"""
+    upload_id: str
+    video_id: str
+    key: str
+    part_size: int
+    part_count: Optional[int] = None
+
+
+class PartUrlsRequest(BaseModel):
+    """Schema for requesting presigned part URLs"""
+    key: str
+    part_numbers: List[PartNumber] = Field(..., min_length=1, max_length=1000)
+
+
+class PartUrl(BaseModel):
+    """Presigned URL for uploading one part"""
+    part_number: int
+    url: str
+
+
+class PartUrlsResponse(BaseModel):
+    """Schema for presigned part URLs"""
+    upload_id: str
+    expires_in: int
+    parts: List[PartUrl]
+
+
+class CompletedPart(BaseModel):
+    """A part uploaded by the client, with the ETag S3 returned for it"""
+    part_number: PartNumber
+    etag: str
+
+
+class UploadComplete(BaseModel):
+    """Schema for completing a multipart upload"""
+    key: str
+    parts: List[CompletedPart] = Field(..., min_length=1)
+
+
+class UploadStatus(BaseModel):
+    """Schema for the state of a resumable upload"""
+    upload_id: str
+    video_id: str
+    key: str
+    status: str
+    offset: int
+    size: Optional[int] = None
+    part_size: int
+    parts_completed: int
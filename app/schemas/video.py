@@ -1,5 +1,8 @@
+from datetime import datetime
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional
+from typing import Annotated, List, Optional
+
+from app.core.config import settings
 
 
 class VideoBase(BaseModel):
@@ -20,6 +23,11 @@ class VideoResponse(VideoBase):
     url: str
     title: str
     description: str = ""
+    # True when identical content was already stored and no new object was written
+    deduplicated: bool = False
+    # Background transcoding and thumbnail jobs, poll them at /jobs/{id}
+    transcode_job_id: Optional[str] = None
+    thumbnail_job_id: Optional[str] = None
 
 
 class VideoMetadata(VideoBase):
@@ -28,3 +36,96 @@ class VideoMetadata(VideoBase):
     url: str
     title: str
     description: str = ""
+    filename: Optional[str] = None
+    original_filename: Optional[str] = None
+    size: Optional[int] = None
+    content_type: Optional[str] = None
+    extension: Optional[str] = None
+    etag: Optional[str] = None
+    created_at: Optional[datetime] = None
+    # HLS master playlist, once transcoding has finished
+    playlist_url: Optional[str] = None
+    # Poster image and WebVTT seek-preview track, once extracted
+    poster_url: Optional[str] = None
+    thumbnail_track_url: Optional[str] = None
+    # Container and stream properties, when they could be read at upload
+    container: Optional[str] = None
+    duration: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    bitrate: Optional[int] = None
+
+
+class VideoListResponse(BaseModel):
+    """Schema for a page of videos"""
+    items: List[VideoMetadata]
+    next_cursor: Optional[str] = None
+
+
+class SignUrlsRequest(BaseModel):
+    """Schema for a batch of videos to sign URLs for"""
+    video_ids: Annotated[List[str], Field(min_length=1, max_length=5000)]
+    expires_in: Optional[int] = Field(None, ge=60, le=7 * 24 * 3600)
+
+
+class SignedUrl(BaseModel):
+    """Schema for a signed video URL"""
+    id: str
+    url: str
+
+
+class SignedUrlsResponse(BaseModel):
+    """Schema for a batch of signed video URLs"""
+    expires_at: int
+    urls: List[SignedUrl]
+    missing: List[str] = []
+
+
+class SignedCookiesResponse(BaseModel):
+    """Schema for issued CloudFront signed cookies"""
+    resource: str
+    expires_at: int
+
+
+class BatchRequest(BaseModel):
+    """Schema for a batch of video IDs"""
+    video_ids: Annotated[List[str], Field(min_length=1, max_length=settings.BATCH_MAX_ITEMS)]
+
+
+class BatchInfoItem(BaseModel):
+    """Schema for one result of a batch lookup"""
+    id: str
+    status: str
+    video: Optional[VideoMetadata] = None
+    error: Optional[str] = None
+
+
+class BatchInfoResponse(BaseModel):
+    """Schema for batch lookup results, in request order"""
+    results: List[BatchInfoItem]
+
+
+class BatchDeleteItem(BaseModel):
+    """Schema for one result of a batch delete"""
+    id: str
+    status: str
+    error: Optional[str] = None
+
+
+class BatchDeleteResponse(BaseModel):
+    """Schema for batch delete results, in request order"""
+    results: List[BatchDeleteItem]
+    deleted: int
+    failed: int
+
+
+class UploadProgressResponse(BaseModel):
+    """Schema for upload progress"""
+    upload_id: str
+    status: str
+    bytes_transferred: int
+    total_bytes: Optional[int] = None
+    percent: Optional[float] = None
+    bytes_per_second: float = 0.0
@@ -0,0 +1,94 @@
+import logging
+import multiprocessing
+import signal
+import os
+import threading
+from typing import Dict
+
+from app.core.aws import ClientRegistry
+from app.core.config import settings
+from app.core.jobs import JobQueue, JobWorker
+from app.core.metadata import SQLiteVideoRepository, VideoRepository
+from app.core.storage import StorageBackend
+from app.core.thumbnails import THUMBNAIL_JOB, thumbnail_handler
+from app.core.transcoding import TRANSCODE_JOB, transcode_handler
+
+logger = logging.getLogger(__name__)
+
+
+def register_handlers(worker: JobWorker, s3_client: StorageBackend, repository: VideoRepository) -> None:
+    """Register the handler for every kind of post-upload job"""
+    worker.register(TRANSCODE_JOB, transcode_handler(s3_client, repository))
+    worker.register(THUMBNAIL_JOB, thumbnail_handler(s3_client, repository))
+
+
+def configure_logging() -> None:
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", settings.LOG_LEVEL).upper(),
+        format="%(asctime)s %(processName)s %(levelname)s %(name)s: %(message)s",
+    )
+
+
+def run_worker_process(threads: int = settings.JOB_WORKER_THREADS) -> None:
+    """
+    Run jobs in this process until SIGTERM or SIGINT, then finish the jobs
+    in progress and exit
+    
+    Args:
+        threads: Jobs to run at once
+    """
+    configure_logging()
+    stopping = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.set())
+    
+    clients = ClientRegistry()
+    repository = SQLiteVideoRepository(settings.METADATA_DB_PATH)
+    queue = JobQueue(settings.JOB_DB_PATH)
+    worker = JobWorker(queue, threads=threads)
+    register_handlers(worker, clients.s3_client, repository)
+    worker.start()
+    logger.info(f"Job worker {worker.name} started with {threads} threads")
+    try:
+        stopping.wait()
+    finally:
+        worker.stop()
+        queue.close()
+        repository.close()
+        clients.close()
+        logger.info(f"Job worker {worker.name} stopped")
+
+
+def main(processes: int = settings.JOB_WORKER_PROCESSES) -> None:
+    """
+    Run `processes` worker processes, restarting any that die, until SIGTERM
+    or SIGINT
+    
+    Args:
+        processes: Worker processes to run; 1 runs jobs in this process
+    """
+    if processes <= 1:
+        run_worker_process()
+        return
+    
+    stopping = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.set())
+    
+    context = multiprocessing.get_context("spawn")
+    children: Dict[int, multiprocessing.Process] = {}
+    while not stopping.is_set():
+        for index in range(processes):
+            child = children.get(index)
+            if child is None or not child.is_alive():
+                if child is not None:
+                    logger.warning(f"Job worker process {child.pid} exited with {child.exitcode}, restarting")
+                child = context.Process(target=run_worker_process, name=f"job-worker-{index}")
+                child.start()
+                children[index] = child
+        stopping.wait(1)
+    
+    for child in children.values():
+        child.terminate()
+    for child in children.values():
+        child.join()
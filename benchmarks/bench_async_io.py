@@ -0,0 +1,86 @@
+"""
+Load test showing that video endpoint throughput scales with concurrency now
+that S3 calls run off the event loop.
+
+Drives uploads and lookups through the ASGI app in a single event loop (as one
+uvicorn worker would) at increasing concurrency levels.
+
+Usage:
+    python -m benchmarks.bench_async_io [--requests N] [--levels 1,4,16] [--latency-ms MS]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks.common import add_latency, configure_settings, local_s3, report, summarize
+
+API = "/api/v1/videos"
+
+
+async def drive(client: httpx.AsyncClient, make_request, requests: int, concurrency: int):
+    """Issue `requests` calls with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code < 400, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def run(requests: int, levels, payload_size: int, latency: float):
+    from app.main import app
+
+    payload = os.urandom(payload_size)
+    video_ids = []
+
+    async def upload(client, i):
+        response = await client.post(
+            f"{API}/upload",
+            files={"file": (f"bench-{i}.mp4", payload, "video/mp4")},
+        )
+        video_ids.append(response.json()["id"])
+        return response
+
+    async def lookup(client, i):
+        return await client.get(f"{API}/{video_ids[i % len(video_ids)]}")
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        add_latency(app.state.clients.s3_client.s3_client, latency)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for concurrency in levels:
+                results[f"upload_c{concurrency}"] = await drive(client, upload, requests, concurrency)
+                results[f"lookup_c{concurrency}"] = await drive(client, lookup, requests, concurrency)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--levels", default="1,4,16")
+    parser.add_argument("--payload-size", type=int, default=256 * 1024)
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="Simulated round-trip time added to every S3 call")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+
+    with local_s3() as endpoint_url:
+        configure_settings(endpoint_url)
+        results = asyncio.run(run(args.requests, levels, args.payload_size, args.latency_ms / 1000))
+
+    report("async_io", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Bulk lookup and delete: one request per video versus the batch endpoints.
+
+Lookups use videos that are not in the metadata index, so each one needs an
+S3 HEAD; deletes compare per-key DeleteObject with batched DeleteObjects.
+
+Usage:
+    python -m benchmarks.bench_batch [--videos N] [--latency-ms MS]
+"""
+import argparse
+import asyncio
+import io
+import time
+
+import httpx
+
+from benchmarks.common import add_latency, configure_settings, local_s3, report
+
+API = "/api/v1/videos"
+
+
+def seed(clients, video_ids) -> None:
+    for video_id in video_ids:
+        clients.s3_client.upload_video(io.BytesIO(b"0" * 1024), f"videos/{video_id}.mp4", metadata={"title": video_id})
+
+
+async def run(videos: int, latency: float):
+    from app.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        clients = app.state.clients
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            ids = [f"bench-{i}" for i in range(videos)]
+            seed(clients, ids)
+            add_latency(clients.s3_client.s3_client, latency)
+
+            # One HEAD per request, issued sequentially like a naive client
+            clients.s3_client.cache = None
+            start = time.perf_counter()
+            for video_id in ids:
+                response = await client.post(f"{API}/batch/info", json={"video_ids": [video_id]})
+                assert response.status_code == 200
+            results["info_one_per_request_s"] = round(time.perf_counter() - start, 3)
+
+            start = time.perf_counter()
+            response = await client.post(f"{API}/batch/info", json={"video_ids": ids})
+            assert all(item["status"] == "ok" for item in response.json()["results"])
+            results["info_batch_s"] = round(time.perf_counter() - start, 3)
+
+            start = time.perf_counter()
+            for video_id in ids:
+                response = await client.delete(f"{API}/{video_id}")
+                assert response.status_code == 204, response.text
+            results["delete_one_per_request_s"] = round(time.perf_counter() - start, 3)
+
+            seed(clients, ids)
+            start = time.perf_counter()
+            response = await client.post(f"{API}/batch/delete", json={"video_ids": ids})
+            assert response.json()["failed"] == 0
+            results["delete_batch_s"] = round(time.perf_counter() - start, 3)
+
+    results["info_speedup"] = round(results["info_one_per_request_s"] / results["info_batch_s"], 1)
+    results["delete_speedup"] = round(results["delete_one_per_request_s"] / results["delete_batch_s"], 1)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="Simulated round-trip time added to every S3 call")
+    args = parser.parse_args()
+
+    with local_s3() as endpoint_url:
+        configure_settings(endpoint_url)
+        results = asyncio.run(run(args.videos, args.latency_ms / 1000))
+
+    report("batch", results)
+
+
+if __name__ == "__main__":
+    main()
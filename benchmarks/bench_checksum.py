@@ -0,0 +1,113 @@
+"""
+Cost of upload checksums: raw CRC32/SHA-256 throughput when fed in request
+body-sized chunks, and streaming uploads (StreamingMultipartUpload) against a
+local S3 stand-in with and without per-part checksums.
+
+For each algorithm, reports the end-to-end slowdown of the upload, and the
+time spent checksumming as a share of the unchecksummed upload time (less
+noisy than the end-to-end difference on a loopback S3).
+
+Usage:
+    python -m benchmarks.bench_checksum [--size-mb 256] [--chunk-kb 64] [--part-mb 16] [--repeat 3]
+        [--latency-ms 5]
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from benchmarks.common import add_latency, configure_settings, local_s3, report
+
+MB = 1024 * 1024
+
+ALGORITHMS = (None, "CRC32", "SHA256")
+
+
+def checksum_seconds(algorithm: str, payload: bytes, chunk_size: int, repeat: int) -> float:
+    """Best-of-`repeat` time to checksum payload chunk by chunk"""
+    from app.core.hashing import Checksum
+
+    view = memoryview(payload)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        checksum = Checksum(algorithm)
+        for offset in range(0, len(payload), chunk_size):
+            checksum.update(view[offset:offset + chunk_size])
+        checksum.digest()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def upload_seconds(s3_client, payload: bytes, chunk_size: int, part_size: int, repeat: int) -> Dict[str, float]:
+    """
+    Best-of-`repeat` time to stream payload into S3 chunk by chunk, per
+    algorithm. Algorithms take turns within each round, so drift in the
+    stand-in's speed affects them alike.
+    """
+    from app.core.streaming import StreamingMultipartUpload
+
+    view = memoryview(payload)
+
+    async def upload(algorithm: Optional[str]):
+        streaming = StreamingMultipartUpload(
+            s3_client, "videos/bench-checksum.mp4", part_size=part_size, checksum_algorithm=algorithm
+        )
+        for offset in range(0, len(payload), chunk_size):
+            await streaming.write(bytes(view[offset:offset + chunk_size]))
+        await streaming.complete()
+
+    # Warm up connections and the stand-in
+    asyncio.run(upload(None))
+    best = {algorithm: float("inf") for algorithm in ALGORITHMS}
+    for _ in range(repeat):
+        for algorithm in ALGORITHMS:
+            start = time.perf_counter()
+            asyncio.run(upload(algorithm))
+            best[algorithm] = min(best[algorithm], time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256, help="Uploaded file size")
+    parser.add_argument("--chunk-kb", type=int, default=64, help="Size of the request body chunks fed in")
+    parser.add_argument("--part-mb", type=int, default=16, help="Multipart part size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=5.0,
+                        help="Simulated round-trip time added to every S3 call")
+    args = parser.parse_args()
+    payload = os.urandom(args.size_mb * MB)
+    chunk_size = args.chunk_kb * 1024
+
+    results = {}
+    with local_s3() as endpoint_url:
+        configure_settings(endpoint_url)
+        from app.core.aws import AsyncS3Client, S3Client
+
+        sync_client = S3Client(region_name="us-east-1", endpoint_url=endpoint_url)
+        add_latency(sync_client.s3_client, args.latency_ms / 1000)
+        s3_client = AsyncS3Client(sync_client)
+
+        uploads = upload_seconds(s3_client, payload, chunk_size, args.part_mb * MB, args.repeat)
+        baseline = uploads[None]
+        for algorithm in ALGORITHMS:
+            seconds = uploads[algorithm]
+            result = {
+                "upload_seconds": round(seconds, 3),
+                "upload_mb_per_sec": round(args.size_mb / seconds, 1),
+                "overhead_pct": round((seconds / baseline - 1) * 100, 2),
+            }
+            if algorithm is not None:
+                checksum = checksum_seconds(algorithm, payload, chunk_size, args.repeat)
+                result["checksum_mb_per_sec"] = round(args.size_mb / checksum, 1)
+                result["checksum_share_pct"] = round(checksum / baseline * 100, 2)
+            results[algorithm or "none"] = result
+        s3_client.close()
+
+    report("checksum", {"size_mb": args.size_mb, "chunk_kb": args.chunk_kb, "algorithms": results})
+
+
+if __name__ == "__main__":
+    main()
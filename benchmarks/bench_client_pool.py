@@ -0,0 +1,57 @@
+"""
+Requests/sec for video lookups with a per-request S3Client versus the shared,
+pooled client held by ClientRegistry.
+
+Usage:
+    python -m benchmarks.bench_client_pool [--requests N] [--concurrency C]
+"""
+import argparse
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import configure_settings, local_s3, report, summarize
+
+VIDEO_KEY = "videos/bench.mp4"
+
+
+def run(lookup, requests: int, concurrency: int):
+    """Execute `requests` lookups across `concurrency` threads"""
+    def one(_):
+        start = time.perf_counter()
+        lookup(VIDEO_KEY)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, range(requests)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with local_s3() as endpoint_url:
+        configure_settings(endpoint_url)
+        from app.core.aws import ClientRegistry, S3Client
+
+        registry = ClientRegistry(region_name="us-east-1", endpoint_url=endpoint_url)
+        registry.s3_client.upload_video(io.BytesIO(b"0" * 1024), VIDEO_KEY)
+
+        def per_request(key):
+            return S3Client(region_name="us-east-1", endpoint_url=endpoint_url).get_video_url(key)
+
+        results = {
+            "per_request_client": run(per_request, args.requests, args.concurrency),
+            "pooled_client": run(registry.s3_client.get_video_url, args.requests, args.concurrency),
+        }
+        registry.close()
+
+    report("client_pool", results)
+
+
+if __name__ == "__main__":
+    main()
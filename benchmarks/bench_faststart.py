@@ -0,0 +1,149 @@
+"""
+Time to first frame for MP4s with moov at the end, as uploaded, versus the
+faststart layout written by /upload.
+
+Each file is stored in a local S3 stand-in and fetched by two simulated
+players over a link with fixed latency and bandwidth:
+
+- a range-aware player (browsers, hls.js, ExoPlayer) reads the head of the
+  file, follows box headers with Range requests until it has moov, then
+  fetches the first chunk of media;
+- a naive progressive client reads the file front to back in one request
+  until it has moov and the first chunk.
+
+Also reports the cost of the rewrite at ingest (relocating moov while
+uploading versus uploading the file as is).
+
+Usage:
+    python -m benchmarks.bench_faststart [--sizes-mb 16,64,256] [--latency-ms 40] [--bandwidth-mbps 50]
+"""
+import argparse
+import io
+import struct
+import time
+
+from app.core.faststart import faststart
+from app.core.probe import MediaProbe, find_box
+from benchmarks.common import configure_settings, local_s3, report, timed
+from tests.media import build_mp4
+
+# Bytes a player asks for first, before it knows the layout
+INITIAL_RANGE = 256 * 1024
+# Media fetched for the first frame
+FIRST_FRAME_BYTES = 64 * 1024
+READ_SIZE = 64 * 1024
+
+
+class Link:
+    """Simulated network between a player and the CDN"""
+
+    def __init__(self, s3_client, latency: float, bandwidth: float):
+        self.s3_client = s3_client
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requests = 0
+        self.bytes = 0
+
+    def open(self, key: str, start: int, end: int):
+        """Start a GET, paying one round trip"""
+        self.requests += 1
+        time.sleep(self.latency)
+        return self.s3_client.get_object(key, (start, end))["Body"]
+
+    def read(self, body, size: int) -> bytes:
+        data = body.read(size)
+        self.bytes += len(data)
+        time.sleep(len(data) / self.bandwidth)
+        return data
+
+
+def first_chunk_offset(moov: bytes) -> int:
+    start, _ = find_box(moov, (b"trak", b"mdia", b"minf", b"stbl", b"stco"))
+    return struct.unpack(">I", moov[start + 8:start + 12])[0]
+
+
+def range_player(link: Link, key: str, size: int) -> None:
+    probe = MediaProbe()
+    position = 0
+    while not probe.finished and position < size:
+        body = link.open(key, position, min(size, position + INITIAL_RANGE) - 1)
+        data = link.read(body, INITIAL_RANGE)
+        probe.feed(data)
+        position += len(data)
+        if probe.pending_skip:
+            # Jump over mdat with a new request instead of downloading it
+            position += probe.pending_skip
+            probe.skip(probe.pending_skip)
+    offset = first_chunk_offset(probe.elements[b"moov"])
+    if not offset <= position - FIRST_FRAME_BYTES:
+        body = link.open(key, offset, offset + FIRST_FRAME_BYTES - 1)
+        link.read(body, FIRST_FRAME_BYTES)
+
+
+def naive_player(link: Link, key: str, size: int) -> None:
+    probe = MediaProbe()
+    body = link.open(key, 0, size - 1)
+    position = 0
+    needed = None
+    while needed is None or position < needed:
+        data = link.read(body, READ_SIZE)
+        if not data:
+            break
+        position += len(data)
+        probe.feed(data)
+        if needed is None and probe.done:
+            needed = max(position, first_chunk_offset(probe.elements[b"moov"]) + FIRST_FRAME_BYTES)
+    body.close()
+
+
+def measure(s3_client, key: str, size: int, player, latency: float, bandwidth: float):
+    link = Link(s3_client, latency, bandwidth)
+    elapsed = timed(lambda: player(link, key, size))
+    return {"ttff_ms": round(elapsed * 1000, 1), "requests": link.requests, "bytes": link.bytes}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", default="16,64,256")
+    parser.add_argument("--latency-ms", type=float, default=40.0,
+                        help="Round-trip time between player and CDN")
+    parser.add_argument("--bandwidth-mbps", type=float, default=50.0,
+                        help="Player download bandwidth, in megabits per second")
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+    bandwidth = args.bandwidth_mbps * 1e6 / 8
+
+    results = {}
+    with local_s3() as endpoint_url:
+        configure_settings(endpoint_url)
+        from app.core.aws import S3Client
+        s3_client = S3Client()
+
+        for size_mb in (int(size) for size in args.sizes_mb.split(",")):
+            media_size = size_mb * 1024 * 1024
+            # One chunk per 64 KiB of media, roughly what muxers write
+            data = build_mp4(media_size=media_size, chunks=media_size // (128 * 1024), duration=size_mb * 2.0)
+            tail_key, fast_key = f"videos/tail-{size_mb}.mp4", f"videos/fast-{size_mb}.mp4"
+
+            upload_ms = timed(lambda: s3_client.upload_video(io.BytesIO(data), tail_key, file_size=len(data)))
+
+            def upload_faststart():
+                relocated = faststart(io.BytesIO(data))
+                s3_client.upload_video(relocated, fast_key, file_size=relocated.size)
+            faststart_upload_ms = timed(upload_faststart)
+
+            results[f"{size_mb}mb"] = {
+                "ingest_upload_ms": round(upload_ms * 1000, 1),
+                "ingest_faststart_upload_ms": round(faststart_upload_ms * 1000, 1),
+                "range_player_moov_at_end": measure(s3_client, tail_key, len(data), range_player, latency, bandwidth),
+                "range_player_faststart": measure(s3_client, fast_key, len(data), range_player, latency, bandwidth),
+                "naive_player_moov_at_end": measure(s3_client, tail_key, len(data), naive_player, latency, bandwidth),
+                "naive_player_faststart": measure(s3_client, fast_key, len(data), naive_player, latency, bandwidth),
+            }
+        s3_client.close()
+
+    report("faststart", results)
+
+
+if __name__ == "__main__":
+    main()
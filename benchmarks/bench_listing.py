@@ -0,0 +1,113 @@
+"""
+Per-page latency of the video listing as the catalog grows, for keyset
+(cursor) pagination compared with the OFFSET pagination it replaces.
+
+Usage:
+    python -m benchmarks.bench_listing [--sizes 10000,100000,1000000] [--pages N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from benchmarks.common import report, summarize, timed
+
+PAGE_SIZE = 20
+SEED_BATCH = 50000
+
+
+def seed(repository, count: int) -> None:
+    """Insert `count` synthetic videos with spread-out timestamps and sizes"""
+    from app.core.metadata import VideoRecord
+
+    rng = random.Random(count)
+    start = time.time() - count
+    for offset in range(0, count, SEED_BATCH):
+        repository.add_many(
+            VideoRecord(
+                id=str(uuid.UUID(int=rng.getrandbits(128))),
+                key=f"videos/{i}.mp4",
+                title=f"{rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}video {i}",
+                size=rng.randrange(1, 5 * 1024 ** 3),
+                created_at=start + i
+            )
+            for i in range(offset, min(count, offset + SEED_BATCH))
+        )
+
+
+def bench(repository, count: int, pages: int, sort: str):
+    """Time first pages, deep keyset pages and deep OFFSET pages"""
+    from app.core.metadata import SORT_EXPRESSIONS, sort_key
+
+    expression = SORT_EXPRESSIONS[sort]
+    rng = random.Random(0)
+    depths = [rng.randrange(count - PAGE_SIZE) for _ in range(pages)]
+
+    # Cursors for the deep pages, taken from the record just before each depth
+    cursors = []
+    for depth in depths:
+        row = repository._conn.execute(
+            f"SELECT id, created_at, size FROM videos ORDER BY {expression} DESC, id DESC LIMIT 1 OFFSET ?",
+            (depth,)
+        ).fetchone()
+        cursors.append((row[2] if sort == "size" else row[1], row[0]))
+
+    def first_page():
+        repository.list(sort=sort, limit=PAGE_SIZE)
+
+    def keyset_page(cursor):
+        return lambda: repository.list(sort=sort, limit=PAGE_SIZE, after=cursor)
+
+    def offset_page(depth):
+        return lambda: repository._conn.execute(
+            f"SELECT * FROM videos ORDER BY {expression} DESC, id DESC LIMIT ? OFFSET ?",
+            (PAGE_SIZE, depth)
+        ).fetchall()
+
+    def run(fns):
+        start = time.perf_counter()
+        latencies = [timed(fn) for fn in fns]
+        return summarize(latencies, time.perf_counter() - start)
+
+    # Sanity check: the keyset page starts right after its cursor
+    page = repository.list(sort=sort, limit=1, after=cursors[0])
+    assert sort_key(page[0], sort) < cursors[0]
+
+    return {
+        "first_page": run([first_page] * pages),
+        "keyset_deep_page": run([keyset_page(cursor) for cursor in cursors]),
+        "offset_deep_page": run([offset_page(depth) for depth in depths]),
+        "title_prefix_page": run([
+            lambda: repository.list(sort=sort, limit=PAGE_SIZE, title_prefix="Qvideo 12")
+        ] * pages),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--pages", type=int, default=50)
+    args = parser.parse_args()
+
+    from app.core.metadata import SQLiteVideoRepository
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in (int(size) for size in args.sizes.split(",")):
+            path = os.path.join(directory, f"videos-{count}.db")
+            repository = SQLiteVideoRepository(path)
+            seed_seconds = timed(lambda: seed(repository, count))
+            results[str(count)] = {
+                "seed_seconds": round(seed_seconds, 2),
+                "created_at": bench(repository, count, args.pages, "created_at"),
+                "size": bench(repository, count, args.pages, "size"),
+            }
+            repository.close()
+
+    report("listing", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+End-to-end load test: the API running under uvicorn (one or more workers)
+against a local S3 stand-in, driven over HTTP.
+
+For each file size and concurrency level, uploads a batch of videos, then
+looks each one up (GET, which answers with a redirect), fetches its info and
+deletes it. The lookups are then repeated while another batch is uploaded
+(get_during_upload), showing what ingest load does to redirect latency.
+Reports throughput and p50/p95/p99 latency per operation, and the resident
+memory of every worker, as JSON.
+
+Pass --baseline with the JSON output of an earlier run to compare against
+it; the run fails if any operation got slower than --tolerance allows.
+--storage local or memory runs the API on a non-S3 storage backend (memory
+is per process, so use it with --workers 1).
+
+Usage:
+    python -m benchmarks.bench_load [--workers N] [--requests N] [--levels 1,8,32] [--sizes-kb 64,1024]
+        [--storage s3|local|memory] [--output results.json] [--baseline results.json] [--tolerance 0.2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.common import (
+    configure_settings, local_app, local_s3, process_memory, report, summarize, worker_pids
+)
+
+API = "/api/v1/videos"
+
+
+async def drive(requests: int, concurrency: int, make_request, expected_status: int):
+    """Issue `requests` calls with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == expected_status, f"{response.status_code}: {response.text}"
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def run_level(client: httpx.AsyncClient, payload: bytes, requests: int, concurrency: int):
+    video_ids: List[str] = [""] * requests
+
+    async def upload(i: int):
+        response = await client.post(
+            f"{API}/upload",
+            files={"file": (f"load-{i}.mp4", payload, "video/mp4")},
+        )
+        if response.status_code == 201:
+            video_ids[i] = response.json()["id"]
+        return response
+
+    async def get(i: int):
+        return await client.get(f"{API}/{video_ids[i]}")
+
+    async def info(i: int):
+        return await client.get(f"{API}/{video_ids[i]}/info")
+
+    async def delete(i: int):
+        return await client.delete(f"{API}/{video_ids[i]}")
+
+    results = {}
+    for name, make_request, status in (
+        ("upload", upload, 201),
+        ("get", get, 307),
+        ("info", info, 200),
+    ):
+        results[name] = await drive(requests, concurrency, make_request, status)
+        if name == "upload":
+            results[name]["mb_per_sec"] = round(
+                results[name]["ops_per_sec"] * len(payload) / (1024 * 1024), 1
+            )
+    results["get_during_upload"] = await get_during_upload(client, payload, requests, concurrency, get)
+    results["delete"] = await drive(requests, concurrency, delete, 204)
+    return results
+
+
+async def get_during_upload(client: httpx.AsyncClient, payload: bytes, requests: int, concurrency: int, get):
+    """Time lookups while a second batch is uploaded; the extra videos are deleted afterwards"""
+    statuses: Dict[int, int] = {}
+    video_ids: List[str] = []
+
+    async def upload(i: int):
+        # Admission control may turn some away (429/503); they still count as load
+        response = await client.post(
+            f"{API}/upload",
+            files={"file": (f"ingest-{i}.mp4", payload, "video/mp4")},
+        )
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        if response.status_code == 201:
+            video_ids.append(response.json()["id"])
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def throttled_upload(i: int):
+        async with semaphore:
+            await upload(i)
+
+    uploads = asyncio.ensure_future(asyncio.gather(*(throttled_upload(i) for i in range(requests))))
+    result = await drive(requests, concurrency, get, 307)
+    await uploads
+    await asyncio.gather(*(client.delete(f"{API}/{video_id}") for video_id in video_ids))
+    result["upload_statuses"] = {str(status): count for status, count in sorted(statuses.items())}
+    return result
+
+
+async def run(base_url: str, sizes_kb: List[int], levels: List[int], requests: int):
+    results = {}
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        for size_kb in sizes_kb:
+            payload = os.urandom(size_kb * 1024)
+            for concurrency in levels:
+                results[f"{size_kb}kb_c{concurrency}"] = await run_level(client, payload, requests, concurrency)
+    return results
+
+
+def regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Operations whose throughput dropped or p95 latency rose by more than tolerance"""
+    found = []
+    for workload, operations in baseline.get("workloads", {}).items():
+        for name, before in operations.items():
+            after = results["workloads"].get(workload, {}).get(name)
+            if after is None:
+                continue
+            if after["ops_per_sec"] < before["ops_per_sec"] * (1 - tolerance):
+                found.append(f"{workload}.{name}: {before['ops_per_sec']} -> {after['ops_per_sec']} ops/sec")
+            if after["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                found.append(f"{workload}.{name}: p95 {before['p95_ms']} -> {after['p95_ms']} ms")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per operation and workload")
+    parser.add_argument("--levels", default="1,8,32", help="Concurrency levels")
+    parser.add_argument("--sizes-kb", default="64,1024", help="Uploaded file sizes")
+    parser.add_argument("--storage", default="s3", choices=("s3", "local", "memory"), help="Storage backend")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative drop in throughput or rise in p95 latency")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+    sizes_kb = [int(size) for size in args.sizes_kb.split(",")]
+
+    with local_s3() as endpoint_url, tempfile.TemporaryDirectory() as state_dir:
+        configure_settings(endpoint_url)
+        app_env = {
+            "STORAGE_BACKEND": args.storage,
+            "STORAGE_LOCAL_PATH": os.path.join(state_dir, "media"),
+            # One benchmark client stands in for many users
+            "UPLOAD_MAX_CONCURRENT_PER_CLIENT": "0",
+        }
+        with local_app(endpoint_url, state_dir, workers=args.workers, env=app_env) as server:
+            pids = worker_pids(server.pid)
+            idle = [process_memory(pid) for pid in pids]
+            workloads = asyncio.run(run(server.base_url, sizes_kb, levels, args.requests))
+            memory = [
+                dict(process_memory(pid), idle_rss_mb=before["rss_mb"])
+                for pid, before in zip(pids, idle)
+            ]
+
+    results = {
+        "config": {
+            "workers": args.workers,
+            "storage": args.storage,
+            "requests": args.requests,
+            "levels": levels,
+            "sizes_kb": sizes_kb,
+        },
+        "workloads": workloads,
+        "worker_memory": memory,
+    }
+    report("load", results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        if found:
+            print("Regressions against the baseline:", *found, sep="\n  ", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Media probing cost at upload time.
+
+For MP4 (moov at the start and at the end) and WebM files of several sizes,
+compares probe_file() on a spooled file, which reads only the headers, with
+a plain read of the whole file, and measures how much MediaProbe.feed() slows
+down a streamed upload's chunk loop. No S3 is involved.
+
+Usage:
+    python -m benchmarks.bench_probe [--sizes-mb 1,16,128] [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from app.core.probe import MediaProbe, probe_file
+from benchmarks.common import report
+from tests.media import build_mp4, build_webm
+
+CHUNK = 1024 * 1024
+
+
+class CountingFile:
+    """File wrapper counting the bytes actually read"""
+
+    def __init__(self, file_obj):
+        self.file_obj = file_obj
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = self.file_obj.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+    def seek(self, offset, whence=0):
+        return self.file_obj.seek(offset, whence)
+
+    def tell(self):
+        return self.file_obj.tell()
+
+
+def median_ms(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 3)
+
+
+def bench_file(path: str, data: bytes, repeat: int):
+    with open(path, "rb") as file_obj:
+        counting = CountingFile(file_obj)
+        info = probe_file(counting)
+        probe_ms = median_ms(lambda: probe_file(file_obj), repeat)
+
+        def read_all():
+            file_obj.seek(0)
+            while file_obj.read(CHUNK):
+                pass
+        read_ms = median_ms(read_all, repeat)
+
+    def loop(probe):
+        for offset in range(0, len(data), CHUNK):
+            chunk = data[offset:offset + CHUNK]
+            if probe is not None:
+                probe.feed(chunk)
+    stream_ms = median_ms(lambda: loop(None), repeat)
+    stream_probe_ms = median_ms(lambda: loop(MediaProbe()), repeat)
+
+    return {
+        "container": info.container,
+        "duration_s": info.duration,
+        "probe_ms": probe_ms,
+        "probe_bytes_read": counting.bytes_read,
+        "full_read_ms": read_ms,
+        "stream_loop_ms": stream_ms,
+        "stream_loop_with_probe_ms": stream_probe_ms,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", default="1,16,128")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench-probe-") as scratch:
+        for size_mb in (int(size) for size in args.sizes_mb.split(",")):
+            size = size_mb * 1024 * 1024
+            samples = {
+                "mp4_faststart": build_mp4(media_size=size, faststart=True, chunks=size // 65536 or 1),
+                "mp4_moov_at_end": build_mp4(media_size=size, chunks=size // 65536 or 1),
+                "webm": build_webm(media_size=size),
+            }
+            for name, data in samples.items():
+                path = os.path.join(scratch, name)
+                with open(path, "wb") as file_obj:
+                    file_obj.write(data)
+                results[f"{name}_{size_mb}mb"] = bench_file(path, data, args.repeat)
+                os.remove(path)
+
+    report("probe", results)
+
+
+if __name__ == "__main__":
+    main()
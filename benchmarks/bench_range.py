@@ -0,0 +1,120 @@
+"""
+Throughput and latency of proxy-mode video delivery for sequential playback
+and random seeking, using HTTP Range requests.
+
+With --segment-cache, reads go through the disk segment cache; the
+sequential pass fills it, so the random seeks that follow are served from disk.
+
+Usage:
+    python -m benchmarks.bench_range [--size-mb N] [--seeks N] [--concurrency C] [--latency-ms MS] [--segment-cache]
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.common import add_latency, configure_settings, local_s3, report, summarize
+
+API = "/api/v1/videos"
+MB = 1024 * 1024
+
+
+async def timed_get(client: httpx.AsyncClient, url: str, headers=None):
+    start = time.perf_counter()
+    response = await client.get(url, headers=headers)
+    elapsed = time.perf_counter() - start
+    assert response.status_code in (200, 206), response.text
+    return elapsed, len(response.content)
+
+
+def with_throughput(latencies, elapsed: float, total_bytes: int):
+    results = summarize(latencies, elapsed)
+    results["mb_per_sec"] = round(total_bytes / MB / elapsed, 1) if elapsed else 0.0
+    return results
+
+
+async def run(size: int, seeks: int, concurrency: int, range_kb: int, latency: float):
+    from app.main import app
+
+    payload = os.urandom(size)
+    rng = random.Random(0)
+    range_size = range_kb * 1024
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        clients = app.state.clients
+        video_id = "bench-range"
+        clients.s3_client.upload_video(io.BytesIO(payload), f"videos/{video_id}.mp4", file_size=size)
+        add_latency(clients.s3_client.s3_client, latency)
+        url = f"{API}/{video_id}"
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # Whole file in one response
+            start = time.perf_counter()
+            latency_s, received = await timed_get(client, url)
+            results["full_download"] = with_throughput([latency_s], time.perf_counter() - start, received)
+
+            # Sequential playback: consecutive ranges, one at a time
+            latencies, total = [], 0
+            start = time.perf_counter()
+            for offset in range(0, size, range_size):
+                end = min(size, offset + range_size) - 1
+                latency_s, received = await timed_get(client, url, {"Range": f"bytes={offset}-{end}"})
+                latencies.append(latency_s)
+                total += received
+            results["sequential_ranges"] = with_throughput(latencies, time.perf_counter() - start, total)
+
+            # Random seeks from several concurrent viewers
+            semaphore = asyncio.Semaphore(concurrency)
+            offsets = [rng.randrange(size - range_size) for _ in range(seeks)]
+            latencies, sizes = [], []
+
+            async def seek(offset: int):
+                async with semaphore:
+                    latency_s, received = await timed_get(
+                        client, url, {"Range": f"bytes={offset}-{offset + range_size - 1}"}
+                    )
+                    latencies.append(latency_s)
+                    sizes.append(received)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(seek(offset) for offset in offsets))
+            results[f"random_seek_c{concurrency}"] = with_throughput(
+                latencies, time.perf_counter() - start, sum(sizes)
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=32)
+    parser.add_argument("--seeks", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--range-kb", type=int, default=1024)
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="Simulated round-trip time added to every S3 call")
+    parser.add_argument("--segment-cache", action="store_true", help="Serve reads through the disk segment cache")
+    args = parser.parse_args()
+
+    with local_s3() as endpoint_url, tempfile.TemporaryDirectory() as cache_dir:
+        configure_settings(
+            endpoint_url,
+            VIDEO_DELIVERY_MODE="proxy",
+            SEGMENT_CACHE_ENABLED=args.segment_cache,
+            SEGMENT_CACHE_DIR=cache_dir,
+        )
+        results = asyncio.run(
+            run(args.size_mb * MB, args.seeks, args.concurrency, args.range_kb, args.latency_ms / 1000)
+        )
+
+    report("range", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Signatures/sec for CloudFront signed URLs: loading the key per call versus
+once, and cold signatures versus policies already in the signature cache.
+
+Usage:
+    python -m benchmarks.bench_signing [--urls N] [--key-size BITS]
+"""
+import argparse
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from benchmarks.common import report, summarize, timed
+
+
+def rate(count: int, fn) -> dict:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {
+        "signatures": count,
+        "signatures_per_sec": round(count / elapsed, 1),
+        "us_per_signature": round(elapsed / count * 1e6, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", type=int, default=5000)
+    parser.add_argument("--key-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    from app.core.signing import CloudFrontSigner, load_private_key
+
+    pem = rsa.generate_private_key(public_exponent=65537, key_size=args.key_size).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    urls = [f"https://cdn.example.com/videos/{i:08d}.mp4" for i in range(args.urls)]
+    results = {}
+
+    # Baseline: parse the PEM for every URL, as a naive per-request signer would
+    sample = urls[:200]
+    results["key_loaded_per_url"] = rate(len(sample), lambda: [
+        CloudFrontSigner("KBENCH", serialization.load_pem_private_key(pem, password=None)).sign_url(url)
+        for url in sample
+    ])
+
+    signer = CloudFrontSigner("KBENCH", load_private_key(pem))
+    expires = signer.expires_at()
+    results["cold_batch"] = rate(len(urls), lambda: signer.sign_urls(urls, expires))
+    results["cached_batch"] = rate(len(urls), lambda: signer.sign_urls(urls, expires))
+
+    # A playlist: one wildcard policy covers every segment URL
+    segments = [f"https://cdn.example.com/renditions/abc/720p/{i:05d}.ts" for i in range(len(urls))]
+    results["playlist_custom_policy"] = rate(len(segments), lambda: [
+        signer.sign_url_with_policy(url, "https://cdn.example.com/renditions/abc/*", expires)
+        for url in segments
+    ])
+
+    # Latency of a whole 1000-URL batch request, cold and warm
+    batches = [urls[i:i + 1000] for i in range(0, len(urls), 1000)]
+    fresh = CloudFrontSigner("KBENCH", load_private_key(pem))
+    cold = [timed(lambda batch=batch: fresh.sign_urls(batch, expires)) for batch in batches]
+    warm = [timed(lambda batch=batch: fresh.sign_urls(batch, expires)) for batch in batches]
+    results["batch_1000_cold"] = summarize(cold, sum(cold))
+    results["batch_1000_cached"] = summarize(warm, sum(warm))
+
+    report("signing", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Upload throughput (MB/s) across file sizes, comparing boto3's default
+TransferConfig with the settings-driven config used by S3Client.upload_video.
+
+Usage:
+    python -m benchmarks.bench_upload_throughput [--sizes-mb 1,16,64,256] [--repeat N]
+"""
+import argparse
+import io
+import os
+import time
+
+from boto3.s3.transfer import TransferConfig
+
+from benchmarks.common import add_latency, configure_settings, local_s3, report
+
+MB = 1024 * 1024
+
+
+def measure(upload, payload: bytes, repeat: int):
+    """Best-of-`repeat` throughput for uploading payload"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        upload(io.BytesIO(payload))
+        best = min(best, time.perf_counter() - start)
+    return {"seconds": round(best, 4), "mb_per_sec": round(len(payload) / MB / best, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", default="1,16,64,256")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=5.0,
+                        help="Simulated round-trip time added to every S3 call")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes_mb.split(",")]
+
+    data = os.urandom(max(sizes) * MB)
+    results = {}
+    with local_s3() as endpoint_url:
+        configure_settings(endpoint_url)
+        from app.core.aws import S3Client
+
+        s3_client = S3Client(region_name="us-east-1", endpoint_url=endpoint_url)
+        add_latency(s3_client.s3_client, args.latency_ms / 1000)
+        default_config = TransferConfig()
+
+        for size in sizes:
+            payload = data[:size * MB]
+            key = f"videos/bench-{size}mb.mp4"
+            results[f"{size}mb"] = {
+                "boto3_default": measure(
+                    lambda f: s3_client.s3_client.upload_fileobj(
+                        f, s3_client.bucket_name, key, Config=default_config
+                    ),
+                    payload, args.repeat,
+                ),
+                "tuned": measure(
+                    lambda f: s3_client.upload_video(f, key, file_size=len(payload)),
+                    payload, args.repeat,
+                ),
+            }
+        s3_client.close()
+
+    report("upload_throughput", results)
+
+
+if __name__ == "__main__":
+    main()
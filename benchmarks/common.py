@@ -0,0 +1,225 @@
+"""
+Shared helpers for benchmarks run against a local S3 stand-in (moto server)
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import boto3
+
+BENCH_BUCKET = "bench-video-bucket"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, process: subprocess.Popen, name: str) -> None:
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            if time.monotonic() > deadline or process.poll() is not None:
+                raise RuntimeError(f"{name} failed to start")
+            time.sleep(0.1)
+
+
+@contextmanager
+def local_s3(bucket_name: str = BENCH_BUCKET) -> Iterator[str]:
+    """
+    Start a moto S3 server in a separate process and create a bucket on it.
+    
+    Running the stand-in out of process keeps its CPU work from competing with
+    the code under test for the GIL.
+    
+    Args:
+        bucket_name: Name of the bucket to create
+        
+    Yields:
+        Endpoint URL of the local S3 server
+    """
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+    port = _free_port()
+    endpoint_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-H", "127.0.0.1", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for_port(port, process, "moto server")
+        boto3.client("s3", region_name="us-east-1", endpoint_url=endpoint_url).create_bucket(
+            Bucket=bucket_name
+        )
+        yield endpoint_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@contextmanager
+def local_app(
+    endpoint_url: str,
+    state_dir: str,
+    workers: int = 1,
+    bucket_name: str = BENCH_BUCKET,
+    env: Optional[Dict[str, str]] = None
+) -> Iterator[subprocess.Popen]:
+    """
+    Run the API under uvicorn in a separate process, pointed at a local S3 server.
+    
+    Args:
+        endpoint_url: Endpoint URL of the local S3 server
+        state_dir: Directory for the SQLite state files, shared by the workers
+        workers: Number of uvicorn worker processes
+        bucket_name: Bucket the API stores videos in
+        env: Further settings, as environment variables
+        
+    Yields:
+        The uvicorn process, with its base URL in the `base_url` attribute
+    """
+    port = _free_port()
+    process_env = dict(
+        os.environ,
+        S3_ENDPOINT_URL=endpoint_url,
+        S3_BUCKET_NAME=bucket_name,
+        AWS_REGION="us-east-1",
+        UPLOAD_STATE_DB_PATH=os.path.join(state_dir, "uploads.db"),
+        METADATA_DB_PATH=os.path.join(state_dir, "videos.db"),
+        JOB_DB_PATH=os.path.join(state_dir, "jobs.db"),
+        **(env or {}),
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+        ],
+        env=process_env,
+        stdout=subprocess.DEVNULL,
+    )
+    process.base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_for_port(port, process, "uvicorn")
+        yield process
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def worker_pids(pid: int) -> List[int]:
+    """
+    Processes serving requests for a uvicorn started with `pid`: its children
+    when it runs several workers, or the process itself. Linux only.
+    """
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can contain spaces; fields resume after its ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    # uvicorn's multiprocess supervisor also starts a resource tracker; workers
+    # are the children running the app
+    workers = [child for child in children if b"resource_tracker" not in _cmdline(child)]
+    return sorted(workers) or [pid]
+
+
+def _cmdline(pid: int) -> bytes:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read()
+    except OSError:
+        return b""
+
+
+def process_memory(pid: int) -> Dict[str, float]:
+    """
+    Resident and peak resident memory of a process in MB, from /proc. Linux only.
+    """
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "VmHWM"):
+                values[name] = round(int(value.split()[0]) / 1024, 1)
+    return {"rss_mb": values.get("VmRSS", 0.0), "peak_rss_mb": values.get("VmHWM", 0.0)}
+
+
+def add_latency(boto_client, seconds: float) -> None:
+    """
+    Delay every request made by a boto3 client, emulating the round trip to
+    a remote S3 region that a loopback stand-in doesn't have
+    """
+    if seconds <= 0:
+        return
+
+    def delay(**kwargs):
+        time.sleep(seconds)
+
+    boto_client.meta.events.register("before-send.s3.*", delay)
+
+
+def configure_settings(endpoint_url: str, bucket_name: str = BENCH_BUCKET, **overrides) -> None:
+    """Point the application settings at the local S3 server"""
+    from app.core.config import settings
+
+    settings.S3_ENDPOINT_URL = endpoint_url
+    settings.S3_BUCKET_NAME = bucket_name
+    settings.AWS_REGION = "us-east-1"
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """
+    Summarize per-operation latencies (seconds) into throughput and percentiles
+    
+    Returns:
+        Dict with ops/sec and p50/p95/p99 latency in milliseconds
+    """
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        "operations": len(ordered),
+        "ops_per_sec": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+    }
+
+
+def timed(fn: Callable[[], object]) -> float:
+    """Run fn once and return its duration in seconds"""
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def report(name: str, results: Dict) -> None:
+    """Print benchmark results as JSON"""
+    print(json.dumps({"benchmark": name, "results": results}, indent=2))
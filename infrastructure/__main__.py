@@ -10,6 +10,9 @@ from pulumi_aws import s3, cloudfront
 config = pulumi.Config()
 s3_bucket_name = config.get("s3_bucket_name") or "video-storage-bucket"
 environment = config.get("environment") or "dev"
+# PEM public key of the CloudFront key pair used for signed URLs/cookies. When
+# set, videos are only served to signed requests and the bucket stays private.
+signing_public_key_path = config.get("cloudfront_public_key_path")
 
 # Fully qualified bucket name with environment
 bucket_name = f"{s3_bucket_name}-{environment}-{pulumi.get_stack()}"
@@ -40,6 +43,12 @@ video_bucket = s3.Bucket(
         "expiration": {
             "days": 365  # Old videos marked as archived will be deleted after 1 year
         }
+    }, {
+        "enabled": True,
+        "id": "abort-abandoned-uploads",
+        "prefix": "videos/",
+        # Resumable and direct uploads that are never completed still bill for their parts
+        "abortIncompleteMultipartUploadDays": 7
     }],
     tags={
         "Name": bucket_name,
@@ -54,16 +63,47 @@ origin_access_identity = cloudfront.OriginAccessIdentity(
     comment=f"OAI for {bucket_name}"
 )
 
-# Configure public access block settings to allow public policies
+# Configure public access block settings; public policies are only needed when
+# videos are served unsigned
+private_videos = bool(signing_public_key_path)
 public_access_block = s3.BucketPublicAccessBlock(
     "video-bucket-public-access",
     bucket=video_bucket.id,
-    block_public_acls=False,
-    block_public_policy=False,
-    ignore_public_acls=False,
-    restrict_public_buckets=False
+    block_public_acls=private_videos,
+    block_public_policy=private_videos,
+    ignore_public_acls=private_videos,
+    restrict_public_buckets=private_videos
 )
 
+# Key group trusted to sign CloudFront URLs and cookies
+trusted_key_groups = []
+if signing_public_key_path:
+    with open(signing_public_key_path) as public_key_file:
+        signing_public_key = cloudfront.PublicKey(
+            "video-signing-key",
+            comment=f"Signs video URLs for {bucket_name}",
+            encoded_key=public_key_file.read()
+        )
+    signing_key_group = cloudfront.KeyGroup(
+        "video-signing-key-group",
+        comment=f"Trusted signers for {bucket_name}",
+        items=[signing_public_key.id]
+    )
+    trusted_key_groups = [signing_key_group.id]
+
+def public_videos_statement(bucket_id):
+    """Bucket policy statement making videos/ world-readable, unless they are signed-only"""
+    if private_videos:
+        return ""
+    return f''',
+                {{
+                    "Effect": "Allow",
+                    "Principal": {{"AWS": "*"}},
+                    "Action": "s3:GetObject",
+                    "Resource": "arn:aws:s3:::{bucket_id}/videos/*"
+                }}'''
+
+
 # Create a bucket policy that allows CloudFront to access the bucket
 bucket_policy = s3.BucketPolicy(
     "video-bucket-policy",
@@ -83,13 +123,7 @@ bucket_policy = s3.BucketPolicy(
                     }},
                     "Action": "s3:GetObject",
                     "Resource": "arn:aws:s3:::{args[0]}/*"
-                }},
-                {{
-                    "Effect": "Allow",
-                    "Principal": {{"AWS": "*"}},
-                    "Action": "s3:GetObject",
-                    "Resource": "arn:aws:s3:::{args[0]}/videos/*"
-                }}
+                }}{public_videos_statement(args[0])}
             ]
         }}'''
     )
@@ -143,6 +177,8 @@ cdn = cloudfront.Distribution(
             },
         },
         "viewerProtocolPolicy": "redirect-to-https",
+        # Require signed URLs or cookies when a signing key is configured
+        "trustedKeyGroups": trusted_key_groups,
         "minTtl": 0,
         "defaultTtl": 86400,  # 1 day cache for videos
         "maxTtl": 604800,     # 7 days max cache 
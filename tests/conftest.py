@@ -2,12 +2,20 @@
 Conftest for pytest
 """
 
+import os
+
+# Keep local state stores in memory during tests
+os.environ.setdefault("UPLOAD_STATE_DB_PATH", ":memory:")
+os.environ.setdefault("METADATA_DB_PATH", ":memory:")
+os.environ.setdefault("JOB_DB_PATH", ":memory:")
+
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 
 from app.main import app
 from app.core.aws import S3Client
+from app.core.cache import ObjectInfo
 
 
 @pytest.fixture
@@ -15,7 +23,8 @@ def client():
     """
     Create a test client for FastAPI application
     """
-    return TestClient(app)
+    with TestClient(app) as test_client:
+        yield test_client
 
 
 @pytest.fixture
@@ -26,11 +35,14 @@ def mock_s3_client():
     with patch.object(S3Client, '__init__', return_value=None) as mock_init:
         with patch.object(S3Client, 'upload_video') as mock_upload:
             with patch.object(S3Client, 'get_video_url') as mock_get_url:
-                mock_upload.return_value = "https://test-cdn.example.com/videos/test-id.mp4"
-                mock_get_url.return_value = "https://test-cdn.example.com/videos/test-id.mp4"
-                
-                yield {
-                    "init": mock_init,
-                    "upload_video": mock_upload,
-                    "get_video_url": mock_get_url
-                }
+                with patch.object(S3Client, 'head_video') as mock_head:
+                    mock_upload.return_value = "https://test-cdn.example.com/videos/test-id.mp4"
+                    mock_get_url.return_value = "https://test-cdn.example.com/videos/test-id.mp4"
+                    mock_head.return_value = ObjectInfo(exists=True, etag='"test-etag"', content_length=18)
+                    
+                    yield {
+                        "init": mock_init,
+                        "upload_video": mock_upload,
+                        "get_video_url": mock_get_url,
+                        "head_video": mock_head
+                    }
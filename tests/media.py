@@ -0,0 +1,165 @@
+"""
+Synthetic media files for tests and benchmarks.
+
+The files have real container structure (MP4 boxes, Matroska elements) with
+filler bytes for the media data, so they are quick to build at any size and
+need no encoder, but are not playable.
+"""
+import struct
+from typing import List, Optional
+
+
+def box(box_type: bytes, payload: bytes = b"") -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type: bytes, version: int, payload: bytes) -> bytes:
+    return box(box_type, struct.pack(">I", version << 24) + payload)
+
+
+def mvhd(timescale: int, duration: int) -> bytes:
+    return full_box(b"mvhd", 0, struct.pack(">IIII", 0, 0, timescale, duration) + bytes(80))
+
+
+def tkhd(width: int, height: int) -> bytes:
+    # Creation/modification, track ID, reserved, duration, then layer,
+    # volume and matrix, with the 16.16 fixed-point size last
+    return full_box(b"tkhd", 0, bytes(72) + struct.pack(">II", width << 16, height << 16))
+
+
+def track(handler: bytes, codec: bytes, timescale: int, duration: int, width: int = 0, height: int = 0,
+          chunk_offsets: Optional[List[int]] = None, co64: bool = False) -> bytes:
+    mdhd = full_box(b"mdhd", 0, struct.pack(">IIII", 0, 0, timescale, duration) + bytes(4))
+    hdlr = full_box(b"hdlr", 0, bytes(4) + handler + bytes(12) + b"\x00")
+    if handler == b"vide":
+        entry = box(codec, bytes(6) + struct.pack(">H", 1) + bytes(16) + struct.pack(">HH", width, height) + bytes(50))
+    else:
+        entry = box(codec, bytes(6) + struct.pack(">H", 1) + bytes(20))
+    stsd = full_box(b"stsd", 0, struct.pack(">I", 1) + entry)
+    offsets = chunk_offsets or []
+    if co64:
+        chunk_table = full_box(b"co64", 0, struct.pack(f">I{len(offsets)}Q", len(offsets), *offsets))
+    else:
+        chunk_table = full_box(b"stco", 0, struct.pack(f">I{len(offsets)}I", len(offsets), *offsets))
+    stbl = box(b"stbl", stsd + chunk_table)
+    minf = box(b"minf", stbl)
+    mdia = box(b"mdia", mdhd + hdlr + minf)
+    return box(b"trak", (tkhd(width, height) if handler == b"vide" else b"") + mdia)
+
+
+def build_mp4(
+    media_size: int = 1024,
+    faststart: bool = False,
+    duration: float = 10.0,
+    width: int = 1280,
+    height: int = 720,
+    video_codec: bytes = b"avc1",
+    audio_codec: Optional[bytes] = b"mp4a",
+    brand: bytes = b"isom",
+    chunks: int = 4,
+    co64: bool = False,
+    large_mdat: bool = False,
+) -> bytes:
+    """
+    An MP4 with ftyp, mdat and moov boxes
+
+    Args:
+        media_size: Bytes of (filler) media data in mdat
+        faststart: Put moov before mdat, as for progressive playback
+        duration: Duration in seconds
+        width: Video width
+        height: Video height
+        video_codec: Sample entry type of the video track
+        audio_codec: Sample entry type of the audio track, or None for no audio
+        brand: Major brand in ftyp
+        chunks: Chunks per track, listed in the chunk offset tables
+        co64: Use 64-bit chunk offsets (co64) instead of stco
+        large_mdat: Write mdat with a 64-bit size header
+
+    Returns:
+        The file contents
+    """
+    ftyp = box(b"ftyp", brand + struct.pack(">I", 512) + brand + b"mp41")
+    media = bytes(range(256)) * (media_size // 256) + bytes(media_size % 256)
+    mdat_header = (
+        struct.pack(">I4sQ", 1, b"mdat", 16 + media_size) if large_mdat
+        else struct.pack(">I4s", 8 + media_size, b"mdat")
+    )
+    tracks = 2 if audio_codec else 1
+
+    def moov(mdat_offset: int) -> bytes:
+        # Each track's chunks are spread evenly through the media data
+        step = max(1, media_size // (chunks * tracks))
+        offsets = [mdat_offset + len(mdat_header) + step * i for i in range(chunks * tracks)]
+        trak = track(b"vide", video_codec, 90000, int(duration * 90000), width, height,
+                     offsets[0::tracks], co64)
+        if audio_codec:
+            trak += track(b"soun", audio_codec, 48000, int(duration * 48000), chunk_offsets=offsets[1::tracks], co64=co64)
+        return box(b"moov", mvhd(1000, int(duration * 1000)) + trak)
+
+    if faststart:
+        moov_size = len(moov(0))
+        return ftyp + moov(len(ftyp) + moov_size) + mdat_header + media
+    return ftyp + mdat_header + media + moov(len(ftyp))
+
+
+def ebml_id(element: int) -> bytes:
+    return element.to_bytes((element.bit_length() + 7) // 8, "big")
+
+
+def ebml_size(size: int) -> bytes:
+    length = 1
+    while size >= (1 << (7 * length)) - 1:
+        length += 1
+    return ((1 << (7 * length)) | size).to_bytes(length, "big")
+
+
+def element(element_id: int, payload: bytes) -> bytes:
+    return ebml_id(element_id) + ebml_size(len(payload)) + payload
+
+
+def uint(element_id: int, value: int) -> bytes:
+    return element(element_id, value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big"))
+
+
+def build_webm(
+    media_size: int = 1024,
+    duration: float = 10.0,
+    width: int = 1920,
+    height: int = 1080,
+    video_codec: str = "V_VP9",
+    audio_codec: Optional[str] = "A_OPUS",
+    doc_type: str = "webm",
+    unknown_segment_size: bool = False,
+) -> bytes:
+    """
+    A WebM (or Matroska) file with an EBML header, Info, Tracks and one
+    Cluster holding the media data
+
+    Args:
+        media_size: Bytes of (filler) media data in the cluster
+        duration: Duration in seconds
+        width: Video width
+        height: Video height
+        video_codec: Matroska codec ID of the video track
+        audio_codec: Matroska codec ID of the audio track, or None for no audio
+        doc_type: "webm" or "matroska"
+        unknown_segment_size: Write the Segment with an unknown size, as live
+            encoders do
+
+    Returns:
+        The file contents
+    """
+    header = element(0x1A45DFA3, uint(0x4286, 1) + element(0x4282, doc_type.encode()))
+    info = element(0x1549A966, uint(0x2AD7B1, 1000000) + element(0x4489, struct.pack(">d", duration * 1000)))
+    video = element(0xAE, uint(0xD7, 1) + uint(0x83, 1) + element(0x86, video_codec.encode())
+                    + element(0xE0, uint(0xB0, width) + uint(0xBA, height)))
+    audio = element(0xAE, uint(0xD7, 2) + uint(0x83, 2) + element(0x86, audio_codec.encode())) if audio_codec else b""
+    tracks = element(0x1654AE6B, video + audio)
+    cluster = element(0x1F43B675, uint(0xE7, 0) + element(0xA3, bytes(media_size)))
+    body = info + tracks + cluster
+    if unknown_segment_size:
+        segment = ebml_id(0x18538067) + b"\x01\xff\xff\xff\xff\xff\xff\xff" + body
+    else:
+        segment = element(0x18538067, body)
+    return header + segment
@@ -0,0 +1,144 @@
+"""
+Tests for upload admission control
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.admission import (
+    UNKNOWN_CLIENT, AdmissionController, AdmissionMiddleware, AdmissionRejected, TokenBucket, client_address,
+    is_upload_request, parse_trusted_proxies
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_paces_callers_to_the_rate():
+    """Test callers may burst up to the capacity and then wait for the refill"""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=100, capacity=100, clock=clock)
+
+    assert bucket.reserve(100) == 0
+    assert bucket.reserve(50) == pytest.approx(0.5)
+    # A second caller queues behind the first one's debt
+    assert bucket.reserve(50) == pytest.approx(1.0)
+    clock.now = 10
+    assert bucket.reserve(100) == 0
+
+
+def test_uploads_queue_for_slots_and_are_rejected_when_the_queue_is_full():
+    """Test FIFO hand-off of released slots, and 503 once max_queued are waiting"""
+    controller = AdmissionController(max_concurrent=1, max_per_client=0, max_queued=1, queue_timeout=5)
+
+    async def run():
+        await controller.acquire("a")
+        queued = asyncio.ensure_future(controller.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("c")
+        controller.release("a", 2.0)
+        await queued
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert rejected.status_code == 503
+    assert rejected.retry_after >= 1
+    assert controller.active == 1
+    assert controller.queued == 0
+
+
+def test_queued_upload_times_out():
+    """Test an upload that waits longer than queue_timeout is rejected and leaves the queue"""
+    controller = AdmissionController(max_concurrent=1, max_per_client=0, max_queued=0, queue_timeout=0.05)
+
+    async def run():
+        await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("b")
+        return rejected.value
+
+    assert asyncio.run(run()).detail == "Timed out waiting for an upload slot"
+    assert controller.queued == 0
+    assert controller.active == 1
+
+
+def test_is_upload_request():
+    assert is_upload_request("POST", "/api/v1/videos/upload")
+    assert is_upload_request("POST", "/api/v1/videos/upload/stream")
+    assert is_upload_request("PATCH", "/api/v1/videos/uploads/abc")
+    assert not is_upload_request("GET", "/api/v1/videos/abc")
+    assert not is_upload_request("POST", "/api/v1/videos/uploads")
+    assert not is_upload_request("POST", "/api/v1/videos/batch/delete")
+
+
+def test_client_address_behind_trusted_proxies():
+    """Test clients behind trusted proxies are told apart by X-Forwarded-For, which others can't spoof"""
+    trusted = parse_trusted_proxies("10.0.0.0/8, 2001:db8::1")
+
+    def scope(peer, forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded is not None else []
+        return {"client": (peer, 443), "headers": headers}
+
+    # CloudFront edge then ALB: the viewer is the last untrusted entry
+    assert client_address(scope("10.0.1.5", "198.51.100.7, 10.0.2.9"), trusted) == "198.51.100.7"
+    # A forged entry at the start of the header is never reached
+    assert client_address(scope("10.0.1.5", "192.0.2.1, 198.51.100.7"), trusted) == "198.51.100.7"
+    assert client_address(scope("2001:db8::1", "198.51.100.7"), trusted) == "198.51.100.7"
+    # Untrusted peers are taken at their word only for their own address
+    assert client_address(scope("203.0.113.4", "198.51.100.7"), trusted) == "203.0.113.4"
+    assert client_address(scope("10.0.1.5", "198.51.100.7"), []) == "10.0.1.5"
+    # Without a forwarded address the proxy itself is the client
+    assert client_address(scope("10.0.1.5"), trusted) == "10.0.1.5"
+    assert client_address({"client": None, "headers": []}, trusted) == UNKNOWN_CLIENT
+
+
+def build_app(controller, bandwidth=None):
+    application = FastAPI()
+
+    @application.post("/api/v1/videos/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    @application.get("/api/v1/videos/{video_id}")
+    async def get_video(video_id: str):
+        return {"id": video_id}
+
+    application.add_middleware(AdmissionMiddleware, controller=controller, bandwidth=bandwidth)
+    return application
+
+
+def test_client_over_its_limit_gets_429_and_reads_pass():
+    """Test a client's extra upload is rejected with Retry-After while GETs are unaffected"""
+    controller = AdmissionController(max_concurrent=0, max_per_client=1, max_queued=0, queue_timeout=1)
+    # The test client has no peer address
+    asyncio.run(controller.acquire(UNKNOWN_CLIENT))
+    client = TestClient(build_app(controller))
+
+    response = client.post("/api/v1/videos/upload", content=b"video")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert client.get("/api/v1/videos/abc").status_code == 200
+
+    controller.release(UNKNOWN_CLIENT, 1.0)
+    assert client.post("/api/v1/videos/upload", content=b"video").json() == {"size": 5}
+
+
+def test_upload_body_is_throttled_to_the_bandwidth_limit():
+    """Test bytes beyond the bucket's capacity are read no faster than its rate"""
+    controller = AdmissionController(max_concurrent=0, max_per_client=0, max_queued=0, queue_timeout=1)
+    client = TestClient(build_app(controller, TokenBucket(rate=1024 * 1024, capacity=64 * 1024)))
+
+    start = time.perf_counter()
+    response = client.post("/api/v1/videos/upload", content=b"\0" * 320 * 1024)
+    assert response.json() == {"size": 320 * 1024}
+    assert time.perf_counter() - start >= 0.2
+    assert controller.active == 0
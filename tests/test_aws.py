@@ -2,11 +2,15 @@
 Tests for core AWS functionality
 """
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
+import asyncio
 import botocore.exceptions
 import io
+import time
 
-from app.core.aws import S3Client
+from app.core.aws import S3Client, AsyncS3Client, ClientRegistry
+from app.core.hashing import Checksum, ChecksumMismatch, composite_checksum
+from app.core.metrics import UPLOAD_BYTES
 
 
 class TestS3Client:
@@ -37,12 +41,48 @@ class TestS3Client:
             test_file,
             "test-bucket",
             file_name,
-            ExtraArgs={'ContentType': 'video/mp4'}
+            ExtraArgs={'ContentType': 'video/mp4', 'ACL': 'public-read', 'ChecksumAlgorithm': 'CRC32'},
+            Config=ANY,
+            Callback=ANY
         )
         
+        # Assert transferred bytes are counted for /metrics
+        uploaded = UPLOAD_BYTES.labels().value
+        mock_s3.upload_fileobj.call_args.kwargs["Callback"](18)
+        assert UPLOAD_BYTES.labels().value == uploaded + 18
+        
         # Assert result is CloudFront URL
         assert result == f"https://test-cdn.example.com/{file_name}"
     
+    @patch('boto3.client')
+    def test_upload_video_bad_digest(self, mock_boto_client):
+        """Test S3 rejecting the data as corrupted is reported as a checksum mismatch"""
+        mock_s3 = MagicMock()
+        mock_s3.upload_fileobj.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "BadDigest", "Message": "The CRC32 you specified did not match the calculated checksum."}},
+            "PutObject"
+        )
+        s3_client = S3Client()
+        s3_client.s3_client = mock_s3
+        
+        with pytest.raises(ChecksumMismatch):
+            s3_client.upload_video(io.BytesIO(b"test video content"), "videos/test-id.mp4")
+    
+    @patch('boto3.client')
+    def test_signed_delivery_skips_public_acl(self, mock_boto_client):
+        """Test objects in buckets behind signed CloudFront URLs are uploaded without an ACL"""
+        mock_s3 = MagicMock()
+        mock_boto_client.return_value = mock_s3
+        mock_s3.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        s3_client = S3Client(signer=MagicMock())
+        s3_client.bucket_name = "test-bucket"
+        
+        s3_client.upload_video(io.BytesIO(b"test video content"), "videos/test-id.mp4")
+        s3_client.create_multipart_upload("videos/test-id.mp4")
+        
+        assert 'ACL' not in mock_s3.upload_fileobj.call_args.kwargs['ExtraArgs']
+        assert 'ACL' not in mock_s3.create_multipart_upload.call_args.kwargs
+    
     @patch('boto3.client')
     def test_upload_video_without_cloudfront(self, mock_boto_client):
         """Test uploading a video to S3 without CloudFront"""
@@ -116,3 +156,229 @@ class TestS3Client:
         # Call get_video_url and expect exception
         with pytest.raises(ValueError, match="Video file .* does not exist"):
             s3_client.get_video_url(file_name)
+    
+    @patch('boto3.client')
+    def test_get_video_url_uses_cache(self, mock_boto_client):
+        """Test repeated lookups are answered from the cache"""
+        mock_s3 = MagicMock()
+        mock_s3.head_object.return_value = {"ETag": '"abc"', "Metadata": {"title": "Test"}}
+        mock_boto_client.return_value = mock_s3
+        
+        s3_client = S3Client()
+        s3_client.bucket_name = "test-bucket"
+        s3_client.cloudfront_domain = "test-cdn.example.com"
+        
+        file_name = "videos/test-id.mp4"
+        for _ in range(3):
+            assert s3_client.get_video_url(file_name) == f"https://test-cdn.example.com/{file_name}"
+        
+        mock_s3.head_object.assert_called_once()
+        assert s3_client.cache.stats()["hits"] == 2
+        assert s3_client.head_video(file_name).etag == '"abc"'
+    
+    @patch('boto3.client')
+    def test_get_video_url_caches_missing_videos(self, mock_boto_client):
+        """Test 404s are cached so repeated bad lookups don't reach S3"""
+        mock_s3 = MagicMock()
+        mock_s3.head_object.side_effect = botocore.exceptions.ClientError(
+            {"Error": {"Code": "404"}}, "HeadObject"
+        )
+        mock_boto_client.return_value = mock_s3
+        
+        s3_client = S3Client()
+        s3_client.bucket_name = "test-bucket"
+        
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                s3_client.get_video_url("videos/non-existent.mp4")
+        
+        mock_s3.head_object.assert_called_once()
+    
+    @patch('boto3.client')
+    def test_upload_and_delete_invalidate_cache(self, mock_boto_client):
+        """Test writes drop the cached entry for the key"""
+        mock_s3 = MagicMock()
+        mock_boto_client.return_value = mock_s3
+        
+        s3_client = S3Client()
+        s3_client.bucket_name = "test-bucket"
+        file_name = "videos/test-id.mp4"
+        
+        s3_client.get_video_url(file_name)
+        s3_client.delete_video(file_name)
+        s3_client.get_video_url(file_name)
+        s3_client.upload_video(io.BytesIO(b"test video content"), file_name)
+        s3_client.get_video_url(file_name)
+        
+        assert mock_s3.head_object.call_count == 3
+    
+    @patch('boto3.client')
+    def test_delete_videos_batches_keys(self, mock_boto_client):
+        """Test bulk deletes send at most 1000 keys per request and report failures"""
+        mock_s3 = MagicMock()
+        mock_s3.delete_objects.side_effect = [
+            {"Errors": [{"Key": "videos/5.mp4", "Code": "AccessDenied", "Message": "Access Denied"}]},
+            {},
+            {},
+        ]
+        mock_boto_client.return_value = mock_s3
+        
+        s3_client = S3Client()
+        s3_client.bucket_name = "test-bucket"
+        keys = [f"videos/{i}.mp4" for i in range(2500)]
+        
+        errors = s3_client.delete_videos(keys)
+        
+        assert errors == {"videos/5.mp4": "AccessDenied: Access Denied"}
+        sizes = [len(call.kwargs["Delete"]["Objects"]) for call in mock_s3.delete_objects.call_args_list]
+        assert sizes == [1000, 1000, 500]
+
+    
+    @patch('boto3.client')
+    def test_complete_multipart_upload_verifies_checksum(self, mock_boto_client):
+        """Test the assembled object's checksum is checked against the parts sent"""
+        mock_s3 = MagicMock()
+        mock_boto_client.return_value = mock_s3
+        s3_client = S3Client()
+        s3_client.bucket_name = "test-bucket"
+        checksums = []
+        for body in (b"a" * 1024, b"b" * 10):
+            checksum = Checksum("CRC32")
+            checksum.update(body)
+            checksums.append(checksum.b64digest())
+        parts = [
+            {"PartNumber": number, "ETag": f'"etag-{number}"', "ChecksumCRC32": value}
+            for number, value in enumerate(checksums, 1)
+        ]
+        
+        mock_s3.complete_multipart_upload.return_value = {"ChecksumCRC32": composite_checksum("CRC32", checksums)}
+        s3_client.complete_multipart_upload("videos/test-id.mp4", "upload-1", parts)
+        mock_s3.delete_object.assert_not_called()
+        
+        # Stores that don't report it on completion are asked with a HEAD
+        mock_s3.complete_multipart_upload.return_value = {}
+        mock_s3.head_object.return_value = {"ChecksumCRC32": "AAAAAA=="}
+        with pytest.raises(ChecksumMismatch):
+            s3_client.complete_multipart_upload("videos/test-id.mp4", "upload-1", parts)
+        mock_s3.head_object.assert_called_once_with(
+            Bucket="test-bucket", Key="videos/test-id.mp4", ChecksumMode="ENABLED"
+        )
+        mock_s3.delete_object.assert_called_once_with(Bucket="test-bucket", Key="videos/test-id.mp4")
+
+
+class TestAsyncS3Client:
+    """Tests for AsyncS3Client"""
+    
+    @staticmethod
+    def _slow_client(delay: float) -> MagicMock:
+        sync_client = MagicMock()
+        
+        def slow_lookup(file_name):
+            time.sleep(delay)
+            return f"https://test-cdn.example.com/{file_name}"
+        
+        sync_client.get_video_url.side_effect = slow_lookup
+        return sync_client
+    
+    def test_concurrent_calls_do_not_serialize(self):
+        """Test blocking S3 calls overlap instead of running one after another"""
+        s3_client = AsyncS3Client(self._slow_client(0.2), max_concurrency=8)
+        
+        async def lookups():
+            return await asyncio.gather(*(
+                s3_client.get_video_url(f"videos/{i}.mp4") for i in range(8)
+            ))
+        
+        start = time.perf_counter()
+        urls = asyncio.run(lookups())
+        elapsed = time.perf_counter() - start
+        s3_client.close()
+        
+        assert len(urls) == 8
+        assert elapsed < 0.2 * 4
+    
+    def test_concurrency_limit_applies_backpressure(self):
+        """Test calls beyond the concurrency limit wait for a free slot"""
+        s3_client = AsyncS3Client(self._slow_client(0.1), max_concurrency=2)
+        
+        async def lookups():
+            return await asyncio.gather(*(
+                s3_client.get_video_url(f"videos/{i}.mp4") for i in range(4)
+            ))
+        
+        start = time.perf_counter()
+        asyncio.run(lookups())
+        elapsed = time.perf_counter() - start
+        s3_client.close()
+        
+        assert elapsed >= 0.2
+    
+    def test_uploads_leave_slots_for_reads(self):
+        """Test a lookup isn't queued behind upload calls that fill their share of the pool"""
+        sync_client = self._slow_client(0.05)
+        sync_client.upload_part.side_effect = lambda *args: time.sleep(0.3) or '"etag"'
+        s3_client = AsyncS3Client(sync_client, max_concurrency=4, read_reserved=1)
+        
+        async def run():
+            parts = [
+                asyncio.ensure_future(s3_client.upload_part("videos/a.mp4", "upload-1", i, b"data"))
+                for i in range(1, 9)
+            ]
+            await asyncio.sleep(0.05)
+            start = time.perf_counter()
+            await s3_client.get_video_url("videos/b.mp4")
+            elapsed = time.perf_counter() - start
+            await asyncio.gather(*parts)
+            return elapsed
+        
+        elapsed = asyncio.run(run())
+        s3_client.close()
+        
+        assert elapsed < 0.2
+    
+    def test_iter_object_streams_in_chunks(self):
+        """Test objects are read chunk by chunk and the body is closed"""
+        body = MagicMock(wraps=io.BytesIO(b"0123456789"))
+        sync_client = MagicMock()
+        sync_client.get_object.return_value = {"Body": body}
+        s3_client = AsyncS3Client(sync_client, max_concurrency=2)
+        
+        async def read():
+            return [chunk async for chunk in s3_client.iter_object("videos/a.mp4", (2, 8), chunk_size=4, if_match='"abc"')]
+        
+        chunks = asyncio.run(read())
+        s3_client.close()
+        
+        assert chunks == [b"0123", b"4567", b"89"]
+        sync_client.get_object.assert_called_once_with("videos/a.mp4", (2, 8), '"abc"')
+        body.close.assert_called_once()
+
+
+class TestClientRegistry:
+    """Tests for ClientRegistry"""
+    
+    @patch('boto3.client')
+    def test_s3_client_is_shared(self, mock_boto_client):
+        """Test the registry builds one pooled S3 client and reuses it"""
+        registry = ClientRegistry()
+        
+        first = registry.s3_client
+        second = registry.s3_client
+        
+        assert first is second
+        mock_boto_client.assert_called_once()
+        config = mock_boto_client.call_args.kwargs["config"]
+        assert config.max_pool_connections == 50
+        assert config.retries == {"mode": "standard", "max_attempts": 3}
+    
+    @patch('boto3.client')
+    def test_close_releases_client(self, mock_boto_client):
+        """Test closing the registry closes the underlying client"""
+        mock_s3 = MagicMock()
+        mock_boto_client.return_value = mock_s3
+        registry = ClientRegistry()
+        registry.s3_client
+        
+        registry.close()
+        
+        mock_s3.close.assert_called_once()
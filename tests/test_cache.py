@@ -0,0 +1,81 @@
+"""
+Tests for the video lookup cache
+"""
+from unittest.mock import patch
+
+from app.core.cache import InMemoryCacheBackend, ObjectInfo, ObjectInfoCache, RedisCacheBackend
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of the Redis API the cache uses"""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, px=None):
+        self.store[key] = value
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+def test_in_memory_backend_evicts_least_recently_used():
+    """Test the in-memory backend stays within its entry limit"""
+    backend = InMemoryCacheBackend(max_entries=2)
+    backend.set("a", {"exists": True}, ttl=60)
+    backend.set("b", {"exists": True}, ttl=60)
+    backend.get("a")
+    backend.set("c", {"exists": True}, ttl=60)
+
+    assert backend.get("a") is not None
+    assert backend.get("b") is None
+    assert len(backend) == 2
+
+
+def test_in_memory_backend_expires_entries():
+    """Test entries are dropped once their TTL has passed"""
+    backend = InMemoryCacheBackend()
+    with patch("app.core.cache.time.monotonic", return_value=100.0):
+        backend.set("a", {"exists": True}, ttl=10)
+    with patch("app.core.cache.time.monotonic", return_value=111.0):
+        assert backend.get("a") is None
+
+
+def test_in_memory_backend_returns_copies():
+    """Test mutating a stored or returned value does not change the cached entry"""
+    backend = InMemoryCacheBackend()
+    value = {"exists": True, "metadata": {"title": "a"}}
+    backend.set("a", value, ttl=60)
+    value["metadata"]["title"] = "changed by caller"
+    backend.get("a")["metadata"]["title"] = "changed by reader"
+
+    assert backend.get("a") == {"exists": True, "metadata": {"title": "a"}}
+
+
+def test_negative_entries_use_shorter_ttl():
+    """Test missing objects are cached with the negative TTL"""
+    backend = InMemoryCacheBackend()
+    cache = ObjectInfoCache(backend, ttl=300, negative_ttl=5)
+    with patch("app.core.cache.time.monotonic", return_value=100.0):
+        cache.set("videos/missing.mp4", ObjectInfo(exists=False))
+        cache.set("videos/present.mp4", ObjectInfo(exists=True))
+    with patch("app.core.cache.time.monotonic", return_value=110.0):
+        assert cache.get("videos/missing.mp4") is None
+        assert cache.get("videos/present.mp4").exists
+
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_redis_backend_round_trip():
+    """Test ObjectInfo survives the shared backend's serialization"""
+    cache = ObjectInfoCache(RedisCacheBackend(FakeRedis()))
+    info = ObjectInfo(exists=True, metadata={"title": "Test"}, etag='"abc"', content_length=42)
+
+    cache.set("videos/test-id.mp4", info)
+    assert cache.get("videos/test-id.mp4") == info
+
+    cache.invalidate("videos/test-id.mp4")
+    assert cache.get("videos/test-id.mp4") is None
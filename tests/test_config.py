@@ -0,0 +1,32 @@
+"""
+Tests for settings validation
+"""
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("CRC32", "CRC32"),
+    ("sha256", "SHA256"),
+    ("", None),
+])
+def test_checksum_algorithm(monkeypatch, value, expected):
+    """Test supported checksum algorithms are accepted and empty disables checksums"""
+    monkeypatch.setenv("UPLOAD_CHECKSUM_ALGORITHM", value)
+    assert Settings().UPLOAD_CHECKSUM_ALGORITHM == expected
+
+
+def test_checksum_algorithm_rejects_unsupported(monkeypatch):
+    """Test a misspelled or unsupported algorithm fails at startup, not on the first upload"""
+    monkeypatch.setenv("UPLOAD_CHECKSUM_ALGORITHM", "CRC-32")
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+def test_trusted_proxies_rejects_malformed(monkeypatch):
+    """Test a malformed proxy address fails at startup"""
+    monkeypatch.setenv("UPLOAD_TRUSTED_PROXIES", "10.0.0.0/8, alb.internal")
+    with pytest.raises(ValidationError):
+        Settings()
@@ -0,0 +1,110 @@
+"""
+Tests for faststart (moov relocation)
+"""
+import io
+import struct
+from unittest.mock import patch
+
+import pytest
+
+from app.core.faststart import SplicedFile, faststart, patch_chunk_offsets
+from app.core.probe import find_box, probe_file
+from tests.media import box, build_mp4, full_box
+
+
+def chunk_offsets(data: bytes):
+    """Chunk offsets of every track, in file order"""
+    moov_start = data.index(b"moov") - 4
+    moov_size = struct.unpack(">I", data[moov_start:moov_start + 4])[0]
+    moov = data[moov_start:moov_start + moov_size]
+    offsets = []
+    for table in (b"stco", b"co64"):
+        position = 0
+        while True:
+            position = moov.find(table, position)
+            if position < 0:
+                break
+            count = struct.unpack(">I", moov[position + 8:position + 12])[0]
+            fmt = ">Q" if table == b"co64" else ">I"
+            width = struct.calcsize(fmt)
+            start = position + 12
+            offsets += [struct.unpack(fmt, moov[start + i * width:start + (i + 1) * width])[0] for i in range(count)]
+            position += 4
+    return offsets
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"co64": True},
+    {"large_mdat": True},
+    {"audio_codec": None, "media_size": 100001},
+])
+def test_faststart_matches_native_layout(options):
+    """Test a relocated file is identical to one written faststart to begin with"""
+    source = build_mp4(**options)
+    relocated = faststart(io.BytesIO(source))
+
+    assert relocated.size == len(source)
+    assert relocated.read() == build_mp4(faststart=True, **options)
+
+
+def test_faststart_chunk_offsets_follow_data():
+    """Test each patched chunk offset points at the same media bytes as before"""
+    source = build_mp4(media_size=50000, chunks=16)
+    output = faststart(io.BytesIO(source)).read()
+
+    before, after = chunk_offsets(source), chunk_offsets(output)
+    assert len(before) == len(after) == 32
+    for old, new in zip(before, after):
+        assert output[new:new + 64] == source[old:old + 64]
+    assert probe_file(io.BytesIO(output)).faststart is True
+
+
+def test_faststart_skips_other_files():
+    """Test files that are already faststart, or not MP4, are left alone"""
+    assert faststart(io.BytesIO(build_mp4(faststart=True))) is None
+    assert faststart(io.BytesIO(b"test video content")) is None
+    assert faststart(io.BytesIO(build_mp4()), max_moov_bytes=100) is None
+
+
+def test_faststart_keeps_layout_when_offsets_overflow():
+    """Test an offset that stops fitting after relocation leaves the file as it was"""
+    calls = []
+
+    def sizing_then_overflow(*args):
+        calls.append(args)
+        if len(calls) > 1:
+            raise OverflowError("Chunk offset does not fit in stco")
+        return patch_chunk_offsets(*args)
+
+    with patch("app.core.faststart.patch_chunk_offsets", side_effect=sizing_then_overflow):
+        assert faststart(io.BytesIO(build_mp4(media_size=4096))) is None
+
+
+def test_patch_chunk_offsets_widens_to_co64():
+    """Test stco tables become co64 when shifted offsets pass 4 GiB"""
+    stco = full_box(b"stco", 0, struct.pack(">III", 2, 0xFFFFFF00, 0x10))
+    moov = box(b"moov", box(b"trak", box(b"mdia", box(b"minf", box(b"stbl", stco)))))
+
+    with pytest.raises(OverflowError):
+        patch_chunk_offsets(moov, lambda offset: offset + 0x1000, upgrade=False)
+    patched = patch_chunk_offsets(moov, lambda offset: offset + 0x1000, upgrade=True)
+
+    start, end = find_box(patched, (b"moov", b"trak", b"mdia", b"minf", b"stbl", b"co64"))
+    assert struct.unpack(">IIQQ", patched[start:end]) == (0, 2, 0xFFFFFF00 + 0x1000, 0x1010)
+    assert len(patched) == len(moov) + 8
+
+
+def test_spliced_file_reads_and_seeks():
+    """Test reads of any size and position across segment boundaries"""
+    source = io.BytesIO(bytes(range(100)))
+    spliced = SplicedFile(source, [(0, 10), b"abc", (50, 60), (10, 20)])
+    expected = bytes(range(10)) + b"abc" + bytes(range(50, 60)) + bytes(range(10, 20))
+
+    assert spliced.size == len(expected)
+    assert b"".join(iter(lambda: spliced.read(4), b"")) == expected
+    spliced.seek(8)
+    assert spliced.read(7) == expected[8:15]
+    assert spliced.seek(-3, 2) == len(expected) - 3
+    assert spliced.read() == expected[-3:]
+    assert spliced.read(10) == b""
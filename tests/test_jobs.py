@@ -0,0 +1,85 @@
+"""
+Tests for the durable job queue
+"""
+from app.core.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobWorker
+
+
+def test_worker_runs_jobs_and_records_results(tmp_path):
+    """Test jobs survive reopening the queue and are run by a worker"""
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(path)
+    first = queue.enqueue("work", "video-1", {"value": 1})
+    second = queue.enqueue("work", "video-2", {"value": 2})
+    queue.enqueue("other", "video-1")
+    queue.close()
+
+    queue = JobQueue(path)
+    worker = JobWorker(queue, threads=1)
+    worker.register("work", lambda job: f"done {job.payload['value']}")
+
+    assert worker.run_once().result == "done 1"
+    assert worker.run_once().id == second.id
+    # Jobs without a handler are left for a worker that has one
+    assert worker.run_once() is None
+
+    job = queue.get(first.id)
+    assert job.status == SUCCEEDED
+    assert job.attempts == 1
+    assert [job.kind for job in queue.list_for_video("video-1")] == ["work", "other"]
+    assert [job.id for job in queue.list(status=SUCCEEDED)] == [second.id, first.id]
+    assert queue.get("missing") is None
+    queue.close()
+
+
+def test_failed_jobs_retry_with_backoff(monkeypatch):
+    """Test failures are retried after a delay until attempts run out"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "JOB_RETRY_MAX_SECONDS", 15)
+    queue = JobQueue(":memory:")
+    worker = JobWorker(queue)
+
+    def handler(job):
+        raise RuntimeError("boom")
+
+    worker.register("work", handler)
+    job = queue.enqueue("work", "video-1", max_attempts=3)
+
+    failed = worker.run_once()
+    assert failed.status == QUEUED
+    assert failed.error == "boom"
+    assert 5 <= failed.run_at - failed.finished_at <= 10
+    # Not ready again until the backoff has passed
+    assert worker.run_once() is None
+
+    clock = [failed.run_at]
+    monkeypatch.setattr("app.core.jobs.time.time", lambda: clock[0])
+    second = worker.run_once()
+    assert second.attempts == 2
+    assert 7.5 <= second.run_at - clock[0] <= 15
+
+    clock[0] = second.run_at
+    last = worker.run_once()
+    assert last.status == FAILED
+    assert last.attempts == 3
+
+    retried = queue.retry(job.id)
+    assert retried.status == QUEUED
+    assert retried.attempts == 0
+
+
+def test_expired_lease_is_reclaimed(monkeypatch):
+    """Test a job whose worker died is picked up again after its lease expires"""
+    queue = JobQueue(":memory:")
+    job = queue.enqueue("work", "video-1")
+
+    claimed = queue.claim(["work"], "worker-a", lease_seconds=60)
+    assert claimed.status == RUNNING
+    assert queue.claim(["work"], "worker-b", lease_seconds=60) is None
+
+    now = claimed.started_at + 61
+    monkeypatch.setattr("app.core.jobs.time.time", lambda: now)
+    reclaimed = queue.claim(["work"], "worker-b", lease_seconds=60)
+    assert reclaimed.id == job.id
+    assert reclaimed.attempts == 2
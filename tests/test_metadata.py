@@ -0,0 +1,159 @@
+"""
+Tests for the video metadata store
+"""
+import sqlite3
+
+from app.core.metadata import SQLiteVideoRepository, VideoRecord, sort_key
+
+
+def test_add_and_get():
+    """Test that records round-trip through SQLite"""
+    repository = SQLiteVideoRepository(":memory:")
+    record = VideoRecord(
+        id="video-1",
+        key="videos/video-1.mov",
+        title="Clip",
+        description="A clip",
+        original_filename="clip.mov",
+        size=2048,
+        content_type="video/quicktime",
+        extension="mov",
+        etag='"abc"'
+    )
+    repository.add(record)
+
+    assert repository.get("video-1") == record
+    assert repository.get("missing") is None
+    repository.close()
+
+
+def test_add_replaces_existing_record():
+    """Test that re-indexing a video overwrites the old record"""
+    repository = SQLiteVideoRepository(":memory:")
+    repository.add(VideoRecord(id="video-1", key="videos/video-1.mp4", title="Old"))
+    repository.add(VideoRecord(id="video-1", key="videos/video-1.mp4", title="New"))
+
+    assert repository.get("video-1").title == "New"
+    repository.close()
+
+
+def test_delete():
+    """Test deleting a record"""
+    repository = SQLiteVideoRepository(":memory:")
+    repository.add(VideoRecord(id="video-1", key="videos/video-1.mp4", title="Clip"))
+    repository.delete("video-1")
+
+    assert repository.get("video-1") is None
+    repository.close()
+
+
+def seed(repository, count):
+    records = [
+        VideoRecord(
+            id=f"video-{i:03d}",
+            key=f"videos/video-{i:03d}.mp4",
+            title=("Cat " if i % 2 else "Dog ") + str(i),
+            size=(i * 7) % 10,
+            created_at=1000.0 + i // 3
+        )
+        for i in range(count)
+    ]
+    repository.add_many(records)
+    return records
+
+
+def test_list_pages_cover_every_record_once():
+    """Test that keyset pages don't skip or repeat records with tied sort values"""
+    repository = SQLiteVideoRepository(":memory:")
+    records = seed(repository, 50)
+
+    for sort in ("created_at", "size"):
+        for descending in (True, False):
+            seen = []
+            after = None
+            while True:
+                page = repository.list(sort=sort, descending=descending, limit=7, after=after)
+                if not page:
+                    break
+                seen += page
+                after = sort_key(page[-1], sort)
+
+            expected = sorted(records, key=lambda r: sort_key(r, sort), reverse=descending)
+            assert [r.id for r in seen] == [r.id for r in expected]
+    repository.close()
+
+
+def test_list_title_prefix():
+    """Test filtering by title prefix"""
+    repository = SQLiteVideoRepository(":memory:")
+    seed(repository, 20)
+
+    page = repository.list(title_prefix="Cat", limit=100)
+    assert len(page) == 10
+    assert all(r.title.startswith("Cat") for r in page)
+    repository.close()
+
+
+def test_list_uses_indexes():
+    """Test that deep pages are index range scans rather than full scans"""
+    repository = SQLiteVideoRepository(":memory:")
+    records = seed(repository, 20)
+
+    for sort in ("created_at", "size"):
+        statements = []
+        repository._conn.set_trace_callback(statements.append)
+        repository.list(sort=sort, after=sort_key(records[10], sort))
+        repository._conn.set_trace_callback(None)
+
+        plan = repository._conn.execute(f"EXPLAIN QUERY PLAN {statements[-1]}").fetchall()
+        assert plan[0][3].startswith("SEARCH videos USING INDEX")
+        assert not any("TEMP B-TREE" in row[3] for row in plan)
+    repository.close()
+
+
+def test_reference_counts_and_hash_lookup():
+    """Test videos sharing a deduplicated object are counted per key"""
+    repository = SQLiteVideoRepository(":memory:")
+    repository.add(VideoRecord(id="a", key="videos/a.mp4", title="A", sha256="abc"))
+    repository.add(VideoRecord(id="b", key="videos/a.mp4", title="B", sha256="abc"))
+
+    assert repository.find_by_hash("abc").key == "videos/a.mp4"
+    assert repository.find_by_hash("def") is None
+    assert repository.reference_counts(["videos/a.mp4", "videos/x.mp4"]) == {"videos/a.mp4": 2, "videos/x.mp4": 0}
+    repository.close()
+
+
+def test_migrates_older_schema(tmp_path):
+    """Test databases created before the sha256 column gain it on open"""
+    path = str(tmp_path / "videos.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE videos (id TEXT PRIMARY KEY, key TEXT NOT NULL, title TEXT NOT NULL, "
+        "description TEXT NOT NULL DEFAULT '', original_filename TEXT, size INTEGER, content_type TEXT, "
+        "extension TEXT NOT NULL, etag TEXT, created_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO videos VALUES ('a', 'videos/a.mp4', 'A', '', NULL, 1, NULL, 'mp4', NULL, 1.0)")
+    conn.commit()
+    conn.close()
+
+    repository = SQLiteVideoRepository(path)
+    assert repository.get("a").sha256 is None
+    repository.add(VideoRecord(id="b", key="videos/b.mp4", title="B", sha256="abc"))
+    assert repository.find_by_hash("abc").id == "b"
+    assert repository.get("a").playlist_key is None
+    repository.close()
+
+
+def test_set_playlist_updates_every_video_sharing_the_key():
+    """Test a finished transcode is recorded on deduplicated copies too"""
+    repository = SQLiteVideoRepository(":memory:")
+    repository.add(VideoRecord(id="a", key="videos/a.mp4", title="A"))
+    repository.add(VideoRecord(id="b", key="videos/a.mp4", title="B"))
+    repository.add(VideoRecord(id="c", key="videos/c.mp4", title="C"))
+
+    repository.set_playlist("videos/a.mp4", "renditions/a/master.m3u8")
+
+    assert repository.get("a").playlist_key == "renditions/a/master.m3u8"
+    assert repository.get("b").playlist_key == "renditions/a/master.m3u8"
+    assert repository.get("c").playlist_key is None
+    repository.close()
@@ -0,0 +1,90 @@
+"""
+Tests for metrics and the readiness probe
+"""
+from unittest.mock import patch
+
+import boto3
+from botocore.stub import Stubber
+
+from app.core.aws import AsyncS3Client
+from app.core.metrics import (
+    S3_ERRORS, S3_REQUEST_DURATION, Counter, Histogram, Registry, instrument_boto_client, s3_operation_name
+)
+
+
+def test_registry_renders_exposition_format():
+    """Test counters and cumulative histogram buckets in the text format"""
+    registry = Registry()
+    counter = registry.register(Counter("test_total", "A counter", ("result",)))
+    histogram = registry.register(Histogram("test_seconds", "A histogram", buckets=(0.1, 1.0)))
+    counter.labels("hit").inc()
+    counter.labels("hit").inc(2)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE test_total counter" in lines
+    assert 'test_total{result="hit"} 3' in lines
+    assert 'test_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{le="1"} 2' in lines
+    assert 'test_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_seconds_sum 5.55" in lines
+    assert "test_seconds_count 3" in lines
+
+
+def test_s3_operation_name():
+    """Test API operation names are reported the way boto spells them"""
+    assert s3_operation_name("HeadObject") == "head_object"
+    assert s3_operation_name("CompleteMultipartUpload") == "complete_multipart_upload"
+
+
+def test_instrumented_client_records_latency_and_errors():
+    """Test boto calls are timed and failed calls counted by error code"""
+    boto_client = boto3.client("s3", region_name="eu-west-1", aws_access_key_id="x", aws_secret_access_key="x")
+    instrument_boto_client(boto_client)
+    calls = S3_REQUEST_DURATION.labels("head_bucket").counts
+    before = sum(calls)
+    errors = S3_ERRORS.labels("head_bucket", "NoSuchBucket").value
+
+    with Stubber(boto_client) as stubber:
+        stubber.add_response("head_bucket", {}, {"Bucket": "videos"})
+        stubber.add_client_error("head_bucket", "NoSuchBucket", http_status_code=404)
+        boto_client.head_bucket(Bucket="videos")
+        try:
+            boto_client.head_bucket(Bucket="videos")
+        except boto_client.exceptions.ClientError:
+            pass
+
+    assert sum(calls) == before + 2
+    assert S3_ERRORS.labels("head_bucket", "NoSuchBucket").value == errors + 1
+
+
+def test_metrics_endpoint_reports_route_templates(client, mock_s3_client):
+    """Test request latency is labelled by route template, not by path"""
+    client.get("/api/v1/videos/some-video-id")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/api/v1/videos/{video_id}"' in response.text
+    assert "some-video-id" not in response.text
+    assert "video_uploads_in_flight" in response.text
+
+
+def test_ready_when_s3_reachable(client):
+    """Test the readiness probe passes when the bucket can be reached"""
+    with patch.object(AsyncS3Client, "check_bucket", return_value=None):
+        response = client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+
+
+def test_not_ready_when_s3_unreachable(client):
+    """Test the readiness probe fails while S3 is unreachable"""
+    with patch.object(AsyncS3Client, "check_bucket", side_effect=ConnectionError("refused")):
+        response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "S3 is unreachable"
@@ -0,0 +1,120 @@
+"""
+Tests for media probing
+"""
+import io
+
+import pytest
+
+from app.core.probe import MediaProbe, probe_file
+from tests.media import build_mp4, build_webm
+
+
+class CountingFile(io.BytesIO):
+    """BytesIO that counts the bytes read from it"""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def feed(data: bytes, chunk_size: int) -> MediaProbe:
+    probe = MediaProbe()
+    for offset in range(0, len(data), chunk_size):
+        probe.feed(data[offset:offset + chunk_size])
+    return probe
+
+
+@pytest.mark.parametrize("faststart", [True, False])
+def test_probe_mp4(faststart):
+    """Test MP4 properties are read whichever end the moov box is at"""
+    data = build_mp4(media_size=4096, faststart=faststart, duration=8.0, width=1920, height=1080)
+    info = probe_file(io.BytesIO(data))
+
+    assert info.container == "mp4"
+    assert info.mime_type == "video/mp4"
+    assert info.duration == 8.0
+    assert (info.width, info.height) == (1920, 1080)
+    assert (info.video_codec, info.audio_codec) == ("h264", "aac")
+    assert info.bitrate == int(len(data) * 8 / 8.0)
+    assert info.faststart is faststart
+
+
+@pytest.mark.parametrize("brand,container,mime_type", [
+    (b"qt  ", "mov", "video/quicktime"),
+    (b"M4V ", "m4v", "video/x-m4v"),
+    (b"3gp5", "3gp", "video/3gpp"),
+])
+def test_probe_mp4_brands(brand, container, mime_type):
+    """Test the major brand picks the container and MIME type"""
+    info = probe_file(io.BytesIO(build_mp4(brand=brand, video_codec=b"hvc1", audio_codec=None)))
+
+    assert (info.container, info.mime_type) == (container, mime_type)
+    assert info.video_codec == "hevc"
+    assert info.audio_codec is None
+
+
+def test_probe_webm():
+    """Test WebM and Matroska headers are read, including unknown-size segments"""
+    info = probe_file(io.BytesIO(build_webm(duration=12.5, width=640, height=360)))
+    assert (info.container, info.mime_type, info.extension) == ("webm", "video/webm", "webm")
+    assert info.duration == 12.5
+    assert (info.width, info.height) == (640, 360)
+    assert (info.video_codec, info.audio_codec) == ("vp9", "opus")
+
+    info = probe_file(io.BytesIO(build_webm(doc_type="matroska", video_codec="V_MPEG4/ISO/AVC",
+                                            unknown_segment_size=True)))
+    assert (info.container, info.extension, info.video_codec) == ("matroska", "mkv", "h264")
+
+
+def test_probe_file_skips_media_data():
+    """Test only the headers of a seekable file are read, and it is rewound"""
+    data = build_mp4(media_size=8 * 1024 * 1024)
+    file_obj = CountingFile(data)
+
+    assert probe_file(file_obj).duration == 10.0
+    assert file_obj.bytes_read < 256 * 1024
+    assert file_obj.tell() == 0
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_probe_stream_matches_file(chunk_size):
+    """Test feeding a stream in chunks of any size gives the same result"""
+    for data in (build_mp4(media_size=20000, large_mdat=True), build_webm(media_size=20000)):
+        probe = feed(data, chunk_size)
+
+        assert probe.done
+        assert probe.total_bytes == len(data)
+        assert probe.result() == probe_file(io.BytesIO(data))
+
+
+def test_probe_stream_knows_type_before_moov():
+    """Test the MIME type is known from ftyp alone, before a trailing moov arrives"""
+    data = build_mp4(media_size=100000, brand=b"qt  ")
+    probe = feed(data[:1000], 100)
+
+    assert not probe.finished
+    assert probe.result().mime_type == "video/quicktime"
+    assert probe.result().duration is None
+
+
+def test_probe_unrecognised():
+    """Test non-video content is not mistaken for a container"""
+    assert probe_file(io.BytesIO(b"test video content")) is None
+    assert probe_file(io.BytesIO(b"")) is None
+    probe = feed(b"\x00" * 100, 10)
+    assert probe.failed
+    assert probe.result() is None
+
+
+def test_probe_header_limit():
+    """Test a header larger than the limit is given up on instead of buffered"""
+    probe = MediaProbe(max_header_bytes=100)
+    probe.feed(build_mp4(faststart=True))
+
+    assert probe.failed
+    assert probe.result().duration is None
@@ -0,0 +1,66 @@
+"""
+Tests for Range header handling
+"""
+import asyncio
+
+import pytest
+
+from app.core.ranges import MultipartByteranges, RangeNotSatisfiable, if_range_matches, parse_range_header
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", [(0, 99)]),
+    ("bytes=100-", [(100, 999)]),
+    ("bytes=-100", [(900, 999)]),
+    ("bytes=-5000", [(0, 999)]),
+    ("bytes=900-5000", [(900, 999)]),
+    ("bytes=0-9, 20-29", [(0, 9), (20, 29)]),
+    ("bytes=20-29,0-9", [(0, 9), (20, 29)]),
+    ("bytes=0-9,5-19,20-29", [(0, 29)]),
+    ("bytes=0-9,2000-3000", [(0, 9)]),
+])
+def test_parse_range_header(header, expected):
+    """Test valid ranges are clamped, sorted and merged"""
+    assert parse_range_header(header, 1000, max_ranges=16) == expected
+
+
+@pytest.mark.parametrize("header", ["items=0-9", "bytes=", "bytes=9-0", "bytes=a-b", "bytes=10", "bytes=0-1,2-3,4-5"])
+def test_parse_range_header_ignores_invalid(header):
+    """Test malformed headers, and too many ranges, are ignored"""
+    assert parse_range_header(header, 1000, max_ranges=2) is None
+
+
+def test_parse_range_header_unsatisfiable():
+    """Test ranges entirely past the end of the object"""
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=1000-2000", 1000, max_ranges=16)
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=-0", 1000, max_ranges=16)
+
+
+def test_if_range_matches():
+    """Test If-Range uses strong ETag comparison or an exact date"""
+    date = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert if_range_matches('"abc"', '"abc"', date)
+    assert not if_range_matches('"xyz"', '"abc"', date)
+    assert not if_range_matches('W/"abc"', '"abc"', date)
+    assert if_range_matches(date, '"abc"', date)
+    assert not if_range_matches("Thu, 22 Oct 2015 07:28:00 GMT", '"abc"', date)
+
+
+def test_multipart_byteranges_length_matches_body():
+    """Test the advertised Content-Length is exactly the streamed body size"""
+    data = bytes(range(256)) * 4
+    layout = MultipartByteranges([(0, 9), (100, 199), (1000, 1023)], len(data), "video/mp4")
+
+    async def read_range(start, end):
+        yield data[start:end + 1]
+
+    async def collect():
+        return b"".join([chunk async for chunk in layout.stream(read_range)])
+
+    body = asyncio.run(collect())
+    assert len(body) == layout.content_length
+    assert body.startswith(f"--{layout.boundary}\r\nContent-Type: video/mp4\r\nContent-Range: bytes 0-9/1024\r\n\r\n".encode())
+    assert body.endswith(f"\r\n--{layout.boundary}--\r\n".encode())
+    assert data[100:200] in body
@@ -0,0 +1,96 @@
+"""
+Tests for the disk segment cache
+"""
+import asyncio
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.core.aws import AsyncS3Client
+from app.core.segment_cache import SegmentCache
+from app.core.storage import InMemoryStorage
+
+
+def test_store_open_and_evict(tmp_path):
+    """Test segments are mapped back and the least recently used is evicted first"""
+    cache = SegmentCache(str(tmp_path), max_bytes=250, segment_size=100)
+    for index in range(2):
+        cache.store("videos/a.mp4", '"v1"', index, bytes([index]) * 100)
+    cache.open("videos/a.mp4", '"v1"', 0).close()
+    cache.store("videos/a.mp4", '"v1"', 2, b"\x02" * 100)
+
+    assert cache.open("videos/a.mp4", '"v1"', 1) is None
+    mapped = cache.open("videos/a.mp4", '"v1"', 0)
+    assert mapped[:] == b"\x00" * 100
+    mapped.close()
+    # A new version of the object never sees the old one's segments
+    assert cache.open("videos/a.mp4", '"v2"', 0) is None
+
+
+def test_index_survives_restart(tmp_path):
+    """Test segments written by an earlier process are found again"""
+    SegmentCache(str(tmp_path), segment_size=100).store("videos/a.mp4", '"v1"', 3, b"data")
+    cache = SegmentCache(str(tmp_path), segment_size=100)
+
+    mapped = cache.open("videos/a.mp4", '"v1"', 3)
+    assert mapped[:] == b"data"
+    mapped.close()
+
+
+def test_concurrent_misses_share_one_fetch(tmp_path):
+    """Test N concurrent misses on a segment trigger one origin read"""
+    cache = SegmentCache(str(tmp_path), segment_size=100)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return b"segment"
+
+    async def run():
+        return await asyncio.gather(*(cache.fetch("videos/a.mp4", '"v1"', 0, load) for _ in range(20)))
+
+    assert asyncio.run(run()) == [b"segment"] * 20
+    assert len(calls) == 1
+
+
+def test_failed_fetch_reaches_every_waiter(tmp_path):
+    """Test an origin error is raised to all coalesced requests and nothing is cached"""
+    cache = SegmentCache(str(tmp_path), segment_size=100)
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError("Video file videos/a.mp4 has changed")
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.fetch("videos/a.mp4", '"v1"', 0, load) for _ in range(3)), return_exceptions=True
+        )
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))
+    assert cache.open("videos/a.mp4", '"v1"', 0) is None
+
+
+@pytest.mark.parametrize("byte_range", [None, (0, 99), (150, 649), (999, 1099)])
+def test_iter_object_through_cache(tmp_path, byte_range):
+    """Test ranged reads are served from segments, and from disk on the second read"""
+    storage = InMemoryStorage()
+    data = os.urandom(1100)
+    storage.upload_video(io.BytesIO(data), "videos/a.mp4")
+    etag = storage.head_video("videos/a.mp4").etag
+    client = AsyncS3Client(storage, segment_cache=SegmentCache(str(tmp_path), segment_size=256))
+    start, end = byte_range or (0, len(data) - 1)
+
+    async def read():
+        return b"".join([chunk async for chunk in client.iter_object("videos/a.mp4", byte_range, 64, etag)])
+
+    with patch.object(storage, "get_object", wraps=storage.get_object) as get_object:
+        assert asyncio.run(read()) == data[start:end + 1]
+        fetched = get_object.call_count
+        assert asyncio.run(read()) == data[start:end + 1]
+
+    assert fetched == end // 256 - start // 256 + 1
+    assert get_object.call_count == fetched
+    client.close()
@@ -0,0 +1,94 @@
+"""
+Tests for CloudFront URL and cookie signing
+"""
+import base64
+from unittest.mock import MagicMock, patch
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+from app.core.signing import CloudFrontSigner, build_cloudfront_signer, load_private_key
+
+
+def cloudfront_b64decode(value):
+    return base64.b64decode(value.translate(str.maketrans("-_~", "+=/")))
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def signer(private_key):
+    return CloudFrontSigner("KTESTKEYPAIR", private_key, expiry_seconds=3600, expiry_granularity=300)
+
+
+def test_sign_url_canned_policy(signer, private_key):
+    """Test signed URLs carry a signature CloudFront can verify"""
+    url = "https://cdn.example.com/videos/a.mp4"
+    signed = signer.sign_url(url, expires=1700000100)
+
+    base, query = signed.split("?")
+    params = dict(item.split("=", 1) for item in query.split("&"))
+    assert base == url
+    assert params["Expires"] == "1700000100"
+    assert params["Key-Pair-Id"] == "KTESTKEYPAIR"
+
+    policy = b'{"Statement":[{"Resource":"https://cdn.example.com/videos/a.mp4",' \
+             b'"Condition":{"DateLessThan":{"AWS:EpochTime":1700000100}}}]}'
+    private_key.public_key().verify(
+        cloudfront_b64decode(params["Signature"]), policy, padding.PKCS1v15(), hashes.SHA1()
+    )
+
+
+def test_expiry_is_rounded_up(signer):
+    """Test expiries snap to the granularity so policies can be reused"""
+    assert signer.expires_at(now=1000) == 4800
+    assert signer.expires_at(now=1001) == 4800
+    assert signer.expires_at(expires_in=60, now=1001) == 1200
+
+
+def test_signatures_are_cached_per_policy(private_key):
+    """Test the same policy is only signed once"""
+    key = MagicMock(wraps=private_key)
+    signer = CloudFrontSigner("KTESTKEYPAIR", key)
+    urls = [f"https://cdn.example.com/videos/{i % 3}.mp4" for i in range(30)]
+    signed = signer.sign_urls(urls, expires=1700000100)
+
+    assert len(set(signed)) == 3
+    assert key.sign.call_count == 3
+
+
+def test_signed_cookies_custom_policy(signer, private_key):
+    """Test signed cookies carry a wildcard policy and its signature"""
+    cookies, expires = signer.signed_cookies("https://cdn.example.com/renditions/a/*", expires=1700000100)
+
+    policy = cloudfront_b64decode(cookies["CloudFront-Policy"])
+    assert b'"Resource":"https://cdn.example.com/renditions/a/*"' in policy
+    assert expires == 1700000100
+    assert cookies["CloudFront-Key-Pair-Id"] == "KTESTKEYPAIR"
+    private_key.public_key().verify(
+        cloudfront_b64decode(cookies["CloudFront-Signature"]), policy, padding.PKCS1v15(), hashes.SHA1()
+    )
+
+
+def test_build_signer_from_settings(private_key):
+    """Test the signer is only built when a key pair is configured"""
+    from app.core.config import settings
+
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    assert build_cloudfront_signer() is None
+
+    with patch.object(settings, "CLOUDFRONT_KEY_PAIR_ID", "KTESTKEYPAIR"), \
+            patch.object(settings, "CLOUDFRONT_PRIVATE_KEY", pem):
+        first = build_cloudfront_signer()
+        second = build_cloudfront_signer()
+
+    assert first.key_pair_id == "KTESTKEYPAIR"
+    # The parsed key is cached
+    assert first.private_key is second.private_key
+    assert load_private_key.cache_info().hits >= 1
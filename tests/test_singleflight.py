@@ -0,0 +1,114 @@
+"""
+Tests for request coalescing (single-flight)
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    """Test callers with the same key share the in-flight call; other keys don't"""
+    flights = SingleFlight("test")
+    calls = []
+
+    async def call(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return f"result-{key}"
+
+    async def run():
+        return await asyncio.gather(
+            *(flights.do("a", lambda: call("a")) for _ in range(10)),
+            flights.do("b", lambda: call("b")),
+        )
+
+    assert asyncio.run(run()) == ["result-a"] * 10 + ["result-b"]
+    assert sorted(calls) == ["a", "b"]
+    assert len(flights) == 0
+
+
+def test_errors_reach_every_waiter_and_are_not_remembered():
+    """Test a failed call fails all of its waiters, and the next call runs again"""
+    flights = SingleFlight("test")
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise ConnectionError("S3 unavailable")
+        return "ok"
+
+    async def run():
+        results = await asyncio.gather(*(flights.do("a", call) for _ in range(5)), return_exceptions=True)
+        return results, await flights.do("a", call)
+
+    results, retry = asyncio.run(run())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert retry == "ok"
+    assert len(attempts) == 2
+
+
+def test_timeout_leaves_the_call_running_for_others():
+    """Test a waiter that times out does not cancel the shared call"""
+    flights = SingleFlight("test")
+
+    async def call():
+        await asyncio.sleep(0.1)
+        return "ok"
+
+    async def run():
+        impatient = flights.do("a", call, timeout=0.01)
+        patient = flights.do("a", call)
+        return await asyncio.gather(impatient, patient, return_exceptions=True)
+
+    impatient, patient = asyncio.run(run())
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == "ok"
+
+
+def concurrent_gets(client, url, count):
+    # Release every request at once, so all of them arrive while the first lookup runs
+    barrier = threading.Barrier(count)
+
+    def get(_):
+        barrier.wait()
+        return client.get(url, allow_redirects=False)
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(get, range(count)))
+
+
+def test_concurrent_video_lookups_make_one_s3_call(client, mock_s3_client):
+    """Test N simultaneous GETs of the same unindexed video cause one S3 lookup"""
+    def slow_lookup(file_name):
+        time.sleep(0.5)
+        return f"https://test-cdn.example.com/{file_name}"
+
+    mock_s3_client["get_video_url"].side_effect = slow_lookup
+
+    responses = concurrent_gets(client, "/api/v1/videos/viral", 50)
+    assert all(response.status_code == 307 for response in responses)
+    assert {response.headers["location"] for response in responses} == {
+        "https://test-cdn.example.com/videos/viral.mp4"
+    }
+    mock_s3_client["get_video_url"].assert_called_once_with("videos/viral.mp4")
+
+
+@pytest.mark.parametrize("error, status_code", [(ValueError("missing"), 404), (ConnectionError("down"), 500)])
+def test_shared_lookup_errors_map_to_each_response(client, mock_s3_client, error, status_code):
+    """Test every coalesced request gets the error of the shared lookup"""
+    def failing_lookup(file_name):
+        time.sleep(0.3)
+        raise error
+
+    mock_s3_client["get_video_url"].side_effect = failing_lookup
+
+    responses = concurrent_gets(client, "/api/v1/videos/gone", 10)
+    assert [response.status_code for response in responses] == [status_code] * 10
+    assert mock_s3_client["get_video_url"].call_count == 1
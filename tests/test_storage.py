@@ -0,0 +1,140 @@
+"""
+Tests for the local-filesystem and in-memory storage backends
+"""
+import io
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.core.storage import InMemoryStorage, LocalStorage, ObjectStore
+
+
+@pytest.fixture(params=["local", "memory"])
+def storage(request, tmp_path):
+    """Each non-S3 backend, with no CloudFront domain configured"""
+    if request.param == "local":
+        backend = LocalStorage(str(tmp_path), public_base_url="http://edge.example.com/media")
+    else:
+        backend = InMemoryStorage(public_base_url="http://edge.example.com/media")
+    backend.cloudfront_domain = None
+    return backend
+
+
+@pytest.fixture
+def client_factory(monkeypatch):
+    """Build a test client after overriding settings"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    def factory(**overrides):
+        for name, value in overrides.items():
+            monkeypatch.setattr(settings, name, value)
+        return TestClient(app)
+
+    return factory
+
+
+def test_upload_head_and_read(storage):
+    """Test stored objects report their info and can be read by range"""
+    data = os.urandom(300000)
+    progress = []
+    url = storage.upload_video(
+        io.BytesIO(data), "videos/a.mp4", metadata={"title": "A"},
+        progress_callback=progress.append, content_type="video/webm"
+    )
+
+    assert url == "http://edge.example.com/media/videos/a.mp4"
+    assert sum(progress) == len(data)
+    info = storage.head_video("videos/a.mp4")
+    assert info.exists and info.content_length == len(data)
+    assert info.content_type == "video/webm"
+    assert info.metadata == {"title": "A"}
+
+    response = storage.get_object("videos/a.mp4", (1000, 1999), if_match=info.etag)
+    assert response["ContentLength"] == 1000
+    assert response["Body"].read() == data[1000:2000]
+    response["Body"].close()
+    assert storage.get_object("videos/a.mp4")["Body"].read() == data
+
+    with pytest.raises(ValueError):
+        storage.get_object("videos/a.mp4", if_match='"stale"')
+    assert storage.head_video("videos/missing.mp4").exists is False
+    with pytest.raises(ValueError):
+        storage.get_video_url("videos/missing.mp4")
+
+
+def test_multipart_upload(storage):
+    """Test parts are listed, assembled in order and cleaned up"""
+    upload_id = storage.create_multipart_upload("videos/b.mp4", {"title": "B"}, "video/mp4")
+    etags = {number: storage.upload_part("videos/b.mp4", upload_id, number, bytes([number]) * 10) for number in (2, 1)}
+
+    assert storage.list_parts("videos/b.mp4", upload_id) == {1: (etags[1], 10), 2: (etags[2], 10)}
+    storage.complete_multipart_upload(
+        "videos/b.mp4", upload_id, [{"PartNumber": n, "ETag": etags[n]} for n in (1, 2)]
+    )
+
+    assert storage.get_object("videos/b.mp4")["Body"].read() == b"\x01" * 10 + b"\x02" * 10
+    assert storage.head_video("videos/b.mp4").metadata == {"title": "B"}
+    with pytest.raises(ValueError):
+        storage.list_parts("videos/b.mp4", upload_id)
+    with pytest.raises(ValueError):
+        storage.abort_multipart_upload("videos/b.mp4", "unknown")
+
+
+def test_delete_prefix(storage, tmp_path):
+    """Test deleting a prefix removes only the objects under it"""
+    source = tmp_path / "segment.ts"
+    source.write_bytes(b"segment")
+    storage.upload_file(str(source), "renditions/v1/720p/0.ts", "video/mp2t", cache_control="max-age=60")
+    storage.upload_file(str(source), "renditions/v1/master.m3u8", "application/vnd.apple.mpegurl")
+    storage.upload_video(io.BytesIO(b"video"), "renditions/v10/master.m3u8")
+
+    assert storage.head_video("renditions/v1/720p/0.ts").content_type == "video/mp2t"
+    assert storage.delete_prefix("renditions/v1/") == {}
+    assert storage.head_video("renditions/v1/master.m3u8").exists is False
+    assert storage.head_video("renditions/v10/master.m3u8").exists is True
+
+    target = tmp_path / "download.bin"
+    storage.download_file("renditions/v10/master.m3u8", str(target))
+    assert target.read_bytes() == b"video"
+
+
+def test_incomplete_backend_cannot_be_built():
+    """Test a backend missing a primitive fails when constructed, not when first used"""
+    class WriteOnly(ObjectStore):
+        def _write(self, file_name, chunks):
+            return 0, '""'
+
+    with pytest.raises(TypeError):
+        WriteOnly()
+
+
+def test_local_storage_rejects_escaping_keys(tmp_path):
+    """Test keys cannot reach outside the storage directory or its metadata"""
+    storage = LocalStorage(str(tmp_path / "media"))
+    for key in ("../outside.mp4", "/etc/passwd", ".meta/videos/a.mp4.json"):
+        with pytest.raises(ValueError):
+            storage.upload_video(io.BytesIO(b"x"), key)
+
+    # Dots are only special as a whole path component
+    for key in ("..clip.mp4", "videos/..x", "videos/a/../b.mp4"):
+        storage.upload_video(io.BytesIO(b"x"), key)
+        assert storage.head_video(key).exists
+
+
+def test_service_runs_on_memory_storage(client_factory):
+    """Test an upload can be served back in proxy mode without S3"""
+    with client_factory(STORAGE_BACKEND="memory", VIDEO_DELIVERY_MODE="proxy") as client:
+        response = client.post(
+            "/api/v1/videos/upload",
+            files={"file": ("clip.mp4", b"test video content", "video/mp4")},
+        )
+        assert response.status_code == 201
+        video_id = response.json()["id"]
+
+        response = client.get(f"/api/v1/videos/{video_id}", headers={"Range": "bytes=5-9"})
+        assert response.status_code == 206
+        assert response.content == b"video"
+        assert client.get("/ready").status_code == 200
@@ -0,0 +1,190 @@
+"""
+Tests for streaming (non-spooled) uploads
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import zlib
+
+import pytest
+
+from app.core.hashing import ChecksumMismatch
+from app.core.streaming import (
+    FIELD, FILE_DATA, FILE_END, FILE_START, MultipartFormStream, StreamingMultipartUpload
+)
+from tests.media import build_mp4
+
+KB = 1024
+
+
+class FakeAsyncS3Client:
+    """Records multipart calls made by StreamingMultipartUpload"""
+
+    def __init__(self, fail_on_part=None, fail_on_complete=None):
+        self.fail_on_part = fail_on_part
+        self.fail_on_complete = fail_on_complete
+        self.parts = {}
+        self.checksums = {}
+        self.completed = None
+        self.aborted = False
+        self.put = None
+        self.content_type = None
+
+    async def create_multipart_upload(self, file_name, metadata=None, content_type=None, checksum_algorithm=None):
+        self.content_type = content_type
+        self.checksum_algorithm = checksum_algorithm
+        return "upload-1"
+
+    async def upload_part(self, file_name, upload_id, part_number, body, checksum=None):
+        await asyncio.sleep(0)
+        if part_number == self.fail_on_part:
+            raise RuntimeError("part failed")
+        self.parts[part_number] = body
+        self.checksums[part_number] = checksum
+        return f'"etag-{part_number}"'
+
+    async def complete_multipart_upload(self, file_name, upload_id, parts):
+        if self.fail_on_complete is not None:
+            raise self.fail_on_complete
+        self.completed = parts
+        return f"https://test-cdn.example.com/{file_name}"
+
+    async def abort_multipart_upload(self, file_name, upload_id):
+        self.aborted = True
+
+    async def upload_video(
+        self, file_obj, file_name, metadata=None, file_size=None, progress_callback=None, content_type=None
+    ):
+        self.put = file_obj.read()
+        self.content_type = content_type
+        return f"https://test-cdn.example.com/{file_name}"
+
+
+async def stream(upload, data, chunk_size):
+    for offset in range(0, len(data), chunk_size):
+        await upload.write(data[offset:offset + chunk_size])
+    return await upload.complete()
+
+
+def test_large_stream_uses_bounded_memory():
+    """Test a stream much larger than the memory budget is sent part by part"""
+    s3_client = FakeAsyncS3Client()
+    upload = StreamingMultipartUpload(
+        s3_client, "videos/test-id.mp4", part_size=64 * KB, max_parts_in_flight=2
+    )
+    data = os.urandom(1024 * KB)
+
+    url = asyncio.run(stream(upload, data, chunk_size=16 * KB))
+
+    assert url == "https://test-cdn.example.com/videos/test-id.mp4"
+    assert b"".join(s3_client.parts[n] for n in sorted(s3_client.parts)) == data
+    assert [p["PartNumber"] for p in s3_client.completed] == list(range(1, 17))
+    assert upload.peak_buffered_bytes <= 64 * KB * 3 + 16 * KB
+    assert upload.peak_buffered_bytes < len(data)
+
+
+@pytest.mark.parametrize("algorithm, checksum", [
+    ("CRC32", lambda data: zlib.crc32(data).to_bytes(4, "big")),
+    ("SHA256", lambda data: hashlib.sha256(data).digest()),
+])
+def test_parts_carry_their_checksums(algorithm, checksum):
+    """Test each part is sent with the checksum of exactly its bytes, across chunk boundaries"""
+    s3_client = FakeAsyncS3Client()
+    upload = StreamingMultipartUpload(
+        s3_client, "videos/test-id.mp4", part_size=64 * KB, checksum_algorithm=algorithm
+    )
+    data = os.urandom(200 * KB)
+
+    asyncio.run(stream(upload, data, chunk_size=24 * KB))
+
+    assert s3_client.checksum_algorithm == algorithm
+    for part in s3_client.completed:
+        expected = base64.b64encode(checksum(s3_client.parts[part["PartNumber"]])).decode()
+        assert part[f"Checksum{algorithm}"] == expected
+        assert s3_client.checksums[part["PartNumber"]].b64digest() == expected
+
+
+def test_short_stream_uses_single_put():
+    """Test a stream smaller than one part skips the multipart API"""
+    s3_client = FakeAsyncS3Client()
+    upload = StreamingMultipartUpload(s3_client, "videos/test-id.mp4", part_size=64 * KB)
+
+    asyncio.run(stream(upload, b"test video content", chunk_size=4))
+
+    assert s3_client.put == b"test video content"
+    assert s3_client.parts == {}
+
+
+def test_probed_stream_sets_content_type():
+    """Test the sniffed container type is stored instead of the declared one"""
+    s3_client = FakeAsyncS3Client()
+    upload = StreamingMultipartUpload(
+        s3_client, "videos/test-id.mov", part_size=16 * KB, content_type="video/mp4", probe=True
+    )
+    data = build_mp4(media_size=256 * KB, brand=b"qt  ")
+
+    asyncio.run(stream(upload, data, chunk_size=4 * KB))
+
+    assert s3_client.content_type == "video/quicktime"
+    assert upload.media.duration == 10.0
+    assert upload.media.faststart is False
+
+
+def test_failed_part_aborts_upload():
+    """Test a failed part surfaces the error and the upload can be aborted"""
+    s3_client = FakeAsyncS3Client(fail_on_part=2)
+    upload = StreamingMultipartUpload(s3_client, "videos/test-id.mp4", part_size=16 * KB)
+
+    async def run():
+        try:
+            await stream(upload, os.urandom(128 * KB), chunk_size=16 * KB)
+        except RuntimeError:
+            await upload.abort()
+            raise
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert s3_client.aborted
+    assert s3_client.completed is None
+
+
+def test_upload_is_not_aborted_after_completion():
+    """Test abort leaves S3 alone once completion has been requested, even if it failed"""
+    s3_client = FakeAsyncS3Client(fail_on_complete=ChecksumMismatch("stored object differs"))
+    upload = StreamingMultipartUpload(s3_client, "videos/test-id.mp4", part_size=16 * KB)
+
+    async def run():
+        await stream(upload, os.urandom(48 * KB), chunk_size=16 * KB)
+        try:
+            await upload.complete()
+        finally:
+            await upload.abort()
+
+    with pytest.raises(ChecksumMismatch):
+        asyncio.run(run())
+    assert not s3_client.aborted
+
+
+def test_multipart_form_stream_emits_events():
+    """Test form fields and file data are parsed across arbitrary chunk splits"""
+    boundary = "test-boundary"
+    payload = os.urandom(10 * KB)
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="title"\r\n\r\n'
+        "My Video\r\n"
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="clip.webm"\r\n'
+        "Content-Type: video/webm\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+
+    form = MultipartFormStream(f"multipart/form-data; boundary={boundary}")
+    events = []
+    for offset in range(0, len(body), 333):
+        events.extend(form.feed(body[offset:offset + 333]))
+
+    assert events[0] == (FIELD, "title", "My Video")
+    assert events[1] == (FILE_START, "file", "clip.webm", "video/webm")
+    assert b"".join(e[1] for e in events if e[0] == FILE_DATA) == payload
+    assert events[-1] == (FILE_END,)
@@ -0,0 +1,96 @@
+"""
+Tests for poster and sprite sheet extraction
+"""
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from app.core.thumbnails import build_thumbnail_track, extract_thumbnails, generate_thumbnails, sprite_layout
+
+
+def test_sprite_layout(monkeypatch):
+    """Test tiles keep the source aspect ratio and fill sheets row by row"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_TILE_WIDTH", 160)
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_INTERVAL_SECONDS", 10)
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_COLUMNS", 5)
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_ROWS", 2)
+    layout = sprite_layout(1920, 1080, 125.0)
+
+    assert (layout.tile_width, layout.tile_height) == (160, 90)
+    assert layout.count == 13
+    assert layout.sheets == 2
+    assert layout.position(0) == (0, 0, 0)
+    assert layout.position(6) == (0, 160, 90)
+    assert layout.position(12) == (1, 320, 0)
+
+
+def test_build_thumbnail_track(monkeypatch):
+    """Test the WebVTT track points each interval at its tile"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_COLUMNS", 2)
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_ROWS", 1)
+    layout = sprite_layout(640, 360, 25.0)
+    track = build_thumbnail_track("abc", layout, 25.0)
+
+    assert track.startswith("WEBVTT\n\n")
+    assert "00:00:10.000 --> 00:00:20.000\nabc.sprite_000.jpg#xywh=160,0,160,90" in track
+    assert "00:00:20.000 --> 00:00:25.000\nabc.sprite_001.jpg#xywh=0,0,160,90" in track
+
+
+def fake_ffmpeg(command, **kwargs):
+    """Stand-in for ffprobe/ffmpeg that writes the files ffmpeg would"""
+    if "-show_streams" in command:
+        probe = {"streams": [{"codec_type": "video", "width": 1280, "height": 720}], "format": {"duration": "30.5"}}
+        return subprocess.CompletedProcess(command, 0, stdout=json.dumps(probe).encode())
+    output = command[-1]
+    if "%03d" in output:
+        output = output.replace("%03d", "000")
+    with open(output, "wb") as image:
+        image.write(b"\xff\xd8\xff")
+    return subprocess.CompletedProcess(command, 0, stdout=b"", stderr=b"")
+
+
+def test_generate_thumbnails_uploads_next_to_video():
+    """Test the poster, track and sprites are stored beside the video with long cache headers"""
+    s3_client = MagicMock()
+    s3_client.download_file.side_effect = lambda key, path: open(path, "wb").close()
+
+    with patch("app.core.transcoding.subprocess.run", side_effect=fake_ffmpeg), \
+            patch("app.core.thumbnails.subprocess.run", side_effect=fake_ffmpeg), \
+            ThreadPoolExecutor(max_workers=1) as executor:
+        poster = generate_thumbnails(s3_client, "videos/abc.mp4", executor)
+
+    assert poster == "videos/abc.poster.jpg"
+    uploads = {call.args[1]: call.args[2] for call in s3_client.upload_file.call_args_list}
+    assert uploads == {
+        "videos/abc.poster.jpg": "image/jpeg",
+        "videos/abc.thumbnails.vtt": "text/vtt",
+        "videos/abc.sprite_000.jpg": "image/jpeg",
+    }
+    assert all(
+        call.kwargs["cache_control"].startswith("public, max-age=")
+        for call in s3_client.upload_file.call_args_list
+    )
+
+
+def test_track_only_covers_sprites_written(tmp_path, monkeypatch):
+    """Test a stream that yields fewer sheets than its duration suggests gets no cues for missing ones"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_INTERVAL_SECONDS", 10)
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_COLUMNS", 2)
+    monkeypatch.setattr(settings, "THUMBNAIL_SPRITE_ROWS", 1)
+    # The probe reports 30.5 s (two sheets), but only the first sheet is written
+    with patch("app.core.transcoding.subprocess.run", side_effect=fake_ffmpeg), \
+            patch("app.core.thumbnails.subprocess.run", side_effect=fake_ffmpeg):
+        names = extract_thumbnails(str(tmp_path / "source"), str(tmp_path), "abc")
+
+    assert names == ["abc.poster.jpg", "abc.thumbnails.vtt", "abc.sprite_000.jpg"]
+    track = (tmp_path / "abc.thumbnails.vtt").read_text()
+    assert track.count(" --> ") == 2
+    assert "sprite_001" not in track
@@ -0,0 +1,102 @@
+"""
+Tests for HLS transcoding
+"""
+import json
+import os
+import subprocess
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.transcoding import (
+    Rendition, build_ffmpeg_command, parse_ladder, renditions_prefix, select_renditions, transcode_video
+)
+
+
+def test_parse_ladder():
+    """Test the ladder is parsed and ordered tallest first"""
+    assert parse_ladder("360:800, 1080:5000,720:2800") == [
+        Rendition(1080, 5000), Rendition(720, 2800), Rendition(360, 800)
+    ]
+    with pytest.raises(ValueError):
+        parse_ladder("720p")
+    with pytest.raises(ValueError):
+        parse_ladder("")
+
+
+def test_select_renditions_never_upscales():
+    """Test rungs taller than the source are dropped"""
+    ladder = parse_ladder("1080:5000,720:2800,480:1400")
+    assert select_renditions(ladder, 720) == [Rendition(720, 2800), Rendition(480, 1400)]
+    assert select_renditions(ladder, 2160) == ladder
+    assert select_renditions(ladder, 301) == [Rendition(300, 1400)]
+
+
+def test_renditions_prefix():
+    """Test renditions live under a prefix named after the source"""
+    assert renditions_prefix("videos/abc.mp4") == "renditions/abc/"
+
+
+def test_build_ffmpeg_command():
+    """Test one ffmpeg run produces every rendition with aligned keyframes"""
+    renditions = [Rendition(720, 2800), Rendition(360, 800)]
+    command = build_ffmpeg_command("in.mp4", "out", renditions, has_audio=True, segment_seconds=4)
+
+    assert command[command.index("-filter_complex") + 1] == (
+        "[0:v]split=2[v0][v1];[v0]scale=-2:720[v0out];[v1]scale=-2:360[v1out]"
+    )
+    assert command[command.index("-b:v:1") + 1] == "800k"
+    assert command.count("0:a:0") == 2
+    assert command[command.index("-var_stream_map") + 1] == "v:0,a:0,name:720p v:1,a:1,name:360p"
+    assert command[command.index("-hls_time") + 1] == "4"
+    assert command[-1] == os.path.join("out", "%v", "index.m3u8")
+
+    silent = build_ffmpeg_command("in.mp4", "out", renditions, has_audio=False)
+    assert "0:a:0" not in silent
+    assert silent[silent.index("-var_stream_map") + 1] == "v:0,name:720p v:1,name:360p"
+
+
+def fake_ffmpeg(command, **kwargs):
+    """Stand-in for ffprobe/ffmpeg that writes the files ffmpeg would"""
+    if "-show_streams" in command:
+        streams = [{"codec_type": "video", "height": 720}, {"codec_type": "audio"}]
+        return subprocess.CompletedProcess(command, 0, stdout=json.dumps({"streams": streams}).encode())
+    output_dir = os.path.dirname(os.path.dirname(command[-1]))
+    for name in ("720p", "480p"):
+        for filename in ("index.m3u8", "seg_00000.ts", "seg_00001.ts"):
+            with open(os.path.join(output_dir, name, filename), "w") as output:
+                output.write(filename)
+    with open(os.path.join(output_dir, "master.m3u8"), "w") as output:
+        output.write("#EXTM3U")
+    return subprocess.CompletedProcess(command, 0, stdout=b"", stderr=b"")
+
+
+def test_transcode_video_uploads_renditions(monkeypatch):
+    """Test segments are uploaded before playlists, and the master playlist last"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "TRANSCODE_LADDER", "1080:5000,720:2800,480:1400")
+    s3_client = MagicMock()
+    s3_client.download_file.side_effect = lambda key, path: open(path, "wb").close()
+
+    with patch("app.core.transcoding.subprocess.run", side_effect=fake_ffmpeg):
+        playlist_key = transcode_video(s3_client, "videos/abc.mp4")
+
+    assert playlist_key == "renditions/abc/master.m3u8"
+    uploads = [(call.args[1], call.args[2]) for call in s3_client.upload_file.call_args_list]
+    assert len(uploads) == 7
+    assert uploads[-1] == ("renditions/abc/master.m3u8", "application/vnd.apple.mpegurl")
+    assert all(content_type == "video/mp2t" for _, content_type in uploads[:4])
+    assert ("renditions/abc/480p/seg_00001.ts", "video/mp2t") in uploads
+
+
+def test_transcode_video_reports_ffmpeg_errors():
+    """Test a failing ffmpeg run surfaces its stderr"""
+    def failing_ffmpeg(command, **kwargs):
+        if "-show_streams" in command:
+            return fake_ffmpeg(command, **kwargs)
+        return subprocess.CompletedProcess(command, 1, stdout=b"", stderr=b"Invalid data found")
+
+    with patch("app.core.transcoding.subprocess.run", side_effect=failing_ffmpeg):
+        with pytest.raises(RuntimeError, match="Invalid data found"):
+            transcode_video(MagicMock(), "videos/abc.mp4")
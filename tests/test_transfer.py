@@ -0,0 +1,98 @@
+"""
+Tests for multipart transfer tuning and upload progress tracking
+"""
+from app.core.metrics import UPLOADS_IN_FLIGHT
+from app.core.transfer import MB, MAX_PARTS, ProgressTracker, build_transfer_config, select_part_size
+
+
+def test_select_part_size_uses_configured_size_for_small_files():
+    """Test the configured part size is kept when it fits S3's part limit"""
+    assert select_part_size(100 * MB, part_size=16 * MB) == 16 * MB
+    assert select_part_size(None, part_size=16 * MB) == 16 * MB
+
+
+def test_select_part_size_grows_for_large_files():
+    """Test very large files get bigger parts so they stay under 10,000 parts"""
+    file_size = 500 * 1024 * MB
+    part_size = select_part_size(file_size, part_size=16 * MB)
+
+    assert part_size % MB == 0
+    assert file_size / part_size <= MAX_PARTS
+
+
+def test_select_part_size_respects_s3_minimum():
+    """Test parts are never smaller than S3's 5 MB minimum"""
+    assert select_part_size(10 * MB, part_size=1 * MB) == 5 * MB
+
+
+def test_build_transfer_config_uses_settings():
+    """Test the transfer config is driven by settings"""
+    config = build_transfer_config(file_size=200 * 1024 * MB)
+
+    assert config.multipart_threshold == 16 * MB
+    assert config.max_request_concurrency == 10
+    assert config.multipart_chunksize > 16 * MB
+
+
+def test_progress_tracker_records_callbacks():
+    """Test progress callbacks accumulate transferred bytes"""
+    tracker = ProgressTracker()
+    callback = tracker.start("upload-1", total_bytes=200)
+    callback(50)
+    callback(50)
+
+    progress = tracker.get("upload-1")
+    assert progress.bytes_transferred == 100
+    assert progress.percent == 50.0
+    assert progress.status == "uploading"
+
+    tracker.finish("upload-1")
+    assert tracker.get("upload-1").status == "completed"
+
+
+def test_progress_tracker_is_bounded():
+    """Test old uploads are dropped once the tracker is full"""
+    tracker = ProgressTracker(max_entries=2)
+    for upload_id in ("a", "b", "c"):
+        tracker.start(upload_id)
+
+    assert tracker.get("a") is None
+    assert tracker.get("c") is not None
+
+
+def test_progress_tracker_evicts_finished_uploads_first():
+    """Test eviction keeps in-flight uploads and the gauge balanced"""
+    in_flight = UPLOADS_IN_FLIGHT.labels().value
+    tracker = ProgressTracker(max_entries=2)
+    tracker.start("a")
+    tracker.start("b")
+    tracker.finish("b")
+    tracker.start("c")
+
+    assert tracker.get("a") is not None
+    assert tracker.get("b") is None
+
+    # With nothing finished, the oldest in-flight upload goes and stops counting
+    tracker.start("d")
+    assert tracker.get("a") is None
+    assert UPLOADS_IN_FLIGHT.labels().value == in_flight + 2
+    tracker.finish("a")
+    tracker.finish("c")
+    tracker.finish("d")
+    assert UPLOADS_IN_FLIGHT.labels().value == in_flight
+
+
+def test_progress_tracker_reused_id():
+    """Test a replaced upload cannot finish the one reusing its ID"""
+    in_flight = UPLOADS_IN_FLIGHT.labels().value
+    tracker = ProgressTracker()
+    first = tracker.start("upload-1")
+    second = tracker.start("upload-1")
+
+    tracker.finish("upload-1", succeeded=False, callback=first)
+    assert tracker.get("upload-1").status == "uploading"
+    assert UPLOADS_IN_FLIGHT.labels().value == in_flight + 1
+
+    tracker.finish("upload-1", callback=second)
+    assert tracker.get("upload-1").status == "completed"
+    assert UPLOADS_IN_FLIGHT.labels().value == in_flight
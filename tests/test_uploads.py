@@ -0,0 +1,250 @@
+"""
+Tests for direct-to-S3 and resumable multipart upload endpoints
+"""
+import asyncio
+import os
+from unittest.mock import MagicMock, patch
+
+from app.core.aws import S3Client
+from app.core.cache import ObjectInfo
+from app.core.hashing import ChecksumMismatch
+
+API = "/api/v1/videos/uploads"
+KEY = "videos/0b7c5f3e-6a7e-4c1e-9d7e-3f1a2b3c4d5e.mp4"
+
+
+def test_create_upload(client, mock_s3_client):
+    """Test starting an upload returns the key and part layout"""
+    with patch.object(S3Client, "create_multipart_upload", return_value="upload-1") as mock_create:
+        response = client.post(API, json={
+            "filename": "clip.mp4",
+            "content_type": "video/mp4",
+            "size": 100 * 1024 * 1024,
+            "title": "Direct",
+        })
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["upload_id"] == "upload-1"
+    assert body["key"] == f"videos/{body['video_id']}.mp4"
+    assert body["part_count"] * body["part_size"] >= 100 * 1024 * 1024
+    assert mock_create.call_args.args[1]["title"] == "Direct"
+
+
+def test_create_upload_rejects_non_video(client, mock_s3_client):
+    """Test only videos may be uploaded"""
+    response = client.post(API, json={"filename": "notes.txt", "content_type": "text/plain"})
+
+    assert response.status_code == 400
+
+
+def test_get_part_urls(client, mock_s3_client):
+    """Test presigned URLs are returned for each requested part"""
+    urls = {1: "https://s3.example.com/part-1", 2: "https://s3.example.com/part-2"}
+    with patch.object(S3Client, "generate_presigned_part_urls", return_value=urls) as mock_sign:
+        response = client.post(f"{API}/upload-1/parts", json={"key": KEY, "part_numbers": [1, 2]})
+
+    assert response.status_code == 200
+    assert response.json()["parts"] == [
+        {"part_number": 1, "url": "https://s3.example.com/part-1"},
+        {"part_number": 2, "url": "https://s3.example.com/part-2"},
+    ]
+    mock_sign.assert_called_once_with(KEY, "upload-1", [1, 2])
+
+
+def test_get_part_urls_rejects_foreign_keys(client, mock_s3_client):
+    """Test keys outside the video key scheme are never signed"""
+    with patch.object(S3Client, "generate_presigned_part_urls") as mock_sign:
+        response = client.post(f"{API}/upload-1/parts", json={"key": "private/secret.mp4", "part_numbers": [1]})
+
+    assert response.status_code == 400
+    mock_sign.assert_not_called()
+
+
+def test_complete_upload(client, mock_s3_client):
+    """Test completing an upload assembles parts in order"""
+    with patch.object(S3Client, "complete_multipart_upload",
+                      return_value=f"https://test-cdn.example.com/{KEY}") as mock_complete, \
+            patch.object(S3Client, "head_video",
+                         return_value=ObjectInfo(exists=True, metadata={"title": "Direct"})):
+        response = client.post(f"{API}/upload-1/complete", json={
+            "key": KEY,
+            "parts": [{"part_number": 2, "etag": '"b"'}, {"part_number": 1, "etag": '"a"'}],
+        })
+
+    assert response.status_code == 200
+    assert response.json()["id"] == "0b7c5f3e-6a7e-4c1e-9d7e-3f1a2b3c4d5e"
+    assert response.json()["title"] == "Direct"
+    mock_complete.assert_called_once_with(KEY, "upload-1", [
+        {"PartNumber": 1, "ETag": '"a"'},
+        {"PartNumber": 2, "ETag": '"b"'},
+    ])
+
+
+def test_complete_upload_checksum_mismatch(client, mock_s3_client):
+    """Test an assembled object that fails verification is reported as 502, not blamed on the client"""
+    with patch.object(S3Client, "complete_multipart_upload", side_effect=ChecksumMismatch("mismatch")):
+        response = client.post(f"{API}/upload-1/complete", json={
+            "key": KEY,
+            "parts": [{"part_number": 1, "etag": '"a"'}],
+        })
+
+    assert response.status_code == 502
+
+
+def test_abort_unknown_upload(client, mock_s3_client):
+    """Test aborting an unknown upload returns 404"""
+    with patch.object(S3Client, "abort_multipart_upload", side_effect=ValueError("Upload x does not exist")):
+        response = client.delete(f"{API}/x", params={"key": KEY})
+
+    assert response.status_code == 404
+
+
+class FakeMultipartStore:
+    """Stands in for S3's side of a multipart upload"""
+
+    def __init__(self):
+        self.parts = {}
+        self.sent_parts = []
+        self.completed = None
+
+    def upload_part(self, file_name, upload_id, part_number, body, checksum=None):
+        self.sent_parts.append(part_number)
+        self.parts[part_number] = bytes(body)
+        return f'"etag-{part_number}"'
+
+    def list_parts(self, file_name, upload_id):
+        return {n: (f'"etag-{n}"', len(body)) for n, body in self.parts.items()}
+
+    def complete_multipart_upload(self, file_name, upload_id, parts):
+        self.completed = parts
+        return f"https://test-cdn.example.com/{file_name}"
+
+
+def send_then_disconnect(app, path, headers, body, chunk_size):
+    """Drive a PATCH at the ASGI level, dropping the connection after `body`"""
+    messages = [
+        {"type": "http.request", "body": body[i:i + chunk_size], "more_body": True}
+        for i in range(0, len(body), chunk_size)
+    ] + [{"type": "http.disconnect"}]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "PATCH",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+        "app": app,
+    }
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    asyncio.run(app(scope, receive, send))
+
+
+def test_resume_interrupted_upload(client, mock_s3_client):
+    """Test a killed upload resumes from the last stored part without re-sending it"""
+    from app.core.uploads import UploadSession
+
+    part_size = 64 * 1024
+    data = os.urandom(part_size * 4 + 1000)
+    s3 = FakeMultipartStore()
+    client.app.state.upload_sessions.create(UploadSession(
+        upload_id="resumable-1", video_id="0b7c5f3e-6a7e-4c1e-9d7e-3f1a2b3c4d5e",
+        key=KEY, part_size=part_size, total_size=len(data),
+    ))
+
+    with patch.object(S3Client, "upload_part", side_effect=s3.upload_part), \
+            patch.object(S3Client, "list_parts", side_effect=s3.list_parts), \
+            patch.object(S3Client, "complete_multipart_upload", side_effect=s3.complete_multipart_upload):
+        # The connection dies two and a half parts in
+        send_then_disconnect(
+            client.app, f"{API}/resumable-1",
+            {"Upload-Offset": "0", "Content-Type": "application/offset+octet-stream"},
+            data[:part_size * 2 + part_size // 2], chunk_size=16 * 1024,
+        )
+
+        response = client.head(f"{API}/resumable-1")
+        offset = int(response.headers["Upload-Offset"])
+        assert offset == part_size * 2
+        assert response.headers["Upload-Length"] == str(len(data))
+
+        # Resuming from the wrong offset is refused
+        response = client.patch(f"{API}/resumable-1", content=data, headers={"Upload-Offset": "0"})
+        assert response.status_code == 409
+        assert response.headers["Upload-Offset"] == str(offset)
+
+        response = client.patch(
+            f"{API}/resumable-1", content=data[offset:], headers={"Upload-Offset": str(offset)}
+        )
+        assert response.status_code == 204
+        assert response.headers["Upload-Offset"] == str(len(data))
+
+    assert s3.sent_parts == [1, 2, 3, 4, 5]
+    assert b"".join(s3.parts[n] for n in sorted(s3.parts)) == data
+    assert [p["PartNumber"] for p in s3.completed] == [1, 2, 3, 4, 5]
+    assert client.get(f"{API}/resumable-1").json()["status"] == "completed"
+
+
+def test_upload_keeps_declared_content_type(client, mock_s3_client):
+    """Test a WebM upload is stored and indexed as WebM, not the MP4 default"""
+    boto = MagicMock()
+    boto.create_multipart_upload.return_value = {"UploadId": "webm-1"}
+    s3 = FakeMultipartStore()
+    data = os.urandom(1000)
+
+    with patch.object(client.app.state.clients.s3_client, "s3_client", boto), \
+            patch.object(S3Client, "upload_part", side_effect=s3.upload_part), \
+            patch.object(S3Client, "complete_multipart_upload", side_effect=s3.complete_multipart_upload):
+        body = client.post(API, json={"filename": "clip.webm", "content_type": "video/webm", "size": len(data)}).json()
+        response = client.patch(f"{API}/{body['upload_id']}", content=data, headers={"Upload-Offset": "0"})
+
+    assert response.status_code == 204
+    assert boto.create_multipart_upload.call_args.kwargs["ContentType"] == "video/webm"
+    assert client.app.state.upload_sessions.get("webm-1").content_type == "video/webm"
+    assert client.app.state.video_repository.get(body["video_id"]).content_type == "video/webm"
+
+
+def test_retry_indexes_completed_upload(client, mock_s3_client):
+    """Test a resumable upload stored but not indexed is indexed by a retried PATCH"""
+    from app.core.uploads import UploadSession
+
+    data = os.urandom(1000)
+    s3 = FakeMultipartStore()
+    video_id = "0b7c5f3e-6a7e-4c1e-9d7e-3f1a2b3c4d5e"
+    client.app.state.upload_sessions.create(UploadSession(
+        upload_id="resumable-2", video_id=video_id, key=KEY, part_size=64 * 1024, total_size=len(data),
+    ))
+
+    with patch.object(S3Client, "upload_part", side_effect=s3.upload_part), \
+            patch.object(S3Client, "complete_multipart_upload", side_effect=s3.complete_multipart_upload):
+        with patch("app.api.endpoints.uploads.index_video", side_effect=RuntimeError("database is locked")):
+            response = client.patch(f"{API}/resumable-2", content=data, headers={"Upload-Offset": "0"})
+        assert response.status_code == 500
+        assert client.app.state.video_repository.get(video_id) is None
+
+        response = client.patch(f"{API}/resumable-2", content=data, headers={"Upload-Offset": "0"})
+
+    assert response.status_code == 204
+    assert response.headers["Upload-Offset"] == str(len(data))
+    assert client.app.state.video_repository.get(video_id) is not None
+    assert len(s3.completed) == 1
+
+
+def test_create_upload_rejects_empty_file(client, mock_s3_client):
+    """Test an upload declared as empty is refused before S3 is involved"""
+    with patch.object(S3Client, "create_multipart_upload") as mock_create:
+        response = client.post(API, json={"filename": "clip.mp4", "content_type": "video/mp4", "size": 0})
+
+    assert response.status_code == 422
+    mock_create.assert_not_called()
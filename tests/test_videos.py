@@ -2,9 +2,16 @@
 Tests for video endpoints
 """
 import io
+import os
 import pytest
 from unittest.mock import patch, MagicMock
 
+from app.core.aws import S3Client
+from app.core.hashing import ChecksumMismatch
+from app.core.metadata import VideoRecord
+from app.core.metrics import UPLOADS_IN_FLIGHT
+from tests.media import build_mp4
+
 
 def test_upload_video(client, mock_s3_client):
     """Test uploading a video"""
@@ -29,6 +36,227 @@ def test_upload_video(client, mock_s3_client):
     mock_s3_client["upload_video"].assert_called_once()
 
 
+def test_upload_probes_media(client, mock_s3_client):
+    """Test container details are read at upload and set the stored Content-Type"""
+    data = build_mp4(media_size=64 * 1024, brand=b"qt  ", duration=4.0, width=640, height=480)
+    
+    response = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("clip", io.BytesIO(data), "video/mp4")},
+    )
+    
+    assert response.status_code == 201
+    assert response.json()["filename"].endswith(".mov")
+    assert mock_s3_client["upload_video"].call_args.kwargs["content_type"] == "video/quicktime"
+    
+    info = client.get(f"/api/v1/videos/{response.json()['id']}/info").json()
+    assert info["content_type"] == "video/quicktime"
+    assert info["container"] == "mov"
+    assert info["duration"] == 4.0
+    assert (info["width"], info["height"]) == (640, 480)
+    assert (info["video_codec"], info["audio_codec"]) == ("h264", "aac")
+
+
+def test_upload_relocates_moov(client, mock_s3_client):
+    """Test an MP4 with a trailing moov box is stored in faststart layout"""
+    uploaded = {}
+    
+    def fake_upload(file_obj, file_name, **kwargs):
+        uploaded[file_name] = file_obj.read()
+        return f"https://test-cdn.example.com/{file_name}"
+    mock_s3_client["upload_video"].side_effect = fake_upload
+    
+    response = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("clip.mp4", io.BytesIO(build_mp4(media_size=32 * 1024)), "video/mp4")},
+    )
+    assert response.status_code == 201
+    assert uploaded[response.json()["filename"]] == build_mp4(media_size=32 * 1024, faststart=True)
+    
+    response = client.post(
+        "/api/v1/videos/upload?faststart=false",
+        files={"file": ("clip.mp4", io.BytesIO(build_mp4(media_size=32 * 1024)), "video/mp4")},
+    )
+    assert uploaded[response.json()["filename"]] == build_mp4(media_size=32 * 1024)
+
+
+def test_upload_progress(client, mock_s3_client):
+    """Test polling the progress of an upload by its upload ID"""
+    def fake_upload(file_obj, file_name, metadata=None, file_size=None, progress_callback=None, content_type=None):
+        progress_callback(file_size)
+        return f"https://test-cdn.example.com/{file_name}"
+    mock_s3_client["upload_video"].side_effect = fake_upload
+    
+    response = client.post(
+        "/api/v1/videos/upload?upload_id=my-upload",
+        files={"file": ("test_video.mp4", io.BytesIO(b"test video content"), "video/mp4")},
+    )
+    assert response.status_code == 201
+    
+    response = client.get("/api/v1/videos/upload/my-upload/progress")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["bytes_transferred"] == len(b"test video content")
+    assert response.json()["percent"] == 100.0
+    
+    assert client.get("/api/v1/videos/upload/unknown/progress").status_code == 404
+
+
+def test_upload_failing_faststart_is_not_left_in_flight(client, mock_s3_client):
+    """Test an upload whose moov relocation fails is marked failed and leaves the gauge"""
+    in_flight = UPLOADS_IN_FLIGHT.labels().value
+    with patch("app.api.endpoints.videos.faststart", side_effect=OSError("read error")):
+        response = client.post(
+            "/api/v1/videos/upload?upload_id=faststart-fails",
+            files={"file": ("clip.mp4", io.BytesIO(build_mp4(media_size=32 * 1024)), "video/mp4")},
+        )
+    
+    assert response.status_code == 500
+    assert client.get("/api/v1/videos/upload/faststart-fails/progress").json()["status"] == "failed"
+    assert UPLOADS_IN_FLIGHT.labels().value == in_flight
+    mock_s3_client["upload_video"].assert_not_called()
+
+
+def test_upload_failing_before_transfer_is_not_left_in_flight(client, mock_s3_client, monkeypatch):
+    """Test an upload whose dedup check fails is marked failed and leaves the gauge"""
+    from app.core.config import settings
+    
+    monkeypatch.setattr(settings, "UPLOAD_DEDUP_ENABLED", True)
+    in_flight = UPLOADS_IN_FLIGHT.labels().value
+    with patch("app.api.endpoints.videos.file_sha256", side_effect=OSError("read error")):
+        response = client.post(
+            "/api/v1/videos/upload?upload_id=hash-fails",
+            files={"file": ("test_video.mp4", io.BytesIO(b"test video content"), "video/mp4")},
+        )
+    
+    assert response.status_code == 500
+    assert client.get("/api/v1/videos/upload/hash-fails/progress").json()["status"] == "failed"
+    assert UPLOADS_IN_FLIGHT.labels().value == in_flight
+    mock_s3_client["upload_video"].assert_not_called()
+
+
+def test_upload_index_failure_removes_object(client, mock_s3_client):
+    """Test a stored upload that cannot be indexed is deleted rather than orphaned"""
+    with patch.object(S3Client, "delete_video") as mock_delete, \
+            patch("app.api.endpoints.videos.index_video", side_effect=RuntimeError("database is locked")):
+        response = client.post(
+            "/api/v1/videos/upload",
+            files={"file": ("clip.mp4", io.BytesIO(b"test video content"), "video/mp4")},
+        )
+    
+    assert response.status_code == 500
+    mock_delete.assert_called_once_with(mock_s3_client["upload_video"].call_args.kwargs["file_name"])
+
+
+def test_upload_succeeds_when_scheduling_fails(client, mock_s3_client, monkeypatch):
+    """Test a job queue error does not fail an upload that is stored and indexed"""
+    from app.core.config import settings
+    
+    monkeypatch.setattr(settings, "TRANSCODE_ENABLED", True)
+    with patch.object(client.app.state.jobs, "enqueue", side_effect=RuntimeError("queue unavailable")):
+        response = client.post(
+            "/api/v1/videos/upload",
+            files={"file": ("clip.mp4", io.BytesIO(b"test video content"), "video/mp4")},
+        )
+    
+    assert response.status_code == 201
+    assert response.json()["transcode_job_id"] is None
+    assert client.app.state.video_repository.get(response.json()["id"]) is not None
+
+
+def test_upload_video_stream_does_not_touch_disk(client, mock_s3_client):
+    """Test a streamed upload larger than the memory budget goes straight to S3"""
+    part_size = 64 * 1024
+    payload = os.urandom(1024 * 1024)
+    
+    with patch.object(S3Client, "create_multipart_upload", return_value="upload-1"), \
+            patch.object(S3Client, "upload_part", return_value='"etag"') as mock_upload_part, \
+            patch.object(S3Client, "complete_multipart_upload",
+                         return_value="https://test-cdn.example.com/videos/test-id.webm") as mock_complete, \
+            patch("app.api.endpoints.videos.select_part_size", return_value=part_size), \
+            patch("starlette.formparsers.SpooledTemporaryFile", side_effect=AssertionError("spooled to disk")), \
+            patch("tempfile.TemporaryFile", side_effect=AssertionError("spooled to disk")):
+        response = client.post(
+            "/api/v1/videos/upload/stream?title=Streamed",
+            files={"file": ("clip.webm", payload, "video/webm")},
+        )
+    
+    assert response.status_code == 201
+    assert response.json()["filename"].endswith(".webm")
+    assert response.json()["title"] == "Streamed"
+    sent = b"".join(call.args[3] for call in mock_upload_part.call_args_list)
+    assert sent == payload
+    assert mock_upload_part.call_count == len(payload) // part_size
+    mock_complete.assert_called_once()
+
+
+def test_upload_video_stream_index_failure_removes_object(client, mock_s3_client):
+    """Test a completed upload that cannot be indexed is deleted, not aborted"""
+    payload = os.urandom(256 * 1024)
+    
+    with patch.object(S3Client, "create_multipart_upload", return_value="upload-1"), \
+            patch.object(S3Client, "upload_part", return_value='"etag"'), \
+            patch.object(S3Client, "complete_multipart_upload",
+                         return_value="https://test-cdn.example.com/videos/test-id.mp4"), \
+            patch.object(S3Client, "abort_multipart_upload") as mock_abort, \
+            patch.object(S3Client, "delete_video") as mock_delete, \
+            patch("app.api.endpoints.videos.select_part_size", return_value=64 * 1024), \
+            patch("app.api.endpoints.videos.index_video", side_effect=RuntimeError("database is locked")):
+        response = client.post(
+            "/api/v1/videos/upload/stream?filename=clip.mp4",
+            content=payload,
+            headers={"Content-Type": "video/mp4"},
+        )
+    
+    assert response.status_code == 500
+    mock_abort.assert_not_called()
+    mock_delete.assert_called_once()
+    assert mock_delete.call_args.args[0].endswith(".mp4")
+
+
+def test_upload_video_stream_checksum_mismatch(client, mock_s3_client):
+    """Test a stored object that fails verification is a 502 and is not aborted afterwards"""
+    with patch.object(S3Client, "create_multipart_upload", return_value="upload-1"), \
+            patch.object(S3Client, "upload_part", return_value='"etag"'), \
+            patch.object(S3Client, "complete_multipart_upload",
+                         side_effect=ChecksumMismatch("Checksum mismatch for videos/test-id.mp4")), \
+            patch.object(S3Client, "abort_multipart_upload") as mock_abort, \
+            patch("app.api.endpoints.videos.select_part_size", return_value=64 * 1024):
+        response = client.post(
+            "/api/v1/videos/upload/stream?filename=clip.mp4&upload_id=corrupted",
+            content=os.urandom(256 * 1024),
+            headers={"Content-Type": "video/mp4"},
+        )
+    
+    assert response.status_code == 502
+    mock_abort.assert_not_called()
+    assert client.get("/api/v1/videos/upload/corrupted/progress").json()["status"] == "failed"
+
+
+def test_upload_video_checksum_mismatch(client, mock_s3_client):
+    """Test a multipart form upload S3 rejects as corrupted is a 502"""
+    mock_s3_client["upload_video"].side_effect = ChecksumMismatch("S3 rejected videos/test-id.mp4")
+    
+    response = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("test.mp4", io.BytesIO(b"test video content"), "video/mp4")},
+    )
+    
+    assert response.status_code == 502
+
+
+def test_upload_video_stream_rejects_non_video(client, mock_s3_client):
+    """Test streamed uploads must be videos"""
+    response = client.post(
+        "/api/v1/videos/upload/stream",
+        content=b"test text content",
+        headers={"Content-Type": "text/plain"},
+    )
+    
+    assert response.status_code == 400
+    mock_s3_client["upload_video"].assert_not_called()
+
+
 def test_upload_non_video_file(client, mock_s3_client):
     """Test uploading a non-video file"""
     # Create a test file
@@ -66,10 +294,17 @@ def test_get_video(client, mock_s3_client):
 
 
 def test_get_video_info(client, mock_s3_client):
-    """Test getting video info"""
-    # Set up the mock
+    """Test getting video info from the metadata store"""
+    # Seed the metadata store
     video_id = "test-id"
-    mock_s3_client["get_video_url"].return_value = f"https://test-cdn.example.com/videos/{video_id}.mp4"
+    client.app.state.video_repository.add(VideoRecord(
+        id=video_id,
+        key=f"videos/{video_id}.webm",
+        title="Test Video",
+        size=1024,
+        content_type="video/webm",
+        extension="webm"
+    ))
     
     # Send test request
     response = client.get(f"/api/v1/videos/{video_id}/info")
@@ -77,9 +312,424 @@ def test_get_video_info(client, mock_s3_client):
     # Assert response
     assert response.status_code == 200
     assert response.json()["id"] == video_id
-    assert "url" in response.json()
-    assert "title" in response.json()
-    assert "description" in response.json()
+    assert response.json()["title"] == "Test Video"
+    assert response.json()["size"] == 1024
+    assert response.json()["extension"] == "webm"
+    assert response.json()["url"].endswith(f"videos/{video_id}.webm")
     
-    # Assert get_video_url was called
-    mock_s3_client["get_video_url"].assert_called_once()
+    # Assert S3 was not called
+    mock_s3_client["get_video_url"].assert_not_called()
+    mock_s3_client["head_video"].assert_not_called()
+
+
+def test_get_video_info_not_found(client, mock_s3_client):
+    """Test getting info for a video that is neither indexed nor in S3"""
+    from app.core.cache import ObjectInfo
+    
+    mock_s3_client["head_video"].return_value = ObjectInfo(exists=False)
+    response = client.get("/api/v1/videos/missing-id/info")
+    
+    assert response.status_code == 404
+    mock_s3_client["get_video_url"].assert_not_called()
+
+
+def test_get_video_info_legacy(client, mock_s3_client):
+    """Test videos uploaded before the index existed are described from S3"""
+    from app.core.cache import ObjectInfo
+    
+    mock_s3_client["head_video"].return_value = ObjectInfo(
+        exists=True, metadata={"title": "Legacy"}, content_length=42
+    )
+    response = client.get("/api/v1/videos/legacy/info")
+    
+    assert response.status_code == 200
+    assert response.json()["title"] == "Legacy"
+    assert response.json()["size"] == 42
+    mock_s3_client["head_video"].assert_called_once_with("videos/legacy.mp4")
+
+
+def test_upload_indexes_video(client, mock_s3_client):
+    """Test that uploaded videos are served from the metadata store"""
+    response = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("clip.webm", b"test video content", "video/webm")},
+        data={"title": "Indexed", "description": "From the index"}
+    )
+    assert response.status_code == 201
+    video_id = response.json()["id"]
+    
+    response = client.get(f"/api/v1/videos/{video_id}/info")
+    assert response.status_code == 200
+    info = response.json()
+    assert info["title"] == "Indexed"
+    assert info["description"] == "From the index"
+    assert info["original_filename"] == "clip.webm"
+    assert info["extension"] == "webm"
+    assert info["etag"] == '"test-etag"'
+    assert info["size"] == 18
+    
+    # The redirect uses the stored key, so the real extension is kept
+    response = client.get(f"/api/v1/videos/{video_id}", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"].endswith(f"videos/{video_id}.webm")
+    mock_s3_client["get_video_url"].assert_not_called()
+
+
+def test_list_videos(client, mock_s3_client):
+    """Test paging through the video listing"""
+    client.app.state.video_repository.add_many(
+        VideoRecord(id=f"video-{i}", key=f"videos/video-{i}.mp4", title=f"Video {i}", size=i, created_at=1000.0 + i)
+        for i in range(5)
+    )
+    
+    response = client.get("/api/v1/videos", params={"limit": 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert [item["id"] for item in page["items"]] == ["video-4", "video-3"]
+    
+    ids = [item["id"] for item in page["items"]]
+    while page["next_cursor"]:
+        page = client.get("/api/v1/videos", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+        ids += [item["id"] for item in page["items"]]
+    assert ids == ["video-4", "video-3", "video-2", "video-1", "video-0"]
+    
+    response = client.get("/api/v1/videos", params={"sort": "size", "order": "asc", "title": "Video 3"})
+    assert [item["id"] for item in response.json()["items"]] == ["video-3"]
+    mock_s3_client["get_video_url"].assert_not_called()
+
+
+def test_list_videos_rejects_bad_cursor(client, mock_s3_client):
+    """Test that malformed or mismatched cursors are rejected"""
+    response = client.get("/api/v1/videos", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    
+    client.app.state.video_repository.add_many(
+        VideoRecord(id=f"video-{i}", key=f"videos/video-{i}.mp4", title="Video", size=i) for i in range(3)
+    )
+    cursor = client.get("/api/v1/videos", params={"limit": 1}).json()["next_cursor"]
+    response = client.get("/api/v1/videos", params={"sort": "size", "cursor": cursor})
+    assert response.status_code == 400
+    
+    response = client.get("/api/v1/videos", params={"sort": "title"})
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def proxy_video(client, mock_s3_client, monkeypatch):
+    """Serve a known video in proxy mode"""
+    from app.core.cache import ObjectInfo
+    from app.core.config import settings
+    
+    data = bytes(range(256)) * 40
+    monkeypatch.setattr(settings, "VIDEO_DELIVERY_MODE", "proxy")
+    mock_s3_client["head_video"].return_value = ObjectInfo(
+        exists=True,
+        etag='"proxy-etag"',
+        content_length=len(data),
+        content_type="video/mp4",
+        last_modified="Wed, 21 Oct 2015 07:28:00 GMT"
+    )
+    
+    def get_object(file_name, byte_range=None, if_match=None):
+        start, end = byte_range if byte_range else (0, len(data) - 1)
+        return {"Body": io.BytesIO(data[start:end + 1])}
+    
+    with patch.object(S3Client, "get_object", side_effect=get_object) as mock_get:
+        yield data, mock_get
+
+
+def test_proxy_full_video(client, proxy_video):
+    """Test proxy mode streams the whole object when no Range is sent"""
+    data, mock_get = proxy_video
+    response = client.get("/api/v1/videos/test-id")
+    
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"] == '"proxy-etag"'
+    mock_get.assert_called_once_with("videos/test-id.mp4", None, '"proxy-etag"')
+
+
+def test_proxy_single_range(client, proxy_video):
+    """Test a single range returns 206 with Content-Range"""
+    data, mock_get = proxy_video
+    response = client.get("/api/v1/videos/test-id", headers={"Range": "bytes=100-199"})
+    
+    assert response.status_code == 206
+    assert response.content == data[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(data)}"
+    assert response.headers["content-length"] == "100"
+    mock_get.assert_called_once_with("videos/test-id.mp4", (100, 199), '"proxy-etag"')
+
+
+def test_proxy_multiple_ranges(client, proxy_video):
+    """Test several ranges are returned as multipart/byteranges"""
+    data, _ = proxy_video
+    response = client.get("/api/v1/videos/test-id", headers={"Range": "bytes=0-9,-10"})
+    
+    assert response.status_code == 206
+    assert response.headers["content-type"].startswith("multipart/byteranges; boundary=")
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert f"Content-Range: bytes 0-9/{len(data)}".encode() in response.content
+    assert f"Content-Range: bytes {len(data) - 10}-{len(data) - 1}/{len(data)}".encode() in response.content
+    assert data[-10:] in response.content
+
+
+def test_proxy_if_range(client, proxy_video):
+    """Test a stale If-Range validator gets the full object instead of a range"""
+    data, _ = proxy_video
+    
+    response = client.get("/api/v1/videos/test-id", headers={"Range": "bytes=0-9", "If-Range": '"proxy-etag"'})
+    assert response.status_code == 206
+    
+    response = client.get("/api/v1/videos/test-id", headers={"Range": "bytes=0-9", "If-Range": '"old-etag"'})
+    assert response.status_code == 200
+    assert response.content == data
+
+
+def test_proxy_unsatisfiable_range(client, proxy_video):
+    """Test ranges past the end of the object get a 416"""
+    data, mock_get = proxy_video
+    response = client.get("/api/v1/videos/test-id", headers={"Range": f"bytes={len(data)}-"})
+    
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(data)}"
+    mock_get.assert_not_called()
+
+
+def test_proxy_head(client, proxy_video):
+    """Test HEAD reports the size without reading the object"""
+    data, mock_get = proxy_video
+    response = client.head("/api/v1/videos/test-id")
+    
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(data))
+    mock_get.assert_not_called()
+
+
+@pytest.fixture
+def signing_client(client, monkeypatch):
+    """Enable CloudFront signing on the running app"""
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from app.core.signing import CloudFrontSigner
+    
+    s3_client = client.app.state.clients.s3_client
+    monkeypatch.setattr(s3_client, "cloudfront_domain", "cdn.example.com")
+    monkeypatch.setattr(
+        s3_client, "signer",
+        CloudFrontSigner("KTESTKEYPAIR", rsa.generate_private_key(public_exponent=65537, key_size=2048))
+    )
+    for i in range(3):
+        client.app.state.video_repository.add(
+            VideoRecord(id=f"video-{i}", key=f"videos/video-{i}.mp4", title=f"Video {i}")
+        )
+    return client
+
+
+def test_sign_video_urls(signing_client):
+    """Test a batch of video URLs is signed in one call"""
+    response = signing_client.post(
+        "/api/v1/videos/sign",
+        json={"video_ids": ["video-0", "missing", "video-2"], "expires_in": 600}
+    )
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["urls"]] == ["video-0", "video-2"]
+    assert body["missing"] == ["missing"]
+    for item in body["urls"]:
+        assert item["url"].startswith(f"https://cdn.example.com/videos/{item['id']}.mp4?Expires={body['expires_at']}&Signature=")
+        assert item["url"].endswith("&Key-Pair-Id=KTESTKEYPAIR")
+
+
+def test_issue_signed_cookies(signing_client):
+    """Test signed cookies are set for a video"""
+    response = signing_client.post("/api/v1/videos/video-1/cookies")
+    
+    assert response.status_code == 200
+    assert response.json()["resource"] == "https://cdn.example.com/*/video-1*"
+    assert {"CloudFront-Policy", "CloudFront-Signature", "CloudFront-Key-Pair-Id"} <= set(response.cookies.keys())
+
+
+def test_sign_video_urls_not_configured(client):
+    """Test signing endpoints report when no key pair is configured"""
+    response = client.post("/api/v1/videos/sign", json={"video_ids": ["video-0"]})
+    assert response.status_code == 501
+
+
+def test_batch_video_info(client, mock_s3_client):
+    """Test batch lookups use the index and fall back to S3 for unindexed videos"""
+    from app.core.cache import ObjectInfo
+    
+    client.app.state.video_repository.add(VideoRecord(id="indexed", key="videos/indexed.webm", title="Indexed"))
+    
+    def head_video(file_name):
+        if file_name == "videos/legacy.mp4":
+            return ObjectInfo(exists=True, metadata={"title": "Legacy"}, content_length=42)
+        return ObjectInfo(exists=False)
+    
+    mock_s3_client["head_video"].side_effect = head_video
+    response = client.post("/api/v1/videos/batch/info", json={"video_ids": ["indexed", "legacy", "missing"]})
+    
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(item["id"], item["status"]) for item in results] == [
+        ("indexed", "ok"), ("legacy", "ok"), ("missing", "not_found")
+    ]
+    assert results[0]["video"]["title"] == "Indexed"
+    assert results[1]["video"]["title"] == "Legacy"
+    assert results[1]["video"]["size"] == 42
+    # The indexed video needs no S3 call
+    assert mock_s3_client["head_video"].call_count == 2
+
+
+def test_batch_video_info_limit(client, mock_s3_client):
+    """Test oversized batches are rejected"""
+    response = client.post("/api/v1/videos/batch/info", json={"video_ids": [str(i) for i in range(1001)]})
+    assert response.status_code == 422
+
+
+def test_batch_delete_videos(client, mock_s3_client):
+    """Test batch deletes report per-item results and clean up the index"""
+    from app.core.cache import ObjectInfo
+    
+    repository = client.app.state.video_repository
+    for video_id in ("a", "b"):
+        repository.add(VideoRecord(id=video_id, key=f"videos/{video_id}.mov", title=video_id))
+    
+    def head_video(file_name):
+        return ObjectInfo(exists=file_name == "videos/legacy.mp4")
+    
+    mock_s3_client["head_video"].side_effect = head_video
+    with patch.object(S3Client, "delete_videos", return_value={"videos/b.mov": "AccessDenied: Access Denied"}) as mock_delete:
+        response = client.post("/api/v1/videos/batch/delete", json={"video_ids": ["a", "b", "legacy", "missing"]})
+    
+    assert response.status_code == 200
+    body = response.json()
+    assert [(item["id"], item["status"]) for item in body["results"]] == [
+        ("a", "deleted"), ("b", "error"), ("legacy", "deleted"), ("missing", "not_found")
+    ]
+    assert body["deleted"] == 2
+    assert body["failed"] == 1
+    mock_delete.assert_called_once_with(["videos/a.mov", "videos/b.mov", "videos/legacy.mp4"])
+    assert repository.get("a") is None
+    assert repository.get("b") is not None
+
+
+def test_delete_video(client, mock_s3_client):
+    """Test deleting a single video"""
+    from app.core.cache import ObjectInfo
+    
+    client.app.state.video_repository.add(VideoRecord(id="a", key="videos/a.mp4", title="a"))
+    with patch.object(S3Client, "delete_videos", return_value={}):
+        response = client.delete("/api/v1/videos/a")
+    assert response.status_code == 204
+    assert client.app.state.video_repository.get("a") is None
+    
+    mock_s3_client["head_video"].return_value = ObjectInfo(exists=False)
+    response = client.delete("/api/v1/videos/a")
+    assert response.status_code == 404
+
+
+def test_dedup_upload_shares_object(client, mock_s3_client, monkeypatch):
+    """Test identical uploads share one object, which is deleted with its last reference"""
+    from app.core.config import settings
+    
+    monkeypatch.setattr(settings, "UPLOAD_DEDUP_ENABLED", True)
+    first = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("a.mp4", b"same video content", "video/mp4")}
+    ).json()
+    second = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("b.mp4", b"same video content", "video/mp4")}
+    ).json()
+    streamed = client.post(
+        "/api/v1/videos/upload/stream?filename=c.mp4",
+        content=b"same video content",
+        headers={"Content-Type": "video/mp4"}
+    ).json()
+    
+    assert not first["deduplicated"]
+    assert second["deduplicated"] and streamed["deduplicated"]
+    assert second["filename"] == streamed["filename"] == first["filename"]
+    mock_s3_client["upload_video"].assert_called_once()
+    
+    with patch.object(S3Client, "delete_videos", return_value={}) as mock_delete:
+        client.delete(f"/api/v1/videos/{first['id']}")
+        client.post("/api/v1/videos/batch/delete", json={"video_ids": [second["id"]]})
+        mock_delete.assert_not_called()
+        
+        client.delete(f"/api/v1/videos/{streamed['id']}")
+        mock_delete.assert_called_once_with([first["filename"]])
+
+
+def test_upload_queues_transcode(client, mock_s3_client, monkeypatch):
+    """Test uploads queue a transcode job whose status is exposed by the API"""
+    from app.core.config import settings
+    from app.core.jobs import JobWorker
+    from app.worker import register_handlers
+    
+    monkeypatch.setattr(settings, "TRANSCODE_ENABLED", True)
+    body = client.post(
+        "/api/v1/videos/upload",
+        files={"file": ("a.mp4", b"video content", "video/mp4")}
+    ).json()
+    job_id = body["transcode_job_id"]
+    assert client.get(f"/api/v1/jobs/{job_id}").json()["status"] == "queued"
+    
+    # Run the job as the background worker would
+    worker = JobWorker(client.app.state.jobs)
+    register_handlers(worker, MagicMock(), client.app.state.video_repository)
+    with patch("app.core.transcoding.transcode_video", return_value="renditions/x/master.m3u8"):
+        assert worker.run_once().id == job_id
+    
+    job = client.get(f"/api/v1/jobs/{job_id}").json()
+    assert job["status"] == "succeeded"
+    assert job["video_id"] == body["id"]
+    assert job["result"] == "renditions/x/master.m3u8"
+    assert job["attempts"] == 1
+    jobs = client.get(f"/api/v1/videos/{body['id']}/jobs").json()["items"]
+    assert [item["id"] for item in jobs] == [job_id]
+    assert client.get("/api/v1/jobs?status=succeeded").json()["items"][0]["id"] == job_id
+    assert client.get("/api/v1/jobs/missing").status_code == 404
+    assert client.post(f"/api/v1/jobs/{job_id}/retry").status_code == 409
+    
+    info = client.get(f"/api/v1/videos/{body['id']}/info").json()
+    assert info["playlist_url"].endswith("renditions/x/master.m3u8")
+
+
+def test_get_video_redirects_to_playlist(client, mock_s3_client):
+    """Test transcoded videos redirect to their HLS master playlist"""
+    client.app.state.video_repository.add(VideoRecord(
+        id="hls", key="videos/hls.mp4", title="HLS", playlist_key="renditions/hls/master.m3u8"
+    ))
+    response = client.get("/api/v1/videos/hls", follow_redirects=False)
+    
+    assert response.status_code == 307
+    assert response.headers["location"].endswith("/renditions/hls/master.m3u8")
+    
+    with patch.object(S3Client, "delete_videos", return_value={}), \
+            patch.object(S3Client, "delete_prefix", return_value={}) as mock_delete_prefix:
+        assert client.delete("/api/v1/videos/hls").status_code == 204
+    mock_delete_prefix.assert_called_once_with("renditions/hls/")
+
+
+def test_get_thumbnail(client, mock_s3_client):
+    """Test thumbnails redirect with long cache headers, and 404 until extracted"""
+    repository = client.app.state.video_repository
+    repository.add(VideoRecord(id="thumbs", key="videos/thumbs.mp4", title="Thumbs"))
+    assert client.get("/api/v1/videos/thumbs/thumbnail").status_code == 404
+    
+    repository.set_thumbnails("videos/thumbs.mp4", "videos/thumbs.poster.jpg", "videos/thumbs.thumbnails.vtt")
+    response = client.get("/api/v1/videos/thumbs/thumbnail", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"].endswith("/videos/thumbs.poster.jpg")
+    assert response.headers["cache-control"] == "public, max-age=31536000"
+    
+    response = client.get("/api/v1/videos/thumbs/thumbnail?variant=sprite&sheet=2", follow_redirects=False)
+    assert response.headers["location"].endswith("/videos/thumbs.sprite_002.jpg")
+    
+    info = client.get("/api/v1/videos/thumbs/info").json()
+    assert info["poster_url"].endswith("/videos/thumbs.poster.jpg")
+    assert info["thumbnail_track_url"].endswith("/videos/thumbs.thumbnails.vtt")
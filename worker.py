@@ -0,0 +1,14 @@
+"""
+Background job worker for the AWS Video CDN service.
+
+Runs the post-upload jobs (transcoding, thumbnails) queued by the API.
+"""
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+if __name__ == "__main__":
+    from app.worker import main
+
+    main()